@@ -1,25 +1,135 @@
-from typing import List
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
 from abc import ABC, abstractmethod
 
-from domain.stock import CreateStock, Stock
+from domain.stock import CreateStock, ListStockQuery, StockDictPage, StockPage, Quote
 from domain.portfolio import Portfolio
+from domain.enum import StockType
+
+T = TypeVar("T")
 
 
 class AbstractStockRepository(ABC):
     @abstractmethod
-    def create(self, stock: CreateStock) -> str:
+    def create(self, stock: CreateStock, session: Optional[Any] = None) -> str:
         """Create a new stock entry in the repository."""
 
     @abstractmethod
-    def list(self, user_id: int) -> List[Stock]:
-        """List all stock by user id"""
+    def create_many(self, stocks: List[CreateStock], session: Optional[Any] = None) -> List[str]:
+        """Create stock entries in bulk, returning their ids in order"""
+
+    @abstractmethod
+    def list_dicts(self, query: ListStockQuery) -> StockDictPage:
+        """List one page of stock by user id as stored documents, newest first"""
+
+    @abstractmethod
+    def iter_pages(self, query: ListStockQuery) -> Iterator[StockPage]:
+        """Yield every matching stock page by page, newest first"""
+
+    @abstractmethod
+    def watch_user_ids(self, stopped: Callable[[], bool]) -> Iterator[int]:
+        """Yield the user id of every stock entry created from now on, by any process, until `stopped()`"""
 
 
 class AbstractPortfolioRepository(ABC):
     @abstractmethod
-    def update(self, portfolio: Portfolio) -> None:
-        """Update portfolio in the repository"""
+    def update_many(self, portfolios: List[Portfolio], session: Optional[Any] = None) -> List[int]:
+        """Update portfolios in one round trip unless changed since read, returns the user ids of those not updated"""
+
+    @abstractmethod
+    def get(self, user_id: int, session: Optional[Any] = None, secondary_ok: bool = False) -> Portfolio:
+        """Get Portfolio, from a secondary when `secondary_ok` and the repository reads from secondaries"""
+
+    @abstractmethod
+    def get_many(self, user_ids: List[int], secondary_ok: bool = False) -> Dict[int, Portfolio]:
+        """Get the portfolios of several users in one query by user id, users without a portfolio are left out"""
+
+    @abstractmethod
+    def apply_trade(self, stock: CreateStock, session: Optional[Any] = None) -> None:
+        """Apply the cash and holding delta of a trade to the portfolio atomically"""
+
+
+class AbstractPriceProvider(ABC):
+    @abstractmethod
+    def get_price(self, symbol: str, stock_type: StockType) -> Optional[float]:
+        """Get the latest price of a symbol, None if the provider has no quote for it"""
+
+
+class AbstractQuoteRepository(ABC):
+    @abstractmethod
+    def get_many(self, stock_info: List[Tuple[str, StockType]], max_age: float) -> List[Quote]:
+        """Get the quotes fetched less than max_age seconds ago"""
+
+    @abstractmethod
+    def save(self, quote: Quote) -> None:
+        """Save the latest quote of a symbol"""
+
+
+class AbstractTransactionManager(ABC):
+    @abstractmethod
+    def run(self, callback: Callable[[Any], T]) -> T:
+        """Run callback(session) in a single transaction, retrying it on transient transaction errors"""
+
+
+# asyncio counterparts of the ports above, for the grpc.aio server
+
+
+class AbstractAsyncStockRepository(ABC):
+    @abstractmethod
+    async def create(self, stock: CreateStock, session: Optional[Any] = None) -> str:
+        """Create a new stock entry in the repository."""
+
+    @abstractmethod
+    async def create_many(self, stocks: List[CreateStock], session: Optional[Any] = None) -> List[str]:
+        """Create stock entries in bulk, returning their ids in order"""
+
+    @abstractmethod
+    async def list_dicts(self, query: ListStockQuery) -> StockDictPage:
+        """List one page of stock by user id as stored documents, newest first"""
+
+    @abstractmethod
+    def iter_pages(self, query: ListStockQuery) -> AsyncIterator[StockPage]:
+        """Yield every matching stock page by page, newest first"""
+
+    @abstractmethod
+    def watch_user_ids(self) -> AsyncIterator[int]:
+        """Yield the user id of every stock entry created from now on, by any process"""
+
+
+class AbstractAsyncPortfolioRepository(ABC):
+    @abstractmethod
+    async def update_many(self, portfolios: List[Portfolio], session: Optional[Any] = None) -> List[int]:
+        """Update portfolios in one round trip unless changed since read, returns the user ids of those not updated"""
+
+    @abstractmethod
+    async def get(self, user_id: int, session: Optional[Any] = None, secondary_ok: bool = False) -> Portfolio:
+        """Get Portfolio, from a secondary when `secondary_ok` and the repository reads from secondaries"""
+
+    @abstractmethod
+    async def get_many(self, user_ids: List[int], secondary_ok: bool = False) -> Dict[int, Portfolio]:
+        """Get the portfolios of several users in one query by user id, users without a portfolio are left out"""
+
+    @abstractmethod
+    async def apply_trade(self, stock: CreateStock, session: Optional[Any] = None) -> None:
+        """Apply the cash and holding delta of a trade to the portfolio atomically"""
+
+
+class AbstractAsyncPriceProvider(ABC):
+    @abstractmethod
+    async def get_price(self, symbol: str, stock_type: StockType) -> Optional[float]:
+        """Get the latest price of a symbol, None if the provider has no quote for it"""
+
+
+class AbstractAsyncQuoteRepository(ABC):
+    @abstractmethod
+    async def get_many(self, stock_info: List[Tuple[str, StockType]], max_age: float) -> List[Quote]:
+        """Get the quotes fetched less than max_age seconds ago"""
+
+    @abstractmethod
+    async def save(self, quote: Quote) -> None:
+        """Save the latest quote of a symbol"""
+
 
+class AbstractAsyncTransactionManager(ABC):
     @abstractmethod
-    def get(self, user_id: int) -> Portfolio:
-        """Get Portfolio"""
+    async def run(self, callback: Callable[[Any], Awaitable[T]]) -> T:
+        """Run await callback(session) in a single transaction, retrying it on transient transaction errors"""
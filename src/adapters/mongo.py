@@ -0,0 +1,235 @@
+import asyncio
+import importlib.util
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple, TypeVar
+from pymongo import AsyncMongoClient, MongoClient, monitoring
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred, _ServerMode
+from utils.config import MongoConfig
+
+# Python packages pymongo needs for each compressor, zlib ships with Python
+_COMPRESSOR_PACKAGES = {"zstd": "zstandard", "snappy": "snappy"}
+_PREWARM_POLL_SECONDS = 0.05
+_READ_PREFERENCES = {
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+C = TypeVar("C")
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PoolStats:
+    open: int  # connections created and not closed yet, across every server of the deployment
+    in_use: int
+    created: int
+    closed: int
+    checkouts: int
+    checkout_failures: int
+    wait_queue_timeouts: int
+    cleared: int  # times a pool was cleared after a network error or a server marked unknown
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """Counts the connection pool events of a MongoClient, pass it in `event_listeners`."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._created = 0
+        self._closed = 0
+        self._checkouts = 0
+        self._checkins = 0
+        self._checkout_failures = 0
+        self._wait_queue_timeouts = 0
+        self._cleared = 0
+
+    def stats(self) -> PoolStats:
+        with self._lock:
+            return PoolStats(
+                open=self._created - self._closed,
+                in_use=self._checkouts - self._checkins,
+                created=self._created,
+                closed=self._closed,
+                checkouts=self._checkouts,
+                checkout_failures=self._checkout_failures,
+                wait_queue_timeouts=self._wait_queue_timeouts,
+                cleared=self._cleared,
+            )
+
+    def connection_created(self, event: monitoring.ConnectionCreatedEvent) -> None:
+        with self._lock:
+            self._created += 1
+
+    def connection_closed(self, event: monitoring.ConnectionClosedEvent) -> None:
+        with self._lock:
+            self._closed += 1
+
+    def connection_checked_out(self, event: monitoring.ConnectionCheckedOutEvent) -> None:
+        with self._lock:
+            self._checkouts += 1
+
+    def connection_checked_in(self, event: monitoring.ConnectionCheckedInEvent) -> None:
+        with self._lock:
+            self._checkins += 1
+
+    def connection_check_out_failed(self, event: monitoring.ConnectionCheckOutFailedEvent) -> None:
+        with self._lock:
+            self._checkout_failures += 1
+            if event.reason == monitoring.ConnectionCheckOutFailedReason.TIMEOUT:
+                self._wait_queue_timeouts += 1
+
+    def pool_cleared(self, event: monitoring.PoolClearedEvent) -> None:
+        with self._lock:
+            self._cleared += 1
+
+    def connection_check_out_started(self, event: monitoring.ConnectionCheckOutStartedEvent) -> None:
+        pass
+
+    def connection_ready(self, event: monitoring.ConnectionReadyEvent) -> None:
+        pass
+
+    def pool_created(self, event: monitoring.PoolCreatedEvent) -> None:
+        pass
+
+    def pool_ready(self, event: monitoring.PoolReadyEvent) -> None:
+        pass
+
+    def pool_closed(self, event: monitoring.PoolClosedEvent) -> None:
+        pass
+
+
+def available_compressors(compressors: Tuple[str, ...]) -> Tuple[str, ...]:
+    """`compressors` without those whose package is not installed, pymongo would only warn about them."""
+    available = []
+    for compressor in compressors:
+        package = _COMPRESSOR_PACKAGES.get(compressor)
+        if package is not None and importlib.util.find_spec(package) is None:
+            logger.warning("mongo compressor %s needs the %s package, skipping it", compressor, package)
+            continue
+        available.append(compressor)
+
+    return tuple(available)
+
+
+def read_preference(config: MongoConfig) -> _ServerMode:
+    if config.read_preference == "primary":
+        return Primary()
+
+    max_staleness = -1 if config.max_staleness is None else int(config.max_staleness)
+    return _READ_PREFERENCES[config.read_preference](max_staleness=max_staleness)
+
+
+def with_read_preference(collection: C, read_preference: Optional[_ServerMode]) -> C:
+    """`collection` for read-only queries, `collection` itself without a read preference of its own."""
+    if read_preference is None:
+        return collection
+
+    return collection.with_options(read_preference=read_preference)
+
+
+class MongoConnection:
+    """Owns the process's MongoClient, which every repository shares.
+
+    Repositories only borrow `client`, the connection closes it once, on `close()` or leaving its `with` block, so
+    no repository can tear the pool down under the others. The client itself reads from the primary,
+    `read_preference` is for the repositories' read-only queries.
+    """
+
+    def __init__(self, config: MongoConfig):
+        self.config = config
+        self.read_preference = read_preference(config)
+        self.pool_listener = PoolStatsListener()
+        self.client = MongoClient(config.uri, event_listeners=[self.pool_listener], **_client_options(config))
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def prewarm(self) -> bool:
+        """Connects and waits up to `prewarm_timeout` for pymongo to open `min_pool_size` connections.
+
+        Returns whether the pool reached its minimum, a deployment that is slow to answer only delays the start.
+        """
+        self.client.admin.command("ping")
+        deadline = time.monotonic() + self.config.prewarm_timeout
+        while self.pool_stats().open < self.config.min_pool_size:
+            if time.monotonic() >= deadline:
+                logger.warning("mongo pool has %s of %s connections", self.pool_stats().open, self.config.min_pool_size)
+                return False
+            time.sleep(_PREWARM_POLL_SECONDS)
+
+        return True
+
+    def pool_stats(self) -> PoolStats:
+        return self.pool_listener.stats()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+
+        logger.info("closing mongo client, pool stats: %s", self.pool_stats())
+        self.client.close()
+
+    def __enter__(self) -> "MongoConnection":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class AsyncMongoConnection:
+    """`MongoConnection` around pymongo's asyncio client, for the grpc.aio server."""
+
+    def __init__(self, config: MongoConfig):
+        self.config = config
+        self.read_preference = read_preference(config)
+        self.pool_listener = PoolStatsListener()
+        self.client = AsyncMongoClient(config.uri, event_listeners=[self.pool_listener], **_client_options(config))
+        self._closed = False
+
+    async def prewarm(self) -> bool:
+        await self.client.admin.command("ping")
+        deadline = time.monotonic() + self.config.prewarm_timeout
+        while self.pool_stats().open < self.config.min_pool_size:
+            if time.monotonic() >= deadline:
+                logger.warning("mongo pool has %s of %s connections", self.pool_stats().open, self.config.min_pool_size)
+                return False
+            await asyncio.sleep(_PREWARM_POLL_SECONDS)
+
+        return True
+
+    def pool_stats(self) -> PoolStats:
+        return self.pool_listener.stats()
+
+    async def close(self) -> None:
+        # Set before the first await, so concurrent callers on the loop see it
+        if self._closed:
+            return
+        self._closed = True
+
+        logger.info("closing mongo client, pool stats: %s", self.pool_stats())
+        await self.client.close()
+
+    async def __aenter__(self) -> "AsyncMongoConnection":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+
+def _client_options(config: MongoConfig) -> Dict[str, Any]:
+    options = config.client_options()
+    if config.compressors:
+        compressors = available_compressors(config.compressors)
+        if compressors:
+            options["compressors"] = ",".join(compressors)
+        else:
+            del options["compressors"]
+
+    return options
@@ -1,42 +1,359 @@
 from datetime import datetime, timezone
-from pymongo import MongoClient
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from pymongo import ASCENDING, AsyncMongoClient, IndexModel, MongoClient, ReplaceOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from pymongo.asynchronous.client_session import AsyncClientSession
+from pymongo.asynchronous.database import AsyncDatabase
+from pymongo.client_session import ClientSession
 from pymongo.database import Database
-from .base import AbstractPortfolioRepository
+from pymongo.read_preferences import _ServerMode
+from .base import AbstractAsyncPortfolioRepository, AbstractPortfolioRepository
+from .mongo import with_read_preference
 from domain.portfolio import Portfolio, Holding
-from domain.enum import StockType
+from domain.stock import CreateStock
+from domain.enum import ActionType
+
+# A BUY of a new symbol may race with another BUY creating the same holding or portfolio
+APPLY_TRADE_MAX_ATTEMPTS = 3
+
+PORTFOLIO_INDEXES = [IndexModel([("user_id", ASCENDING)], unique=True)]
+DUPLICATE_KEY_ERROR = 11000
+
+# A filter and the update to run with it
+Update = Tuple[Dict[str, Any], Any]
 
 
 class PortfolioRepository(AbstractPortfolioRepository):
-    def __init__(self, mongo_client: MongoClient, database_name: str = "stock_db"):
+    def __init__(
+        self,
+        mongo_client: MongoClient,
+        database_name: str = "stock_db",
+        read_preference: Optional[_ServerMode] = None,
+    ):
         self.client = mongo_client
         self.db: Database = self.client[database_name]
         self.collection = self.db["portfolio"]
+        self.read_collection = with_read_preference(self.collection, read_preference)
 
-    def get(self, user_id: int) -> Portfolio:
-        result = self.collection.find_one({"user_id": user_id})
+    def ensure_indexes(self) -> None:
+        self.collection.create_indexes(PORTFOLIO_INDEXES)
+
+    def get(self, user_id: int, session: Optional[ClientSession] = None, secondary_ok: bool = False) -> Portfolio:
+        # A session's reads follow its transaction, which runs on the primary
+        collection = self.read_collection if secondary_ok and session is None else self.collection
+        result = collection.find_one({"user_id": user_id}, session=session)
         if result is None:
             return None
 
-        return Portfolio(
-            user_id=result["user_id"],
-            cash_balance=result["cash_balance"],
-            total_money_in=result["total_money_in"],
-            holdings=[
-                Holding(
-                    symbol=holding["symbol"],
-                    shares=holding["shares"],
-                    stock_type=StockType(holding["stock_type"]),
-                    total_cost=holding["total_cost"],
-                )
-                for holding in result["holdings"]
-            ],
-            created_at=result["created_at"],
-            updated_at=result["updated_at"],
-        )
-
-    def update(self, portfolio: Portfolio) -> None:
-        portfolio.updated_at = datetime.now(timezone.utc)
-        self.collection.replace_one({"user_id": portfolio.user_id}, portfolio.as_dict(), upsert=True)
-
-    def __del__(self):
-        self.client.close()
+        return Portfolio.from_dict(result)
+
+    def get_many(self, user_ids: List[int], secondary_ok: bool = False) -> Dict[int, Portfolio]:
+        if not user_ids:
+            return {}
+
+        collection = self.read_collection if secondary_ok else self.collection
+        return _to_portfolio_by_user_id(collection.find(_user_ids_criteria(user_ids)))
+
+    def update_many(self, portfolios: List[Portfolio], session: Optional[ClientSession] = None) -> List[int]:
+        """Writes back portfolios read with `get`, unless they changed since.
+
+        A portfolio only replaces the stored one if that still has the `updated_at` and balances it was read with,
+        and a new one only replaces an empty one, so a trade applied meanwhile is never overwritten. Returns the user
+        ids of the portfolios that were not written.
+        """
+        if not portfolios:
+            return []
+
+        try:
+            self.collection.bulk_write(_replace_requests(portfolios), ordered=False, session=session)
+        except BulkWriteError as e:
+            return _conflicting_user_ids(portfolios, e, session)
+
+        return []
+
+    def apply_trade(self, stock: CreateStock, session: Optional[ClientSession] = None) -> None:
+        now = datetime.now(timezone.utc)
+        amount = stock.price * stock.quantity
+
+        if stock.action_type == ActionType.TRANSFER:
+            self._upsert(*_transfer(stock, amount, now), session)
+        elif stock.action_type == ActionType.BUY:
+            self._apply_buy(stock, amount, now, session)
+        else:
+            self._apply_sell(stock, amount, now, session)
+
+    def _apply_buy(self, stock: CreateStock, amount: float, now: datetime, session: Optional[ClientSession]) -> None:
+        for _ in range(APPLY_TRADE_MAX_ATTEMPTS):
+            # Existing holding, the common case
+            result = self.collection.update_one(*_buy_existing_holding(stock, amount, now), session=session)
+            if result.matched_count:
+                return
+
+            # New symbol in an existing portfolio
+            result = self.collection.update_one(*_buy_new_holding(stock, amount, now), session=session)
+            if result.matched_count:
+                return
+
+            # Either the portfolio does not exist yet or another BUY just added the holding, make sure the
+            # portfolio exists and try again
+            self._upsert(*_ensure_portfolio(stock.user_id, now), session)
+
+        raise Exception(f"Failed to apply BUY of {stock.symbol} for user_id={stock.user_id}")
+
+    def _apply_sell(self, stock: CreateStock, amount: float, now: datetime, session: Optional[ClientSession]) -> None:
+        result = self.collection.update_one(*_sell(stock, amount, now), session=session)
+        if not result.matched_count:
+            raise Exception("Can not sell non-exist stock")
+
+    def _upsert(self, criteria: dict, update: dict, session: Optional[ClientSession]) -> None:
+        try:
+            self.collection.update_one(criteria, update, upsert=True, session=session)
+        except DuplicateKeyError:
+            # Another request inserted the portfolio between our match and insert, the unique user_id index
+            # rejected the duplicate so the update now matches the existing document
+            self.collection.update_one(criteria, update, session=session)
+
+
+class AsyncPortfolioRepository(AbstractAsyncPortfolioRepository):
+    """`PortfolioRepository` on pymongo's asyncio client, for the grpc.aio server."""
+
+    def __init__(
+        self,
+        mongo_client: AsyncMongoClient,
+        database_name: str = "stock_db",
+        read_preference: Optional[_ServerMode] = None,
+    ):
+        self.client = mongo_client
+        self.db: AsyncDatabase = self.client[database_name]
+        self.collection = self.db["portfolio"]
+        self.read_collection = with_read_preference(self.collection, read_preference)
+
+    async def ensure_indexes(self) -> None:
+        await self.collection.create_indexes(PORTFOLIO_INDEXES)
+
+    async def get(
+        self, user_id: int, session: Optional[AsyncClientSession] = None, secondary_ok: bool = False
+    ) -> Portfolio:
+        collection = self.read_collection if secondary_ok and session is None else self.collection
+        result = await collection.find_one({"user_id": user_id}, session=session)
+        if result is None:
+            return None
+
+        return Portfolio.from_dict(result)
+
+    async def get_many(self, user_ids: List[int], secondary_ok: bool = False) -> Dict[int, Portfolio]:
+        if not user_ids:
+            return {}
+
+        collection = self.read_collection if secondary_ok else self.collection
+        portfolio_docs = await collection.find(_user_ids_criteria(user_ids)).to_list()
+        return _to_portfolio_by_user_id(portfolio_docs)
+
+    async def update_many(
+        self, portfolios: List[Portfolio], session: Optional[AsyncClientSession] = None
+    ) -> List[int]:
+        if not portfolios:
+            return []
+
+        try:
+            await self.collection.bulk_write(_replace_requests(portfolios), ordered=False, session=session)
+        except BulkWriteError as e:
+            return _conflicting_user_ids(portfolios, e, session)
+
+        return []
+
+    async def apply_trade(self, stock: CreateStock, session: Optional[AsyncClientSession] = None) -> None:
+        now = datetime.now(timezone.utc)
+        amount = stock.price * stock.quantity
+
+        if stock.action_type == ActionType.TRANSFER:
+            await self._upsert(*_transfer(stock, amount, now), session)
+        elif stock.action_type == ActionType.BUY:
+            await self._apply_buy(stock, amount, now, session)
+        else:
+            await self._apply_sell(stock, amount, now, session)
+
+    async def _apply_buy(
+        self, stock: CreateStock, amount: float, now: datetime, session: Optional[AsyncClientSession]
+    ) -> None:
+        for _ in range(APPLY_TRADE_MAX_ATTEMPTS):
+            result = await self.collection.update_one(*_buy_existing_holding(stock, amount, now), session=session)
+            if result.matched_count:
+                return
+
+            result = await self.collection.update_one(*_buy_new_holding(stock, amount, now), session=session)
+            if result.matched_count:
+                return
+
+            await self._upsert(*_ensure_portfolio(stock.user_id, now), session)
+
+        raise Exception(f"Failed to apply BUY of {stock.symbol} for user_id={stock.user_id}")
+
+    async def _apply_sell(
+        self, stock: CreateStock, amount: float, now: datetime, session: Optional[AsyncClientSession]
+    ) -> None:
+        result = await self.collection.update_one(*_sell(stock, amount, now), session=session)
+        if not result.matched_count:
+            raise Exception("Can not sell non-exist stock")
+
+    async def _upsert(self, criteria: dict, update: dict, session: Optional[AsyncClientSession]) -> None:
+        try:
+            await self.collection.update_one(criteria, update, upsert=True, session=session)
+        except DuplicateKeyError:
+            await self.collection.update_one(criteria, update, session=session)
+
+
+def _user_ids_criteria(user_ids: List[int]) -> Dict[str, Any]:
+    return {"user_id": {"$in": list(set(user_ids))}}
+
+
+def _to_portfolio_by_user_id(portfolio_docs: Iterable[Dict[str, Any]]) -> Dict[int, Portfolio]:
+    portfolio_by_user_id = {}
+    for portfolio_doc in portfolio_docs:
+        portfolio = Portfolio.from_dict(portfolio_doc)
+        portfolio_by_user_id[portfolio.user_id] = portfolio
+
+    return portfolio_by_user_id
+
+
+def _replace_requests(portfolios: List[Portfolio]) -> List[ReplaceOne]:
+    now = datetime.now(timezone.utc)
+    requests = []
+    for portfolio in portfolios:
+        # The upsert fails on the unique user_id index, instead of replacing the stored portfolio, when that changed
+        # since it was read
+        criteria = _unchanged_criteria(portfolio)
+        portfolio.updated_at = now
+        requests.append(ReplaceOne(criteria, portfolio.as_dict(), upsert=True))
+
+    return requests
+
+
+def _unchanged_criteria(portfolio: Portfolio) -> Dict[str, Any]:
+    stored = portfolio.stored_state()
+    if stored is None:
+        # Only an empty portfolio, e.g. one a concurrent BUY is still creating, has nothing to lose
+        return {"user_id": portfolio.user_id, "cash_balance": 0.0, "total_money_in": 0.0, "holdings": []}
+
+    # updated_at only has millisecond precision, but every trade also moves the cash balance
+    updated_at, cash_balance, total_money_in = stored
+    return {
+        "user_id": portfolio.user_id,
+        "updated_at": updated_at,
+        "cash_balance": cash_balance,
+        "total_money_in": total_money_in,
+    }
+
+
+def _conflicting_user_ids(portfolios: List[Portfolio], error: BulkWriteError, session: Optional[Any]) -> List[int]:
+    # A transaction is aborted by any write error, the caller cannot go on with it
+    if session is not None:
+        raise error
+
+    user_ids = []
+    for write_error in error.details.get("writeErrors", []):
+        if write_error.get("code") != DUPLICATE_KEY_ERROR:
+            raise error
+        user_ids.append(portfolios[write_error["index"]].user_id)
+
+    return user_ids
+
+
+def _transfer(stock: CreateStock, amount: float, now: datetime) -> Update:
+    return (
+        {"user_id": stock.user_id},
+        {
+            "$inc": {"cash_balance": amount, "total_money_in": amount},
+            "$set": {"updated_at": now},
+            "$setOnInsert": {"holdings": [], "created_at": now},
+        },
+    )
+
+
+def _buy_existing_holding(stock: CreateStock, amount: float, now: datetime) -> Update:
+    return (
+        {"user_id": stock.user_id, "holdings.symbol": stock.symbol},
+        {
+            "$inc": {
+                "cash_balance": -amount,
+                "holdings.$.shares": stock.quantity,
+                "holdings.$.total_cost": amount,
+            },
+            "$set": {"updated_at": now},
+        },
+    )
+
+
+def _buy_new_holding(stock: CreateStock, amount: float, now: datetime) -> Update:
+    # The $ne guard keeps a concurrent BUY from pushing the holding twice
+    holding = Holding(symbol=stock.symbol, shares=stock.quantity, stock_type=stock.stock_type, total_cost=amount)
+    return (
+        {"user_id": stock.user_id, "holdings.symbol": {"$ne": stock.symbol}},
+        {
+            "$inc": {"cash_balance": -amount},
+            "$push": {"holdings": holding.as_dict()},
+            "$set": {"updated_at": now},
+        },
+    )
+
+
+def _ensure_portfolio(user_id: int, now: datetime) -> Update:
+    return (
+        {"user_id": user_id},
+        {
+            "$setOnInsert": {
+                "cash_balance": 0.0,
+                "total_money_in": 0.0,
+                "holdings": [],
+                "created_at": now,
+                "updated_at": now,
+            }
+        },
+    )
+
+
+def _sell(stock: CreateStock, amount: float, now: datetime) -> Update:
+    # The remaining cost depends on the stored shares and total_cost, so it is computed server side with an
+    # update pipeline. Holdings that reach zero shares are dropped in the same update. In a pipeline a string
+    # starting with $ is a field or variable path, so the symbol is compared as a $literal.
+    sold_holding = {
+        "symbol": "$$holding.symbol",
+        "shares": {"$subtract": ["$$holding.shares", stock.quantity]},
+        "stock_type": "$$holding.stock_type",
+        "total_cost": {
+            "$subtract": [
+                "$$holding.total_cost",
+                {"$multiply": [{"$divide": ["$$holding.total_cost", "$$holding.shares"]}, stock.quantity]},
+            ]
+        },
+    }
+    return (
+        {"user_id": stock.user_id, "holdings.symbol": stock.symbol},
+        [
+            {
+                "$set": {
+                    "cash_balance": {"$add": ["$cash_balance", amount]},
+                    "updated_at": now,
+                    "holdings": {
+                        "$filter": {
+                            "input": {
+                                "$map": {
+                                    "input": "$holdings",
+                                    "as": "holding",
+                                    "in": {
+                                        "$cond": [
+                                            {"$eq": ["$$holding.symbol", {"$literal": stock.symbol}]},
+                                            sold_holding,
+                                            "$$holding",
+                                        ]
+                                    },
+                                }
+                            },
+                            "as": "holding",
+                            "cond": {"$gt": ["$$holding.shares", 0]},
+                        }
+                    },
+                }
+            }
+        ],
+    )
@@ -0,0 +1,94 @@
+import asyncio
+import json
+import time
+import zlib
+from concurrent.futures import Executor
+from typing import Dict, Optional
+import yfinance as yf
+from polygon import RESTClient
+from .base import AbstractAsyncPriceProvider, AbstractPriceProvider
+from domain.enum import StockType
+
+ETF_KEY = "navPrice"
+STOCK_KEY = "currentPrice"
+
+
+class YFinancePriceProvider(AbstractPriceProvider):
+    def get_price(self, symbol: str, stock_type: StockType) -> Optional[float]:
+        price_field = STOCK_KEY if stock_type == StockType.STOCKS else ETF_KEY
+        return yf.Ticker(symbol.upper()).info.get(price_field)
+
+
+class PolygonPriceProvider(AbstractPriceProvider):
+    def __init__(self, api_key: str):
+        self.client = RESTClient(api_key=api_key)
+
+    def get_price(self, symbol: str, stock_type: StockType) -> Optional[float]:
+        # Polygon has no NAV for ETFs, both stock types are priced from the previous close
+        result = self.client.get_previous_close_agg(symbol.upper())
+        if isinstance(result, list):
+            result = result[0] if result else None
+        if result is None:
+            return None
+
+        return result.close
+
+
+class InMemoryPriceProvider(AbstractPriceProvider):
+    """Offline provider for tests and benchmarks.
+
+    Symbols missing from `prices` get a deterministic price derived from the symbol, and `latency`
+    simulates the round trip of a remote provider.
+    """
+
+    def __init__(self, prices: Optional[Dict[str, float]] = None, latency: float = 0.0):
+        self.prices = {symbol.upper(): price for symbol, price in (prices or {}).items()}
+        self.latency = latency
+
+    @classmethod
+    def from_file(cls, path: str, latency: float = 0.0) -> "InMemoryPriceProvider":
+        with open(path, encoding="utf-8") as f:
+            return cls(prices=json.load(f), latency=latency)
+
+    def get_price(self, symbol: str, stock_type: StockType) -> Optional[float]:
+        if self.latency:
+            time.sleep(self.latency)
+
+        return self.lookup(symbol)
+
+    def lookup(self, symbol: str) -> float:
+        """The price of `symbol` without the simulated latency."""
+        symbol = symbol.upper()
+        if symbol in self.prices:
+            return self.prices[symbol]
+
+        return float(zlib.crc32(symbol.encode()) % 50000) / 100 + 1.0
+
+
+class ExecutorPriceProvider(AbstractAsyncPriceProvider):
+    """Runs a blocking provider on `executor`, so the event loop keeps serving while a quote is fetched.
+
+    yfinance and the Polygon client only have blocking APIs, the executor also bounds how many upstream calls are
+    in flight at once.
+    """
+
+    def __init__(self, provider: AbstractPriceProvider, executor: Executor):
+        self.provider = provider
+        self.executor = executor
+
+    async def get_price(self, symbol: str, stock_type: StockType) -> Optional[float]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.provider.get_price, symbol, stock_type)
+
+
+class AsyncInMemoryPriceProvider(AbstractAsyncPriceProvider):
+    """`InMemoryPriceProvider` for the async server, its latency is awaited instead of blocking a thread."""
+
+    def __init__(self, provider: InMemoryPriceProvider):
+        self.provider = provider
+
+    async def get_price(self, symbol: str, stock_type: StockType) -> Optional[float]:
+        if self.provider.latency:
+            await asyncio.sleep(self.provider.latency)
+
+        return self.provider.lookup(symbol)
@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from pymongo import ASCENDING, AsyncMongoClient, IndexModel, MongoClient
+from pymongo.asynchronous.database import AsyncDatabase
+from pymongo.database import Database
+from pymongo.read_preferences import _ServerMode
+from .base import AbstractAsyncQuoteRepository, AbstractQuoteRepository
+from .mongo import with_read_preference
+from domain.stock import Quote
+from domain.enum import StockType
+
+QUOTE_SNAPSHOT_RETENTION_SECONDS = 24 * 60 * 60
+
+
+class QuoteRepository(AbstractQuoteRepository):
+    def __init__(
+        self,
+        mongo_client: MongoClient,
+        database_name: str = "stock_db",
+        retention_seconds: int = QUOTE_SNAPSHOT_RETENTION_SECONDS,
+        read_preference: Optional[_ServerMode] = None,
+    ):
+        self.client = mongo_client
+        self.db: Database = self.client[database_name]
+        self.collection = self.db["quotes"]
+        # Snapshots carry their fetch time and get_many filters on it, a lagging secondary only returns fewer
+        self.read_collection = with_read_preference(self.collection, read_preference)
+        self.retention_seconds = retention_seconds
+
+    def ensure_indexes(self) -> None:
+        self.collection.create_indexes(_quote_indexes(self.retention_seconds))
+
+    def get_many(self, stock_info: List[Tuple[str, StockType]], max_age: float) -> List[Quote]:
+        if not stock_info:
+            return []
+
+        wanted = _wanted(stock_info)
+        quote_docs = self.read_collection.find(_recent_quotes_criteria(wanted, max_age), projection={"_id": 0})
+        return _to_quotes(quote_docs, wanted)
+
+    def save(self, quote: Quote) -> None:
+        self.collection.update_one(*_save_update(quote), upsert=True)
+
+
+class AsyncQuoteRepository(AbstractAsyncQuoteRepository):
+    """`QuoteRepository` on pymongo's asyncio client, for the grpc.aio server."""
+
+    def __init__(
+        self,
+        mongo_client: AsyncMongoClient,
+        database_name: str = "stock_db",
+        retention_seconds: int = QUOTE_SNAPSHOT_RETENTION_SECONDS,
+        read_preference: Optional[_ServerMode] = None,
+    ):
+        self.client = mongo_client
+        self.db: AsyncDatabase = self.client[database_name]
+        self.collection = self.db["quotes"]
+        # Snapshots carry their fetch time and get_many filters on it, a lagging secondary only returns fewer
+        self.read_collection = with_read_preference(self.collection, read_preference)
+        self.retention_seconds = retention_seconds
+
+    async def ensure_indexes(self) -> None:
+        await self.collection.create_indexes(_quote_indexes(self.retention_seconds))
+
+    async def get_many(self, stock_info: List[Tuple[str, StockType]], max_age: float) -> List[Quote]:
+        if not stock_info:
+            return []
+
+        wanted = _wanted(stock_info)
+        quote_docs = await self.read_collection.find(
+            _recent_quotes_criteria(wanted, max_age), projection={"_id": 0}
+        ).to_list()
+        return _to_quotes(quote_docs, wanted)
+
+    async def save(self, quote: Quote) -> None:
+        await self.collection.update_one(*_save_update(quote), upsert=True)
+
+
+def _quote_indexes(retention_seconds: int) -> List[IndexModel]:
+    return [
+        IndexModel([("symbol", ASCENDING), ("stock_type", ASCENDING)], unique=True),
+        # Mongo drops snapshots nobody refreshed for retention_seconds
+        IndexModel([("fetched_at", ASCENDING)], expireAfterSeconds=retention_seconds),
+    ]
+
+
+def _wanted(stock_info: List[Tuple[str, StockType]]) -> Set[Tuple[str, str]]:
+    return {(symbol.upper(), stock_type.value) for symbol, stock_type in stock_info}
+
+
+def _recent_quotes_criteria(wanted: Set[Tuple[str, str]], max_age: float) -> Dict[str, Any]:
+    return {
+        "symbol": {"$in": list({symbol for symbol, _ in wanted})},
+        "fetched_at": {"$gte": datetime.now(timezone.utc) - timedelta(seconds=max_age)},
+    }
+
+
+def _to_quotes(quote_docs: Iterable[Dict[str, Any]], wanted: Set[Tuple[str, str]]) -> List[Quote]:
+    return [
+        Quote(
+            symbol=doc["symbol"],
+            stock_type=StockType(doc["stock_type"]),
+            price=doc["price"],
+            # pymongo returns naive datetimes, they are always stored in UTC
+            fetched_at=doc["fetched_at"].replace(tzinfo=timezone.utc),
+        )
+        for doc in quote_docs
+        if (doc["symbol"], doc["stock_type"]) in wanted
+    ]
+
+
+def _save_update(quote: Quote) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    return (
+        {"symbol": quote.symbol.upper(), "stock_type": quote.stock_type.value},
+        {"$set": {"price": quote.price, "fetched_at": quote.fetched_at}},
+    )
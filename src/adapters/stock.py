@@ -1,42 +1,233 @@
-from typing import List
-from pymongo import MongoClient
+import base64
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
+from pymongo import ASCENDING, DESCENDING, AsyncMongoClient, IndexModel, MongoClient
+from pymongo.asynchronous.client_session import AsyncClientSession
+from pymongo.asynchronous.database import AsyncDatabase
+from pymongo.client_session import ClientSession
 from pymongo.database import Database
-from .base import AbstractStockRepository
-from domain.stock import CreateStock, Stock
-from domain.enum import ActionType, StockType
+from pymongo.read_preferences import _ServerMode
+from .base import AbstractAsyncStockRepository, AbstractStockRepository
+from .mongo import with_read_preference
+from domain.stock import CreateStock, ListStockQuery, Stock, StockDict, StockDictPage, StockPage
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Fields of a stored stock that listing returns, _id is always included
+LIST_PROJECTION = {
+    field: 1
+    for field in ("user_id", "symbol", "price", "quantity", "action_type", "stock_type", "created_at", "updated_at")
+}
+
+# Both end with the (created_at, _id) keyset of list, so pages are read off the index without a sort
+STOCK_INDEXES = [
+    IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]),
+    IndexModel([("user_id", ASCENDING), ("symbol", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]),
+]
+LIST_SORT = [("created_at", DESCENDING), ("_id", DESCENDING)]
+# Change stream events carry only what watch_user_ids needs, _id stays as the resume token
+CREATED_USER_IDS_PIPELINE = [{"$match": {"operationType": "insert"}}, {"$project": {"fullDocument.user_id": 1}}]
+WATCH_MAX_AWAIT_SECONDS = 1.0  # how long a change stream poll blocks, and so how long stopping it can take
+
+T = TypeVar("T")
+C = TypeVar("C")
 
 
 class StockRepository(AbstractStockRepository):
-    def __init__(self, mongo_client: MongoClient, database_name: str = "stock_db"):
+    def __init__(
+        self,
+        mongo_client: MongoClient,
+        database_name: str = "stock_db",
+        read_preference: Optional[_ServerMode] = None,
+    ):
         self.client = mongo_client
         self.db: Database = self.client[database_name]
         self.collection = self.db["stocks"]
+        self.read_collection = with_read_preference(self.collection, read_preference)
+
+    def ensure_indexes(self) -> None:
+        self.collection.create_indexes(STOCK_INDEXES)
+
+    def create(self, stock: CreateStock, session: Optional[ClientSession] = None) -> str:
+        result = self.collection.insert_one(_to_document(stock), session=session)
+        return str(result.inserted_id)
+
+    def create_many(self, stocks: List[CreateStock], session: Optional[ClientSession] = None) -> List[str]:
+        if not stocks:
+            return []
+
+        result = self.collection.insert_many([_to_document(stock) for stock in stocks], session=session)
+        return [str(inserted_id) for inserted_id in result.inserted_ids]
+
+    def list_dicts(self, query: ListStockQuery) -> StockDictPage:
+        stock_docs = list(_limit(self._find(query, projection=LIST_PROJECTION), query.page_size))
+        stocks, next_cursor = _to_page(stock_docs, query.page_size, _to_stock_dict)
+        return StockDictPage(stocks=stocks, next_cursor=next_cursor)
+
+    def iter_pages(self, query: ListStockQuery) -> Iterator[StockPage]:
+        # A single cursor fetched lazily in batches of page_size, only one page is held in memory at a time
+        stock_docs = self._find(query).batch_size(query.page_size + 1)
+        try:
+            page_docs: List[Dict[str, Any]] = []
+            for doc in stock_docs:
+                if len(page_docs) == query.page_size:
+                    yield StockPage(
+                        stocks=[_to_stock(d) for d in page_docs],
+                        next_cursor=_encode_cursor(page_docs[-1]["created_at"], page_docs[-1]["_id"]),
+                    )
+                    page_docs = []
+                page_docs.append(doc)
+
+            if page_docs:
+                yield StockPage(stocks=[_to_stock(d) for d in page_docs])
+        finally:
+            stock_docs.close()
+
+    def watch_user_ids(self, stopped: Callable[[], bool]) -> Iterator[int]:
+        # Change streams need a replica set or sharded cluster
+        with self.collection.watch(
+            CREATED_USER_IDS_PIPELINE, max_await_time_ms=int(WATCH_MAX_AWAIT_SECONDS * 1000)
+        ) as changes:
+            while not stopped():
+                change = changes.try_next()
+                if change is not None:
+                    yield change["fullDocument"]["user_id"]
+
+    def _find(self, query: ListStockQuery, projection: Optional[Dict[str, Any]] = None):
+        return self.read_collection.find(_list_criteria(query), projection=projection).sort(LIST_SORT)
+
+
+class AsyncStockRepository(AbstractAsyncStockRepository):
+    """`StockRepository` on pymongo's asyncio client, for the grpc.aio server."""
+
+    def __init__(
+        self,
+        mongo_client: AsyncMongoClient,
+        database_name: str = "stock_db",
+        read_preference: Optional[_ServerMode] = None,
+    ):
+        self.client = mongo_client
+        self.db: AsyncDatabase = self.client[database_name]
+        self.collection = self.db["stocks"]
+        self.read_collection = with_read_preference(self.collection, read_preference)
+
+    async def ensure_indexes(self) -> None:
+        await self.collection.create_indexes(STOCK_INDEXES)
 
-    def create(self, stock: CreateStock) -> str:
-        stock_dict = stock.as_dict()
-        stock_dict["updated_at"] = stock_dict["created_at"]
-        result = self.collection.insert_one(stock_dict)
+    async def create(self, stock: CreateStock, session: Optional[AsyncClientSession] = None) -> str:
+        result = await self.collection.insert_one(_to_document(stock), session=session)
         return str(result.inserted_id)
 
-    def list(self, user_id: int) -> List[Stock]:
-        stock_docs = self.collection.find({"user_id": user_id})
-
-        stocks = [
-            Stock(
-                id=str(doc["_id"]),
-                user_id=doc["user_id"],
-                symbol=doc["symbol"],
-                price=doc["price"],
-                quantity=doc["quantity"],
-                action_type=ActionType(doc["action_type"]),
-                stock_type=StockType(doc["stock_type"]),
-                created_at=doc["created_at"],
-                updated_at=doc["updated_at"],
-            )
-            for doc in stock_docs
+    async def create_many(self, stocks: List[CreateStock], session: Optional[AsyncClientSession] = None) -> List[str]:
+        if not stocks:
+            return []
+
+        result = await self.collection.insert_many([_to_document(stock) for stock in stocks], session=session)
+        return [str(inserted_id) for inserted_id in result.inserted_ids]
+
+    async def list_dicts(self, query: ListStockQuery) -> StockDictPage:
+        stock_docs = await _limit(self._find(query, projection=LIST_PROJECTION), query.page_size).to_list()
+        stocks, next_cursor = _to_page(stock_docs, query.page_size, _to_stock_dict)
+        return StockDictPage(stocks=stocks, next_cursor=next_cursor)
+
+    async def iter_pages(self, query: ListStockQuery) -> AsyncIterator[StockPage]:
+        stock_docs = self._find(query).batch_size(query.page_size + 1)
+        try:
+            page_docs: List[Dict[str, Any]] = []
+            async for doc in stock_docs:
+                if len(page_docs) == query.page_size:
+                    yield StockPage(
+                        stocks=[_to_stock(d) for d in page_docs],
+                        next_cursor=_encode_cursor(page_docs[-1]["created_at"], page_docs[-1]["_id"]),
+                    )
+                    page_docs = []
+                page_docs.append(doc)
+
+            if page_docs:
+                yield StockPage(stocks=[_to_stock(d) for d in page_docs])
+        finally:
+            await stock_docs.close()
+
+    async def watch_user_ids(self) -> AsyncIterator[int]:
+        async with await self.collection.watch(CREATED_USER_IDS_PIPELINE) as changes:
+            async for change in changes:
+                yield change["fullDocument"]["user_id"]
+
+    def _find(self, query: ListStockQuery, projection: Optional[Dict[str, Any]] = None):
+        return self.read_collection.find(_list_criteria(query), projection=projection).sort(LIST_SORT)
+
+
+def _to_document(stock: CreateStock) -> Dict[str, Any]:
+    stock_dict = stock.as_dict()
+    stock_dict["updated_at"] = stock_dict["created_at"]
+    return stock_dict
+
+
+def _list_criteria(query: ListStockQuery) -> Dict[str, Any]:
+    criteria: Dict[str, Any] = {"user_id": query.user_id}
+    if query.symbol:
+        criteria["symbol"] = query.symbol
+    if query.action_type:
+        criteria["action_type"] = query.action_type.value
+    if query.start_date or query.end_date:
+        criteria["created_at"] = {}
+        if query.start_date:
+            criteria["created_at"]["$gte"] = query.start_date
+        if query.end_date:
+            criteria["created_at"]["$lt"] = query.end_date
+    if query.cursor:
+        # Keyset pagination: resume strictly after the last entry of the previous page
+        created_at, stock_id = _decode_cursor(query.cursor)
+        criteria["$or"] = [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": stock_id}},
         ]
 
-        return stocks
+    return criteria
+
+
+def _limit(cursor: C, page_size: Optional[int]) -> C:
+    # One extra document tells whether there is a next page, without a page_size every document is read
+    return cursor if page_size is None else cursor.limit(page_size + 1)
+
+
+def _to_page(
+    stock_docs: List[Dict[str, Any]], page_size: Optional[int], convert: Callable[[Dict[str, Any]], T]
+) -> Tuple[List[T], Optional[str]]:
+    # stock_docs holds up to page_size + 1 documents, the extra one only tells whether there is a next page
+    if page_size is None:
+        return [convert(doc) for doc in stock_docs], None
+
+    has_next = len(stock_docs) > page_size
+    stock_docs = stock_docs[:page_size]
+
+    next_cursor = _encode_cursor(stock_docs[-1]["created_at"], stock_docs[-1]["_id"]) if has_next else None
+    return [convert(doc) for doc in stock_docs], next_cursor
+
+
+def _to_stock(doc: Dict[str, Any]) -> Stock:
+    return Stock.from_dict({**doc, "id": str(doc["_id"])})
+
+
+def _to_stock_dict(doc: Dict[str, Any]) -> StockDict:
+    # The stored values were validated by CreateStock on the way in, only the id needs converting
+    doc["id"] = str(doc.pop("_id"))
+    return doc
+
+
+def _encode_cursor(created_at: datetime, stock_id: ObjectId) -> str:
+    # Mongo stores datetimes with millisecond precision, the cursor keeps exactly that
+    created_at_ms = (created_at.replace(tzinfo=timezone.utc) - _EPOCH) // timedelta(milliseconds=1)
+    payload = json.dumps([created_at_ms, str(stock_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
 
-    def __del__(self):
-        self.client.close()
+def _decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    try:
+        created_at_ms, stock_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return _EPOCH + timedelta(milliseconds=int(created_at_ms)), ObjectId(stock_id)
+    except (ValueError, TypeError, InvalidId) as e:
+        raise ValueError("Invalid cursor") from e
@@ -0,0 +1,41 @@
+from typing import Any, Awaitable, Callable, TypeVar
+from pymongo import AsyncMongoClient, MongoClient, ReadPreference
+from pymongo.read_concern import ReadConcern
+from pymongo.write_concern import WriteConcern
+from .base import AbstractAsyncTransactionManager, AbstractTransactionManager
+
+T = TypeVar("T")
+
+
+class MongoTransactionManager(AbstractTransactionManager):
+    """Runs callbacks in a multi-document transaction, which needs a replica set or sharded cluster."""
+
+    def __init__(self, mongo_client: MongoClient):
+        self.client = mongo_client
+
+    def run(self, callback: Callable[[Any], T]) -> T:
+        with self.client.start_session() as session:
+            # with_transaction retries the whole callback on TransientTransactionError and the commit on
+            # UnknownTransactionCommitResult until its 120 second budget runs out
+            return session.with_transaction(
+                callback,
+                read_concern=ReadConcern("snapshot"),
+                write_concern=WriteConcern("majority"),
+                read_preference=ReadPreference.PRIMARY,
+            )
+
+
+class AsyncMongoTransactionManager(AbstractAsyncTransactionManager):
+    """`MongoTransactionManager` on pymongo's asyncio client, for the grpc.aio server."""
+
+    def __init__(self, mongo_client: AsyncMongoClient):
+        self.client = mongo_client
+
+    async def run(self, callback: Callable[[Any], Awaitable[T]]) -> T:
+        async with self.client.start_session() as session:
+            return await session.with_transaction(
+                callback,
+                read_concern=ReadConcern("snapshot"),
+                write_concern=WriteConcern("majority"),
+                read_preference=ReadPreference.PRIMARY,
+            )
@@ -1,8 +1,10 @@
-from dataclasses import dataclass, asdict
-from datetime import datetime
-from typing import List, TypedDict
-from .enum import StockType
-from utils.utils import custom_dict_factory
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple, TypedDict
+from .enum import ActionType, StockType
+from .stock import CreateStock, CreateBatchError, StockInfo
+from utils.codec import compile_decoder, compile_encoder
+from utils.slots import slotted
 
 
 class HoldingDict(TypedDict):
@@ -21,6 +23,7 @@ class PortfolioDict(TypedDict):
     updated_at: datetime
 
 
+@slotted
 @dataclass
 class Holding:
     symbol: str
@@ -37,11 +40,21 @@ class Holding:
             raise ValueError("total_cost cannot be negative")
 
     def as_dict(self) -> HoldingDict:
-        return asdict(self, dict_factory=custom_dict_factory)
+        return _encode_holding(self)
 
+    @classmethod
+    def from_dict(cls, data: HoldingDict) -> "Holding":
+        return _decode_holding(data)
 
+
+@slotted(extra_slots=("_by_symbol", "_stored"))
 @dataclass
 class Portfolio:
+    """A user's cash and holdings.
+
+    `holdings` is indexed by symbol, so it must only be changed through `apply_trade` once the portfolio is built.
+    """
+
     user_id: int
     cash_balance: float
     total_money_in: float
@@ -53,13 +66,131 @@ class Portfolio:
         if self.total_money_in < 0:
             raise ValueError("total_money_in cannot be negative")
 
+        # The holdings keyed by symbol, in the order of `holdings`. The first one wins if a symbol is stored twice
+        self._by_symbol: Dict[str, Holding] = {}
+        for holding in self.holdings:
+            self._by_symbol.setdefault(holding.symbol, holding)
+
+        # updated_at, cash_balance and total_money_in as stored, for repositories to detect changes made since
+        self._stored: Optional[Tuple[datetime, float, float]] = None
+
+    @classmethod
+    def empty(cls, user_id: int) -> "Portfolio":
+        created_at = datetime.now(timezone.utc)
+        return cls(
+            user_id=user_id,
+            cash_balance=0.0,
+            total_money_in=0.0,
+            holdings=[],
+            created_at=created_at,
+            updated_at=created_at,
+        )
+
+    def apply_trade(self, stock: CreateStock) -> None:
+        symbol = stock.symbol
+        price = stock.price
+        quantity = stock.quantity
+        action_type = stock.action_type
+
+        if action_type == ActionType.TRANSFER:
+            self.cash_balance += price * quantity
+            self.total_money_in += price * quantity
+        elif action_type == ActionType.BUY:
+            self.cash_balance -= price * quantity
+
+            holding = self.get_holding(symbol)
+            if not holding:
+                holding = Holding(symbol=symbol, shares=0, stock_type=stock.stock_type, total_cost=0.0)
+                self._by_symbol[symbol] = holding
+                self.holdings.append(holding)
+
+            holding.shares += quantity
+            holding.total_cost += price * quantity
+        else:
+            holding = self.get_holding(symbol)
+            if holding is None:
+                raise ValueError("Can not sell non-exist stock")
+
+            self.cash_balance += price * quantity
+            holding.shares -= quantity
+            if holding.shares > 0:
+                # Adjust total_cost proportionally (using average cost)
+                avg_cost = holding.total_cost / (holding.shares + quantity)
+                holding.total_cost -= avg_cost * quantity
+            else:
+                holding.total_cost = 0.0
+                self._remove_holding(symbol)
+
+    def get_holding(self, symbol: str) -> Optional[Holding]:
+        return self._by_symbol.get(symbol)
+
+    def _remove_holding(self, symbol: str) -> None:
+        # The dict keeps the order holdings are stored and returned in, `holdings` is refilled from it in one C-level
+        # copy rather than by shifting positions in Python
+        del self._by_symbol[symbol]
+        self.holdings[:] = self._by_symbol.values()
+
     def as_dict(self) -> PortfolioDict:
-        return asdict(self, dict_factory=custom_dict_factory)
+        return _encode_portfolio(self)
+
+    def stored_state(self) -> Optional[Tuple[datetime, float, float]]:
+        """`updated_at`, `cash_balance` and `total_money_in` as read from the repository, None if never stored."""
+        return self._stored
 
+    @classmethod
+    def from_dict(cls, data: PortfolioDict) -> "Portfolio":
+        portfolio = _decode_portfolio(data)
+        portfolio._stored = (portfolio.updated_at, portfolio.cash_balance, portfolio.total_money_in)
+        return portfolio
 
+
+# Generated once at import time, see utils.codec
+_encode_holding = compile_encoder(Holding)
+_decode_holding = compile_decoder(Holding)
+_encode_portfolio = compile_encoder(Portfolio)
+_decode_portfolio = compile_decoder(Portfolio)
+
+
+def apply_trades(
+    portfolios: Dict[int, Portfolio], stocks: List[CreateStock]
+) -> Tuple[List[Tuple[int, CreateStock]], List[CreateBatchError]]:
+    """Applies `stocks` in order to the portfolios of their users, stocks of users not in `portfolios` are skipped.
+
+    Returns the accepted trades with their index, a trade the portfolio rejects (e.g. selling a stock it does not
+    hold) is reported at its index instead.
+    """
+    accepted: List[Tuple[int, CreateStock]] = []
+    errors: List[CreateBatchError] = []
+    for index, stock in enumerate(stocks):
+        if stock.user_id not in portfolios:
+            continue
+
+        try:
+            portfolios[stock.user_id].apply_trade(stock)
+        except ValueError as e:
+            errors.append(CreateBatchError(index=index, message=str(e)))
+            continue
+
+        accepted.append((index, stock))
+
+    return accepted, errors
+
+
+@slotted
 @dataclass
 class PortfolioInfo:
     user_id: int
     total_portfolio_value: float
     total_gain: float
     roi: float
+    missing_symbols: List[str] = field(default_factory=list)
+    stale_symbols: List[str] = field(default_factory=list)
+
+
+@slotted
+@dataclass
+class PortfolioSummary:
+    """Totals and per-holding breakdown of one valuation, `stock_info` is keyed by stock type and "CASH"."""
+
+    info: PortfolioInfo
+    stock_info: Dict[str, List[StockInfo]]
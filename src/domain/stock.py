@@ -1,9 +1,13 @@
-from dataclasses import asdict, dataclass
-from typing import TypedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, TypedDict
 from datetime import datetime
-from utils.utils import custom_dict_factory
+from utils.codec import compile_decoder, compile_encoder
+from utils.slots import slotted
 from .enum import ActionType, StockType
 
+LIST_PAGE_SIZE_DEFAULT = 100
+LIST_PAGE_SIZE_MAX = 1000
+
 
 class CreateStockDict(TypedDict):
     user_id: int
@@ -27,6 +31,7 @@ class StockDict(TypedDict):
     updated_at: datetime
 
 
+@slotted
 @dataclass
 class StockInfo:
     symbol: str
@@ -34,8 +39,42 @@ class StockInfo:
     price: float
     avg_cost: float
     percentage: float
+    stale: bool = False
+    missing: bool = False
 
 
+@slotted
+@dataclass
+class StockPrices:
+    prices: Dict[str, float]
+    missing_symbols: List[str] = field(default_factory=list)  # no quote at all, priced at 0.0
+    stale_symbols: List[str] = field(default_factory=list)  # priced from an expired cached quote
+
+
+@slotted
+@dataclass
+class Quote:
+    symbol: str
+    stock_type: StockType
+    price: float
+    fetched_at: datetime
+
+
+@slotted
+@dataclass
+class CreateBatchError:
+    index: int
+    message: str
+
+
+@slotted
+@dataclass
+class CreateBatchResult:
+    ids: List[str]  # ids[i] is empty when stocks[i] was rejected
+    errors: List[CreateBatchError]
+
+
+@slotted
 @dataclass
 class CreateStock:
     user_id: int
@@ -57,9 +96,10 @@ class CreateStock:
             raise ValueError("quantity must be greater than 0")
 
     def as_dict(self) -> CreateStockDict:
-        return asdict(self, dict_factory=custom_dict_factory)
+        return _encode_create_stock(self)
 
 
+@slotted
 @dataclass
 class Stock:
     id: str
@@ -85,4 +125,48 @@ class Stock:
             raise ValueError("quantity must be positive")
 
     def as_dict(self) -> StockDict:
-        return asdict(self, dict_factory=custom_dict_factory)
+        return _encode_stock(self)
+
+    @classmethod
+    def from_dict(cls, data: StockDict) -> "Stock":
+        return _decode_stock(data)
+
+
+# Generated once at import time, see utils.codec
+_encode_create_stock = compile_encoder(CreateStock)
+_encode_stock = compile_encoder(Stock)
+_decode_stock = compile_decoder(Stock)
+
+
+@slotted
+@dataclass
+class ListStockQuery:
+    user_id: int
+    page_size: Optional[int] = LIST_PAGE_SIZE_DEFAULT  # None returns every matching stock in one page
+    cursor: Optional[str] = None  # next_cursor of the previous page, None for the first page
+    symbol: Optional[str] = None
+    action_type: Optional[ActionType] = None
+    start_date: Optional[datetime] = None  # inclusive
+    end_date: Optional[datetime] = None  # exclusive
+
+    def __post_init__(self):
+        if self.user_id <= 0:
+            raise ValueError("user_id must be positive")
+        if self.page_size is not None and (self.page_size <= 0 or self.page_size > LIST_PAGE_SIZE_MAX):
+            raise ValueError(f"page_size must be between 1 and {LIST_PAGE_SIZE_MAX}")
+        if self.start_date and self.end_date and self.start_date >= self.end_date:
+            raise ValueError("start_date must be before end_date")
+
+
+@slotted
+@dataclass
+class StockPage:
+    stocks: List[Stock]  # newest first
+    next_cursor: Optional[str] = None  # None on the last page
+
+
+@slotted
+@dataclass
+class StockDictPage:
+    stocks: List[StockDict]  # stored documents as is, for read-only listing without building Stock
+    next_cursor: Optional[str] = None  # None on the last page
@@ -1,30 +1,47 @@
-from typing import List as ListType
+from typing import Dict, List as ListType
 import logging
 from datetime import datetime, timezone
 import grpc
 import proto.stock_pb2 as stock_pb2
 import proto.stock_pb2_grpc as stock_pb2_grpc
 from usecase.base import AbstractStockUsecase
-from domain.stock import CreateStock, Stock, StockInfo
+from domain.stock import (
+    CreateStock,
+    CreateBatchError,
+    CreateBatchResult,
+    ListStockQuery,
+    Stock,
+    StockDict,
+    StockInfo,
+    LIST_PAGE_SIZE_DEFAULT,
+)
+from domain.portfolio import PortfolioInfo, PortfolioSummary
 from domain.enum import ActionType, ACTION_MAP, StockType, STOCK_MAP
+from utils.batch import micro_batches
+
+CREATE_STREAM_BATCH_SIZE = 500
+CREATE_STREAM_FLUSH_INTERVAL_SECONDS = 0.2
+# Pages and batches are large enough to be worth the CPU, single stocks and portfolios are sent as they are
+LARGE_RESPONSE_COMPRESSION = grpc.Compression.Gzip
+
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_UTC = datetime(1970, 1, 1, tzinfo=timezone.utc)
 
 
 class StockService(stock_pb2_grpc.StockService):
-    def __init__(self, stock_usecase: AbstractStockUsecase):
+    def __init__(
+        self,
+        stock_usecase: AbstractStockUsecase,
+        create_stream_batch_size: int = CREATE_STREAM_BATCH_SIZE,
+        create_stream_flush_interval: float = CREATE_STREAM_FLUSH_INTERVAL_SECONDS,
+    ):
         self.stock_usecase = stock_usecase
+        self.create_stream_batch_size = create_stream_batch_size
+        self.create_stream_flush_interval = create_stream_flush_interval
 
     def Create(self, request, context):
         try:
-            stock = CreateStock(
-                user_id=request.user_id,
-                symbol=request.symbol,
-                price=request.price,
-                quantity=request.quantity,
-                action_type=self._map_action_type(request.action),
-                stock_type=self._map_stock_type(request.stock_type),
-                created_at=datetime.now(timezone.utc),
-            )
-
+            stock = self._to_create_stock(request)
             stock_id = self.stock_usecase.create(stock)
             return stock_pb2.CreateResp(id=stock_id)
         except ValueError as e:
@@ -43,12 +60,103 @@ class StockService(stock_pb2_grpc.StockService):
             context.set_details("Internal server error")
             raise grpc.RpcError("Internal server error")
 
+    def CreateBatch(self, request, context):
+        try:
+            ids, errors = self._create_batch(request.stocks, offset=0)
+
+            return stock_pb2.CreateBatchResp(ids=ids, errors=errors)
+        except Exception as e:
+            logging.error("Failed to create stock batch of %s entries: %s", len(request.stocks), str(e))
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details("Internal server error")
+            raise grpc.RpcError("Internal server error")
+
+    def CreateStream(self, request_iterator, context):
+        ids: ListType[str] = []
+        errors = []
+        try:
+            # Each micro-batch is applied and written on its own, a batch that fails is reported entry by entry and
+            # the stream goes on, so the ids of the batches written before and after it still reach the client
+            for create_reqs in micro_batches(
+                request_iterator, self.create_stream_batch_size, self.create_stream_flush_interval
+            ):
+                try:
+                    batch_ids, batch_errors = self._create_batch(create_reqs, offset=len(ids))
+                except Exception as e:
+                    logging.error(
+                        "Failed to create stock stream batch of %s entries after %s entries: %s",
+                        len(create_reqs),
+                        len(ids),
+                        str(e),
+                    )
+                    batch_ids, batch_errors = self._failed_create_batch(len(create_reqs), offset=len(ids))
+                ids.extend(batch_ids)
+                errors.extend(batch_errors)
+
+            return stock_pb2.CreateBatchResp(ids=ids, errors=errors)
+        except Exception as e:
+            logging.error("Failed to create stock stream after %s entries: %s", len(ids), str(e))
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details("Internal server error")
+            raise grpc.RpcError("Internal server error")
+
+    def _create_batch(self, create_reqs, offset: int):
+        """Creates the entries of `create_reqs`, error indexes are shifted by `offset` to their request position."""
+        stocks, indexes, errors = self._to_create_batch(create_reqs)
+        result = self.stock_usecase.create_batch(stocks)
+        return self._merge_create_batch_result(len(create_reqs), offset, indexes, errors, result)
+
+    def _failed_create_batch(self, count: int, offset: int):
+        """Reports every entry of a micro-batch whose write failed as an error at its request position."""
+        return [""] * count, [
+            stock_pb2.CreateBatchError(index=offset + index, message="Internal server error") for index in range(count)
+        ]
+
+    def _to_create_batch(self, create_reqs):
+        """Converts `create_reqs`, returning the valid entries, their position in `create_reqs` and the invalid ones."""
+        stocks: ListType[CreateStock] = []
+        indexes: ListType[int] = []  # position in create_reqs of every entry in stocks
+        errors: ListType[CreateBatchError] = []
+        for index, create_req in enumerate(create_reqs):
+            try:
+                stocks.append(self._to_create_stock(create_req))
+                indexes.append(index)
+            except ValueError as e:
+                errors.append(CreateBatchError(index=index, message=f"Invalid input: {str(e)}"))
+
+        return stocks, indexes, errors
+
+    def _merge_create_batch_result(
+        self,
+        count: int,
+        offset: int,
+        indexes: ListType[int],
+        errors: ListType[CreateBatchError],
+        result: CreateBatchResult,
+    ):
+        ids = [""] * count
+        for index, stock_id in zip(indexes, result.ids):
+            ids[index] = stock_id
+        errors.extend(CreateBatchError(index=indexes[e.index], message=e.message) for e in result.errors)
+        errors.sort(key=lambda e: e.index)
+
+        return ids, [stock_pb2.CreateBatchError(index=offset + e.index, message=e.message) for e in errors]
+
     def List(self, request, context):
         try:
-            user_id = request.user_id
-            stock_list = self.stock_usecase.list(user_id)
+            context.set_compression(LARGE_RESPONSE_COMPRESSION)
+            query = self._to_list_stock_query(request, unpaged=True)
+            # Listing only reads back validated data, so the stored documents map straight onto the messages
+            page = self.stock_usecase.list_dicts(query)
 
-            return stock_pb2.ListResp(stock_list=self._convert_to_proto_stock_list(stock_list))
+            return stock_pb2.ListResp(
+                stock_list=self._convert_dicts_to_proto_stock_list(page.stocks), next_cursor=page.next_cursor or ""
+            )
+        except ValueError as e:
+            logging.error("Invalid input for stock list: %s", str(e))
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(f"Invalid input: {str(e)}")
+            raise grpc.RpcError(f"Invalid input: {str(e)}")
         except Exception as e:
             logging.error(
                 "Failed to list stocks for user_id=%s: %s",
@@ -59,6 +167,30 @@ class StockService(stock_pb2_grpc.StockService):
             context.set_details("Internal server error")
             raise grpc.RpcError("Internal server error")
 
+    def ListStream(self, request, context):
+        try:
+            context.set_compression(LARGE_RESPONSE_COMPRESSION)
+            query = self._to_list_stock_query(request)
+            # page_size is the number of stocks per message, next_cursor resumes the stream after that message
+            for page in self.stock_usecase.list_stream(query):
+                yield stock_pb2.ListResp(
+                    stock_list=self._convert_to_proto_stock_list(page.stocks), next_cursor=page.next_cursor or ""
+                )
+        except ValueError as e:
+            logging.error("Invalid input for stock list stream: %s", str(e))
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(f"Invalid input: {str(e)}")
+            raise grpc.RpcError(f"Invalid input: {str(e)}")
+        except Exception as e:
+            logging.error(
+                "Failed to stream stocks for user_id=%s: %s",
+                request.user_id,
+                str(e),
+            )
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details("Internal server error")
+            raise grpc.RpcError("Internal server error")
+
     def GetPortfolioInfo(self, request, context):
         try:
             user_id = request.user_id
@@ -69,6 +201,8 @@ class StockService(stock_pb2_grpc.StockService):
                 total_portfolio_value=info.total_portfolio_value,
                 total_gain=info.total_gain,
                 roi=info.roi,
+                missing_symbols=info.missing_symbols,
+                stale_symbols=info.stale_symbols,
             )
         except Exception as e:
             logging.error(
@@ -80,6 +214,25 @@ class StockService(stock_pb2_grpc.StockService):
             context.set_details("Internal server error")
             raise grpc.RpcError("Internal server error")
 
+    def GetPortfolioInfoBatch(self, request, context):
+        try:
+            context.set_compression(LARGE_RESPONSE_COMPRESSION)
+            infos = self.stock_usecase.get_portfolio_info_batch(user_ids=list(request.user_ids))
+
+            return stock_pb2.GetPortfolioInfoBatchResp(
+                portfolios=[self._convert_to_proto_portfolio_info(info) for info in infos]
+            )
+        except ValueError as e:
+            logging.error("Invalid input for portfolio info batch: %s", str(e))
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(f"Invalid input: {str(e)}")
+            raise grpc.RpcError(f"Invalid input: {str(e)}")
+        except Exception as e:
+            logging.error("Failed to get portfolio info batch of %s users: %s", len(request.user_ids), str(e))
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details("Internal server error")
+            raise grpc.RpcError("Internal server error")
+
     def GetStockInfo(self, request, context):
         try:
             user_id = request.user_id
@@ -96,6 +249,49 @@ class StockService(stock_pb2_grpc.StockService):
             context.set_details("Internal server error")
             raise grpc.RpcError("Internal server error")
 
+    def GetPortfolioSummary(self, request, context):
+        try:
+            user_id = request.user_id
+            summary = self.stock_usecase.get_portfolio_summary(user_id=user_id)
+
+            return self._convert_to_proto_portfolio_summary(user_id=user_id, summary=summary)
+        except Exception as e:
+            logging.error(
+                "Failed to get portfolio summary for user_id=%s: %s",
+                request.user_id,
+                str(e),
+            )
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details("Internal server error")
+            raise grpc.RpcError("Internal server error")
+
+    def _to_create_stock(self, request) -> CreateStock:
+        return CreateStock(
+            user_id=request.user_id,
+            symbol=request.symbol,
+            price=request.price,
+            quantity=request.quantity,
+            action_type=self._map_action_type(request.action),
+            stock_type=self._map_stock_type(request.stock_type),
+            created_at=datetime.now(timezone.utc),
+        )
+
+    def _to_list_stock_query(self, request, unpaged: bool = False) -> ListStockQuery:
+        page_size = request.page_size or LIST_PAGE_SIZE_DEFAULT
+        if unpaged and not request.page_size and not request.cursor:
+            # Clients from before pagination set neither, they keep getting the whole history in one response
+            page_size = None
+
+        return ListStockQuery(
+            user_id=request.user_id,
+            page_size=page_size,
+            cursor=request.cursor or None,
+            symbol=request.symbol or None,
+            action_type=self._map_action_type(request.action) if request.action else None,
+            start_date=request.start_date.ToDatetime(tzinfo=timezone.utc) if request.HasField("start_date") else None,
+            end_date=request.end_date.ToDatetime(tzinfo=timezone.utc) if request.HasField("end_date") else None,
+        )
+
     def _map_action_type(self, action: int) -> ActionType:
         if action not in ACTION_MAP:
             raise ValueError(f"Invalid action type: {action}. Must be 1 (BUY), 2 (SELL), or 3 (TRANSFER).")
@@ -122,6 +318,22 @@ class StockService(stock_pb2_grpc.StockService):
             for stock in stock_list
         ]
 
+    def _convert_dicts_to_proto_stock_list(self, stock_dicts: ListType[StockDict]):
+        return [
+            stock_pb2.Stock(
+                id=stock["id"],
+                user_id=stock["user_id"],
+                symbol=stock["symbol"],
+                price=stock["price"],
+                quantity=stock["quantity"],
+                action=stock["action_type"],
+                stock_type=stock["stock_type"],
+                created_at=_to_timestamp_fields(stock["created_at"]),
+                updated_at=_to_timestamp_fields(stock["updated_at"]),
+            )
+            for stock in stock_dicts
+        ]
+
     def _convert_to_proto_stock_info(self, stock_info: StockInfo):
         return stock_pb2.GetStockInfoResp(
             stocks=self._convert_to_proto_stock_info_list(stock_info[StockType.STOCKS.value]),
@@ -129,6 +341,31 @@ class StockService(stock_pb2_grpc.StockService):
             cash=self._convert_to_proto_stock_info_list(stock_info["CASH"]),
         )
 
+    def _convert_to_proto_portfolio_info(self, info: PortfolioInfo):
+        return stock_pb2.GetPortfolioInfoResp(
+            user_id=info.user_id,
+            total_portfolio_value=info.total_portfolio_value,
+            total_gain=info.total_gain,
+            roi=info.roi,
+            missing_symbols=info.missing_symbols,
+            stale_symbols=info.stale_symbols,
+        )
+
+    def _convert_to_proto_portfolio_summary(self, user_id: int, summary: PortfolioSummary):
+        info = summary.info
+        stock_info = summary.stock_info
+        return stock_pb2.GetPortfolioSummaryResp(
+            user_id=user_id,
+            total_portfolio_value=info.total_portfolio_value,
+            total_gain=info.total_gain,
+            roi=info.roi,
+            missing_symbols=info.missing_symbols,
+            stale_symbols=info.stale_symbols,
+            stocks=self._convert_to_proto_stock_info_list(stock_info[StockType.STOCKS.value]),
+            etf=self._convert_to_proto_stock_info_list(stock_info[StockType.ETF.value]),
+            cash=self._convert_to_proto_stock_info_list(stock_info["CASH"]),
+        )
+
     def _convert_to_proto_stock_info_list(self, stock_info_list: ListType[StockInfo]):
         return [
             stock_pb2.StockInfo(
@@ -137,6 +374,14 @@ class StockService(stock_pb2_grpc.StockService):
                 price=stock_info.price,
                 avg_cost=stock_info.avg_cost,
                 percentage=stock_info.percentage,
+                stale=stock_info.stale,
+                missing=stock_info.missing,
             )
             for stock_info in stock_info_list
         ]
+
+
+def _to_timestamp_fields(value: datetime) -> Dict[str, int]:
+    # Several times cheaper than letting protobuf convert the datetime, pymongo returns naive UTC datetimes
+    delta = value - (_EPOCH if value.tzinfo is None else _EPOCH_UTC)
+    return {"seconds": delta.days * 86400 + delta.seconds, "nanos": delta.microseconds * 1000}
@@ -0,0 +1,191 @@
+from typing import List as ListType
+import logging
+import grpc
+import proto.stock_pb2 as stock_pb2
+from .stock import (
+    StockService,
+    CREATE_STREAM_BATCH_SIZE,
+    CREATE_STREAM_FLUSH_INTERVAL_SECONDS,
+    LARGE_RESPONSE_COMPRESSION,
+)
+from usecase.base import AbstractAsyncStockUsecase
+from utils.batch import async_micro_batches
+
+
+class AsyncStockService(StockService):
+    """`StockService` for the grpc.aio server, every RPC awaits the async usecase instead of holding a thread.
+
+    Requests and responses go through the `StockService` converters, so both servers answer identically. Errors are
+    reported with `context.abort`, grpc.aio replaces the details of any other exception raised by a handler.
+    """
+
+    def __init__(
+        self,
+        stock_usecase: AbstractAsyncStockUsecase,
+        create_stream_batch_size: int = CREATE_STREAM_BATCH_SIZE,
+        create_stream_flush_interval: float = CREATE_STREAM_FLUSH_INTERVAL_SECONDS,
+    ):
+        super().__init__(
+            stock_usecase,
+            create_stream_batch_size=create_stream_batch_size,
+            create_stream_flush_interval=create_stream_flush_interval,
+        )
+
+    async def Create(self, request, context):
+        try:
+            stock = self._to_create_stock(request)
+            stock_id = await self.stock_usecase.create(stock)
+            return stock_pb2.CreateResp(id=stock_id)
+        except ValueError as e:
+            logging.error("Invalid input for stock creation: %s", str(e))
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, f"Invalid input: {str(e)}")
+        except Exception as e:
+            logging.error(
+                "Failed to create stock for user_id=%s, symbol=%s: %s",
+                request.user_id,
+                request.symbol,
+                str(e),
+            )
+            await context.abort(grpc.StatusCode.INTERNAL, "Internal server error")
+
+    async def CreateBatch(self, request, context):
+        try:
+            ids, errors = await self._create_batch_async(request.stocks, offset=0)
+
+            return stock_pb2.CreateBatchResp(ids=ids, errors=errors)
+        except Exception as e:
+            logging.error("Failed to create stock batch of %s entries: %s", len(request.stocks), str(e))
+            await context.abort(grpc.StatusCode.INTERNAL, "Internal server error")
+
+    async def CreateStream(self, request_iterator, context):
+        ids: ListType[str] = []
+        errors = []
+        try:
+            async for create_reqs in async_micro_batches(
+                request_iterator, self.create_stream_batch_size, self.create_stream_flush_interval
+            ):
+                try:
+                    batch_ids, batch_errors = await self._create_batch_async(create_reqs, offset=len(ids))
+                except Exception as e:
+                    logging.error(
+                        "Failed to create stock stream batch of %s entries after %s entries: %s",
+                        len(create_reqs),
+                        len(ids),
+                        str(e),
+                    )
+                    batch_ids, batch_errors = self._failed_create_batch(len(create_reqs), offset=len(ids))
+                ids.extend(batch_ids)
+                errors.extend(batch_errors)
+
+            return stock_pb2.CreateBatchResp(ids=ids, errors=errors)
+        except Exception as e:
+            logging.error("Failed to create stock stream after %s entries: %s", len(ids), str(e))
+            await context.abort(grpc.StatusCode.INTERNAL, "Internal server error")
+
+    async def _create_batch_async(self, create_reqs, offset: int):
+        stocks, indexes, errors = self._to_create_batch(create_reqs)
+        result = await self.stock_usecase.create_batch(stocks)
+        return self._merge_create_batch_result(len(create_reqs), offset, indexes, errors, result)
+
+    async def List(self, request, context):
+        try:
+            context.set_compression(LARGE_RESPONSE_COMPRESSION)
+            query = self._to_list_stock_query(request, unpaged=True)
+            page = await self.stock_usecase.list_dicts(query)
+
+            return stock_pb2.ListResp(
+                stock_list=self._convert_dicts_to_proto_stock_list(page.stocks), next_cursor=page.next_cursor or ""
+            )
+        except ValueError as e:
+            logging.error("Invalid input for stock list: %s", str(e))
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, f"Invalid input: {str(e)}")
+        except Exception as e:
+            logging.error(
+                "Failed to list stocks for user_id=%s: %s",
+                request.user_id,
+                str(e),
+            )
+            await context.abort(grpc.StatusCode.INTERNAL, "Internal server error")
+
+    async def ListStream(self, request, context):
+        try:
+            context.set_compression(LARGE_RESPONSE_COMPRESSION)
+            query = self._to_list_stock_query(request)
+            async for page in self.stock_usecase.list_stream(query):
+                yield stock_pb2.ListResp(
+                    stock_list=self._convert_to_proto_stock_list(page.stocks), next_cursor=page.next_cursor or ""
+                )
+        except ValueError as e:
+            logging.error("Invalid input for stock list stream: %s", str(e))
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, f"Invalid input: {str(e)}")
+        except Exception as e:
+            logging.error(
+                "Failed to stream stocks for user_id=%s: %s",
+                request.user_id,
+                str(e),
+            )
+            await context.abort(grpc.StatusCode.INTERNAL, "Internal server error")
+
+    async def GetPortfolioInfo(self, request, context):
+        try:
+            user_id = request.user_id
+            info = await self.stock_usecase.get_portfolio_info(user_id=user_id)
+
+            return stock_pb2.GetPortfolioInfoResp(
+                user_id=user_id,
+                total_portfolio_value=info.total_portfolio_value,
+                total_gain=info.total_gain,
+                roi=info.roi,
+                missing_symbols=info.missing_symbols,
+                stale_symbols=info.stale_symbols,
+            )
+        except Exception as e:
+            logging.error(
+                "Failed to get portfolio info for user_id=%s: %s",
+                request.user_id,
+                str(e),
+            )
+            await context.abort(grpc.StatusCode.INTERNAL, "Internal server error")
+
+    async def GetPortfolioInfoBatch(self, request, context):
+        try:
+            context.set_compression(LARGE_RESPONSE_COMPRESSION)
+            infos = await self.stock_usecase.get_portfolio_info_batch(user_ids=list(request.user_ids))
+
+            return stock_pb2.GetPortfolioInfoBatchResp(
+                portfolios=[self._convert_to_proto_portfolio_info(info) for info in infos]
+            )
+        except ValueError as e:
+            logging.error("Invalid input for portfolio info batch: %s", str(e))
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, f"Invalid input: {str(e)}")
+        except Exception as e:
+            logging.error("Failed to get portfolio info batch of %s users: %s", len(request.user_ids), str(e))
+            await context.abort(grpc.StatusCode.INTERNAL, "Internal server error")
+
+    async def GetStockInfo(self, request, context):
+        try:
+            user_id = request.user_id
+            stock_info = await self.stock_usecase.get_stock_info(user_id=user_id)
+
+            return self._convert_to_proto_stock_info(stock_info=stock_info)
+        except Exception as e:
+            logging.error(
+                "Failed to get stock info for user_id=%s: %s",
+                request.user_id,
+                str(e),
+            )
+            await context.abort(grpc.StatusCode.INTERNAL, "Internal server error")
+
+    async def GetPortfolioSummary(self, request, context):
+        try:
+            user_id = request.user_id
+            summary = await self.stock_usecase.get_portfolio_summary(user_id=user_id)
+
+            return self._convert_to_proto_portfolio_summary(user_id=user_id, summary=summary)
+        except Exception as e:
+            logging.error(
+                "Failed to get portfolio summary for user_id=%s: %s",
+                request.user_id,
+                str(e),
+            )
+            await context.abort(grpc.StatusCode.INTERNAL, "Internal server error")
@@ -1,14 +1,50 @@
+import asyncio
 import logging
 import os
+import signal
+from typing import Any, Dict, Optional
 import grpc
 import proto.stock_pb2_grpc as stock_pb2_grpc
 from concurrent import futures
-from pymongo import MongoClient
 from dotenv import load_dotenv
-from handler.stock import StockService
-from adapters.stock import StockRepository
-from adapters.portfolio import PortfolioRepository
-from usecase.stock import StockUsecase
+from handler.stock import StockService, CREATE_STREAM_BATCH_SIZE, CREATE_STREAM_FLUSH_INTERVAL_SECONDS
+from handler.stock_async import AsyncStockService
+from adapters.stock import AsyncStockRepository, StockRepository
+from adapters.portfolio import AsyncPortfolioRepository, PortfolioRepository
+from adapters.quote import AsyncQuoteRepository, QuoteRepository
+from adapters.transaction import AsyncMongoTransactionManager, MongoTransactionManager
+from adapters.mongo import AsyncMongoConnection, MongoConnection
+from adapters.base import AbstractAsyncPriceProvider, AbstractPriceProvider
+from adapters.price import (
+    YFinancePriceProvider,
+    PolygonPriceProvider,
+    InMemoryPriceProvider,
+    ExecutorPriceProvider,
+    AsyncInMemoryPriceProvider,
+)
+from usecase.stock import (
+    StockUsecase,
+    PRICE_CACHE_TTL_SECONDS,
+    PRICE_CACHE_MAX_SIZE,
+    PRICE_FETCH_MAX_WORKERS,
+    PRICE_FETCH_TIMEOUT_SECONDS,
+    VALUATION_CACHE_TTL_SECONDS,
+    VALUATION_CACHE_MAX_SIZE,
+    RECENT_WRITE_TTL_SECONDS,
+    RECENT_WRITE_MAX_SIZE,
+)
+from usecase.stock_async import AsyncStockUsecase
+from usecase.refresher import (
+    PriceRefresher,
+    AsyncPriceRefresher,
+    PRICE_REFRESH_INTERVAL_SECONDS,
+    PRICE_REFRESH_AHEAD_SECONDS,
+    PRICE_REFRESH_MAX_SYMBOLS,
+    HOT_SYMBOL_TTL_SECONDS,
+)
+from usecase.invalidator import AsyncValuationInvalidator, ValuationInvalidator
+from utils.cache import TTLCache, VersionedCache
+from utils.config import MongoConfig, ServerConfig, load_mongo_config, load_server_config
 
 
 load_dotenv()
@@ -17,21 +53,245 @@ logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
+def build_price_provider() -> AbstractPriceProvider:
+    provider = os.getenv("PRICE_PROVIDER", "yfinance")
+    if provider == "yfinance":
+        return YFinancePriceProvider()
+    if provider == "polygon":
+        return PolygonPriceProvider(api_key=os.getenv("POLYGON_API_KEY"))
+    if provider == "memory":
+        # The simulated latency stands in for a remote provider in load tests
+        price_file = os.getenv("PRICE_FILE")
+        latency = float(os.getenv("PRICE_LATENCY_SECONDS", 0.0))
+        if price_file:
+            return InMemoryPriceProvider.from_file(price_file, latency=latency)
+        return InMemoryPriceProvider(latency=latency)
 
-def serve():
-    client = MongoClient(os.getenv("MONGO_URI"))
-    logger.info("connected to mongodb")
+    raise ValueError(f"Invalid price provider: {provider}. Must be yfinance, polygon or memory.")
 
-    stock_repo = StockRepository(client, "stock_db")
-    portfolio_repo = PortfolioRepository(client, "stock_db")
-    stock_usecase = StockUsecase(stock_repo, portfolio_repo)
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
-    stock_pb2_grpc.add_StockServiceServicer_to_server(StockService(stock_usecase), server)
-    server.add_insecure_port("[::]:50051")
+
+def build_async_price_provider(price_executor: futures.Executor) -> AbstractAsyncPriceProvider:
+    provider = build_price_provider()
+    if isinstance(provider, InMemoryPriceProvider):
+        return AsyncInMemoryPriceProvider(provider)
+
+    return ExecutorPriceProvider(provider, price_executor)
+
+
+def build_price_cache() -> TTLCache[float]:
+    return TTLCache(
+        ttl=float(os.getenv("PRICE_CACHE_TTL_SECONDS", PRICE_CACHE_TTL_SECONDS)),
+        max_size=int(os.getenv("PRICE_CACHE_MAX_SIZE", PRICE_CACHE_MAX_SIZE)),
+    )
+
+
+def build_price_executor() -> futures.ThreadPoolExecutor:
+    return futures.ThreadPoolExecutor(
+        max_workers=int(os.getenv("PRICE_FETCH_MAX_WORKERS", PRICE_FETCH_MAX_WORKERS)),
+        thread_name_prefix="price-fetch",
+    )
+
+
+def build_hot_symbols(refresh_interval: float) -> Optional[TTLCache[bool]]:
+    if refresh_interval <= 0:
+        return None
+
+    return TTLCache(
+        ttl=float(os.getenv("HOT_SYMBOL_TTL_SECONDS", HOT_SYMBOL_TTL_SECONDS)),
+        max_size=int(os.getenv("PRICE_REFRESH_MAX_SYMBOLS", PRICE_REFRESH_MAX_SYMBOLS)),
+    )
+
+
+def build_valuation_cache() -> Optional[VersionedCache[Any]]:
+    ttl = float(os.getenv("VALUATION_CACHE_TTL_SECONDS", VALUATION_CACHE_TTL_SECONDS))
+    if ttl <= 0:
+        return None
+
+    return VersionedCache(ttl=ttl, max_size=int(os.getenv("VALUATION_CACHE_MAX_SIZE", VALUATION_CACHE_MAX_SIZE)))
+
+
+def build_recent_writes(mongo_config: MongoConfig) -> TTLCache[bool]:
+    # Secondaries further behind than max_staleness are not read from, so a write reaches them within that window
+    ttl = float(os.getenv("RECENT_WRITE_TTL_SECONDS", RECENT_WRITE_TTL_SECONDS))
+    return TTLCache(
+        ttl=max(ttl, mongo_config.max_staleness or 0.0),
+        max_size=int(os.getenv("RECENT_WRITE_MAX_SIZE", RECENT_WRITE_MAX_SIZE)),
+    )
+
+
+def watch_valuations(valuation_cache: Optional[VersionedCache[Any]]) -> bool:
+    # Every process keeps its own cache, the change stream lets it see the trades other processes serve
+    return valuation_cache is not None and os.getenv("VALUATION_CHANGE_STREAM") == "true"
+
+
+def stock_service_options() -> Dict[str, Any]:
+    return {
+        "create_stream_batch_size": int(os.getenv("CREATE_STREAM_BATCH_SIZE", CREATE_STREAM_BATCH_SIZE)),
+        "create_stream_flush_interval": float(
+            os.getenv("CREATE_STREAM_FLUSH_INTERVAL_SECONDS", CREATE_STREAM_FLUSH_INTERVAL_SECONDS)
+        ),
+    }
+
+
+def serve(config: ServerConfig, mongo_config: MongoConfig):
+    mongo = MongoConnection(mongo_config)
+    mongo.prewarm()
+    client = mongo.client
+    logger.info("connected to mongodb, pool stats: %s", mongo.pool_stats())
+
+    stock_repo = StockRepository(client, "stock_db", read_preference=mongo.read_preference)
+    portfolio_repo = PortfolioRepository(client, "stock_db", read_preference=mongo.read_preference)
+    quote_repo = QuoteRepository(client, "stock_db", read_preference=mongo.read_preference)
+    # create_indexes is a no-op for indexes that already exist, so every start can run it
+    for repo in (stock_repo, portfolio_repo, quote_repo):
+        repo.ensure_indexes()
+    price_executor = build_price_executor()
+    refresh_interval = float(os.getenv("PRICE_REFRESH_INTERVAL_SECONDS", PRICE_REFRESH_INTERVAL_SECONDS))
+    hot_symbols = build_hot_symbols(refresh_interval)
+    valuation_cache = build_valuation_cache()
+    stock_usecase = StockUsecase(
+        stock_repo,
+        portfolio_repo,
+        build_price_provider(),
+        price_cache=build_price_cache(),
+        price_executor=price_executor,
+        price_fetch_timeout=float(os.getenv("PRICE_FETCH_TIMEOUT_SECONDS", PRICE_FETCH_TIMEOUT_SECONDS)),
+        hot_symbols=hot_symbols,
+        quote_repo=quote_repo,
+        # Transactions need a replica set, standalone deployments keep the two separate writes
+        transaction_manager=MongoTransactionManager(client) if os.getenv("MONGO_TRANSACTIONS") == "true" else None,
+        valuation_cache=valuation_cache,
+        recent_writes=build_recent_writes(mongo_config),
+    )
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=config.max_workers, thread_name_prefix="grpc"),
+        options=config.options(),
+        maximum_concurrent_rpcs=config.maximum_concurrent_rpcs,
+        compression=config.compression,
+    )
+    stock_service = StockService(stock_usecase, **stock_service_options())
+    stock_pb2_grpc.add_StockServiceServicer_to_server(stock_service, server)
+    server.add_insecure_port(f"[::]:{config.port}")
     logger.info("server is running...")
     server.start()
-    server.wait_for_termination()
+
+    refresher = None
+    if hot_symbols is not None:
+        refresher = PriceRefresher(
+            stock_usecase,
+            interval=refresh_interval,
+            refresh_ahead=float(os.getenv("PRICE_REFRESH_AHEAD_SECONDS", PRICE_REFRESH_AHEAD_SECONDS)),
+        )
+        refresher.start()
+
+    invalidator = None
+    if watch_valuations(valuation_cache):
+        invalidator = ValuationInvalidator(stock_usecase, stock_repo)
+        invalidator.start()
+
+    signal.signal(signal.SIGTERM, lambda *_: server.stop(grace=5))
+    try:
+        server.wait_for_termination()
+    finally:
+        if refresher is not None:
+            refresher.stop()
+        if invalidator is not None:
+            invalidator.stop()
+        if valuation_cache is not None:
+            logger.info("valuation cache stats: %s", valuation_cache.stats())
+        logger.info("price cache stats: %s", stock_usecase.price_cache.stats())
+        # Fetches that joined a concurrent fetch of the same quote instead of calling the provider again
+        logger.info("price fetch singleflight stats: %s", stock_usecase.price_flight.stats())
+        price_executor.shutdown(wait=False)
+        mongo.close()
+
+
+async def serve_async(config: ServerConfig, mongo_config: MongoConfig):
+    """`serve` on grpc.aio, requests wait on Mongo and the price provider without holding a thread each."""
+    mongo = AsyncMongoConnection(mongo_config)
+    await mongo.prewarm()
+    client = mongo.client
+    logger.info("connected to mongodb, pool stats: %s", mongo.pool_stats())
+
+    stock_repo = AsyncStockRepository(client, "stock_db", read_preference=mongo.read_preference)
+    portfolio_repo = AsyncPortfolioRepository(client, "stock_db", read_preference=mongo.read_preference)
+    quote_repo = AsyncQuoteRepository(client, "stock_db", read_preference=mongo.read_preference)
+    for repo in (stock_repo, portfolio_repo, quote_repo):
+        await repo.ensure_indexes()
+    # Still needed for the providers that only have a blocking client
+    price_executor = build_price_executor()
+    refresh_interval = float(os.getenv("PRICE_REFRESH_INTERVAL_SECONDS", PRICE_REFRESH_INTERVAL_SECONDS))
+    hot_symbols = build_hot_symbols(refresh_interval)
+    valuation_cache = build_valuation_cache()
+    stock_usecase = AsyncStockUsecase(
+        stock_repo,
+        portfolio_repo,
+        build_async_price_provider(price_executor),
+        price_cache=build_price_cache(),
+        price_fetch_timeout=float(os.getenv("PRICE_FETCH_TIMEOUT_SECONDS", PRICE_FETCH_TIMEOUT_SECONDS)),
+        hot_symbols=hot_symbols,
+        quote_repo=quote_repo,
+        transaction_manager=(
+            AsyncMongoTransactionManager(client) if os.getenv("MONGO_TRANSACTIONS") == "true" else None
+        ),
+        valuation_cache=valuation_cache,
+        recent_writes=build_recent_writes(mongo_config),
+    )
+    # No thread pool to size, max_workers only applies to the threaded server
+    server = grpc.aio.server(
+        options=config.options(),
+        maximum_concurrent_rpcs=config.maximum_concurrent_rpcs,
+        compression=config.compression,
+    )
+    stock_service = AsyncStockService(stock_usecase, **stock_service_options())
+    stock_pb2_grpc.add_StockServiceServicer_to_server(stock_service, server)
+    server.add_insecure_port(f"[::]:{config.port}")
+    logger.info("async server is running...")
+    await server.start()
+
+    refresher = None
+    if hot_symbols is not None:
+        refresher = AsyncPriceRefresher(
+            stock_usecase,
+            interval=refresh_interval,
+            refresh_ahead=float(os.getenv("PRICE_REFRESH_AHEAD_SECONDS", PRICE_REFRESH_AHEAD_SECONDS)),
+        )
+        refresher.start()
+
+    invalidator = None
+    if watch_valuations(valuation_cache):
+        invalidator = AsyncValuationInvalidator(stock_usecase, stock_repo)
+        invalidator.start()
+
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, lambda: asyncio.ensure_future(server.stop(grace=5)))
+    try:
+        await server.wait_for_termination()
+    finally:
+        if refresher is not None:
+            await refresher.stop()
+        if invalidator is not None:
+            await invalidator.stop()
+        if valuation_cache is not None:
+            logger.info("valuation cache stats: %s", valuation_cache.stats())
+        logger.info("price cache stats: %s", stock_usecase.price_cache.stats())
+        # Fetches that joined a concurrent fetch of the same quote instead of calling the provider again
+        logger.info("price fetch singleflight stats: %s", stock_usecase.price_flight.stats())
+        price_executor.shutdown(wait=False)
+        await mongo.close()
+
+
+def run_server(reuse_port: bool = False):
+    """Runs the server of SERVER_MODE until it is stopped, `reuse_port` lets several processes share its port."""
+    config = load_server_config(reuse_port=reuse_port)
+    mongo_config = load_mongo_config()
+    mode = os.getenv("SERVER_MODE", "threaded")
+    if mode == "threaded":
+        serve(config, mongo_config)
+    elif mode == "async":
+        asyncio.run(serve_async(config, mongo_config))
+    else:
+        raise ValueError(f"Invalid server mode: {mode}. Must be threaded or async.")
 
 
 if __name__ == "__main__":
-    serve()
+    run_server()
@@ -0,0 +1,45 @@
+"""Runs SERVER_WORKERS server processes sharing SERVER_PORT through SO_REUSEPORT.
+
+Each worker is a full `index.run_server` with its own MongoClient, price cache and gRPC server, the kernel spreads
+new connections across them. A gRPC channel sticks to the worker that accepted it, so the load only spreads across
+workers with several client connections. Crashed workers are restarted, SIGTERM stops them all gracefully.
+"""
+
+import logging
+import os
+from dotenv import load_dotenv
+from index import run_server
+from utils.supervisor import Supervisor
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def available_cpus() -> int:
+    """CPUs this process may use, including a cgroup v2 CPU quota such as a container's `--cpus` limit."""
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max", encoding="utf-8") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, int(quota) // int(period)))
+    except (OSError, ValueError):
+        pass
+
+    return cpus
+
+
+def run_worker(index: int) -> None:
+    run_server(reuse_port=True)
+
+
+def main():
+    workers = int(os.getenv("SERVER_WORKERS") or available_cpus())
+    logger.info("starting %s server workers", workers)
+    Supervisor(run_worker, workers=workers).run()
+
+
+if __name__ == "__main__":
+    main()
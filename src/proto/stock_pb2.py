@@ -25,7 +25,7 @@ _sym_db = _symbol_database.Default()
 from google.protobuf import timestamp_pb2 as google_dot_protobuf_dot_timestamp__pb2
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x11proto/stock.proto\x12\x05stock\x1a\x1fgoogle/protobuf/timestamp.proto\"B\n\x06\x41\x63tion\"8\n\x04Type\x12\x0f\n\x0bUNSPECIFIED\x10\x00\x12\x07\n\x03\x42UY\x10\x01\x12\x08\n\x04SELL\x10\x02\x12\x0c\n\x08TRANSFER\x10\x03\"9\n\tStockType\",\n\x04Type\x12\x0f\n\x0bUNSPECIFIED\x10\x00\x12\n\n\x06STOCKS\x10\x01\x12\x07\n\x03\x45TF\x10\x02\"\xab\x02\n\x05Stock\x12\x0e\n\x02id\x18\x01 \x01(\tR\x02id\x12\x18\n\x07user_id\x18\x02 \x01(\x05R\x07user_id\x12\x16\n\x06symbol\x18\x03 \x01(\tR\x06symbol\x12\x14\n\x05price\x18\x04 \x01(\x01R\x05price\x12\x1a\n\x08quantity\x18\x05 \x01(\x05R\x08quantity\x12\x16\n\x06\x61\x63tion\x18\x06 \x01(\tR\x06\x61\x63tion\x12\x1e\n\nstock_type\x18\x07 \x01(\tR\nstock_type\x12:\n\ncreated_at\x18\x08 \x01(\x0b\x32\x1a.google.protobuf.TimestampR\ncreated_at\x12:\n\nupdated_at\x18\t \x01(\x0b\x32\x1a.google.protobuf.TimestampR\nupdated_at\"\x91\x01\n\tStockInfo\x12\x16\n\x06symbol\x18\x01 \x01(\tR\x06symbol\x12\x1a\n\x08quantity\x18\x02 \x01(\x05R\x08quantity\x12\x14\n\x05price\x18\x03 \x01(\x01R\x05price\x12\x1a\n\x08\x61vg_cost\x18\x04 \x01(\x01R\x08\x61vg_cost\x12\x1e\n\npercentage\x18\x05 \x01(\x01R\npercentage\"\xca\x02\n\tCreateReq\x12\x18\n\x07user_id\x18\x01 \x01(\x05R\x07user_id\x12\x16\n\x06symbol\x18\x02 \x01(\tR\x06symbol\x12\x14\n\x05price\x18\x03 \x01(\x01R\x05price\x12\x1a\n\x08quantity\x18\x04 \x01(\x05R\x08quantity\x12*\n\x06\x61\x63tion\x18\x05 \x01(\x0e\x32\x12.stock.Action.TypeR\x06\x61\x63tion\x12\x35\n\nstock_type\x18\x06 \x01(\x0e\x32\x15.stock.StockType.TypeR\nstock_type\x12:\n\ncreated_at\x18\x07 \x01(\x0b\x32\x1a.google.protobuf.TimestampR\ncreated_at\x12:\n\nupdated_at\x18\x08 \x01(\x0b\x32\x1a.google.protobuf.TimestampR\nupdated_at\"\x1c\n\nCreateResp\x12\x0e\n\x02id\x18\x01 \x01(\tR\x02id\"#\n\x07ListReq\x12\x18\n\x07user_id\x18\x01 \x01(\x05R\x07user_id\"8\n\x08ListResp\x12,\n\nstock_list\x18\x01 \x03(\x0b\x32\x0c.stock.StockR\nstock_list\"/\n\x13GetPortfolioInfoReq\x12\x18\n\x07user_id\x18\x01 \x01(\x05R\x07user_id\"\x98\x01\n\x14GetPortfolioInfoResp\x12\x18\n\x07user_id\x18\x01 \x01(\x05R\x07user_id\x12\x34\n\x15total_portfolio_value\x18\x02 \x01(\x01R\x15total_portfolio_value\x12\x1e\n\ntotal_gain\x18\x03 \x01(\x01R\ntotal_gain\x12\x10\n\x03roi\x18\x04 \x01(\x01R\x03roi\"+\n\x0fGetStockInfoReq\x12\x18\n\x07user_id\x18\x01 \x01(\x05R\x07user_id\"\x86\x01\n\x10GetStockInfoResp\x12(\n\x06stocks\x18\x01 \x03(\x0b\x32\x10.stock.StockInfoR\x06STOCKS\x12\"\n\x03\x65tf\x18\x02 \x03(\x0b\x32\x10.stock.StockInfoR\x03\x45TF\x12$\n\x04\x63\x61sh\x18\x03 \x03(\x0b\x32\x10.stock.StockInfoR\x04\x43\x41SH2\xfc\x01\n\x0cStockService\x12/\n\x06\x43reate\x12\x10.stock.CreateReq\x1a\x11.stock.CreateResp\"\x00\x12)\n\x04List\x12\x0e.stock.ListReq\x1a\x0f.stock.ListResp\"\x00\x12M\n\x10GetPortfolioInfo\x12\x1a.stock.GetPortfolioInfoReq\x1a\x1b.stock.GetPortfolioInfoResp\"\x00\x12\x41\n\x0cGetStockInfo\x12\x16.stock.GetStockInfoReq\x1a\x17.stock.GetStockInfoResp\"\x00\x62\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x11proto/stock.proto\x12\x05stock\x1a\x1fgoogle/protobuf/timestamp.proto\"B\n\x06\x41\x63tion\"8\n\x04Type\x12\x0f\n\x0bUNSPECIFIED\x10\x00\x12\x07\n\x03\x42UY\x10\x01\x12\x08\n\x04SELL\x10\x02\x12\x0c\n\x08TRANSFER\x10\x03\"9\n\tStockType\",\n\x04Type\x12\x0f\n\x0bUNSPECIFIED\x10\x00\x12\n\n\x06STOCKS\x10\x01\x12\x07\n\x03\x45TF\x10\x02\"\xab\x02\n\x05Stock\x12\x0e\n\x02id\x18\x01 \x01(\tR\x02id\x12\x18\n\x07user_id\x18\x02 \x01(\x05R\x07user_id\x12\x16\n\x06symbol\x18\x03 \x01(\tR\x06symbol\x12\x14\n\x05price\x18\x04 \x01(\x01R\x05price\x12\x1a\n\x08quantity\x18\x05 \x01(\x05R\x08quantity\x12\x16\n\x06\x61\x63tion\x18\x06 \x01(\tR\x06\x61\x63tion\x12\x1e\n\nstock_type\x18\x07 \x01(\tR\nstock_type\x12:\n\ncreated_at\x18\x08 \x01(\x0b\x32\x1a.google.protobuf.TimestampR\ncreated_at\x12:\n\nupdated_at\x18\t \x01(\x0b\x32\x1a.google.protobuf.TimestampR\nupdated_at\"\xc1\x01\n\tStockInfo\x12\x16\n\x06symbol\x18\x01 \x01(\tR\x06symbol\x12\x1a\n\x08quantity\x18\x02 \x01(\x05R\x08quantity\x12\x14\n\x05price\x18\x03 \x01(\x01R\x05price\x12\x1a\n\x08\x61vg_cost\x18\x04 \x01(\x01R\x08\x61vg_cost\x12\x1e\n\npercentage\x18\x05 \x01(\x01R\npercentage\x12\x14\n\x05stale\x18\x06 \x01(\x08R\x05stale\x12\x18\n\x07missing\x18\x07 \x01(\x08R\x07missing\"\xca\x02\n\tCreateReq\x12\x18\n\x07user_id\x18\x01 \x01(\x05R\x07user_id\x12\x16\n\x06symbol\x18\x02 \x01(\tR\x06symbol\x12\x14\n\x05price\x18\x03 \x01(\x01R\x05price\x12\x1a\n\x08quantity\x18\x04 \x01(\x05R\x08quantity\x12*\n\x06\x61\x63tion\x18\x05 \x01(\x0e\x32\x12.stock.Action.TypeR\x06\x61\x63tion\x12\x35\n\nstock_type\x18\x06 \x01(\x0e\x32\x15.stock.StockType.TypeR\nstock_type\x12:\n\ncreated_at\x18\x07 \x01(\x0b\x32\x1a.google.protobuf.TimestampR\ncreated_at\x12:\n\nupdated_at\x18\x08 \x01(\x0b\x32\x1a.google.protobuf.TimestampR\nupdated_at\"\x1c\n\nCreateResp\x12\x0e\n\x02id\x18\x01 \x01(\tR\x02id\":\n\x0e\x43reateBatchReq\x12(\n\x06stocks\x18\x01 \x03(\x0b\x32\x10.stock.CreateReqR\x06stocks\"B\n\x10\x43reateBatchError\x12\x14\n\x05index\x18\x01 \x01(\x05R\x05index\x12\x18\n\x07message\x18\x02 \x01(\tR\x07message\"T\n\x0f\x43reateBatchResp\x12\x10\n\x03ids\x18\x01 \x03(\tR\x03ids\x12/\n\x06\x65rrors\x18\x02 \x03(\x0b\x32\x17.stock.CreateBatchErrorR\x06\x65rrors\"\x91\x02\n\x07ListReq\x12\x18\n\x07user_id\x18\x01 \x01(\x05R\x07user_id\x12\x1c\n\tpage_size\x18\x02 \x01(\x05R\tpage_size\x12\x16\n\x06\x63ursor\x18\x03 \x01(\tR\x06\x63ursor\x12\x16\n\x06symbol\x18\x04 \x01(\tR\x06symbol\x12*\n\x06\x61\x63tion\x18\x05 \x01(\x0e\x32\x12.stock.Action.TypeR\x06\x61\x63tion\x12:\n\nstart_date\x18\x06 \x01(\x0b\x32\x1a.google.protobuf.TimestampR\nstart_date\x12\x36\n\x08\x65nd_date\x18\x07 \x01(\x0b\x32\x1a.google.protobuf.TimestampR\x08\x65nd_date\"Z\n\x08ListResp\x12,\n\nstock_list\x18\x01 \x03(\x0b\x32\x0c.stock.StockR\nstock_list\x12 \n\x0bnext_cursor\x18\x02 \x01(\tR\x0bnext_cursor\"/\n\x13GetPortfolioInfoReq\x12\x18\n\x07user_id\x18\x01 \x01(\x05R\x07user_id\"\xe8\x01\n\x14GetPortfolioInfoResp\x12\x18\n\x07user_id\x18\x01 \x01(\x05R\x07user_id\x12\x34\n\x15total_portfolio_value\x18\x02 \x01(\x01R\x15total_portfolio_value\x12\x1e\n\ntotal_gain\x18\x03 \x01(\x01R\ntotal_gain\x12\x10\n\x03roi\x18\x04 \x01(\x01R\x03roi\x12(\n\x0fmissing_symbols\x18\x05 \x03(\tR\x0fmissing_symbols\x12$\n\rstale_symbols\x18\x06 \x03(\tR\rstale_symbols\"6\n\x18GetPortfolioInfoBatchReq\x12\x1a\n\x08user_ids\x18\x01 \x03(\x05R\x08user_ids\"X\n\x19GetPortfolioInfoBatchResp\x12;\n\nportfolios\x18\x01 \x03(\x0b\x32\x1b.stock.GetPortfolioInfoRespR\nportfolios\"+\n\x0fGetStockInfoReq\x12\x18\n\x07user_id\x18\x01 \x01(\x05R\x07user_id\"\x86\x01\n\x10GetStockInfoResp\x12(\n\x06stocks\x18\x01 \x03(\x0b\x32\x10.stock.StockInfoR\x06STOCKS\x12\"\n\x03\x65tf\x18\x02 \x03(\x0b\x32\x10.stock.StockInfoR\x03\x45TF\x12$\n\x04\x63\x61sh\x18\x03 \x03(\x0b\x32\x10.stock.StockInfoR\x04\x43\x41SH\"2\n\x16GetPortfolioSummaryReq\x12\x18\n\x07user_id\x18\x01 \x01(\x05R\x07user_id\"\xdf\x02\n\x17GetPortfolioSummaryResp\x12\x18\n\x07user_id\x18\x01 \x01(\x05R\x07user_id\x12\x34\n\x15total_portfolio_value\x18\x02 \x01(\x01R\x15total_portfolio_value\x12\x1e\n\ntotal_gain\x18\x03 \x01(\x01R\ntotal_gain\x12\x10\n\x03roi\x18\x04 \x01(\x01R\x03roi\x12(\n\x0fmissing_symbols\x18\x05 \x03(\tR\x0fmissing_symbols\x12$\n\rstale_symbols\x18\x06 \x03(\tR\rstale_symbols\x12(\n\x06stocks\x18\x07 \x03(\x0b\x32\x10.stock.StockInfoR\x06STOCKS\x12\"\n\x03\x65tf\x18\x08 \x03(\x0b\x32\x10.stock.StockInfoR\x03\x45TF\x12$\n\x04\x63\x61sh\x18\t \x03(\x0b\x32\x10.stock.StockInfoR\x04\x43\x41SH2\xe3\x04\n\x0cStockService\x12/\n\x06\x43reate\x12\x10.stock.CreateReq\x1a\x11.stock.CreateResp\"\x00\x12>\n\x0b\x43reateBatch\x12\x15.stock.CreateBatchReq\x1a\x16.stock.CreateBatchResp\"\x00\x12<\n\x0c\x43reateStream\x12\x10.stock.CreateReq\x1a\x16.stock.CreateBatchResp\"\x00(\x01\x12)\n\x04List\x12\x0e.stock.ListReq\x1a\x0f.stock.ListResp\"\x00\x12\x31\n\nListStream\x12\x0e.stock.ListReq\x1a\x0f.stock.ListResp\"\x00\x30\x01\x12M\n\x10GetPortfolioInfo\x12\x1a.stock.GetPortfolioInfoReq\x1a\x1b.stock.GetPortfolioInfoResp\"\x00\x12\\\n\x15GetPortfolioInfoBatch\x12\x1f.stock.GetPortfolioInfoBatchReq\x1a .stock.GetPortfolioInfoBatchResp\"\x00\x12\x41\n\x0cGetStockInfo\x12\x16.stock.GetStockInfoReq\x1a\x17.stock.GetStockInfoResp\"\x00\x12V\n\x13GetPortfolioSummary\x12\x1d.stock.GetPortfolioSummaryReq\x1a\x1e.stock.GetPortfolioSummaryResp\"\x00\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -43,23 +43,37 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_STOCK']._serialized_start=189
   _globals['_STOCK']._serialized_end=488
   _globals['_STOCKINFO']._serialized_start=491
-  _globals['_STOCKINFO']._serialized_end=636
-  _globals['_CREATEREQ']._serialized_start=639
-  _globals['_CREATEREQ']._serialized_end=969
-  _globals['_CREATERESP']._serialized_start=971
-  _globals['_CREATERESP']._serialized_end=999
-  _globals['_LISTREQ']._serialized_start=1001
-  _globals['_LISTREQ']._serialized_end=1036
-  _globals['_LISTRESP']._serialized_start=1038
-  _globals['_LISTRESP']._serialized_end=1094
-  _globals['_GETPORTFOLIOINFOREQ']._serialized_start=1096
-  _globals['_GETPORTFOLIOINFOREQ']._serialized_end=1143
-  _globals['_GETPORTFOLIOINFORESP']._serialized_start=1146
-  _globals['_GETPORTFOLIOINFORESP']._serialized_end=1298
-  _globals['_GETSTOCKINFOREQ']._serialized_start=1300
-  _globals['_GETSTOCKINFOREQ']._serialized_end=1343
-  _globals['_GETSTOCKINFORESP']._serialized_start=1346
-  _globals['_GETSTOCKINFORESP']._serialized_end=1480
-  _globals['_STOCKSERVICE']._serialized_start=1483
-  _globals['_STOCKSERVICE']._serialized_end=1735
+  _globals['_STOCKINFO']._serialized_end=684
+  _globals['_CREATEREQ']._serialized_start=687
+  _globals['_CREATEREQ']._serialized_end=1017
+  _globals['_CREATERESP']._serialized_start=1019
+  _globals['_CREATERESP']._serialized_end=1047
+  _globals['_CREATEBATCHREQ']._serialized_start=1049
+  _globals['_CREATEBATCHREQ']._serialized_end=1107
+  _globals['_CREATEBATCHERROR']._serialized_start=1109
+  _globals['_CREATEBATCHERROR']._serialized_end=1175
+  _globals['_CREATEBATCHRESP']._serialized_start=1177
+  _globals['_CREATEBATCHRESP']._serialized_end=1261
+  _globals['_LISTREQ']._serialized_start=1264
+  _globals['_LISTREQ']._serialized_end=1537
+  _globals['_LISTRESP']._serialized_start=1539
+  _globals['_LISTRESP']._serialized_end=1629
+  _globals['_GETPORTFOLIOINFOREQ']._serialized_start=1631
+  _globals['_GETPORTFOLIOINFOREQ']._serialized_end=1678
+  _globals['_GETPORTFOLIOINFORESP']._serialized_start=1681
+  _globals['_GETPORTFOLIOINFORESP']._serialized_end=1913
+  _globals['_GETPORTFOLIOINFOBATCHREQ']._serialized_start=1915
+  _globals['_GETPORTFOLIOINFOBATCHREQ']._serialized_end=1969
+  _globals['_GETPORTFOLIOINFOBATCHRESP']._serialized_start=1971
+  _globals['_GETPORTFOLIOINFOBATCHRESP']._serialized_end=2059
+  _globals['_GETSTOCKINFOREQ']._serialized_start=2061
+  _globals['_GETSTOCKINFOREQ']._serialized_end=2104
+  _globals['_GETSTOCKINFORESP']._serialized_start=2107
+  _globals['_GETSTOCKINFORESP']._serialized_end=2241
+  _globals['_GETPORTFOLIOSUMMARYREQ']._serialized_start=2243
+  _globals['_GETPORTFOLIOSUMMARYREQ']._serialized_end=2293
+  _globals['_GETPORTFOLIOSUMMARYRESP']._serialized_start=2296
+  _globals['_GETPORTFOLIOSUMMARYRESP']._serialized_end=2647
+  _globals['_STOCKSERVICE']._serialized_start=2650
+  _globals['_STOCKSERVICE']._serialized_end=3261
 # @@protoc_insertion_point(module_scope)
@@ -39,21 +39,46 @@ class StockServiceStub(object):
                 request_serializer=proto_dot_stock__pb2.CreateReq.SerializeToString,
                 response_deserializer=proto_dot_stock__pb2.CreateResp.FromString,
                 _registered_method=True)
+        self.CreateBatch = channel.unary_unary(
+                '/stock.StockService/CreateBatch',
+                request_serializer=proto_dot_stock__pb2.CreateBatchReq.SerializeToString,
+                response_deserializer=proto_dot_stock__pb2.CreateBatchResp.FromString,
+                _registered_method=True)
+        self.CreateStream = channel.stream_unary(
+                '/stock.StockService/CreateStream',
+                request_serializer=proto_dot_stock__pb2.CreateReq.SerializeToString,
+                response_deserializer=proto_dot_stock__pb2.CreateBatchResp.FromString,
+                _registered_method=True)
         self.List = channel.unary_unary(
                 '/stock.StockService/List',
                 request_serializer=proto_dot_stock__pb2.ListReq.SerializeToString,
                 response_deserializer=proto_dot_stock__pb2.ListResp.FromString,
                 _registered_method=True)
+        self.ListStream = channel.unary_stream(
+                '/stock.StockService/ListStream',
+                request_serializer=proto_dot_stock__pb2.ListReq.SerializeToString,
+                response_deserializer=proto_dot_stock__pb2.ListResp.FromString,
+                _registered_method=True)
         self.GetPortfolioInfo = channel.unary_unary(
                 '/stock.StockService/GetPortfolioInfo',
                 request_serializer=proto_dot_stock__pb2.GetPortfolioInfoReq.SerializeToString,
                 response_deserializer=proto_dot_stock__pb2.GetPortfolioInfoResp.FromString,
                 _registered_method=True)
+        self.GetPortfolioInfoBatch = channel.unary_unary(
+                '/stock.StockService/GetPortfolioInfoBatch',
+                request_serializer=proto_dot_stock__pb2.GetPortfolioInfoBatchReq.SerializeToString,
+                response_deserializer=proto_dot_stock__pb2.GetPortfolioInfoBatchResp.FromString,
+                _registered_method=True)
         self.GetStockInfo = channel.unary_unary(
                 '/stock.StockService/GetStockInfo',
                 request_serializer=proto_dot_stock__pb2.GetStockInfoReq.SerializeToString,
                 response_deserializer=proto_dot_stock__pb2.GetStockInfoResp.FromString,
                 _registered_method=True)
+        self.GetPortfolioSummary = channel.unary_unary(
+                '/stock.StockService/GetPortfolioSummary',
+                request_serializer=proto_dot_stock__pb2.GetPortfolioSummaryReq.SerializeToString,
+                response_deserializer=proto_dot_stock__pb2.GetPortfolioSummaryResp.FromString,
+                _registered_method=True)
 
 
 class StockServiceServicer(object):
@@ -65,24 +90,54 @@ class StockServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def CreateBatch(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def CreateStream(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def List(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def ListStream(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def GetPortfolioInfo(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def GetPortfolioInfoBatch(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def GetStockInfo(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def GetPortfolioSummary(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_StockServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -91,21 +146,46 @@ def add_StockServiceServicer_to_server(servicer, server):
                     request_deserializer=proto_dot_stock__pb2.CreateReq.FromString,
                     response_serializer=proto_dot_stock__pb2.CreateResp.SerializeToString,
             ),
+            'CreateBatch': grpc.unary_unary_rpc_method_handler(
+                    servicer.CreateBatch,
+                    request_deserializer=proto_dot_stock__pb2.CreateBatchReq.FromString,
+                    response_serializer=proto_dot_stock__pb2.CreateBatchResp.SerializeToString,
+            ),
+            'CreateStream': grpc.stream_unary_rpc_method_handler(
+                    servicer.CreateStream,
+                    request_deserializer=proto_dot_stock__pb2.CreateReq.FromString,
+                    response_serializer=proto_dot_stock__pb2.CreateBatchResp.SerializeToString,
+            ),
             'List': grpc.unary_unary_rpc_method_handler(
                     servicer.List,
                     request_deserializer=proto_dot_stock__pb2.ListReq.FromString,
                     response_serializer=proto_dot_stock__pb2.ListResp.SerializeToString,
             ),
+            'ListStream': grpc.unary_stream_rpc_method_handler(
+                    servicer.ListStream,
+                    request_deserializer=proto_dot_stock__pb2.ListReq.FromString,
+                    response_serializer=proto_dot_stock__pb2.ListResp.SerializeToString,
+            ),
             'GetPortfolioInfo': grpc.unary_unary_rpc_method_handler(
                     servicer.GetPortfolioInfo,
                     request_deserializer=proto_dot_stock__pb2.GetPortfolioInfoReq.FromString,
                     response_serializer=proto_dot_stock__pb2.GetPortfolioInfoResp.SerializeToString,
             ),
+            'GetPortfolioInfoBatch': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetPortfolioInfoBatch,
+                    request_deserializer=proto_dot_stock__pb2.GetPortfolioInfoBatchReq.FromString,
+                    response_serializer=proto_dot_stock__pb2.GetPortfolioInfoBatchResp.SerializeToString,
+            ),
             'GetStockInfo': grpc.unary_unary_rpc_method_handler(
                     servicer.GetStockInfo,
                     request_deserializer=proto_dot_stock__pb2.GetStockInfoReq.FromString,
                     response_serializer=proto_dot_stock__pb2.GetStockInfoResp.SerializeToString,
             ),
+            'GetPortfolioSummary': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetPortfolioSummary,
+                    request_deserializer=proto_dot_stock__pb2.GetPortfolioSummaryReq.FromString,
+                    response_serializer=proto_dot_stock__pb2.GetPortfolioSummaryResp.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'stock.StockService', rpc_method_handlers)
@@ -144,6 +224,60 @@ class StockService(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def CreateBatch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/stock.StockService/CreateBatch',
+            proto_dot_stock__pb2.CreateBatchReq.SerializeToString,
+            proto_dot_stock__pb2.CreateBatchResp.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def CreateStream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/stock.StockService/CreateStream',
+            proto_dot_stock__pb2.CreateReq.SerializeToString,
+            proto_dot_stock__pb2.CreateBatchResp.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def List(request,
             target,
@@ -171,6 +305,33 @@ class StockService(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def ListStream(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/stock.StockService/ListStream',
+            proto_dot_stock__pb2.ListReq.SerializeToString,
+            proto_dot_stock__pb2.ListResp.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def GetPortfolioInfo(request,
             target,
@@ -198,6 +359,33 @@ class StockService(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def GetPortfolioInfoBatch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/stock.StockService/GetPortfolioInfoBatch',
+            proto_dot_stock__pb2.GetPortfolioInfoBatchReq.SerializeToString,
+            proto_dot_stock__pb2.GetPortfolioInfoBatchResp.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def GetStockInfo(request,
             target,
@@ -224,3 +412,30 @@ class StockService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def GetPortfolioSummary(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/stock.StockService/GetPortfolioSummary',
+            proto_dot_stock__pb2.GetPortfolioSummaryReq.SerializeToString,
+            proto_dot_stock__pb2.GetPortfolioSummaryResp.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
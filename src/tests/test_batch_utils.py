@@ -0,0 +1,131 @@
+import asyncio
+import queue
+import pytest
+from utils.batch import async_micro_batches, micro_batches
+
+
+def _blocking_source(source: "queue.Queue"):
+    while True:
+        item = source.get()
+        if item is None:
+            return
+        yield item
+
+
+class TestMicroBatches:
+    def test_flushes_full_batches(self):
+        # Act
+        batches = list(micro_batches(range(7), max_size=3, max_delay=10))
+
+        # Assert
+        assert batches == [[0, 1, 2], [3, 4, 5], [6]]
+
+    def test_empty_source(self):
+        # Act
+        batches = list(micro_batches([], max_size=3, max_delay=10))
+
+        # Assert
+        assert batches == []
+
+    def test_flushes_partial_batch_after_max_delay(self):
+        # Arrange
+        source = queue.Queue()
+        source.put(1)
+        source.put(2)
+        batches = micro_batches(_blocking_source(source), max_size=10, max_delay=0.05)
+
+        # Act
+        first = next(batches)  # the source is still open, only the delay can flush this batch
+        source.put(3)
+        source.put(None)
+        rest = list(batches)
+
+        # Assert
+        assert first == [1, 2]
+        assert rest == [[3]]
+
+    def test_source_error_is_raised_after_earlier_batches(self):
+        # Arrange
+        def source():
+            yield from range(4)
+            raise ValueError("stream cancelled")
+
+        batches = micro_batches(source(), max_size=2, max_delay=10)
+
+        # Act/Assert
+        assert next(batches) == [0, 1]
+        assert next(batches) == [2, 3]
+        with pytest.raises(ValueError, match="stream cancelled"):
+            next(batches)
+
+    @pytest.mark.parametrize("max_size, max_delay", [(0, 1), (1, -1)])
+    def test_invalid_arguments(self, max_size, max_delay):
+        # Act/Assert
+        with pytest.raises(ValueError):
+            list(micro_batches([], max_size=max_size, max_delay=max_delay))
+
+
+async def _collect(batches):
+    return [batch async for batch in batches]
+
+
+class TestAsyncMicroBatches:
+    def test_flushes_full_batches(self):
+        # Arrange
+        async def source():
+            for item in range(7):
+                yield item
+
+        # Act
+        batches = asyncio.run(_collect(async_micro_batches(source(), max_size=3, max_delay=10)))
+
+        # Assert
+        assert batches == [[0, 1, 2], [3, 4, 5], [6]]
+
+    def test_flushes_partial_batch_after_max_delay(self):
+        # Arrange
+        async def run():
+            source = asyncio.Queue()
+
+            async def blocking_source():
+                while True:
+                    item = await source.get()
+                    if item is None:
+                        return
+                    yield item
+
+            for item in (1, 2):
+                source.put_nowait(item)
+            batches = async_micro_batches(blocking_source(), max_size=10, max_delay=0.05)
+
+            # Act
+            first = await batches.__anext__()  # the source is still open, only the delay can flush this batch
+            source.put_nowait(3)
+            source.put_nowait(None)
+            return first, await _collect(batches)
+
+        first, rest = asyncio.run(run())
+
+        # Assert
+        assert first == [1, 2]
+        assert rest == [[3]]
+
+    def test_source_error_is_raised_after_earlier_batches(self):
+        # Arrange
+        async def source():
+            for item in range(4):
+                yield item
+            raise ValueError("stream cancelled")
+
+        async def run():
+            batches = async_micro_batches(source(), max_size=2, max_delay=10)
+            received = [await batches.__anext__(), await batches.__anext__()]
+            with pytest.raises(ValueError, match="stream cancelled"):
+                await batches.__anext__()
+            return received
+
+        # Act
+        received = asyncio.run(run())
+
+        # Assert
+        assert received == [[0, 1], [2, 3]]
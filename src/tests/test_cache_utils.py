@@ -0,0 +1,209 @@
+import pytest
+from utils.cache import TTLCache, CacheStats, VersionedCache, VersionedCacheStats
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+class TestTTLCache:
+    def test_get_returns_value_before_expiry(self, clock):
+        # Arrange
+        cache = TTLCache(ttl=10, max_size=2, clock=clock)
+        cache.set("AAPL", 150.0)
+        clock.now = 9.9
+
+        # Act
+        result = cache.get("AAPL")
+
+        # Assert
+        assert result == 150.0
+        assert cache.stats() == CacheStats(hits=1, misses=0, evictions=0, size=1, max_size=2)
+
+    def test_get_returns_none_after_expiry(self, clock):
+        # Arrange
+        cache = TTLCache(ttl=10, max_size=2, clock=clock)
+        cache.set("AAPL", 150.0)
+        clock.now = 10.0
+
+        # Act
+        result = cache.get("AAPL")
+
+        # Assert
+        assert result is None
+        assert cache.stats().misses == 1
+
+    def test_get_stale_returns_expired_value(self, clock):
+        # Arrange
+        cache = TTLCache(ttl=10, max_size=2, clock=clock)
+        cache.set("AAPL", 150.0)
+        clock.now = 20.0
+
+        # Act
+        result = cache.get_stale("AAPL")
+
+        # Assert
+        assert result == 150.0
+        assert cache.get_stale("SPY") is None
+        assert cache.stats() == CacheStats(hits=0, misses=0, evictions=0, size=1, max_size=2)
+
+    def test_expires_in_and_keys(self, clock):
+        # Arrange
+        cache = TTLCache(ttl=10, max_size=3, clock=clock)
+        cache.set("AAPL", 150.0)
+        clock.now = 5.0
+        cache.set("SPY", 400.0)
+        clock.now = 12.0
+
+        # Act
+        keys = cache.keys()
+
+        # Assert
+        assert keys == ["SPY"]
+        assert cache.expires_in("AAPL") == -2.0
+        assert cache.expires_in("SPY") == 3.0
+        assert cache.expires_in("TSLA") is None
+
+    def test_set_evicts_least_recently_used(self, clock):
+        # Arrange
+        cache = TTLCache(ttl=10, max_size=2, clock=clock)
+        cache.set("AAPL", 150.0)
+        cache.set("SPY", 400.0)
+        cache.get("AAPL")  # SPY is now the least recently used entry
+
+        # Act
+        cache.set("TSLA", 200.0)
+
+        # Assert
+        assert cache.get("SPY") is None
+        assert cache.get("AAPL") == 150.0
+        assert cache.get("TSLA") == 200.0
+        assert cache.stats().evictions == 1
+        assert len(cache) == 2
+
+    def test_set_refreshes_expiry(self, clock):
+        # Arrange
+        cache = TTLCache(ttl=10, max_size=2, clock=clock)
+        cache.set("AAPL", 150.0)
+        clock.now = 8.0
+        cache.set("AAPL", 155.0)
+        clock.now = 15.0
+
+        # Act
+        result = cache.get("AAPL")
+
+        # Assert
+        assert result == 155.0
+
+    def test_set_with_custom_ttl(self, clock):
+        # Arrange
+        cache = TTLCache(ttl=10, max_size=2, clock=clock)
+        cache.set("AAPL", 150.0, ttl=2)
+        clock.now = 2.0
+
+        # Act
+        result = cache.get("AAPL")
+
+        # Assert
+        assert result is None
+
+    def test_delete_and_clear(self, clock):
+        # Arrange
+        cache = TTLCache(ttl=10, max_size=2, clock=clock)
+        cache.set("AAPL", 150.0)
+        cache.set("SPY", 400.0)
+
+        # Act
+        cache.delete("AAPL")
+
+        # Assert
+        assert cache.get("AAPL") is None
+        cache.clear()
+        assert len(cache) == 0
+
+    @pytest.mark.parametrize("ttl, max_size", [(0, 1), (1, 0)])
+    def test_invalid_arguments(self, ttl, max_size):
+        # Act/Assert
+        with pytest.raises(ValueError):
+            TTLCache(ttl=ttl, max_size=max_size)
+
+
+class TestVersionedCache:
+    def test_get_returns_value_until_invalidated(self, clock):
+        # Arrange
+        cache = VersionedCache(ttl=10, max_size=10, clock=clock)
+        cache.set(1, "info", cache.version())
+
+        # Act
+        before = cache.get(1)
+        cache.invalidate(1)
+        after = cache.get(1)
+
+        # Assert
+        assert (before, after) == ("info", None)
+
+    def test_set_refuses_value_computed_before_invalidation(self, clock):
+        # Arrange
+        cache = VersionedCache(ttl=10, max_size=10, clock=clock)
+        stale_version = cache.version()
+        cache.invalidate(1)
+        cache.set(1, "fresh", cache.version())
+
+        # Act
+        cached = cache.set(1, "stale", stale_version)
+
+        # Assert
+        assert not cached
+        assert cache.get(1) == "fresh"
+
+    def test_bump_epoch_drops_every_entry(self, clock):
+        # Arrange
+        cache = VersionedCache(ttl=10, max_size=10, clock=clock)
+        version = cache.version()
+        cache.set(1, "info", version)
+
+        # Act
+        cache.bump_epoch()
+
+        # Assert
+        assert cache.get(1) is None
+        assert not cache.set(2, "info", version)
+        assert cache.set(2, "info", cache.version())
+
+    def test_entries_expire(self, clock):
+        # Arrange
+        cache = VersionedCache(ttl=10, max_size=10, clock=clock)
+        cache.set(1, "info", cache.version())
+        clock.now = 10
+
+        # Act
+        result = cache.get(1)
+
+        # Assert
+        assert result is None
+
+    def test_stats(self, clock):
+        # Arrange
+        cache = VersionedCache(ttl=10, max_size=2, clock=clock)
+        for user_id in (1, 2, 3):
+            cache.set(user_id, "info", cache.version())
+        cache.get(3)
+        cache.get(1)
+        cache.invalidate(2)
+
+        # Act
+        result = cache.stats()
+
+        # Assert
+        assert result == VersionedCacheStats(
+            hits=1, misses=1, evictions=1, size=2, max_size=2, invalidations=1, epoch=0
+        )
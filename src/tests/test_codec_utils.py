@@ -0,0 +1,141 @@
+import pytest
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import List, Optional
+from utils.codec import compile_decoder, compile_encoder
+from utils.utils import custom_dict_factory
+from domain.portfolio import Portfolio, Holding
+from domain.stock import CreateStock, Stock
+from domain.enum import ActionType, StockType
+
+CREATED_AT = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+@dataclass
+class Tagged:
+    name: str
+    action_type: Optional[ActionType]
+    stock_types: List[StockType]
+    nested: List[List[Holding]]
+    parent: Optional[Holding]
+
+
+def _holding(symbol="AAPL"):
+    return Holding(symbol=symbol, shares=10, stock_type=StockType.STOCKS, total_cost=1500.0)
+
+
+DOMAIN_OBJECTS = [
+    _holding(),
+    Portfolio(
+        user_id=1,
+        cash_balance=500.0,
+        total_money_in=2000.0,
+        holdings=[_holding(), Holding(symbol="SPY", shares=2, stock_type=StockType.ETF, total_cost=800.0)],
+        created_at=CREATED_AT,
+        updated_at=CREATED_AT,
+    ),
+    Portfolio(
+        user_id=2,
+        cash_balance=0.0,
+        total_money_in=0.0,
+        holdings=[],
+        created_at=CREATED_AT,
+        updated_at=CREATED_AT,
+    ),
+    CreateStock(
+        user_id=1,
+        symbol="AAPL",
+        price=150.0,
+        quantity=2,
+        action_type=ActionType.BUY,
+        stock_type=StockType.STOCKS,
+        created_at=CREATED_AT,
+    ),
+    Stock(
+        id="stock_123",
+        user_id=1,
+        symbol="SPY",
+        price=400.0,
+        quantity=1,
+        action_type=ActionType.SELL,
+        stock_type=StockType.ETF,
+        created_at=CREATED_AT,
+        updated_at=CREATED_AT,
+    ),
+]
+
+
+class TestCodec:
+    @pytest.mark.parametrize("obj", DOMAIN_OBJECTS, ids=lambda obj: type(obj).__name__)
+    def test_as_dict_matches_asdict(self, obj):
+        # Act
+        result = obj.as_dict()
+
+        # Assert
+        assert result == asdict(obj, dict_factory=custom_dict_factory)
+
+    @pytest.mark.parametrize(
+        "obj", [obj for obj in DOMAIN_OBJECTS if hasattr(obj, "from_dict")], ids=lambda obj: type(obj).__name__
+    )
+    def test_from_dict_round_trip(self, obj):
+        # Act
+        result = type(obj).from_dict(obj.as_dict())
+
+        # Assert
+        assert result == obj
+
+    def test_from_dict_ignores_unknown_keys(self):
+        # Arrange
+        data = {"_id": "65a1b2c3d4e5f6a7b8c9d0e1", **_holding().as_dict()}
+
+        # Act
+        result = Holding.from_dict(data)
+
+        # Assert
+        assert result == _holding()
+
+    def test_lists_are_copied_not_shared(self):
+        # Arrange
+        portfolio = DOMAIN_OBJECTS[1]
+
+        # Act
+        result = portfolio.as_dict()
+        result["holdings"].append({"symbol": "TSLA"})
+
+        # Assert
+        assert len(portfolio.holdings) == 2
+
+    @pytest.mark.parametrize("action_type, parent", [(ActionType.BUY, _holding("SPY")), (None, None)])
+    def test_optional_and_nested_types(self, action_type, parent):
+        # Arrange
+        obj = Tagged(
+            name="tagged",
+            action_type=action_type,
+            stock_types=[StockType.ETF, StockType.STOCKS],
+            nested=[[_holding()], []],
+            parent=parent,
+        )
+        encode, decode = compile_encoder(Tagged), compile_decoder(Tagged)
+
+        # Act
+        result = encode(obj)
+
+        # Assert
+        assert result == asdict(obj, dict_factory=custom_dict_factory)
+        assert decode(result) == obj
+
+    def test_decoder_runs_validation(self):
+        # Arrange
+        data = {**_holding().as_dict(), "shares": -1}
+
+        # Act/Assert
+        with pytest.raises(ValueError, match="shares cannot be negative"):
+            Holding.from_dict(data)
+
+    def test_decoder_rejects_unknown_enum_value(self):
+        # Arrange
+        data = {**_holding().as_dict(), "stock_type": "BOND"}
+
+        # Act/Assert
+        with pytest.raises(ValueError, match="'BOND' is not a valid StockType"):
+            Holding.from_dict(data)
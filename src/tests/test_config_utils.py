@@ -0,0 +1,204 @@
+import grpc
+import pytest
+from concurrent import futures
+from utils.config import MongoConfig, ServerConfig, load_mongo_config, load_server_config
+
+
+class TestServerConfigFromEnv:
+    def test_defaults(self):
+        # Act
+        config = ServerConfig.from_env({"SERVER_MAX_CONCURRENT_RPCS": ""})
+
+        # Assert
+        assert config == ServerConfig()
+        assert config.compression == grpc.Compression.NoCompression
+        assert config.maximum_concurrent_rpcs is None
+
+    def test_reads_every_setting(self):
+        # Arrange
+        env = {
+            "SERVER_PORT": "50052",
+            "SERVER_MAX_WORKERS": "32",
+            "SERVER_MAX_CONCURRENT_RPCS": "256",
+            "SERVER_MAX_SEND_MESSAGE_BYTES": "1024",
+            "SERVER_MAX_RECEIVE_MESSAGE_BYTES": "2048",
+            "SERVER_COMPRESSION": "none",
+            "SERVER_KEEPALIVE_TIME_SECONDS": "60",
+            "SERVER_KEEPALIVE_TIMEOUT_SECONDS": "5",
+            "SERVER_KEEPALIVE_PERMIT_WITHOUT_CALLS": "true",
+            "SERVER_MIN_PING_INTERVAL_SECONDS": "10",
+            "SERVER_MAX_CONNECTION_IDLE_SECONDS": "120",
+            "SERVER_MAX_CONNECTION_AGE_SECONDS": "1800",
+            "SERVER_MAX_CONNECTION_AGE_GRACE_SECONDS": "30",
+        }
+
+        # Act
+        config = ServerConfig.from_env(env)
+
+        # Assert
+        assert config == ServerConfig(
+            port=50052,
+            max_workers=32,
+            maximum_concurrent_rpcs=256,
+            max_send_message_length=1024,
+            max_receive_message_length=2048,
+            compression=grpc.Compression.NoCompression,
+            keepalive_time=60.0,
+            keepalive_timeout=5.0,
+            keepalive_permit_without_calls=True,
+            min_ping_interval=10.0,
+            max_connection_idle=120.0,
+            max_connection_age=1800.0,
+            max_connection_age_grace=30.0,
+        )
+
+    def test_invalid_compression(self):
+        # Act & Assert
+        with pytest.raises(ValueError, match="Invalid server compression: br. Must be none, gzip or deflate."):
+            ServerConfig.from_env({"SERVER_COMPRESSION": "br"})
+
+    def test_invalid_value(self):
+        # Act & Assert
+        with pytest.raises(ValueError, match="Invalid SERVER_MAX_WORKERS: ten"):
+            ServerConfig.from_env({"SERVER_MAX_WORKERS": "ten"})
+
+    def test_invalid_max_workers(self):
+        # Act & Assert
+        with pytest.raises(ValueError, match="max_workers must be greater than 0"):
+            ServerConfig.from_env({"SERVER_MAX_WORKERS": "0"})
+
+
+class TestServerConfigOptions:
+    def test_options(self):
+        # Arrange
+        config = ServerConfig(max_connection_age=1800.0, reuse_port=True)
+
+        # Act
+        options = dict(config.options())
+
+        # Assert
+        assert options == {
+            "grpc.so_reuseport": 1,
+            "grpc.max_send_message_length": 16 * 1024 * 1024,
+            "grpc.max_receive_message_length": 4 * 1024 * 1024,
+            "grpc.keepalive_time_ms": 7200000,
+            "grpc.keepalive_timeout_ms": 20000,
+            "grpc.keepalive_permit_without_calls": 0,
+            "grpc.http2.min_recv_ping_interval_without_data_ms": 300000,
+            "grpc.max_connection_age_ms": 1800000,
+        }
+
+    def test_server_accepts_options(self):
+        # Arrange
+        config = ServerConfig(maximum_concurrent_rpcs=8, max_connection_idle=60.0, max_connection_age_grace=5.0)
+        server = grpc.server(
+            futures.ThreadPoolExecutor(max_workers=config.max_workers),
+            options=config.options(),
+            maximum_concurrent_rpcs=config.maximum_concurrent_rpcs,
+            compression=config.compression,
+        )
+
+        # Act
+        port = server.add_insecure_port("127.0.0.1:0")
+        server.start()
+        server.stop(None)
+
+        # Assert
+        assert port > 0
+
+
+class TestLoadServerConfig:
+    def test_environment_overrides_config_file(self, tmp_path, monkeypatch):
+        # Arrange
+        config_file = tmp_path / "server.env"
+        config_file.write_text("SERVER_MAX_WORKERS=32\nSERVER_COMPRESSION=deflate\nSERVER_PORT=50052\n")
+        monkeypatch.setenv("SERVER_CONFIG_FILE", str(config_file))
+        monkeypatch.setenv("SERVER_MAX_WORKERS", "64")
+        monkeypatch.setenv("SERVER_PORT", "")
+        monkeypatch.delenv("SERVER_COMPRESSION", raising=False)
+
+        # Act
+        config = load_server_config(reuse_port=True)
+
+        # Assert
+        assert (config.max_workers, config.compression, config.port) == (64, grpc.Compression.Deflate, 50052)
+        assert config.reuse_port
+
+    def test_missing_config_file(self, tmp_path, monkeypatch):
+        # Arrange
+        monkeypatch.setenv("SERVER_CONFIG_FILE", str(tmp_path / "missing.env"))
+
+        # Act & Assert
+        with pytest.raises(ValueError, match="Server config file not found"):
+            load_server_config()
+
+
+class TestMongoConfig:
+    @pytest.mark.parametrize(
+        "env, expected",
+        [
+            ({}, {"maxPoolSize": 100, "minPoolSize": 0, "maxIdleTimeMS": 300000, "waitQueueTimeoutMS": 10000}),
+            (
+                {
+                    "MONGO_MAX_POOL_SIZE": "50",
+                    "MONGO_MIN_POOL_SIZE": "10",
+                    "MONGO_MAX_IDLE_TIME_SECONDS": "0",
+                    "MONGO_WAIT_QUEUE_TIMEOUT_SECONDS": "1.5",
+                    "MONGO_COMPRESSORS": "zstd, zlib",
+                },
+                {"maxPoolSize": 50, "minPoolSize": 10, "waitQueueTimeoutMS": 1500, "compressors": "zstd,zlib"},
+            ),
+        ],
+    )
+    def test_client_options(self, env, expected):
+        # Act
+        options = MongoConfig.from_env(env).client_options()
+
+        # Assert
+        assert options == expected
+
+    def test_invalid_compressor(self):
+        # Act & Assert
+        with pytest.raises(ValueError, match="Invalid mongo compressor: lz4. Must be zstd, snappy or zlib."):
+            MongoConfig.from_env({"MONGO_COMPRESSORS": "zstd,lz4"})
+
+    def test_min_pool_size_above_max(self):
+        # Act & Assert
+        with pytest.raises(ValueError, match="min_pool_size must be between 0 and max_pool_size"):
+            MongoConfig(max_pool_size=5, min_pool_size=10)
+
+    def test_load_from_config_file(self, tmp_path, monkeypatch):
+        # Arrange
+        config_file = tmp_path / "server.env"
+        config_file.write_text("MONGO_URI=mongodb://mongodb:27017\nMONGO_MIN_POOL_SIZE=5\n")
+        monkeypatch.setenv("SERVER_CONFIG_FILE", str(config_file))
+        monkeypatch.delenv("MONGO_URI", raising=False)
+        monkeypatch.delenv("MONGO_MIN_POOL_SIZE", raising=False)
+
+        # Act
+        config = load_mongo_config()
+
+        # Assert
+        assert (config.uri, config.min_pool_size) == ("mongodb://mongodb:27017", 5)
+
+    def test_read_preference(self):
+        # Act
+        config = MongoConfig.from_env(
+            {"MONGO_READ_PREFERENCE": "secondaryPreferred", "MONGO_MAX_STALENESS_SECONDS": "120"}
+        )
+
+        # Assert
+        assert (config.read_preference, config.max_staleness) == ("secondaryPreferred", 120.0)
+
+    @pytest.mark.parametrize(
+        "kwargs, message",
+        [
+            ({"read_preference": "secondaries"}, "Invalid mongo read preference: secondaries"),
+            ({"max_staleness": 120.0}, "max_staleness needs a read preference other than primary"),
+            ({"read_preference": "nearest", "max_staleness": 30.0}, "max_staleness must be at least 90 seconds"),
+        ],
+    )
+    def test_invalid_read_preference(self, kwargs, message):
+        # Act & Assert
+        with pytest.raises(ValueError, match=message):
+            MongoConfig(**kwargs)
@@ -0,0 +1,197 @@
+import asyncio
+from unittest.mock import MagicMock, patch
+from pymongo import MongoClient, monitoring
+from pymongo.read_preferences import Primary, Secondary, SecondaryPreferred
+from adapters.mongo import (
+    AsyncMongoConnection,
+    MongoConnection,
+    PoolStats,
+    PoolStatsListener,
+    available_compressors,
+    read_preference,
+    with_read_preference,
+)
+from adapters.portfolio import PortfolioRepository
+from adapters.stock import StockRepository
+from domain.stock import ListStockQuery
+from utils.config import MongoConfig
+
+MONGO_URI = "mongodb://localhost:27015"
+
+
+class TestPoolStatsListener:
+    def test_counts_pool_events(self):
+        # Arrange
+        listener = PoolStatsListener()
+        address = ("localhost", 27017)
+
+        # Act
+        for connection_id in (1, 2):
+            listener.connection_created(monitoring.ConnectionCreatedEvent(address, connection_id))
+            listener.connection_checked_out(monitoring.ConnectionCheckedOutEvent(address, connection_id, 0.0))
+        listener.connection_checked_in(monitoring.ConnectionCheckedInEvent(address, 1))
+        listener.connection_closed(monitoring.ConnectionClosedEvent(address, 1, "idle"))
+        listener.connection_check_out_failed(
+            monitoring.ConnectionCheckOutFailedEvent(address, monitoring.ConnectionCheckOutFailedReason.TIMEOUT, 0.0)
+        )
+        listener.pool_cleared(monitoring.PoolClearedEvent(address))
+
+        # Assert
+        assert listener.stats() == PoolStats(
+            open=1,
+            in_use=1,
+            created=2,
+            closed=1,
+            checkouts=2,
+            checkout_failures=1,
+            wait_queue_timeouts=1,
+            cleared=1,
+        )
+
+
+class TestAvailableCompressors:
+    def test_skips_compressors_without_their_package(self):
+        # Arrange
+        installed = {"snappy"}
+
+        # Act
+        with patch("adapters.mongo.importlib.util.find_spec", side_effect=lambda name: name in installed or None):
+            result = available_compressors(("zstd", "snappy", "zlib"))
+
+        # Assert
+        assert result == ("snappy", "zlib")
+
+
+class TestMongoConnection:
+    def test_applies_pool_options(self):
+        # Arrange
+        config = MongoConfig(
+            uri=MONGO_URI, max_pool_size=20, min_pool_size=2, max_idle_time=60.0, wait_queue_timeout=2.0
+        )
+
+        # Act
+        with MongoConnection(config) as mongo:
+            pool_options = mongo.client.options.pool_options
+
+        # Assert
+        assert (pool_options.max_pool_size, pool_options.min_pool_size) == (20, 2)
+        assert (pool_options.max_idle_time_seconds, pool_options.wait_queue_timeout) == (60.0, 2.0)
+
+    def test_close_closes_the_client_once(self):
+        # Arrange
+        mongo = MongoConnection(MongoConfig(uri=MONGO_URI))
+
+        # Act
+        with patch.object(mongo.client, "close") as close:
+            mongo.close()
+            mongo.close()
+
+        # Assert
+        close.assert_called_once_with()
+
+    def test_prewarm_opens_min_pool_size_connections(self):
+        # Arrange
+        mongo = MongoConnection(MongoConfig(uri=MONGO_URI, min_pool_size=3))
+
+        # Act
+        try:
+            warm = mongo.prewarm()
+            stats = mongo.pool_stats()
+        finally:
+            mongo.close()
+
+        # Assert
+        assert warm
+        assert stats.open >= 3
+
+
+class TestAsyncMongoConnection:
+    def test_close_closes_the_client_once(self):
+        # Arrange
+        async def run():
+            mongo = AsyncMongoConnection(MongoConfig(uri=MONGO_URI))
+            with patch.object(mongo.client, "close") as close:
+                await asyncio.gather(mongo.close(), mongo.close())
+            return close
+
+        # Act
+        close = asyncio.run(run())
+
+        # Assert
+        close.assert_awaited_once_with()
+
+    def test_prewarm_opens_min_pool_size_connections(self):
+        # Arrange
+        async def run():
+            async with AsyncMongoConnection(MongoConfig(uri=MONGO_URI, min_pool_size=3)) as mongo:
+                return await mongo.prewarm(), mongo.pool_stats()
+
+        # Act
+        warm, stats = asyncio.run(run())
+
+        # Assert
+        assert warm
+        assert stats.open >= 3
+
+
+class TestReadPreference:
+    def test_read_preference(self):
+        # Act & Assert
+        assert read_preference(MongoConfig()) == Primary()
+        assert read_preference(MongoConfig(read_preference="secondary", max_staleness=120.0)) == Secondary(
+            max_staleness=120
+        )
+        assert read_preference(MongoConfig(read_preference="secondaryPreferred")) == SecondaryPreferred()
+
+    def test_with_read_preference(self):
+        # Arrange
+        client = MongoClient(MONGO_URI, connect=False)
+        collection = client["test_stock_db"]["stocks"]
+
+        # Act
+        unchanged = with_read_preference(collection, None)
+        secondary = with_read_preference(collection, Secondary(max_staleness=120))
+
+        # Assert
+        assert unchanged is collection
+        assert secondary.read_preference == Secondary(max_staleness=120)
+        assert collection.read_preference == Primary()
+        client.close()
+
+
+class TestReadRouting:
+    @staticmethod
+    def _client():
+        client = MagicMock()
+        collection = client.__getitem__.return_value.__getitem__.return_value
+        read_collection = collection.with_options.return_value
+        collection.find_one.return_value = read_collection.find_one.return_value = None
+        return client, collection, read_collection
+
+    def test_portfolio_reads_from_secondary_only_when_allowed(self):
+        # Arrange
+        client, collection, read_collection = self._client()
+        repository = PortfolioRepository(client, read_preference=Secondary())
+
+        # Act
+        repository.get(user_id=1, secondary_ok=True)
+        repository.get(user_id=2)
+        repository.get(user_id=3, session=object(), secondary_ok=True)
+
+        # Assert
+        collection.with_options.assert_called_once_with(read_preference=Secondary())
+        assert [c.args[0] for c in read_collection.find_one.call_args_list] == [{"user_id": 1}]
+        assert [c.args[0] for c in collection.find_one.call_args_list] == [{"user_id": 2}, {"user_id": 3}]
+
+    def test_stock_list_reads_from_secondary(self):
+        # Arrange
+        client, collection, read_collection = self._client()
+        read_collection.find.return_value.sort.return_value.limit.return_value = []
+        repository = StockRepository(client, read_preference=Secondary())
+
+        # Act
+        repository.list_dicts(ListStockQuery(user_id=1, page_size=10))
+
+        # Assert
+        read_collection.find.assert_called_once()
+        collection.find.assert_not_called()
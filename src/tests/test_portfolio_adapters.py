@@ -1,10 +1,13 @@
 import pytest
+from dataclasses import replace
 from datetime import datetime, timezone
-from unittest.mock import ANY
+from unittest.mock import ANY, MagicMock, Mock
 from pymongo import MongoClient
+from pymongo.errors import DuplicateKeyError
 from adapters.portfolio import PortfolioRepository
 from domain.portfolio import Portfolio, Holding
-from domain.enum import StockType
+from domain.stock import CreateStock
+from domain.enum import ActionType, StockType
 
 
 @pytest.fixture(scope="module")
@@ -17,7 +20,9 @@ def mongo_client():
 
 @pytest.fixture(scope="module")
 def portfolio_repository(mongo_client):
-    return PortfolioRepository(mongo_client, database_name="test_stock_db")
+    repository = PortfolioRepository(mongo_client, database_name="test_stock_db")
+    repository.ensure_indexes()
+    return repository
 
 
 @pytest.fixture(scope="function", autouse=True)
@@ -26,7 +31,7 @@ def clear_collection(portfolio_repository):
 
 
 class TestPortfolioRepository:
-    def test_update_new_portfolio(self, portfolio_repository):
+    def test_get_existing_portfolio(self, portfolio_repository):
         # Arrange
         created_at = datetime.now(timezone.utc)
         portfolio = Portfolio(
@@ -37,99 +42,336 @@ class TestPortfolioRepository:
             created_at=created_at,
             updated_at=created_at,
         )
+        portfolio_repository.collection.insert_one(portfolio.as_dict())
+        expected_result = Portfolio(
+            user_id=1,
+            cash_balance=1000.0,
+            total_money_in=1000.0,
+            holdings=[Holding(symbol="AAPL", shares=10, stock_type=StockType.STOCKS, total_cost=1500.0)],
+            created_at=ANY,
+            updated_at=ANY,
+        )
 
         # Action
-        portfolio_repository.update(portfolio)
+        result = portfolio_repository.get(user_id=1)
 
         # Assertion
-        result = portfolio_repository.collection.find_one({"user_id": 1})
-        assert result["user_id"] == portfolio.user_id
-        assert result["cash_balance"] == portfolio.cash_balance
-        assert result["total_money_in"] == portfolio.total_money_in
-        assert len(result["holdings"]) == 1
-        assert result["holdings"][0]["symbol"] == "AAPL"
-        assert result["holdings"][0]["shares"] == 10
-        assert result["holdings"][0]["stock_type"] == StockType.STOCKS.value
-        assert result["holdings"][0]["total_cost"] == 1500.0
+        assert result == expected_result
 
-    def test_update_existing_portfolio(self, portfolio_repository):
+    def test_get_non_existent_portfolio(self, portfolio_repository):
         # Arrange
-        initial_portfolio = Portfolio(
+        created_at = datetime.now(timezone.utc)
+        portfolio = Portfolio(
             user_id=1,
             cash_balance=1000.0,
             total_money_in=1000.0,
             holdings=[Holding(symbol="AAPL", shares=10, stock_type=StockType.STOCKS, total_cost=1500.0)],
-            created_at=datetime.now(timezone.utc),
-            updated_at=datetime.now(timezone.utc),
+            created_at=created_at,
+            updated_at=created_at,
+        )
+        portfolio_repository.collection.insert_one(portfolio.as_dict())
+
+        # Action
+        result = portfolio_repository.get(user_id=999)
+
+        # Assertion
+        assert result is None
+
+    def test_get_many(self, portfolio_repository):
+        # Arrange
+        created_at = datetime.now(timezone.utc)
+        for user_id in (1, 2, 3):
+            portfolio_repository.collection.insert_one(
+                Portfolio(
+                    user_id=user_id,
+                    cash_balance=100.0 * user_id,
+                    total_money_in=100.0 * user_id,
+                    holdings=[],
+                    created_at=created_at,
+                    updated_at=created_at,
+                ).as_dict()
+            )
+
+        # Action
+        result = portfolio_repository.get_many([1, 3, 999, 1], secondary_ok=True)
+
+        # Assertion
+        assert sorted(result) == [1, 3]
+        assert result[3].cash_balance == 300.0
+
+    def test_update_many(self, portfolio_repository):
+        # Arrange
+        created_at = datetime.now(timezone.utc)
+        portfolio_repository.collection.insert_one(
+            Portfolio(
+                user_id=1,
+                cash_balance=0.0,
+                total_money_in=0.0,
+                holdings=[],
+                created_at=created_at,
+                updated_at=created_at,
+            ).as_dict()
         )
-        result = portfolio_repository.collection.insert_one(initial_portfolio.as_dict())
+        portfolios = [portfolio_repository.get(user_id=1) or Portfolio.empty(1), Portfolio.empty(2)]
+        for portfolio in portfolios:
+            portfolio.cash_balance = 500.0
+            portfolio.total_money_in = 1000.0
+            portfolio.holdings.append(Holding(symbol="AAPL", shares=5, stock_type=StockType.STOCKS, total_cost=500.0))
 
-        updated_portfolio = Portfolio(
+        # Action
+        conflicts = portfolio_repository.update_many(portfolios)
+
+        # Assertion
+        assert conflicts == []
+        assert portfolio_repository.collection.count_documents({}) == 2
+        for user_id in (1, 2):
+            result = portfolio_repository.get(user_id=user_id)
+            assert result.cash_balance == 500.0
+            assert result.total_money_in == 1000.0
+            assert [(h.symbol, h.shares) for h in result.holdings] == [("AAPL", 5)]
+
+    def test_update_many_skips_portfolios_changed_since_read(self, portfolio_repository):
+        # Arrange
+        transfer = CreateStock(
             user_id=1,
-            cash_balance=2000.0,
-            total_money_in=2000.0,
-            holdings=[Holding(symbol="AAPL", shares=20, stock_type=StockType.STOCKS, total_cost=3000.0)],
-            created_at=initial_portfolio.created_at,
-            updated_at=datetime.now(timezone.utc),
+            symbol="CASH",
+            price=100.0,
+            quantity=1,
+            action_type=ActionType.TRANSFER,
+            stock_type=StockType.STOCKS,
+            created_at=datetime.now(timezone.utc),
         )
+        portfolio_repository.apply_trade(transfer)
+        portfolio = portfolio_repository.get(user_id=1)
+        portfolio.cash_balance = 0.0
+        new_portfolio = Portfolio.empty(2)
+        portfolio_repository.apply_trade(transfer)  # concurrent trade after the read
+        portfolio_repository.apply_trade(replace(transfer, user_id=2))
 
         # Action
-        portfolio_repository.update(updated_portfolio)
+        conflicts = portfolio_repository.update_many([portfolio, new_portfolio])
 
         # Assertion
-        result = portfolio_repository.collection.find_one({"user_id": 1})
-        assert result is not None
-        assert result["user_id"] == updated_portfolio.user_id
-        assert result["cash_balance"] == 2000.0
-        assert result["total_money_in"] == 2000.0
-        assert len(result["holdings"]) == 1
-        assert result["holdings"][0]["symbol"] == "AAPL"
-        assert result["holdings"][0]["shares"] == 20
-        assert result["holdings"][0]["stock_type"] == StockType.STOCKS.value
-        assert result["holdings"][0]["total_cost"] == 3000.0
+        assert sorted(conflicts) == [1, 2]
+        assert portfolio_repository.get(user_id=1).cash_balance == 200.0
+        assert portfolio_repository.get(user_id=2).cash_balance == 100.0
 
-    def test_get_existing_portfolio(self, portfolio_repository):
+    def test_ensure_indexes(self, portfolio_repository):
+        # Action
+        portfolio_repository.ensure_indexes()  # idempotent
+        indexes = portfolio_repository.collection.index_information()
+
+        # Assertion
+        assert indexes["user_id_1"]["unique"] is True
+
+    def test_get_uses_index(self, portfolio_repository):
+        # Action
+        plan = portfolio_repository.collection.find({"user_id": 1}).explain()
+
+        # Assertion
+        winning_plan = str(plan["queryPlanner"]["winningPlan"])
+        assert "IXSCAN" in winning_plan
+        assert "COLLSCAN" not in winning_plan
+
+    def test_user_id_is_unique(self, portfolio_repository):
         # Arrange
         created_at = datetime.now(timezone.utc)
         portfolio = Portfolio(
             user_id=1,
-            cash_balance=1000.0,
-            total_money_in=1000.0,
-            holdings=[Holding(symbol="AAPL", shares=10, stock_type=StockType.STOCKS, total_cost=1500.0)],
+            cash_balance=0.0,
+            total_money_in=0.0,
+            holdings=[],
             created_at=created_at,
             updated_at=created_at,
         )
         portfolio_repository.collection.insert_one(portfolio.as_dict())
-        expected_result = Portfolio(
+
+        # Act/Assert
+        with pytest.raises(DuplicateKeyError):
+            portfolio_repository.collection.insert_one(portfolio.as_dict())
+
+
+class TestPortfolioRepositoryApplyTrade:
+    def _trade(self, action_type, symbol="AAPL", price=150.0, quantity=2, stock_type=StockType.STOCKS):
+        return CreateStock(
             user_id=1,
-            cash_balance=1000.0,
-            total_money_in=1000.0,
-            holdings=[Holding(symbol="AAPL", shares=10, stock_type=StockType.STOCKS, total_cost=1500.0)],
+            symbol=symbol,
+            price=price,
+            quantity=quantity,
+            action_type=action_type,
+            stock_type=stock_type,
+            created_at=datetime.now(timezone.utc),
+        )
+
+    def _insert_portfolio(self, portfolio_repository, cash_balance, total_money_in, holdings):
+        created_at = datetime.now(timezone.utc)
+        portfolio = Portfolio(
+            user_id=1,
+            cash_balance=cash_balance,
+            total_money_in=total_money_in,
+            holdings=holdings,
+            created_at=created_at,
+            updated_at=created_at,
+        )
+        portfolio_repository.collection.insert_one(portfolio.as_dict())
+
+    def test_transfer_new_portfolio(self, portfolio_repository):
+        # Action
+        portfolio_repository.apply_trade(self._trade(ActionType.TRANSFER, symbol="TRANSFER", price=3000.0, quantity=1))
+
+        # Assertion
+        result = portfolio_repository.get(user_id=1)
+        assert result == Portfolio(
+            user_id=1,
+            cash_balance=3000.0,
+            total_money_in=3000.0,
+            holdings=[],
             created_at=ANY,
             updated_at=ANY,
         )
 
+    def test_transfer_existing_portfolio(self, portfolio_repository):
+        # Arrange
+        self._insert_portfolio(portfolio_repository, cash_balance=3000.0, total_money_in=3000.0, holdings=[])
+
         # Action
+        portfolio_repository.apply_trade(self._trade(ActionType.TRANSFER, symbol="TRANSFER", price=3000.0, quantity=1))
+
+        # Assertion
         result = portfolio_repository.get(user_id=1)
+        assert result.cash_balance == 6000.0
+        assert result.total_money_in == 6000.0
+        assert portfolio_repository.collection.count_documents({}) == 1
+
+    def test_transfer_retries_when_upsert_loses_race(self):
+        # Arrange
+        repository = PortfolioRepository(MagicMock())
+        repository.collection = Mock()
+        repository.collection.update_one.side_effect = [DuplicateKeyError("duplicate user_id"), Mock()]
+
+        # Action
+        repository.apply_trade(self._trade(ActionType.TRANSFER, symbol="TRANSFER", price=3000.0, quantity=1))
 
         # Assertion
-        assert result == expected_result
+        first, second = repository.collection.update_one.call_args_list
+        assert first.kwargs["upsert"] is True
+        assert "upsert" not in second.kwargs
+        assert first.args == second.args
 
-    def test_get_non_existent_portfolio(self, portfolio_repository):
+    def test_buy_new_portfolio(self, portfolio_repository):
+        # Action
+        portfolio_repository.apply_trade(self._trade(ActionType.BUY, symbol="TSLA", price=2000.0, quantity=2))
+
+        # Assertion
+        result = portfolio_repository.get(user_id=1)
+        assert result.cash_balance == -4000.0
+        assert result.total_money_in == 0.0
+        assert result.holdings == [Holding(symbol="TSLA", shares=2, stock_type=StockType.STOCKS, total_cost=4000.0)]
+
+    def test_buy_new_holding(self, portfolio_repository):
         # Arrange
-        created_at = datetime.now(timezone.utc)
-        portfolio = Portfolio(
-            user_id=1,
+        self._insert_portfolio(
+            portfolio_repository,
+            cash_balance=5000.0,
+            total_money_in=5000.0,
+            holdings=[Holding(symbol="SPY", shares=1, stock_type=StockType.ETF, total_cost=400.0)],
+        )
+
+        # Action
+        portfolio_repository.apply_trade(self._trade(ActionType.BUY, symbol="TSLA", price=2000.0, quantity=2))
+
+        # Assertion
+        result = portfolio_repository.get(user_id=1)
+        assert result.cash_balance == 1000.0
+        assert result.holdings == [
+            Holding(symbol="SPY", shares=1, stock_type=StockType.ETF, total_cost=400.0),
+            Holding(symbol="TSLA", shares=2, stock_type=StockType.STOCKS, total_cost=4000.0),
+        ]
+
+    def test_buy_existing_holding(self, portfolio_repository):
+        # Arrange
+        self._insert_portfolio(
+            portfolio_repository,
             cash_balance=1000.0,
             total_money_in=1000.0,
-            holdings=[Holding(symbol="AAPL", shares=10, stock_type=StockType.STOCKS, total_cost=1500.0)],
-            created_at=created_at,
-            updated_at=created_at,
+            holdings=[Holding(symbol="AAPL", shares=5, stock_type=StockType.STOCKS, total_cost=750.0)],
         )
-        portfolio_repository.collection.insert_one(portfolio.as_dict())
 
         # Action
-        result = portfolio_repository.get(user_id=999)
+        portfolio_repository.apply_trade(self._trade(ActionType.BUY, price=150.0, quantity=3))
 
         # Assertion
-        assert result is None
+        result = portfolio_repository.get(user_id=1)
+        assert result.cash_balance == 550.0  # 1000 - (150 * 3)
+        assert result.holdings == [Holding(symbol="AAPL", shares=8, stock_type=StockType.STOCKS, total_cost=1200.0)]
+
+    def test_sell_existing_holding_partial(self, portfolio_repository):
+        # Arrange
+        self._insert_portfolio(
+            portfolio_repository,
+            cash_balance=1000.0,
+            total_money_in=1000.0,
+            holdings=[Holding(symbol="AAPL", shares=5, stock_type=StockType.STOCKS, total_cost=750.0)],
+        )
+
+        # Action
+        portfolio_repository.apply_trade(self._trade(ActionType.SELL, price=200.0, quantity=2))
+
+        # Assertion
+        result = portfolio_repository.get(user_id=1)
+        assert result.cash_balance == 1400.0  # 1000 + (200 * 2)
+        assert result.total_money_in == 1000.0
+        assert result.holdings == [
+            Holding(symbol="AAPL", shares=3, stock_type=StockType.STOCKS, total_cost=450.0)  # 750 - (150 * 2)
+        ]
+
+    def test_sell_symbol_is_not_read_as_a_path(self, portfolio_repository):
+        # Arrange
+        self._insert_portfolio(
+            portfolio_repository,
+            cash_balance=1000.0,
+            total_money_in=1000.0,
+            holdings=[
+                Holding(symbol="AAPL", shares=5, stock_type=StockType.STOCKS, total_cost=750.0),
+                Holding(symbol="$$holding.symbol", shares=5, stock_type=StockType.STOCKS, total_cost=500.0),
+            ],
+        )
+
+        # Action
+        portfolio_repository.apply_trade(self._trade(ActionType.SELL, symbol="$$holding.symbol", price=100.0))
+
+        # Assertion
+        result = portfolio_repository.get(user_id=1)
+        assert result.holdings == [
+            Holding(symbol="AAPL", shares=5, stock_type=StockType.STOCKS, total_cost=750.0),
+            Holding(symbol="$$holding.symbol", shares=3, stock_type=StockType.STOCKS, total_cost=300.0),
+        ]
+
+    def test_sell_existing_holding_all_shares(self, portfolio_repository):
+        # Arrange
+        self._insert_portfolio(
+            portfolio_repository,
+            cash_balance=1000.0,
+            total_money_in=1000.0,
+            holdings=[
+                Holding(symbol="AAPL", shares=5, stock_type=StockType.STOCKS, total_cost=750.0),
+                Holding(symbol="SPY", shares=1, stock_type=StockType.ETF, total_cost=400.0),
+            ],
+        )
+
+        # Action
+        portfolio_repository.apply_trade(self._trade(ActionType.SELL, price=300.0, quantity=5))
+
+        # Assertion
+        result = portfolio_repository.get(user_id=1)
+        assert result.cash_balance == 2500.0  # 1000 + (300 * 5)
+        assert result.holdings == [Holding(symbol="SPY", shares=1, stock_type=StockType.ETF, total_cost=400.0)]
+
+    def test_sell_non_existent_holding(self, portfolio_repository):
+        # Arrange
+        self._insert_portfolio(portfolio_repository, cash_balance=1000.0, total_money_in=1000.0, holdings=[])
+
+        # Act/Assertion
+        with pytest.raises(Exception, match="Can not sell non-exist stock"):
+            portfolio_repository.apply_trade(self._trade(ActionType.SELL))
+        assert portfolio_repository.get(user_id=1).cash_balance == 1000.0
@@ -0,0 +1,165 @@
+import pytest
+from datetime import datetime, timezone
+from domain.portfolio import Portfolio, Holding, apply_trades
+from domain.stock import CreateStock, CreateBatchError
+from domain.enum import ActionType, StockType
+
+
+def _trade(action_type, symbol="AAPL", price=100.0, quantity=10):
+    return CreateStock(
+        user_id=1,
+        symbol=symbol,
+        price=price,
+        quantity=quantity,
+        action_type=action_type,
+        stock_type=StockType.STOCKS,
+        created_at=datetime.now(timezone.utc),
+    )
+
+
+def _portfolio(*symbols):
+    created_at = datetime.now(timezone.utc)
+    return Portfolio(
+        user_id=1,
+        cash_balance=0.0,
+        total_money_in=0.0,
+        holdings=[
+            Holding(symbol=symbol, shares=10, stock_type=StockType.STOCKS, total_cost=1000.0) for symbol in symbols
+        ],
+        created_at=created_at,
+        updated_at=created_at,
+    )
+
+
+class TestPortfolioApplyTrade:
+    def test_get_holding(self):
+        # Arrange
+        portfolio = _portfolio("AAPL", "SPY")
+
+        # Act/Assert
+        assert portfolio.get_holding("SPY") is portfolio.holdings[1]
+        assert portfolio.get_holding("TSLA") is None
+
+    def test_buy_new_and_existing_holding(self):
+        # Arrange
+        portfolio = _portfolio("AAPL")
+
+        # Act
+        portfolio.apply_trade(_trade(ActionType.BUY, symbol="SPY", price=400.0, quantity=1))
+        portfolio.apply_trade(_trade(ActionType.BUY, symbol="AAPL", price=200.0, quantity=5))
+
+        # Assert
+        assert [(h.symbol, h.shares, h.total_cost) for h in portfolio.holdings] == [
+            ("AAPL", 15, 2000.0),
+            ("SPY", 1, 400.0),
+        ]
+        assert portfolio.get_holding("SPY") is portfolio.holdings[1]
+        assert portfolio.cash_balance == -1400.0
+
+    def test_partial_sell_keeps_average_cost(self):
+        # Arrange
+        portfolio = _portfolio("AAPL")
+
+        # Act
+        portfolio.apply_trade(_trade(ActionType.SELL, price=150.0, quantity=4))
+
+        # Assert
+        assert portfolio.get_holding("AAPL").shares == 6
+        assert portfolio.get_holding("AAPL").total_cost == 600.0
+        assert portfolio.cash_balance == 600.0
+
+    @pytest.mark.parametrize("sold", ["AAPL", "SPY", "TSLA"])
+    def test_full_sell_removes_holding_and_keeps_order(self, sold):
+        # Arrange
+        portfolio = _portfolio("AAPL", "SPY", "TSLA")
+
+        # Act
+        portfolio.apply_trade(_trade(ActionType.SELL, symbol=sold, quantity=10))
+
+        # Assert
+        remaining = [symbol for symbol in ("AAPL", "SPY", "TSLA") if symbol != sold]
+        assert [h.symbol for h in portfolio.holdings] == remaining
+        assert portfolio.as_dict()["holdings"] == [h.as_dict() for h in portfolio.holdings]
+        assert portfolio.get_holding(sold) is None
+        for symbol in remaining:
+            assert portfolio.get_holding(symbol).symbol == symbol
+
+    def test_buy_after_full_sell(self):
+        # Arrange
+        portfolio = _portfolio("AAPL", "SPY")
+        portfolio.apply_trade(_trade(ActionType.SELL, symbol="AAPL", quantity=10))
+
+        # Act
+        portfolio.apply_trade(_trade(ActionType.BUY, symbol="AAPL", price=50.0, quantity=2))
+
+        # Assert
+        assert [(h.symbol, h.shares) for h in portfolio.holdings] == [("SPY", 10), ("AAPL", 2)]
+        assert portfolio.get_holding("AAPL").total_cost == 100.0
+
+    def test_sell_non_existent_holding(self):
+        # Arrange
+        portfolio = _portfolio("AAPL")
+
+        # Act/Assert
+        with pytest.raises(ValueError, match="Can not sell non-exist stock"):
+            portfolio.apply_trade(_trade(ActionType.SELL, symbol="TSLA"))
+
+    def test_index_is_not_serialized_or_compared(self):
+        # Arrange
+        portfolio = _portfolio("AAPL")
+
+        # Act
+        result = Portfolio.from_dict(portfolio.as_dict())
+
+        # Assert
+        assert "_by_symbol" not in portfolio.as_dict()
+        assert result == portfolio
+        assert result.get_holding("AAPL") == portfolio.get_holding("AAPL")
+
+
+    def test_stored_state_is_remembered_from_dict(self):
+        # Arrange
+        portfolio = _portfolio("AAPL")
+        portfolio.cash_balance = 100.0
+
+        # Act
+        result = Portfolio.from_dict(portfolio.as_dict())
+        result.apply_trade(_trade(ActionType.TRANSFER, quantity=1))
+
+        # Assert
+        assert portfolio.stored_state() is None
+        assert result.stored_state() == (portfolio.updated_at, 100.0, 0.0)
+        assert result.cash_balance == 200.0
+
+class TestApplyTrades:
+    def test_rejected_trades_are_reported_by_index(self):
+        # Arrange
+        portfolio = _portfolio("AAPL")
+        trades = [
+            _trade(ActionType.SELL, symbol="TSLA"),
+            _trade(ActionType.BUY, symbol="TSLA", quantity=1),
+            _trade(ActionType.SELL, symbol="TSLA", quantity=1),
+        ]
+
+        # Act
+        accepted, errors = apply_trades({1: portfolio}, trades)
+
+        # Assert
+        assert accepted == [(1, trades[1]), (2, trades[2])]
+        assert errors == [CreateBatchError(index=0, message="Can not sell non-exist stock")]
+        assert portfolio.get_holding("TSLA") is None
+
+    def test_skips_users_without_portfolio(self):
+        # Arrange
+        portfolio = _portfolio()
+        other_user_trade = _trade(ActionType.TRANSFER)
+        other_user_trade.user_id = 2
+        trades = [other_user_trade, _trade(ActionType.TRANSFER, quantity=1)]
+
+        # Act
+        accepted, errors = apply_trades({1: portfolio}, trades)
+
+        # Assert
+        assert accepted == [(1, trades[1])]
+        assert errors == []
+        assert portfolio.cash_balance == 100.0
@@ -0,0 +1,145 @@
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock, patch
+from adapters.price import (
+    YFinancePriceProvider,
+    PolygonPriceProvider,
+    InMemoryPriceProvider,
+    ExecutorPriceProvider,
+    AsyncInMemoryPriceProvider,
+)
+from domain.enum import StockType
+
+
+class TestYFinancePriceProvider:
+    @patch("adapters.price.yf.Ticker")
+    def test_get_price_stocks(self, mock_yf_ticker):
+        # Arrange
+        mock_yf_ticker.return_value.info = {"currentPrice": 150.0, "navPrice": 149.0}
+
+        # Act
+        result = YFinancePriceProvider().get_price("aapl", StockType.STOCKS)
+
+        # Assert
+        mock_yf_ticker.assert_called_once_with("AAPL")
+        assert result == 150.0
+
+    @patch("adapters.price.yf.Ticker")
+    def test_get_price_etf(self, mock_yf_ticker):
+        # Arrange
+        mock_yf_ticker.return_value.info = {"currentPrice": 401.0, "navPrice": 400.0}
+
+        # Act
+        result = YFinancePriceProvider().get_price("SPY", StockType.ETF)
+
+        # Assert
+        assert result == 400.0
+
+    @patch("adapters.price.yf.Ticker")
+    def test_get_price_missing_price_field(self, mock_yf_ticker):
+        # Arrange
+        mock_yf_ticker.return_value.info = {}
+
+        # Act
+        result = YFinancePriceProvider().get_price("AAPL", StockType.STOCKS)
+
+        # Assert
+        assert result is None
+
+
+class TestPolygonPriceProvider:
+    @patch("adapters.price.RESTClient")
+    def test_get_price(self, mock_rest_client):
+        # Arrange
+        mock_rest_client.return_value.get_previous_close_agg.return_value = [Mock(close=150.0)]
+        provider = PolygonPriceProvider(api_key="key")
+
+        # Act
+        result = provider.get_price("aapl", StockType.STOCKS)
+
+        # Assert
+        mock_rest_client.assert_called_once_with(api_key="key")
+        mock_rest_client.return_value.get_previous_close_agg.assert_called_once_with("AAPL")
+        assert result == 150.0
+
+    @patch("adapters.price.RESTClient")
+    def test_get_price_no_result(self, mock_rest_client):
+        # Arrange
+        mock_rest_client.return_value.get_previous_close_agg.return_value = []
+        provider = PolygonPriceProvider(api_key="key")
+
+        # Act
+        result = provider.get_price("INVALID", StockType.STOCKS)
+
+        # Assert
+        assert result is None
+
+
+class TestInMemoryPriceProvider:
+    def test_get_price_known_symbol(self):
+        # Arrange
+        provider = InMemoryPriceProvider(prices={"aapl": 150.0})
+
+        # Act
+        result = provider.get_price("AAPL", StockType.STOCKS)
+
+        # Assert
+        assert result == 150.0
+
+    def test_get_price_unknown_symbol_is_deterministic(self):
+        # Arrange
+        provider = InMemoryPriceProvider()
+
+        # Act
+        first = provider.get_price("XYZ", StockType.STOCKS)
+        second = InMemoryPriceProvider().get_price("XYZ", StockType.ETF)
+
+        # Assert
+        assert first == second
+        assert first > 0
+
+    def test_from_file(self, tmp_path):
+        # Arrange
+        price_file = tmp_path / "prices.json"
+        price_file.write_text(json.dumps({"SPY": 400.0}))
+
+        # Act
+        provider = InMemoryPriceProvider.from_file(str(price_file))
+
+        # Assert
+        assert provider.get_price("SPY", StockType.ETF) == 400.0
+
+
+class TestExecutorPriceProvider:
+    def test_get_price_runs_on_executor(self):
+        # Arrange
+        provider = Mock()
+        provider.get_price.return_value = 150.0
+
+        # Act
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            result = asyncio.run(ExecutorPriceProvider(provider, executor).get_price("AAPL", StockType.STOCKS))
+
+        # Assert
+        assert result == 150.0
+        provider.get_price.assert_called_once_with("AAPL", StockType.STOCKS)
+
+
+class TestAsyncInMemoryPriceProvider:
+    def test_latency_is_awaited_concurrently(self):
+        # Arrange
+        provider = AsyncInMemoryPriceProvider(InMemoryPriceProvider(prices={"AAPL": 150.0}, latency=0.1))
+
+        async def run():
+            return await asyncio.gather(*(provider.get_price("AAPL", StockType.STOCKS) for _ in range(10)))
+
+        # Act
+        start = time.monotonic()
+        results = asyncio.run(run())
+        elapsed = time.monotonic() - start
+
+        # Assert
+        assert results == [150.0] * 10
+        assert elapsed < 0.5
@@ -0,0 +1,78 @@
+import asyncio
+import pytest
+from threading import Event
+from unittest.mock import AsyncMock, Mock
+from usecase.refresher import AsyncPriceRefresher, PriceRefresher
+
+
+class TestPriceRefresher:
+    def test_refreshes_periodically_until_stopped(self):
+        # Arrange
+        refreshed = Event()
+        stock_usecase = Mock()
+        stock_usecase.refresh_hot_prices.side_effect = lambda refresh_ahead: refreshed.set() or 1
+        refresher = PriceRefresher(stock_usecase, interval=0.01, refresh_ahead=30)
+
+        # Act
+        refresher.start()
+        assert refreshed.wait(5)
+        refresher.stop(timeout=5)
+        calls = stock_usecase.refresh_hot_prices.call_count
+
+        # Assert
+        stock_usecase.refresh_hot_prices.assert_called_with(refresh_ahead=30)
+        assert refresher._thread is None
+        assert stock_usecase.refresh_hot_prices.call_count == calls
+
+    def test_keeps_running_after_refresh_error(self, caplog):
+        # Arrange
+        refreshed = Event()
+        stock_usecase = Mock()
+
+        def refresh(refresh_ahead):
+            if stock_usecase.refresh_hot_prices.call_count == 1:
+                raise Exception("API error")
+            refreshed.set()
+            return 1
+
+        stock_usecase.refresh_hot_prices.side_effect = refresh
+        refresher = PriceRefresher(stock_usecase, interval=0.01, refresh_ahead=30)
+
+        # Act
+        refresher.start()
+        result = refreshed.wait(5)
+        refresher.stop(timeout=5)
+
+        # Assert
+        assert result
+        assert stock_usecase.refresh_hot_prices.call_count >= 2
+        assert [(r.levelname, r.getMessage()) for r in caplog.records] == [("ERROR", "Failed to refresh hot prices")]
+
+    def test_invalid_interval(self):
+        # Act/Assert
+        with pytest.raises(ValueError, match="interval must be greater than 0"):
+            PriceRefresher(Mock(), interval=0, refresh_ahead=30)
+
+
+class TestAsyncPriceRefresher:
+    def test_refreshes_periodically_until_stopped(self, caplog):
+        # Arrange
+        stock_usecase = Mock()
+        stock_usecase.refresh_hot_prices = AsyncMock(side_effect=[Exception("API error"), 1, 1, 1, 1, 1])
+        refresher = AsyncPriceRefresher(stock_usecase, interval=0.01, refresh_ahead=30)
+
+        async def run():
+            refresher.start()
+            while stock_usecase.refresh_hot_prices.await_count < 2:
+                await asyncio.sleep(0.01)
+            await refresher.stop()
+            return stock_usecase.refresh_hot_prices.await_count
+
+        # Act
+        calls = asyncio.run(run())
+
+        # Assert
+        stock_usecase.refresh_hot_prices.assert_awaited_with(refresh_ahead=30)
+        assert refresher._task is None
+        assert stock_usecase.refresh_hot_prices.await_count == calls
+        assert ("ERROR", "Failed to refresh hot prices") in [(r.levelname, r.getMessage()) for r in caplog.records]
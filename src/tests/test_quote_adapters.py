@@ -0,0 +1,87 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from pymongo import MongoClient
+from adapters.quote import QuoteRepository
+from domain.stock import Quote
+from domain.enum import StockType
+
+
+@pytest.fixture(scope="module")
+def mongo_client():
+    client = MongoClient("mongodb://localhost:27015")
+    yield client
+    client.drop_database("test_stock_db")
+    client.close()
+
+
+@pytest.fixture(scope="module")
+def quote_repository(mongo_client):
+    repository = QuoteRepository(mongo_client, database_name="test_stock_db")
+    repository.ensure_indexes()
+    return repository
+
+
+@pytest.fixture(scope="function", autouse=True)
+def clear_collection(quote_repository):
+    quote_repository.collection.delete_many({})
+
+
+class TestQuoteRepository:
+    def test_save_new_quote(self, quote_repository):
+        # Arrange
+        fetched_at = datetime.now(timezone.utc)
+        quote = Quote(symbol="aapl", stock_type=StockType.STOCKS, price=150.0, fetched_at=fetched_at)
+
+        # Action
+        quote_repository.save(quote)
+
+        # Assertion
+        result = quote_repository.collection.find_one({"symbol": "AAPL"})
+        assert result["stock_type"] == StockType.STOCKS.value
+        assert result["price"] == 150.0
+
+    def test_save_existing_quote(self, quote_repository):
+        # Arrange
+        fetched_at = datetime.now(timezone.utc)
+        quote_repository.save(Quote(symbol="AAPL", stock_type=StockType.STOCKS, price=150.0, fetched_at=fetched_at))
+
+        # Action
+        quote_repository.save(Quote(symbol="AAPL", stock_type=StockType.STOCKS, price=151.0, fetched_at=fetched_at))
+
+        # Assertion
+        assert quote_repository.collection.count_documents({}) == 1
+        assert quote_repository.collection.find_one({"symbol": "AAPL"})["price"] == 151.0
+
+    def test_get_many(self, quote_repository):
+        # Arrange
+        now = datetime.now(timezone.utc)
+        quote_repository.save(Quote(symbol="AAPL", stock_type=StockType.STOCKS, price=150.0, fetched_at=now))
+        quote_repository.save(Quote(symbol="AAPL", stock_type=StockType.ETF, price=149.0, fetched_at=now))
+        quote_repository.save(
+            Quote(symbol="SPY", stock_type=StockType.ETF, price=400.0, fetched_at=now - timedelta(seconds=120))
+        )
+
+        # Action
+        result = quote_repository.get_many([("AAPL", StockType.STOCKS), ("SPY", StockType.ETF)], max_age=60)
+
+        # Assertion
+        assert len(result) == 1
+        assert result[0].symbol == "AAPL"
+        assert result[0].stock_type == StockType.STOCKS
+        assert result[0].price == 150.0
+        assert result[0].fetched_at.tzinfo == timezone.utc
+
+    def test_get_many_empty(self, quote_repository):
+        # Action
+        result = quote_repository.get_many([], max_age=60)
+
+        # Assertion
+        assert result == []
+
+    def test_ensure_indexes(self, quote_repository):
+        # Action
+        indexes = quote_repository.collection.index_information()
+
+        # Assertion
+        assert indexes["symbol_1_stock_type_1"]["unique"] is True
+        assert indexes["fetched_at_1"]["expireAfterSeconds"] == quote_repository.retention_seconds
@@ -0,0 +1,129 @@
+import asyncio
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event
+from unittest.mock import Mock
+from utils.singleflight import AsyncSingleFlight, SingleFlight, SingleFlightStats
+
+
+class TestSingleFlight:
+    def test_submitted_calls_share_one_future(self):
+        # Arrange
+        flight = SingleFlight()
+        release = Event()
+        fn = Mock(side_effect=lambda symbol: release.wait(5) and symbol)
+
+        # Act
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            futures = [flight.submit("AAPL", executor, fn, "AAPL") for _ in range(3)]
+            other = flight.submit("SPY", executor, fn, "SPY")
+            release.set()
+            results = [future.result() for future in futures] + [other.result()]
+
+        # Assert
+        assert fn.call_count == 2
+        assert futures[0] is futures[1] is futures[2]
+        assert results == ["AAPL", "AAPL", "AAPL", "SPY"]
+        assert flight.stats() == SingleFlightStats(executed=2, coalesced=2, in_flight=0)
+
+    def test_error_is_shared_with_waiting_callers(self):
+        # Arrange
+        flight = SingleFlight()
+        release = Event()
+
+        def fetch():
+            release.wait(5)
+            raise ValueError("API error")
+
+        # Act
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            leader = flight.submit("AAPL", executor, fetch)
+            follower = flight.submit("AAPL", executor, fetch)
+            release.set()
+
+            # Assert
+            assert follower is leader
+            with pytest.raises(ValueError, match="API error"):
+                follower.result()
+
+    def test_sequential_calls_are_not_coalesced(self):
+        # Arrange
+        flight = SingleFlight()
+        fn = Mock(side_effect=[150.0, 151.0])
+
+        # Act
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            first = flight.submit("AAPL", executor, fn).result()
+            # The key is forgotten by a done callback, which may run just after result() returns
+            while flight.stats().in_flight:
+                time.sleep(0.01)
+            second = flight.submit("AAPL", executor, fn).result()
+
+        # Assert
+        assert (first, second) == (150.0, 151.0)
+        assert flight.stats() == SingleFlightStats(executed=2, coalesced=0, in_flight=0)
+
+
+class TestAsyncSingleFlight:
+    def test_concurrent_calls_share_one_execution(self):
+        # Arrange
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return 150.0
+
+        async def run():
+            return await asyncio.gather(*(flight.do("AAPL", fetch) for _ in range(5)))
+
+        # Act
+        results = asyncio.run(run())
+
+        # Assert
+        assert len(calls) == 1
+        assert results == [150.0] * 5
+        assert flight.stats() == SingleFlightStats(executed=1, coalesced=4, in_flight=0)
+
+    def test_error_is_shared_with_waiting_callers(self):
+        # Arrange
+        flight = AsyncSingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.01)
+            raise Exception("API error")
+
+        async def run():
+            return await asyncio.gather(*(flight.do("AAPL", fetch) for _ in range(3)), return_exceptions=True)
+
+        # Act
+        results = asyncio.run(run())
+
+        # Assert
+        assert [str(e) for e in results] == ["API error"] * 3
+        assert flight.stats().in_flight == 0
+
+    def test_cancelled_caller_does_not_cancel_the_call(self):
+        # Arrange
+        flight = AsyncSingleFlight()
+        finished = []
+
+        async def fetch():
+            await asyncio.sleep(0.05)
+            finished.append(1)
+            return 150.0
+
+        async def run():
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(flight.do("AAPL", fetch), timeout=0.01)
+            return await flight.do("AAPL", fetch)
+
+        # Act
+        result = asyncio.run(run())
+
+        # Assert
+        assert result == 150.0
+        assert finished == [1]
+        assert flight.stats() == SingleFlightStats(executed=1, coalesced=1, in_flight=0)
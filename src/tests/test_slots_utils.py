@@ -0,0 +1,88 @@
+import pytest
+from dataclasses import dataclass, field, fields
+from datetime import datetime, timezone
+from typing import List
+from utils.slots import slotted
+from domain.portfolio import Holding, Portfolio, PortfolioInfo
+from domain.stock import CreateStock, Stock, StockInfo
+from domain.enum import StockType
+
+
+@slotted
+@dataclass
+class Point:
+    x: int
+    y: int = 0
+    tags: List[str] = field(default_factory=list)
+
+    def __post_init__(self):
+        if self.x < 0:
+            raise ValueError("x cannot be negative")
+
+    def norm(self) -> int:
+        return abs(self.x) + abs(self.y)
+
+
+@slotted(extra_slots=("_cache",))
+@dataclass
+class Cached:
+    value: int
+
+    def __post_init__(self):
+        self._cache = self.value * 2
+
+
+class TestSlotted:
+    def test_instances_have_no_dict(self):
+        # Act
+        point = Point(x=1)
+
+        # Assert
+        assert Point.__slots__ == ("x", "y", "tags")
+        assert not hasattr(point, "__dict__")
+        with pytest.raises(AttributeError):
+            point.z = 1
+
+    def test_dataclass_behaviour_is_kept(self):
+        # Act
+        point = Point(x=1, y=2)
+
+        # Assert
+        assert point == Point(1, 2, [])
+        assert point.norm() == 3
+        assert Point(x=1).tags is not Point(x=1).tags
+        assert [f.name for f in fields(point)] == ["x", "y", "tags"]
+        assert repr(point) == "Point(x=1, y=2, tags=[])"
+
+    def test_extra_slots(self):
+        # Act
+        cached = Cached(value=2)
+
+        # Assert
+        assert Cached.__slots__ == ("value", "_cache")
+        assert cached._cache == 4
+        assert [f.name for f in fields(cached)] == ["value"]
+        assert cached == Cached(value=2)
+
+    def test_validation_is_kept(self):
+        # Act/Assert
+        with pytest.raises(ValueError, match="x cannot be negative"):
+            Point(x=-1)
+
+    @pytest.mark.parametrize("cls", [Stock, CreateStock, Holding, Portfolio, StockInfo, PortfolioInfo])
+    def test_domain_classes_are_slotted(self, cls):
+        # Assert
+        assert "__slots__" in cls.__dict__
+        assert "__dict__" not in cls.__dict__
+
+    def test_domain_validation_is_kept(self):
+        # Act/Assert
+        with pytest.raises(ValueError, match="total_money_in cannot be negative"):
+            Portfolio(
+                user_id=1,
+                cash_balance=0.0,
+                total_money_in=-1.0,
+                holdings=[Holding(symbol="AAPL", shares=1, stock_type=StockType.STOCKS, total_cost=1.0)],
+                created_at=datetime.now(timezone.utc),
+                updated_at=datetime.now(timezone.utc),
+            )
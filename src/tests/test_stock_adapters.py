@@ -1,10 +1,10 @@
 import pytest
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from pymongo import MongoClient
 from unittest.mock import ANY
 from bson.objectid import ObjectId
 from adapters.stock import StockRepository
-from domain.stock import CreateStock, Stock
+from domain.stock import CreateStock, ListStockQuery, Stock
 from domain.enum import ActionType, StockType
 
 
@@ -18,7 +18,18 @@ def mongo_client():
 
 @pytest.fixture(scope="module")
 def stock_repository(mongo_client):
-    return StockRepository(mongo_client, database_name="test_stock_db")
+    repository = StockRepository(mongo_client, database_name="test_stock_db")
+    repository.ensure_indexes()
+    return repository
+
+
+def _plan_stages(plan):
+    if isinstance(plan, list):
+        return [stage for item in plan for stage in _plan_stages(item)]
+    if not isinstance(plan, dict):
+        return []
+    stages = [plan["stage"]] if "stage" in plan else []
+    return stages + [stage for value in plan.values() for stage in _plan_stages(value)]
 
 
 @pytest.fixture(scope="function", autouse=True)
@@ -119,6 +130,33 @@ class TestStockRepository:
         # Compare the sets
         assert expected_set == actual_set, f"Expected {expected_set}, but got {actual_set}"
 
+    def test_create_many_stocks(self, stock_repository):
+        # Arrange
+        created_at = datetime.now(timezone.utc)
+        stocks = [
+            CreateStock(
+                user_id=1,
+                symbol=symbol,
+                price=100.0,
+                quantity=10,
+                action_type=ActionType.BUY,
+                stock_type=StockType.STOCKS,
+                created_at=created_at,
+            )
+            for symbol in ("TSLA", "GOOGL", "AAPL")
+        ]
+
+        # Action
+        stock_ids = stock_repository.create_many(stocks)
+
+        # Assertion
+        assert [stock_repository.collection.find_one({"_id": ObjectId(i)})["symbol"] for i in stock_ids] == [
+            "TSLA",
+            "GOOGL",
+            "AAPL",
+        ]
+        assert stock_repository.create_many([]) == []
+
     def test_list_stocks(self, stock_repository):
         # Create mock stock data
         created_at = datetime.now(timezone.utc)
@@ -189,7 +227,7 @@ class TestStockRepository:
         ]
 
         # Action
-        result = stock_repository.list(1)
+        result = [Stock.from_dict(stock) for stock in stock_repository.list_dicts(ListStockQuery(user_id=1)).stocks]
 
         # Assertions
         assert len(result) == 2, f"Expected 2 stocks, but got {len(result)}"
@@ -251,9 +289,186 @@ class TestStockRepository:
         stock_repository.collection.insert_many([mock_stock1, mock_stock2])
 
         # Query for a user_id with no stock data
-        result = stock_repository.list(999)  # Non-existent user_id
+        page = stock_repository.list_dicts(ListStockQuery(user_id=999))  # Non-existent user_id
+        result = page.stocks
 
         # Assertions
         assert len(result) == 0, f"Expected empty list, but got {len(result)} stocks"
         assert isinstance(result, list), "Result should be a list"
-        assert all(isinstance(stock, Stock) for stock in result), "All results should be Stock objects (if any)"
+        assert page.next_cursor is None
+
+
+class TestStockRepositoryListPage:
+    @pytest.fixture
+    def stock_ids(self, stock_repository):
+        # Five trades one day apart plus two sharing a timestamp, so the _id tie-break is exercised
+        created_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        stock_docs = [
+            {
+                "user_id": 1,
+                "symbol": symbol,
+                "price": 100.0,
+                "quantity": 1,
+                "action_type": action_type.value,
+                "stock_type": StockType.STOCKS.value,
+                "created_at": created_at + timedelta(days=day),
+                "updated_at": created_at + timedelta(days=day),
+            }
+            for symbol, action_type, day in [
+                ("AAPL", ActionType.BUY, 0),
+                ("TSLA", ActionType.BUY, 1),
+                ("AAPL", ActionType.SELL, 2),
+                ("TSLA", ActionType.SELL, 2),
+                ("AAPL", ActionType.BUY, 3),
+            ]
+        ]
+        result = stock_repository.collection.insert_many(stock_docs)
+        stock_repository.collection.insert_one({**stock_docs[0], "_id": ObjectId(), "user_id": 2})
+        return [str(inserted_id) for inserted_id in result.inserted_ids]
+
+    def test_pages_newest_first(self, stock_repository, stock_ids):
+        # Action
+        pages = [stock_repository.list_dicts(ListStockQuery(user_id=1, page_size=2))]
+        while pages[-1].next_cursor:
+            pages.append(
+                stock_repository.list_dicts(ListStockQuery(user_id=1, page_size=2, cursor=pages[-1].next_cursor))
+            )
+
+        # Assertion
+        assert [[stock["id"] for stock in page.stocks] for page in pages] == [
+            [stock_ids[4], stock_ids[3]],
+            [stock_ids[2], stock_ids[1]],
+            [stock_ids[0]],
+        ]
+        assert pages[-1].next_cursor is None
+
+    def test_exact_last_page_has_no_cursor(self, stock_repository, stock_ids):
+        # Action
+        page = stock_repository.list_dicts(ListStockQuery(user_id=1, page_size=5))
+
+        # Assertion
+        assert len(page.stocks) == 5
+        assert page.next_cursor is None
+
+    def test_without_page_size_lists_everything(self, stock_repository, stock_ids):
+        # Action
+        page = stock_repository.list_dicts(ListStockQuery(user_id=1, page_size=None))
+
+        # Assertion
+        assert [stock["id"] for stock in page.stocks] == stock_ids[::-1]
+        assert page.next_cursor is None
+
+    def test_filters(self, stock_repository, stock_ids):
+        # Arrange
+        query = ListStockQuery(
+            user_id=1,
+            symbol="AAPL",
+            action_type=ActionType.BUY,
+            start_date=datetime(2024, 1, 1, tzinfo=timezone.utc),
+            end_date=datetime(2024, 1, 4, tzinfo=timezone.utc),
+        )
+
+        # Action
+        page = stock_repository.list_dicts(query)
+
+        # Assertion
+        assert [stock["id"] for stock in page.stocks] == [stock_ids[0]]
+
+    def test_list_dicts_matches_iter_pages(self, stock_repository, stock_ids):
+        # Arrange
+        stock_repository.collection.update_many({}, {"$set": {"note": "not listed"}})
+
+        # Action
+        dict_pages = [stock_repository.list_dicts(ListStockQuery(user_id=1, page_size=3))]
+        dict_pages.append(
+            stock_repository.list_dicts(ListStockQuery(user_id=1, page_size=3, cursor=dict_pages[0].next_cursor))
+        )
+
+        # Assertion
+        pages = list(stock_repository.iter_pages(ListStockQuery(user_id=1, page_size=3)))
+        assert [p.next_cursor for p in dict_pages] == [p.next_cursor for p in pages]
+        assert [[d["id"] for d in p.stocks] for p in dict_pages] == [[s.id for s in p.stocks] for p in pages]
+        assert dict_pages[0].stocks[0] == {
+            "id": stock_ids[4],
+            "user_id": 1,
+            "symbol": "AAPL",
+            "price": 100.0,
+            "quantity": 1,
+            "action_type": ActionType.BUY.value,
+            "stock_type": StockType.STOCKS.value,
+            "created_at": datetime(2024, 1, 4),
+            "updated_at": datetime(2024, 1, 4),
+        }
+
+    def test_iter_pages_streams_every_match(self, stock_repository, stock_ids):
+        # Action
+        pages = list(stock_repository.iter_pages(ListStockQuery(user_id=1, page_size=2)))
+
+        # Assertion
+        assert [[stock.id for stock in page.stocks] for page in pages] == [
+            [stock_ids[4], stock_ids[3]],
+            [stock_ids[2], stock_ids[1]],
+            [stock_ids[0]],
+        ]
+        # Every cursor but the last resumes right after its page, like List
+        resumed = stock_repository.list_dicts(ListStockQuery(user_id=1, page_size=2, cursor=pages[0].next_cursor))
+        assert [Stock.from_dict(stock) for stock in resumed.stocks] == pages[1].stocks
+        assert pages[-1].next_cursor is None
+
+    def test_iter_pages_with_filters(self, stock_repository, stock_ids):
+        # Action
+        pages = list(stock_repository.iter_pages(ListStockQuery(user_id=1, symbol="TSLA")))
+
+        # Assertion
+        assert [[stock.id for stock in page.stocks] for page in pages] == [[stock_ids[3], stock_ids[1]]]
+
+    def test_iter_pages_no_data(self, stock_repository):
+        # Action
+        pages = list(stock_repository.iter_pages(ListStockQuery(user_id=999)))
+
+        # Assertion
+        assert pages == []
+
+    def test_ensure_indexes(self, stock_repository):
+        # Action
+        stock_repository.ensure_indexes()  # idempotent
+        indexes = stock_repository.collection.index_information()
+
+        # Assertion
+        assert list(indexes["user_id_1_created_at_-1__id_-1"]["key"]) == [("user_id", 1), ("created_at", -1), ("_id", -1)]
+        assert list(indexes["user_id_1_symbol_1_created_at_-1__id_-1"]["key"]) == [
+            ("user_id", 1),
+            ("symbol", 1),
+            ("created_at", -1),
+            ("_id", -1),
+        ]
+
+    @pytest.mark.parametrize(
+        "query",
+        [
+            ListStockQuery(user_id=1),
+            ListStockQuery(user_id=1, symbol="AAPL"),
+            ListStockQuery(user_id=1, start_date=datetime(2024, 1, 2, tzinfo=timezone.utc)),
+        ],
+    )
+    def test_list_uses_index(self, stock_repository, stock_ids, query):
+        # Arrange
+        cursor = stock_repository.list_dicts(ListStockQuery(user_id=1, page_size=1)).next_cursor
+
+        # Action
+        plans = [
+            stock_repository._find(query).limit(query.page_size + 1).explain(),
+            stock_repository._find(ListStockQuery(user_id=1, cursor=cursor)).limit(query.page_size + 1).explain(),
+        ]
+
+        # Assertion
+        for plan in plans:
+            stages = _plan_stages(plan["queryPlanner"]["winningPlan"])
+            assert any("IXSCAN" in stage for stage in stages), stages
+            assert "COLLSCAN" not in stages
+
+    @pytest.mark.parametrize("cursor", ["not-base64!", "bm90LWpzb24=", "WzEsIm5vdC1hbi1pZCJd"])
+    def test_invalid_cursor(self, stock_repository, cursor):
+        # Act/Assert
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            stock_repository.list_dicts(ListStockQuery(user_id=1, cursor=cursor))
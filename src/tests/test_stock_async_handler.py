@@ -0,0 +1,278 @@
+import asyncio
+import grpc
+import proto.stock_pb2 as stock_pb2
+import proto.stock_pb2_grpc as stock_pb2_grpc
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, Mock
+from handler.stock_async import AsyncStockService
+from domain.stock import CreateBatchResult, Stock, StockDictPage, StockInfo, StockPage
+from domain.portfolio import PortfolioInfo, PortfolioSummary
+from domain.enum import ActionType, StockType
+
+
+def _call(stock_usecase, rpc, **service_options):
+    """Starts an in-process grpc.aio server around `stock_usecase` and runs `await rpc(stub)` against it."""
+
+    async def run():
+        server = grpc.aio.server()
+        stock_pb2_grpc.add_StockServiceServicer_to_server(AsyncStockService(stock_usecase, **service_options), server)
+        port = server.add_insecure_port("127.0.0.1:0")
+        await server.start()
+        try:
+            async with grpc.aio.insecure_channel(f"127.0.0.1:{port}") as channel:
+                return await rpc(stock_pb2_grpc.StockServiceStub(channel))
+        finally:
+            await server.stop(None)
+
+    return asyncio.run(run())
+
+
+def _rpc_error(stock_usecase, rpc) -> grpc.RpcError:
+    async def expect_error(stub):
+        try:
+            await rpc(stub)
+        except grpc.RpcError as e:
+            return e
+        raise AssertionError("expected an RpcError")
+
+    return _call(stock_usecase, expect_error)
+
+
+def _create_req(symbol="AAPL", action=stock_pb2.Action.BUY):
+    return stock_pb2.CreateReq(
+        user_id=1, symbol=symbol, price=150.0, quantity=2, action=action, stock_type=stock_pb2.StockType.STOCKS
+    )
+
+
+class TestAsyncStockServiceCreate:
+    def test_create(self):
+        # Arrange
+        stock_usecase = Mock()
+        stock_usecase.create = AsyncMock(return_value="123")
+
+        # Act
+        response = _call(stock_usecase, lambda stub: stub.Create(_create_req()))
+
+        # Assert
+        assert response.id == "123"
+        stock = stock_usecase.create.call_args.args[0]
+        assert (stock.symbol, stock.action_type) == ("AAPL", ActionType.BUY)
+
+    def test_create_invalid_input(self):
+        # Arrange
+        stock_usecase = Mock()
+        stock_usecase.create = AsyncMock()
+
+        # Act
+        error = _rpc_error(stock_usecase, lambda stub: stub.Create(_create_req(action=9)))
+
+        # Assert
+        assert error.code() == grpc.StatusCode.INVALID_ARGUMENT
+        assert error.details().startswith("Invalid input: Invalid action type: 9")
+        stock_usecase.create.assert_not_awaited()
+
+    def test_create_internal_error(self):
+        # Arrange
+        stock_usecase = Mock()
+        stock_usecase.create = AsyncMock(side_effect=Exception("Database error"))
+
+        # Act
+        error = _rpc_error(stock_usecase, lambda stub: stub.Create(_create_req()))
+
+        # Assert
+        assert error.code() == grpc.StatusCode.INTERNAL
+        assert error.details() == "Internal server error"
+
+    def test_create_stream(self):
+        # Arrange
+        stock_usecase = Mock()
+        stock_usecase.create_batch = AsyncMock(
+            side_effect=lambda stocks: CreateBatchResult(ids=[s.symbol for s in stocks], errors=[])
+        )
+        create_reqs = [_create_req("AAPL"), _create_req("BAD", action=9), _create_req("MSFT"), _create_req("SPY")]
+
+        # Act
+        response = _call(
+            stock_usecase,
+            lambda stub: stub.CreateStream(iter(create_reqs)),
+            create_stream_batch_size=2,
+        )
+
+        # Assert
+        assert list(response.ids) == ["AAPL", "", "MSFT", "SPY"]
+        assert [(e.index, e.message) for e in response.errors] == [
+            (1, "Invalid input: Invalid action type: 9. Must be 1 (BUY), 2 (SELL), or 3 (TRANSFER).")
+        ]
+        assert [len(call.args[0]) for call in stock_usecase.create_batch.call_args_list] == [1, 2]
+
+    def test_create_stream_failed_batch_keeps_other_batches(self):
+        # Arrange
+        stock_usecase = Mock()
+        stock_usecase.create_batch = AsyncMock(
+            side_effect=[CreateBatchResult(ids=["AAPL", "MSFT"], errors=[]), Exception("Database error")]
+        )
+        create_reqs = [_create_req("AAPL"), _create_req("MSFT"), _create_req("SPY")]
+
+        # Act
+        response = _call(
+            stock_usecase,
+            lambda stub: stub.CreateStream(iter(create_reqs)),
+            create_stream_batch_size=2,
+        )
+
+        # Assert
+        assert list(response.ids) == ["AAPL", "MSFT", ""]
+        assert [(e.index, e.message) for e in response.errors] == [(2, "Internal server error")]
+
+
+class TestAsyncStockServiceList:
+    def test_list_stream(self):
+        # Arrange
+        created_at = datetime(2024, 1, 2, tzinfo=timezone.utc)
+        stock = Stock(
+            id="1",
+            user_id=1,
+            symbol="AAPL",
+            price=150.0,
+            quantity=2,
+            action_type=ActionType.BUY,
+            stock_type=StockType.STOCKS,
+            created_at=created_at,
+            updated_at=created_at,
+        )
+
+        async def list_stream(query):
+            yield StockPage(stocks=[stock], next_cursor="next")
+            yield StockPage(stocks=[stock])
+
+        stock_usecase = Mock()
+        stock_usecase.list_stream = list_stream
+
+        async def read_all(stub):
+            return [response async for response in stub.ListStream(stock_pb2.ListReq(user_id=1, page_size=1))]
+
+        # Act
+        responses = _call(stock_usecase, read_all)
+
+        # Assert
+        assert [r.next_cursor for r in responses] == ["next", ""]
+        assert responses[0].stock_list[0].symbol == "AAPL"
+        assert responses[0].stock_list[0].created_at.ToDatetime(tzinfo=timezone.utc) == created_at
+
+    def test_list_invalid_cursor(self):
+        # Arrange
+        stock_usecase = Mock()
+        stock_usecase.list_dicts = AsyncMock(side_effect=ValueError("Invalid cursor"))
+
+        # Act
+        error = _rpc_error(stock_usecase, lambda stub: stub.List(stock_pb2.ListReq(user_id=1, cursor="x")))
+
+        # Assert
+        assert error.code() == grpc.StatusCode.INVALID_ARGUMENT
+        assert error.details() == "Invalid input: Invalid cursor"
+
+    def test_list_empty_page(self):
+        # Arrange
+        stock_usecase = Mock()
+        stock_usecase.list_dicts = AsyncMock(return_value=StockDictPage(stocks=[]))
+
+        # Act
+        response = _call(stock_usecase, lambda stub: stub.List(stock_pb2.ListReq(user_id=1)))
+
+        # Assert
+        assert list(response.stock_list) == []
+        assert response.next_cursor == ""
+
+
+class TestAsyncStockServiceGetPortfolioInfo:
+    def test_get_portfolio_info(self):
+        # Arrange
+        stock_usecase = Mock()
+        stock_usecase.get_portfolio_info = AsyncMock(
+            return_value=PortfolioInfo(
+                user_id=1, total_portfolio_value=2500.0, total_gain=500.0, roi=25.0, stale_symbols=["AAPL"]
+            )
+        )
+
+        # Act
+        response = _call(stock_usecase, lambda stub: stub.GetPortfolioInfo(stock_pb2.GetPortfolioInfoReq(user_id=1)))
+
+        # Assert
+        assert (response.total_portfolio_value, response.roi) == (2500.0, 25.0)
+        assert list(response.stale_symbols) == ["AAPL"]
+        stock_usecase.get_portfolio_info.assert_awaited_once_with(user_id=1)
+
+    def test_get_portfolio_info_batch(self):
+        # Arrange
+        stock_usecase = Mock()
+        stock_usecase.get_portfolio_info_batch = AsyncMock(
+            return_value=[
+                PortfolioInfo(user_id=2, total_portfolio_value=2500.0, total_gain=500.0, roi=25.0),
+                PortfolioInfo(user_id=1, total_portfolio_value=0.0, total_gain=0.0, roi=0.0),
+            ]
+        )
+
+        # Act
+        response = _call(
+            stock_usecase,
+            lambda stub: stub.GetPortfolioInfoBatch(stock_pb2.GetPortfolioInfoBatchReq(user_ids=[2, 1])),
+        )
+
+        # Assert
+        assert [(info.user_id, info.total_portfolio_value) for info in response.portfolios] == [(2, 2500.0), (1, 0.0)]
+        stock_usecase.get_portfolio_info_batch.assert_awaited_once_with(user_ids=[2, 1])
+
+    def test_get_portfolio_info_batch_invalid_input(self):
+        # Arrange
+        stock_usecase = Mock()
+        stock_usecase.get_portfolio_info_batch = AsyncMock(side_effect=ValueError("too many users"))
+
+        # Act
+        error = _rpc_error(
+            stock_usecase,
+            lambda stub: stub.GetPortfolioInfoBatch(stock_pb2.GetPortfolioInfoBatchReq(user_ids=[1])),
+        )
+
+        # Assert
+        assert error.code() == grpc.StatusCode.INVALID_ARGUMENT
+
+    def test_get_portfolio_summary(self):
+        # Arrange
+        stock_usecase = Mock()
+        stock_usecase.get_portfolio_summary = AsyncMock(
+            return_value=PortfolioSummary(
+                info=PortfolioInfo(user_id=1, total_portfolio_value=2000.0, total_gain=0.0, roi=0.0),
+                stock_info={
+                    StockType.STOCKS.value: [],
+                    StockType.ETF.value: [
+                        StockInfo(symbol="SPY", quantity=10, price=100.0, avg_cost=100.0, percentage=50.0)
+                    ],
+                    "CASH": [StockInfo(symbol="CASH", quantity=1, price=1000.0, avg_cost=0, percentage=50.0)],
+                },
+            )
+        )
+
+        # Act
+        response = _call(
+            stock_usecase, lambda stub: stub.GetPortfolioSummary(stock_pb2.GetPortfolioSummaryReq(user_id=1))
+        )
+
+        # Assert
+        assert (response.user_id, response.total_portfolio_value) == (1, 2000.0)
+        assert [stock.symbol for stock in response.etf] == ["SPY"]
+        assert [stock.symbol for stock in response.cash] == ["CASH"]
+        assert list(response.stocks) == []
+        stock_usecase.get_portfolio_summary.assert_awaited_once_with(user_id=1)
+
+    def test_get_portfolio_summary_internal_error(self):
+        # Arrange
+        stock_usecase = Mock()
+        stock_usecase.get_portfolio_summary = AsyncMock(side_effect=Exception("Database error"))
+
+        # Act
+        error = _rpc_error(
+            stock_usecase, lambda stub: stub.GetPortfolioSummary(stock_pb2.GetPortfolioSummaryReq(user_id=1))
+        )
+
+        # Assert
+        assert error.code() == grpc.StatusCode.INTERNAL
@@ -0,0 +1,406 @@
+import asyncio
+import pytest
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, ANY
+from usecase.stock_async import AsyncStockUsecase
+from domain.stock import CreateStock, CreateBatchError, CreateBatchResult, StockInfo, Quote
+from domain.portfolio import Portfolio, Holding, PortfolioInfo, PortfolioSummary
+from domain.enum import ActionType, StockType
+from utils.cache import TTLCache, VersionedCache
+
+
+@pytest.fixture
+def stock_usecase():
+    stock_repo = AsyncMock()
+    portfolio_repo = AsyncMock()
+    portfolio_repo.update_many.return_value = []
+    price_provider = AsyncMock()
+    usecase = AsyncStockUsecase(stock_repo=stock_repo, portfolio_repo=portfolio_repo, price_provider=price_provider)
+    return usecase, stock_repo, portfolio_repo, price_provider
+
+
+def _portfolio(holdings):
+    now = datetime.now(timezone.utc)
+    return Portfolio(
+        user_id=1,
+        cash_balance=1000.0,
+        total_money_in=2000.0,
+        holdings=holdings,
+        created_at=now,
+        updated_at=now,
+    )
+
+
+class TestAsyncStockUsecaseCreate:
+    def test_create(self, stock_usecase):
+        # Arrange
+        usecase, stock_repo, portfolio_repo, _ = stock_usecase
+        stock = CreateStock(
+            user_id=1,
+            symbol="AAPL",
+            price=150.0,
+            quantity=2,
+            action_type=ActionType.BUY,
+            stock_type=StockType.STOCKS,
+            created_at=ANY,
+        )
+        stock_repo.create.return_value = "123"
+
+        # Act
+        result = asyncio.run(usecase.create(stock))
+
+        # Assert
+        portfolio_repo.apply_trade.assert_awaited_once_with(stock, session=None)
+        stock_repo.create.assert_awaited_once_with(stock, session=None)
+        assert result == "123"
+
+    def test_create_in_transaction(self, stock_usecase):
+        # Arrange
+        usecase, stock_repo, portfolio_repo, _ = stock_usecase
+        session = object()
+
+        async def run_in_transaction(callback):
+            return await callback(session)
+
+        transaction_manager = AsyncMock()
+        transaction_manager.run.side_effect = run_in_transaction
+        usecase.transaction_manager = transaction_manager
+        stock = CreateStock(
+            user_id=1,
+            symbol="AAPL",
+            price=150.0,
+            quantity=2,
+            action_type=ActionType.TRANSFER,
+            stock_type=StockType.STOCKS,
+            created_at=ANY,
+        )
+        stock_repo.create.return_value = "123"
+
+        # Act
+        result = asyncio.run(usecase.create(stock))
+
+        # Assert
+        portfolio_repo.apply_trade.assert_awaited_once_with(stock, session=session)
+        stock_repo.create.assert_awaited_once_with(stock, session=session)
+        assert result == "123"
+
+    def test_create_batch(self, stock_usecase):
+        # Arrange
+        usecase, stock_repo, portfolio_repo, _ = stock_usecase
+        created_at = datetime.now(timezone.utc)
+        stocks = [
+            CreateStock(
+                user_id=1,
+                symbol=symbol,
+                price=100.0,
+                quantity=1,
+                action_type=action_type,
+                stock_type=StockType.STOCKS,
+                created_at=created_at,
+            )
+            for symbol, action_type in [
+                ("CASH", ActionType.TRANSFER),
+                ("AAPL", ActionType.SELL),
+                ("AAPL", ActionType.BUY),
+            ]
+        ]
+        portfolio_repo.get.return_value = None
+        stock_repo.create_many.return_value = ["id0", "id2"]
+
+        # Act
+        result = asyncio.run(usecase.create_batch(stocks))
+
+        # Assert
+        assert result == CreateBatchResult(
+            ids=["id0", "", "id2"], errors=[CreateBatchError(index=1, message="Can not sell non-exist stock")]
+        )
+        portfolio_repo.get.assert_awaited_once_with(user_id=1, session=None)
+        [portfolio], = portfolio_repo.update_many.call_args.args
+        assert portfolio.cash_balance == 0.0
+        assert portfolio.get_holding("AAPL").shares == 1
+        stock_repo.create_many.assert_awaited_once_with([stocks[0], stocks[2]], session=None)
+
+
+class TestAsyncStockUsecaseGetPortfolioInfo:
+    def test_get_portfolio_info(self, stock_usecase):
+        # Arrange
+        usecase, _, portfolio_repo, price_provider = stock_usecase
+        portfolio_repo.get.return_value = _portfolio(
+            [Holding(symbol="AAPL", shares=10, stock_type=StockType.STOCKS, total_cost=1000.0)]
+        )
+        price_provider.get_price.return_value = 150.0
+
+        # Act
+        result = asyncio.run(usecase.get_portfolio_info(user_id=1))
+
+        # Assert
+        assert result == PortfolioInfo(user_id=1, total_portfolio_value=2500.0, total_gain=500.0, roi=25.0)
+        portfolio_repo.get.assert_awaited_once_with(user_id=1, secondary_ok=True)
+        price_provider.get_price.assert_awaited_once_with("AAPL", StockType.STOCKS)
+
+    def test_get_portfolio_info_reads_the_primary_after_a_trade(self, stock_usecase):
+        # Arrange
+        usecase, stock_repo, portfolio_repo, _ = stock_usecase
+        portfolio_repo.get.return_value = None
+        stock_repo.create_many.return_value = ["id0"]
+        stock = CreateStock(
+            user_id=1,
+            symbol="CASH",
+            price=100.0,
+            quantity=1,
+            action_type=ActionType.TRANSFER,
+            stock_type=StockType.STOCKS,
+            created_at=ANY,
+        )
+        asyncio.run(usecase.create_batch([stock]))
+        portfolio_repo.get.reset_mock()
+
+        # Act
+        asyncio.run(usecase.get_portfolio_info(user_id=1))
+
+        # Assert
+        portfolio_repo.get.assert_awaited_once_with(user_id=1, secondary_ok=False)
+
+    def test_get_portfolio_info_no_portfolio(self, stock_usecase):
+        # Arrange
+        usecase, _, portfolio_repo, price_provider = stock_usecase
+        portfolio_repo.get.return_value = None
+
+        # Act
+        result = asyncio.run(usecase.get_portfolio_info(user_id=1))
+
+        # Assert
+        assert result == PortfolioInfo(user_id=1, total_portfolio_value=0.0, total_gain=0.0, roi=0.0)
+        price_provider.get_price.assert_not_awaited()
+
+    def test_valuation_cache_invalidated_by_create(self, stock_usecase):
+        # Arrange
+        usecase, stock_repo, portfolio_repo, price_provider = stock_usecase
+        usecase.valuation_cache = VersionedCache(ttl=5, max_size=10)
+        portfolio_repo.get.return_value = _portfolio(
+            [Holding(symbol="AAPL", shares=10, stock_type=StockType.STOCKS, total_cost=1000.0)]
+        )
+        price_provider.get_price.return_value = 150.0
+        stock_repo.create.return_value = "123"
+        stock = CreateStock(
+            user_id=1,
+            symbol="AAPL",
+            price=150.0,
+            quantity=1,
+            action_type=ActionType.BUY,
+            stock_type=StockType.STOCKS,
+            created_at=ANY,
+        )
+
+        async def run():
+            await usecase.get_portfolio_info(user_id=1)
+            await usecase.get_portfolio_info(user_id=1)
+            await usecase.create(stock)
+            return await usecase.get_portfolio_info(user_id=1)
+
+        # Act
+        result = asyncio.run(run())
+
+        # Assert
+        assert result.total_portfolio_value == 2500.0
+        assert portfolio_repo.get.await_count == 2
+        assert usecase.valuation_cache.stats().hits == 1
+
+    def test_get_stock_info(self, stock_usecase):
+        # Arrange
+        usecase, _, portfolio_repo, price_provider = stock_usecase
+        portfolio_repo.get.return_value = _portfolio(
+            [Holding(symbol="SPY", shares=10, stock_type=StockType.ETF, total_cost=1000.0)]
+        )
+        price_provider.get_price.return_value = 100.0
+
+        # Act
+        result = asyncio.run(usecase.get_stock_info(user_id=1))
+
+        # Assert
+        assert result == {
+            StockType.ETF.value: [StockInfo(symbol="SPY", quantity=10, price=100.0, avg_cost=100.0, percentage=50.0)],
+            StockType.STOCKS.value: [],
+            "CASH": [StockInfo(symbol="CASH", quantity=1, price=1000.0, avg_cost=0, percentage=50.0)],
+        }
+
+
+    def test_get_portfolio_summary(self, stock_usecase):
+        # Arrange
+        usecase, _, portfolio_repo, price_provider = stock_usecase
+        usecase.valuation_cache = VersionedCache(ttl=5, max_size=10)
+        portfolio_repo.get.return_value = _portfolio(
+            [Holding(symbol="SPY", shares=10, stock_type=StockType.ETF, total_cost=1000.0)]
+        )
+        price_provider.get_price.return_value = 100.0
+
+        async def run():
+            summary = await usecase.get_portfolio_summary(user_id=1)
+            info = await usecase.get_portfolio_info(user_id=1)
+            stock_info = await usecase.get_stock_info(user_id=1)
+            return summary, info, stock_info
+
+        # Act
+        summary, info, stock_info = asyncio.run(run())
+
+        # Assert
+        assert summary == PortfolioSummary(info=info, stock_info=stock_info)
+        assert info == PortfolioInfo(user_id=1, total_portfolio_value=2000.0, total_gain=0.0, roi=0.0)
+        portfolio_repo.get.assert_awaited_once_with(user_id=1, secondary_ok=True)
+        price_provider.get_price.assert_awaited_once_with("SPY", StockType.ETF)
+
+    def test_get_portfolio_info_batch(self, stock_usecase):
+        # Arrange
+        usecase, _, portfolio_repo, price_provider = stock_usecase
+        holdings = [Holding(symbol="AAPL", shares=10, stock_type=StockType.STOCKS, total_cost=1000.0)]
+        portfolio_repo.get_many.return_value = {1: _portfolio(holdings), 2: _portfolio(holdings)}
+        price_provider.get_price.return_value = 150.0
+
+        # Act
+        result = asyncio.run(usecase.get_portfolio_info_batch(user_ids=[1, 2]))
+
+        # Assert
+        assert [info.total_portfolio_value for info in result] == [2500.0, 2500.0]
+        assert [info.user_id for info in result] == [1, 2]
+        portfolio_repo.get_many.assert_awaited_once_with([1, 2], secondary_ok=True)
+        price_provider.get_price.assert_awaited_once_with("AAPL", StockType.STOCKS)
+
+class TestAsyncStockUsecaseGetStockPrice:
+    def test_reads_through_cache(self, stock_usecase):
+        # Arrange
+        usecase, _, _, price_provider = stock_usecase
+        price_provider.get_price.return_value = 150.0
+
+        async def run():
+            await usecase._get_stock_price(stock_info=[("AAPL", StockType.STOCKS)])
+            return await usecase._get_stock_price(stock_info=[("AAPL", StockType.STOCKS)])
+
+        # Act
+        result = asyncio.run(run())
+
+        # Assert
+        assert result.prices == {"AAPL": 150.0}
+        price_provider.get_price.assert_awaited_once()
+
+    def test_coalesces_concurrent_lookups(self, stock_usecase):
+        # Arrange
+        usecase, _, _, price_provider = stock_usecase
+
+        async def get_price(symbol, stock_type):
+            await asyncio.sleep(0.01)
+            return 400.0
+
+        price_provider.get_price.side_effect = get_price
+
+        async def run():
+            return await asyncio.gather(
+                *(usecase._get_stock_price(stock_info=[("SPY", StockType.ETF)]) for _ in range(3))
+            )
+
+        # Act
+        results = asyncio.run(run())
+
+        # Assert
+        assert [r.prices for r in results] == [{"SPY": 400.0}] * 3
+        assert price_provider.get_price.await_count == 1
+
+    def test_timeout_degrades_to_missing_and_still_warms_cache(self, stock_usecase, caplog):
+        # Arrange
+        usecase, _, _, price_provider = stock_usecase
+        usecase.price_fetch_timeout = 0.01
+
+        async def get_price(symbol, stock_type):
+            if symbol == "SLOW":
+                await asyncio.sleep(0.05)
+            return 150.0
+
+        price_provider.get_price.side_effect = get_price
+
+        async def run():
+            result = await usecase._get_stock_price(stock_info=[("AAPL", StockType.STOCKS), ("SLOW", StockType.STOCKS)])
+            await asyncio.sleep(0.1)
+            return result
+
+        # Act
+        result = asyncio.run(run())
+
+        # Assert
+        assert result.prices == {"AAPL": 150.0, "SLOW": 0.0}
+        assert result.missing_symbols == ["SLOW"]
+        assert usecase.price_cache.get(("SLOW", StockType.STOCKS)) == 150.0
+        assert [(r.levelname, r.getMessage()) for r in caplog.records] == [
+            ("WARNING", "Timed out fetching price for symbol SLOW")
+        ]
+
+    def test_provider_error_degrades_to_stale_quote(self, stock_usecase, caplog):
+        # Arrange
+        usecase, _, _, price_provider = stock_usecase
+        usecase.price_cache = TTLCache(ttl=0.01, max_size=10)
+        usecase.price_cache.set(("AAPL", StockType.STOCKS), 140.0)
+        price_provider.get_price.side_effect = Exception("API error")
+
+        async def run():
+            await asyncio.sleep(0.02)
+            return await usecase._get_stock_price(stock_info=[("AAPL", StockType.STOCKS)])
+
+        # Act
+        result = asyncio.run(run())
+
+        # Assert
+        assert result.prices == {"AAPL": 140.0}
+        assert result.stale_symbols == ["AAPL"]
+        assert [(r.levelname, r.getMessage()) for r in caplog.records] == [
+            ("ERROR", "Failed to fetch price for symbol AAPL: API error")
+        ]
+
+    def test_uses_fresh_snapshot(self, stock_usecase):
+        # Arrange
+        usecase, _, _, price_provider = stock_usecase
+        usecase.quote_repo = AsyncMock()
+        usecase.quote_repo.get_many.return_value = [
+            Quote(symbol="SPY", stock_type=StockType.ETF, price=400.0, fetched_at=datetime.now(timezone.utc))
+        ]
+        price_provider.get_price.return_value = 150.0
+
+        # Act
+        result = asyncio.run(
+            usecase._get_stock_price(stock_info=[("AAPL", StockType.STOCKS), ("SPY", StockType.ETF)])
+        )
+
+        # Assert
+        assert result.prices == {"AAPL": 150.0, "SPY": 400.0}
+        price_provider.get_price.assert_awaited_once_with("AAPL", StockType.STOCKS)
+        usecase.quote_repo.save.assert_awaited_once()
+
+    def test_refresh_hot_prices(self, stock_usecase):
+        # Arrange
+        usecase, _, _, price_provider = stock_usecase
+        usecase.hot_symbols = TTLCache(ttl=600, max_size=10)
+        usecase.hot_symbols.set(("AAPL", StockType.STOCKS), True)
+        price_provider.get_price.return_value = 150.0
+
+        # Act
+        refreshed = asyncio.run(usecase.refresh_hot_prices(refresh_ahead=30))
+
+        # Assert
+        assert refreshed == 1
+        assert usecase.price_cache.get(("AAPL", StockType.STOCKS)) == 150.0
+
+    def test_refresh_hot_prices_starts_a_new_epoch_only_when_a_price_moves(self, stock_usecase):
+        # Arrange
+        usecase, _, _, price_provider = stock_usecase
+        usecase.valuation_cache = VersionedCache(ttl=5, max_size=10)
+        usecase.hot_symbols = TTLCache(ttl=600, max_size=10)
+        usecase.hot_symbols.set(("AAPL", StockType.STOCKS), True)
+        usecase.price_cache.set(("AAPL", StockType.STOCKS), 150.0)
+        price_provider.get_price.side_effect = [150.0, 155.0]
+
+        # Act
+        asyncio.run(usecase.refresh_hot_prices(refresh_ahead=usecase.price_cache.ttl))
+        unchanged_epoch = usecase.valuation_cache.stats().epoch
+        asyncio.run(usecase.refresh_hot_prices(refresh_ahead=usecase.price_cache.ttl))
+
+        # Assert
+        assert unchanged_epoch == 0
+        assert usecase.valuation_cache.stats().epoch == 1
+        assert usecase.price_cache.get(("AAPL", StockType.STOCKS)) == 155.0
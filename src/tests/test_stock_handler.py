@@ -5,8 +5,18 @@ from datetime import datetime, timezone
 from unittest.mock import Mock
 from handler.stock import StockService
 from usecase.base import AbstractStockUsecase
-from domain.stock import CreateStock, Stock, StockInfo
-from domain.portfolio import PortfolioInfo
+from domain.stock import (
+    CreateStock,
+    CreateBatchError,
+    CreateBatchResult,
+    LIST_PAGE_SIZE_DEFAULT,
+    ListStockQuery,
+    Stock,
+    StockDictPage,
+    StockInfo,
+    StockPage,
+)
+from domain.portfolio import PortfolioInfo, PortfolioSummary
 from domain.enum import ActionType, StockType
 
 
@@ -173,35 +183,189 @@ class TestStockServiceCreate:
         mock_stock_usecase.create.assert_called_once()
 
 
+class TestStockServiceCreateBatch:
+    @pytest.fixture
+    def mock_stock_usecase(self):
+        return Mock(spec=AbstractStockUsecase)
+
+    @pytest.fixture
+    def mock_context(self):
+        return Mock()
+
+    @staticmethod
+    def _create_req(symbol, action=1):
+        return stock_pb2.CreateReq(user_id=1, symbol=symbol, price=100.0, quantity=10, action=action, stock_type=1)
+
+    def test_success(self, mock_stock_usecase, mock_context):
+        # Arrange
+        service = StockService(mock_stock_usecase)
+        request = stock_pb2.CreateBatchReq(stocks=[self._create_req("AAPL"), self._create_req("SPY")])
+        mock_stock_usecase.create_batch.return_value = CreateBatchResult(ids=["id0", "id1"], errors=[])
+
+        # Act
+        response = service.CreateBatch(request, mock_context)
+
+        # Assert
+        assert list(response.ids) == ["id0", "id1"]
+        assert list(response.errors) == []
+        stocks = mock_stock_usecase.create_batch.call_args[0][0]
+        assert [stock.symbol for stock in stocks] == ["AAPL", "SPY"]
+        assert all(isinstance(stock, CreateStock) for stock in stocks)
+        mock_context.set_code.assert_not_called()
+
+    def test_maps_errors_to_request_index(self, mock_stock_usecase, mock_context):
+        # Arrange
+        service = StockService(mock_stock_usecase)
+        request = stock_pb2.CreateBatchReq(
+            stocks=[
+                self._create_req("AAPL", action=0),  # rejected by the handler
+                self._create_req("TSLA", action=2),  # rejected by the usecase
+                self._create_req("SPY"),
+            ]
+        )
+        mock_stock_usecase.create_batch.return_value = CreateBatchResult(
+            ids=["", "id2"], errors=[CreateBatchError(index=0, message="Can not sell non-exist stock")]
+        )
+
+        # Act
+        response = service.CreateBatch(request, mock_context)
+
+        # Assert
+        assert list(response.ids) == ["", "", "id2"]
+        assert [(e.index, e.message) for e in response.errors] == [
+            (0, "Invalid input: Invalid action type: 0. Must be 1 (BUY), 2 (SELL), or 3 (TRANSFER)."),
+            (1, "Can not sell non-exist stock"),
+        ]
+        assert [stock.symbol for stock in mock_stock_usecase.create_batch.call_args[0][0]] == ["TSLA", "SPY"]
+        mock_context.set_code.assert_not_called()
+
+    def test_internal_error(self, mock_stock_usecase, mock_context):
+        # Arrange
+        service = StockService(mock_stock_usecase)
+        request = stock_pb2.CreateBatchReq(stocks=[self._create_req("AAPL")])
+        mock_stock_usecase.create_batch.side_effect = Exception("Database error")
+
+        # Act/Assertion
+        with pytest.raises(grpc.RpcError) as exc_info:
+            service.CreateBatch(request, mock_context)
+        assert str(exc_info.value) == "Internal server error"
+        mock_context.set_code.assert_called_once_with(grpc.StatusCode.INTERNAL)
+        mock_context.set_details.assert_called_once_with("Internal server error")
+
+
+class TestStockServiceCreateStream:
+    @pytest.fixture
+    def mock_stock_usecase(self):
+        usecase = Mock(spec=AbstractStockUsecase)
+        usecase.create_batch.side_effect = lambda stocks: CreateBatchResult(
+            ids=[f"id_{stock.symbol}" for stock in stocks], errors=[]
+        )
+        return usecase
+
+    @pytest.fixture
+    def mock_context(self):
+        return Mock()
+
+    @staticmethod
+    def _create_req(symbol, action=1):
+        return stock_pb2.CreateReq(user_id=1, symbol=symbol, price=100.0, quantity=10, action=action, stock_type=1)
+
+    def test_success_in_micro_batches(self, mock_stock_usecase, mock_context):
+        # Arrange
+        service = StockService(mock_stock_usecase, create_stream_batch_size=2, create_stream_flush_interval=10)
+        requests = [self._create_req(symbol) for symbol in ("AAPL", "SPY", "TSLA")]
+
+        # Act
+        response = service.CreateStream(iter(requests), mock_context)
+
+        # Assert
+        assert list(response.ids) == ["id_AAPL", "id_SPY", "id_TSLA"]
+        assert list(response.errors) == []
+        assert [len(c[0][0]) for c in mock_stock_usecase.create_batch.call_args_list] == [2, 1]
+        mock_context.set_code.assert_not_called()
+
+    def test_errors_use_stream_position(self, mock_stock_usecase, mock_context):
+        # Arrange
+        service = StockService(mock_stock_usecase, create_stream_batch_size=2, create_stream_flush_interval=10)
+        requests = [self._create_req("AAPL"), self._create_req("SPY"), self._create_req("TSLA", action=0)]
+
+        # Act
+        response = service.CreateStream(iter(requests), mock_context)
+
+        # Assert
+        assert list(response.ids) == ["id_AAPL", "id_SPY", ""]
+        assert [e.index for e in response.errors] == [2]
+        assert response.errors[0].message.startswith("Invalid input: Invalid action type: 0.")
+
+    def test_failed_batch_keeps_other_batches(self, mock_stock_usecase, mock_context):
+        # Arrange
+        service = StockService(mock_stock_usecase, create_stream_batch_size=2, create_stream_flush_interval=10)
+        mock_stock_usecase.create_batch.side_effect = [
+            CreateBatchResult(ids=["id_AAPL", "id_SPY"], errors=[]),
+            Exception("Database error"),
+            CreateBatchResult(ids=["id_NVDA"], errors=[]),
+        ]
+        requests = [self._create_req(symbol) for symbol in ("AAPL", "SPY", "TSLA", "MSFT", "NVDA")]
+
+        # Act
+        response = service.CreateStream(iter(requests), mock_context)
+
+        # Assert
+        assert list(response.ids) == ["id_AAPL", "id_SPY", "", "", "id_NVDA"]
+        assert [(e.index, e.message) for e in response.errors] == [
+            (2, "Internal server error"),
+            (3, "Internal server error"),
+        ]
+        mock_context.set_code.assert_not_called()
+
+    def test_internal_error(self, mock_stock_usecase, mock_context):
+        # Arrange
+        service = StockService(mock_stock_usecase)
+
+        def broken_stream():
+            yield self._create_req("AAPL")
+            raise Exception("Connection reset")
+
+        # Act/Assertion
+        with pytest.raises(grpc.RpcError) as exc_info:
+            service.CreateStream(broken_stream(), mock_context)
+        assert str(exc_info.value) == "Internal server error"
+        mock_context.set_code.assert_called_once_with(grpc.StatusCode.INTERNAL)
+        mock_context.set_details.assert_called_once_with("Internal server error")
+
+
 class TestStockServiceList:
     # Fixture to create a mock stock_usecase
     @pytest.fixture
     def mock_stock_usecase(self):
         usecase = Mock(spec=AbstractStockUsecase)
-        usecase.list.return_value = [
-            Stock(
-                id="stock_123",
-                user_id=1,
-                symbol="AAPL",
-                price=100.0,
-                quantity=10,
-                action_type=ActionType.BUY,
-                stock_type=StockType.STOCKS,
-                created_at=datetime(2023, 1, 1, tzinfo=timezone.utc),
-                updated_at=datetime(2023, 1, 1, tzinfo=timezone.utc),  # Include if required
-            ),
-            Stock(
-                id="stock_124",
-                user_id=1,
-                symbol="GOOGL",
-                price=1500.0,
-                quantity=5,
-                action_type=ActionType.SELL,
-                stock_type=StockType.STOCKS,
-                created_at=datetime(2023, 1, 2, tzinfo=timezone.utc),
-                updated_at=datetime(2023, 1, 2, tzinfo=timezone.utc),  # Include if required
-            ),
-        ]
+        usecase.list_dicts.return_value = StockDictPage(
+            stocks=[
+                {
+                    "id": "stock_123",
+                    "user_id": 1,
+                    "symbol": "AAPL",
+                    "price": 100.0,
+                    "quantity": 10,
+                    "action_type": ActionType.BUY.value,
+                    "stock_type": StockType.STOCKS.value,
+                    "created_at": datetime(2023, 1, 1),  # pymongo returns naive UTC datetimes
+                    "updated_at": datetime(2023, 1, 1),
+                },
+                {
+                    "id": "stock_124",
+                    "user_id": 1,
+                    "symbol": "GOOGL",
+                    "price": 1500.0,
+                    "quantity": 5,
+                    "action_type": ActionType.SELL.value,
+                    "stock_type": StockType.STOCKS.value,
+                    "created_at": datetime(2023, 1, 2),
+                    "updated_at": datetime(2023, 1, 2),
+                },
+            ],
+            next_cursor="next",
+        )
         return usecase
 
     # Fixture to create a mock gRPC context
@@ -215,9 +379,7 @@ class TestStockServiceList:
     # Fixture to create a valid gRPC request
     @pytest.fixture
     def valid_request(self):
-        request = Mock()
-        request.user_id = 1
-        return request
+        return stock_pb2.ListReq(user_id=1)
 
     def test_success(self, mock_stock_usecase, mock_context, valid_request):
         # Arrange
@@ -243,14 +405,19 @@ class TestStockServiceList:
         assert response.stock_list[1].quantity == 5
         assert response.stock_list[1].action == ActionType.SELL.value
         assert response.stock_list[1].stock_type == StockType.STOCKS.value
-        mock_stock_usecase.list.assert_called_once_with(1)
+        assert response.stock_list[1].created_at.ToDatetime(tzinfo=timezone.utc) == datetime(
+            2023, 1, 2, tzinfo=timezone.utc
+        )
+        assert response.next_cursor == "next"
+        mock_stock_usecase.list_dicts.assert_called_once_with(ListStockQuery(user_id=1, page_size=None))
+        mock_context.set_compression.assert_called_once_with(grpc.Compression.Gzip)
         mock_context.set_code.assert_not_called()
         mock_context.set_details.assert_not_called()
 
     def test_internal_error(self, mock_stock_usecase, mock_context, valid_request):
         # Arrange
         service = StockService(mock_stock_usecase)
-        mock_stock_usecase.list.side_effect = Exception("Database error")  # Simulate internal error
+        mock_stock_usecase.list_dicts.side_effect = Exception("Database error")  # Simulate internal error
 
         # Act/Assertion
         with pytest.raises(grpc.RpcError) as exc_info:
@@ -258,7 +425,172 @@ class TestStockServiceList:
         assert str(exc_info.value) == "Internal server error"
         mock_context.set_code.assert_called_once_with(grpc.StatusCode.INTERNAL)
         mock_context.set_details.assert_called_once_with("Internal server error")
-        mock_stock_usecase.list.assert_called_once_with(1)
+        mock_stock_usecase.list_dicts.assert_called_once_with(ListStockQuery(user_id=1, page_size=None))
+
+    def test_filters(self, mock_stock_usecase, mock_context):
+        # Arrange
+        service = StockService(mock_stock_usecase)
+        start_date = datetime(2023, 1, 1, tzinfo=timezone.utc)
+        end_date = datetime(2023, 2, 1, tzinfo=timezone.utc)
+        request = stock_pb2.ListReq(
+            user_id=1,
+            page_size=10,
+            cursor="abc",
+            symbol="AAPL",
+            action=2,
+            start_date=start_date,
+            end_date=end_date,
+        )
+
+        # Action
+        service.List(request, mock_context)
+
+        # Assertion
+        mock_stock_usecase.list_dicts.assert_called_once_with(
+            ListStockQuery(
+                user_id=1,
+                page_size=10,
+                cursor="abc",
+                symbol="AAPL",
+                action_type=ActionType.SELL,
+                start_date=start_date,
+                end_date=end_date,
+            )
+        )
+
+    def test_timezone_aware_dates(self, mock_stock_usecase, mock_context, valid_request):
+        # Arrange
+        service = StockService(mock_stock_usecase)
+        stock = dict(mock_stock_usecase.list_dicts.return_value.stocks[0])
+        stock["created_at"] = datetime(2023, 1, 1, 12, 30, 15, 250000, tzinfo=timezone.utc)
+        mock_stock_usecase.list_dicts.return_value = StockDictPage(stocks=[stock])
+
+        # Action
+        response = service.List(valid_request, mock_context)
+
+        # Assertion
+        assert response.stock_list[0].created_at.ToDatetime(tzinfo=timezone.utc) == stock["created_at"]
+
+    def test_last_page_has_empty_cursor(self, mock_stock_usecase, mock_context, valid_request):
+        # Arrange
+        service = StockService(mock_stock_usecase)
+        mock_stock_usecase.list_dicts.return_value = StockDictPage(stocks=[])
+
+        # Action
+        response = service.List(valid_request, mock_context)
+
+        # Assertion
+        assert response.next_cursor == ""
+
+    def test_cursor_without_page_size_gets_default_page(self, mock_stock_usecase, mock_context):
+        # Arrange
+        service = StockService(mock_stock_usecase)
+
+        # Action
+        service.List(stock_pb2.ListReq(user_id=1, cursor="abc"), mock_context)
+
+        # Assertion
+        mock_stock_usecase.list_dicts.assert_called_once_with(
+            ListStockQuery(user_id=1, page_size=LIST_PAGE_SIZE_DEFAULT, cursor="abc")
+        )
+
+    @pytest.mark.parametrize(
+        "request_kwargs",
+        [{"page_size": 1001}, {"action": 9}, {"start_date": datetime(2023, 2, 1), "end_date": datetime(2023, 1, 1)}],
+    )
+    def test_invalid_argument(self, mock_stock_usecase, mock_context, request_kwargs):
+        # Arrange
+        service = StockService(mock_stock_usecase)
+
+        # Act/Assertion
+        with pytest.raises(grpc.RpcError):
+            service.List(stock_pb2.ListReq(user_id=1, **request_kwargs), mock_context)
+        mock_context.set_code.assert_called_once_with(grpc.StatusCode.INVALID_ARGUMENT)
+        mock_stock_usecase.list_dicts.assert_not_called()
+
+    def test_invalid_cursor(self, mock_stock_usecase, mock_context, valid_request):
+        # Arrange
+        service = StockService(mock_stock_usecase)
+        mock_stock_usecase.list_dicts.side_effect = ValueError("Invalid cursor")
+
+        # Act/Assertion
+        with pytest.raises(grpc.RpcError) as exc_info:
+            service.List(valid_request, mock_context)
+        assert str(exc_info.value) == "Invalid input: Invalid cursor"
+        mock_context.set_code.assert_called_once_with(grpc.StatusCode.INVALID_ARGUMENT)
+
+
+class TestStockServiceListStream:
+    @pytest.fixture
+    def mock_stock_usecase(self):
+        return Mock(spec=AbstractStockUsecase)
+
+    @pytest.fixture
+    def mock_context(self):
+        return Mock()
+
+    @staticmethod
+    def _stock(stock_id):
+        created_at = datetime(2023, 1, 1, tzinfo=timezone.utc)
+        return Stock(
+            id=stock_id,
+            user_id=1,
+            symbol="AAPL",
+            price=100.0,
+            quantity=10,
+            action_type=ActionType.BUY,
+            stock_type=StockType.STOCKS,
+            created_at=created_at,
+            updated_at=created_at,
+        )
+
+    def test_success(self, mock_stock_usecase, mock_context):
+        # Arrange
+        service = StockService(mock_stock_usecase)
+        mock_stock_usecase.list_stream.return_value = iter(
+            [
+                StockPage(stocks=[self._stock("stock_1"), self._stock("stock_2")], next_cursor="cursor"),
+                StockPage(stocks=[self._stock("stock_3")]),
+            ]
+        )
+
+        # Action
+        responses = list(service.ListStream(stock_pb2.ListReq(user_id=1, page_size=2), mock_context))
+
+        # Assertion
+        assert [[stock.id for stock in resp.stock_list] for resp in responses] == [["stock_1", "stock_2"], ["stock_3"]]
+        assert [resp.next_cursor for resp in responses] == ["cursor", ""]
+        mock_stock_usecase.list_stream.assert_called_once_with(ListStockQuery(user_id=1, page_size=2))
+        mock_context.set_compression.assert_called_once_with(grpc.Compression.Gzip)
+        mock_context.set_code.assert_not_called()
+
+    def test_invalid_argument(self, mock_stock_usecase, mock_context):
+        # Arrange
+        service = StockService(mock_stock_usecase)
+
+        # Act/Assertion
+        with pytest.raises(grpc.RpcError):
+            list(service.ListStream(stock_pb2.ListReq(user_id=1, page_size=1001), mock_context))
+        mock_context.set_code.assert_called_once_with(grpc.StatusCode.INVALID_ARGUMENT)
+        mock_stock_usecase.list_stream.assert_not_called()
+
+    def test_internal_error_mid_stream(self, mock_stock_usecase, mock_context):
+        # Arrange
+        service = StockService(mock_stock_usecase)
+
+        def pages():
+            yield StockPage(stocks=[self._stock("stock_1")], next_cursor="cursor")
+            raise Exception("Database error")
+
+        mock_stock_usecase.list_stream.return_value = pages()
+        stream = service.ListStream(stock_pb2.ListReq(user_id=1), mock_context)
+
+        # Act/Assertion
+        assert [stock.id for stock in next(stream).stock_list] == ["stock_1"]
+        with pytest.raises(grpc.RpcError) as exc_info:
+            next(stream)
+        assert str(exc_info.value) == "Internal server error"
+        mock_context.set_code.assert_called_once_with(grpc.StatusCode.INTERNAL)
 
 
 class TestStockServiceGetPortfolioInfo:
@@ -303,9 +635,30 @@ class TestStockServiceGetPortfolioInfo:
         assert response.total_gain == 500.0
         assert response.roi == 25.0
         mock_stock_usecase.get_portfolio_info.assert_called_once_with(user_id=1)
+        # A single portfolio is smaller than the gzip framing, the server default leaves it uncompressed
+        mock_context.set_compression.assert_not_called()
         mock_context.set_code.assert_not_called()
         mock_context.set_details.assert_not_called()
 
+    def test_success_with_degraded_prices(self, mock_stock_usecase, mock_context, valid_request):
+        # Arrange
+        service = StockService(mock_stock_usecase)
+        mock_stock_usecase.get_portfolio_info.return_value = PortfolioInfo(
+            user_id=1,
+            total_portfolio_value=2500.0,
+            total_gain=500.0,
+            roi=25.0,
+            missing_symbols=["AAPL"],
+            stale_symbols=["SPY"],
+        )
+
+        # Action
+        response = service.GetPortfolioInfo(valid_request, mock_context)
+
+        # Assertion
+        assert list(response.missing_symbols) == ["AAPL"]
+        assert list(response.stale_symbols) == ["SPY"]
+
     def test_internal_error(self, mock_stock_usecase, mock_context, valid_request):
         # Arrange
         service = StockService(mock_stock_usecase)
@@ -320,6 +673,69 @@ class TestStockServiceGetPortfolioInfo:
         mock_stock_usecase.get_portfolio_info.assert_called_once_with(user_id=1)
 
 
+class TestStockServiceGetPortfolioInfoBatch:
+    # Fixture to create a mock stock_usecase
+    @pytest.fixture
+    def mock_stock_usecase(self):
+        usecase = Mock(spec=AbstractStockUsecase)
+        usecase.get_portfolio_info_batch.return_value = [
+            PortfolioInfo(user_id=2, total_portfolio_value=2500.0, total_gain=500.0, roi=25.0, stale_symbols=["SPY"]),
+            PortfolioInfo(user_id=1, total_portfolio_value=0.0, total_gain=0.0, roi=0.0),
+        ]
+        return usecase
+
+    # Fixture to create a mock gRPC context
+    @pytest.fixture
+    def mock_context(self):
+        context = Mock()
+        context.set_code = Mock()
+        context.set_details = Mock()
+        return context
+
+    def test_success(self, mock_stock_usecase, mock_context):
+        # Arrange
+        service = StockService(mock_stock_usecase)
+        request = stock_pb2.GetPortfolioInfoBatchReq(user_ids=[2, 1])
+
+        # Action
+        response = service.GetPortfolioInfoBatch(request, mock_context)
+
+        # Assertion
+        assert response == stock_pb2.GetPortfolioInfoBatchResp(
+            portfolios=[
+                stock_pb2.GetPortfolioInfoResp(
+                    user_id=2, total_portfolio_value=2500.0, total_gain=500.0, roi=25.0, stale_symbols=["SPY"]
+                ),
+                stock_pb2.GetPortfolioInfoResp(user_id=1),
+            ]
+        )
+        mock_stock_usecase.get_portfolio_info_batch.assert_called_once_with(user_ids=[2, 1])
+        mock_context.set_compression.assert_called_once_with(grpc.Compression.Gzip)
+        mock_context.set_code.assert_not_called()
+
+    def test_invalid_input(self, mock_stock_usecase, mock_context):
+        # Arrange
+        service = StockService(mock_stock_usecase)
+        mock_stock_usecase.get_portfolio_info_batch.side_effect = ValueError("too many users")
+
+        # Act/Assertion
+        with pytest.raises(grpc.RpcError):
+            service.GetPortfolioInfoBatch(stock_pb2.GetPortfolioInfoBatchReq(user_ids=[1]), mock_context)
+        mock_context.set_code.assert_called_once_with(grpc.StatusCode.INVALID_ARGUMENT)
+        mock_context.set_details.assert_called_once_with("Invalid input: too many users")
+
+    def test_internal_error(self, mock_stock_usecase, mock_context):
+        # Arrange
+        service = StockService(mock_stock_usecase)
+        mock_stock_usecase.get_portfolio_info_batch.side_effect = Exception("Database error")
+
+        # Act/Assertion
+        with pytest.raises(grpc.RpcError) as exc_info:
+            service.GetPortfolioInfoBatch(stock_pb2.GetPortfolioInfoBatchReq(user_ids=[1]), mock_context)
+        assert str(exc_info.value) == "Internal server error"
+        mock_context.set_code.assert_called_once_with(grpc.StatusCode.INTERNAL)
+
+
 class TestStockServiceGetStockInfo:
     # Fixture to create a mock stock_usecase
     @pytest.fixture
@@ -441,3 +857,84 @@ class TestStockServiceGetStockInfo:
         mock_context.set_code.assert_called_once_with(grpc.StatusCode.INTERNAL)
         mock_context.set_details.assert_called_once_with("Internal server error")
         mock_stock_usecase.get_stock_info.assert_called_once_with(user_id=1)
+
+
+class TestStockServiceGetPortfolioSummary:
+    # Fixture to create a mock stock_usecase
+    @pytest.fixture
+    def mock_stock_usecase(self):
+        usecase = Mock(spec=AbstractStockUsecase)
+        usecase.get_portfolio_summary.return_value = PortfolioSummary(
+            info=PortfolioInfo(
+                user_id=1,
+                total_portfolio_value=2500.0,
+                total_gain=500.0,
+                roi=25.0,
+                stale_symbols=["SPY"],
+            ),
+            stock_info={
+                StockType.STOCKS.value: [
+                    StockInfo(symbol="AAPL", quantity=10, price=100.0, avg_cost=95.0, percentage=40.0),
+                ],
+                StockType.ETF.value: [
+                    StockInfo(symbol="SPY", quantity=2, price=250.0, avg_cost=240.0, percentage=20.0, stale=True),
+                ],
+                "CASH": [
+                    StockInfo(symbol="CASH", quantity=1, price=1000.0, avg_cost=0.0, percentage=40.0),
+                ],
+            },
+        )
+        return usecase
+
+    # Fixture to create a mock gRPC context
+    @pytest.fixture
+    def mock_context(self):
+        context = Mock()
+        context.set_code = Mock()
+        context.set_details = Mock()
+        return context
+
+    # Fixture to create a valid gRPC request
+    @pytest.fixture
+    def valid_request(self):
+        request = Mock()
+        request.user_id = 1
+        return request
+
+    def test_success(self, mock_stock_usecase, mock_context, valid_request):
+        # Arrange
+        service = StockService(mock_stock_usecase)
+        expected_result = stock_pb2.GetPortfolioSummaryResp(
+            user_id=1,
+            total_portfolio_value=2500.0,
+            total_gain=500.0,
+            roi=25.0,
+            stale_symbols=["SPY"],
+            stocks=[stock_pb2.StockInfo(symbol="AAPL", quantity=10, price=100.0, avg_cost=95.0, percentage=40.0)],
+            etf=[
+                stock_pb2.StockInfo(symbol="SPY", quantity=2, price=250.0, avg_cost=240.0, percentage=20.0, stale=True)
+            ],
+            cash=[stock_pb2.StockInfo(symbol="CASH", quantity=1, price=1000.0, avg_cost=0.0, percentage=40.0)],
+        )
+
+        # Action
+        response = service.GetPortfolioSummary(valid_request, mock_context)
+
+        # Assertion
+        assert response == expected_result
+        mock_stock_usecase.get_portfolio_summary.assert_called_once_with(user_id=1)
+        mock_stock_usecase.get_portfolio_info.assert_not_called()
+        mock_stock_usecase.get_stock_info.assert_not_called()
+        mock_context.set_code.assert_not_called()
+
+    def test_internal_error(self, mock_stock_usecase, mock_context, valid_request):
+        # Arrange
+        service = StockService(mock_stock_usecase)
+        mock_stock_usecase.get_portfolio_summary.side_effect = Exception("Database error")  # Simulate internal error
+
+        # Act/Assertion
+        with pytest.raises(grpc.RpcError) as exc_info:
+            service.GetPortfolioSummary(valid_request, mock_context)
+        assert str(exc_info.value) == "Internal server error"
+        mock_context.set_code.assert_called_once_with(grpc.StatusCode.INTERNAL)
+        mock_context.set_details.assert_called_once_with("Internal server error")
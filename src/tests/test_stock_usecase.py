@@ -1,561 +1,661 @@
+import time
 import pytest
-from unittest.mock import Mock, ANY, patch
-from usecase.stock import StockUsecase
-from domain.stock import CreateStock, Stock, StockInfo
-from domain.portfolio import Portfolio, Holding, PortfolioInfo
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event
+from unittest.mock import Mock, ANY, call, patch
+from usecase.stock import PORTFOLIO_INFO_BATCH_MAX_USERS, StockUsecase
+from domain.stock import (
+    CreateStock,
+    CreateBatchError,
+    CreateBatchResult,
+    ListStockQuery,
+    StockDictPage,
+    StockInfo,
+    StockPage,
+    StockPrices,
+    Quote,
+)
+from domain.portfolio import Portfolio, Holding, PortfolioInfo, PortfolioSummary
 from domain.enum import ActionType, StockType
+from utils.cache import TTLCache, VersionedCache
 
 
 @pytest.fixture
 def stock_usecase():
     stock_repo = Mock()
     portfolio_repo = Mock()
-    usecase = StockUsecase(stock_repo=stock_repo, portfolio_repo=portfolio_repo)
+    portfolio_repo.update_many.return_value = []
+    price_provider = Mock()
+    usecase = StockUsecase(stock_repo=stock_repo, portfolio_repo=portfolio_repo, price_provider=price_provider)
     return usecase, stock_repo, portfolio_repo
 
 
 class TestStockUsecaseCreate:
-    def test_create_transfer_new_portfolio(self, stock_usecase):
+    @pytest.mark.parametrize("action_type", [ActionType.TRANSFER, ActionType.BUY, ActionType.SELL])
+    def test_create(self, stock_usecase, action_type):
         # Arrange
         usecase, stock_repo, portfolio_repo = stock_usecase
         user_id, stock_id = 1, "123"
         stock = CreateStock(
             user_id=user_id,
-            symbol="TRANSFER",
-            price=3000.0,
-            quantity=1,
-            action_type=ActionType.TRANSFER,
+            symbol="AAPL",
+            price=150.0,
+            quantity=2,
+            action_type=action_type,
             stock_type=StockType.STOCKS,
             created_at=ANY,
         )
-        portfolio_repo.get.return_value = None
         stock_repo.create.return_value = stock_id
-        portfolio = Portfolio(
-            user_id=user_id,
-            cash_balance=3000.0,
-            total_money_in=3000.0,
-            holdings=[],
-            created_at=ANY,
-            updated_at=ANY,
-        )
 
         # Act
         result = usecase.create(stock)
 
         # Assert
-        portfolio_repo.get.assert_called_once_with(user_id)
-        portfolio_repo.update.assert_called_once_with(portfolio=portfolio)
-        stock_repo.create.assert_called_once_with(stock)
+        portfolio_repo.apply_trade.assert_called_once_with(stock, session=None)
+        portfolio_repo.get.assert_not_called()
+        portfolio_repo.update_many.assert_not_called()
+        stock_repo.create.assert_called_once_with(stock, session=None)
         assert result == stock_id
 
-    def test_create_transfer_existing_portfolio(self, stock_usecase):
+    def test_create_sell_non_existent_holding(self, stock_usecase):
         # Arrange
         usecase, stock_repo, portfolio_repo = stock_usecase
-        user_id, stock_id = 1, "123"
         stock = CreateStock(
-            user_id=user_id,
-            symbol="TRANSFER",
-            price=3000.0,
-            quantity=1,
-            action_type=ActionType.TRANSFER,
+            user_id=1,
+            symbol="AAPL",
+            price=150.0,
+            quantity=5,
+            action_type=ActionType.SELL,
             stock_type=StockType.STOCKS,
             created_at=ANY,
         )
-        existing_portfolio = Portfolio(
-            user_id=user_id,
-            cash_balance=3000.0,
-            total_money_in=3000.0,
-            holdings=[],
-            created_at=ANY,
-            updated_at=ANY,
-        )
-        portfolio_repo.get.return_value = existing_portfolio
-        stock_repo.create.return_value = stock_id
-        updated_portfolio = Portfolio(
-            user_id=existing_portfolio.user_id,
-            cash_balance=6000.0,
-            total_money_in=6000.0,
-            holdings=[],
-            created_at=ANY,
-            updated_at=ANY,
-        )
+        portfolio_repo.apply_trade.side_effect = Exception("Can not sell non-exist stock")
 
-        # Act
-        result = usecase.create(stock)
-
-        # Assert
-        portfolio_repo.get.assert_called_once_with(user_id)
-        portfolio_repo.update.assert_called_once_with(portfolio=updated_portfolio)
-        stock_repo.create.assert_called_once_with(stock)
-        assert result == stock_id
+        # Act/Assert
+        with pytest.raises(Exception, match="Can not sell non-exist stock"):
+            usecase.create(stock)
+        portfolio_repo.apply_trade.assert_called_once_with(stock, session=None)
+        stock_repo.create.assert_not_called()
 
-    def test_create_buy_new_stock(self, stock_usecase):
+    def test_create_handles_repository_error_on_stock_create(self, stock_usecase):
         # Arrange
         usecase, stock_repo, portfolio_repo = stock_usecase
-        user_id, stock_id = 1, "123"
         stock = CreateStock(
-            user_id=user_id,
-            symbol="TSLA",
-            price=2000.0,
-            quantity=2,
+            user_id=1,
+            symbol="AAPL",
+            price=150.0,
+            quantity=10,
             action_type=ActionType.BUY,
             stock_type=StockType.STOCKS,
             created_at=ANY,
         )
-        existing_portfolio = Portfolio(
-            user_id=user_id,
-            cash_balance=5000.0,
-            total_money_in=5000.0,
-            holdings=[],
-            created_at=ANY,
-            updated_at=ANY,
-        )
-        portfolio_repo.get.return_value = existing_portfolio
-        stock_repo.create.return_value = stock_id
-        updated_portfolio = Portfolio(
-            user_id=existing_portfolio.user_id,
-            cash_balance=1000.0,
-            total_money_in=5000.0,
-            holdings=[Holding(symbol="TSLA", shares=2, stock_type=StockType.STOCKS, total_cost=4000.0)],
-            created_at=ANY,
-            updated_at=ANY,
-        )
+        stock_repo.create.side_effect = Exception("Stock create error")
 
-        # Act
-        result = usecase.create(stock)
+        # Act/Assert
+        with pytest.raises(Exception, match="Stock create error"):
+            usecase.create(stock)
+        portfolio_repo.apply_trade.assert_called_once_with(stock, session=None)
+        stock_repo.create.assert_called_once_with(stock, session=None)
 
-        # Assert
-        portfolio_repo.get.assert_called_once_with(user_id)
-        portfolio_repo.update.assert_called_once_with(portfolio=updated_portfolio)
-        stock_repo.create.assert_called_once_with(stock)
-        assert result == stock_id
 
-    def test_create_buy_existing_holding(self, stock_usecase):
+    def test_create_in_transaction(self, stock_usecase):
         # Arrange
         usecase, stock_repo, portfolio_repo = stock_usecase
-        user_id, stock_id = 1, "stock_126"
+        session = Mock()
+        usecase.transaction_manager = Mock()
+        usecase.transaction_manager.run.side_effect = lambda callback: callback(session)
         stock = CreateStock(
-            user_id=user_id,
+            user_id=1,
             symbol="AAPL",
             price=150.0,
-            quantity=3,
+            quantity=2,
             action_type=ActionType.BUY,
             stock_type=StockType.STOCKS,
             created_at=ANY,
         )
-        existing_portfolio = Portfolio(
-            user_id=user_id,
-            cash_balance=1000.0,
-            total_money_in=1000.0,
-            holdings=[Holding(symbol="AAPL", shares=5, stock_type=StockType.STOCKS, total_cost=750.0)],
-            created_at=ANY,
-            updated_at=ANY,
-        )
-        portfolio_repo.get.return_value = existing_portfolio
-        stock_repo.create.return_value = stock_id
-        updated_portfolio = Portfolio(
-            user_id=user_id,
-            cash_balance=550.0,  # 1000 - (150 * 3)
-            total_money_in=1000.0,
-            holdings=[
-                Holding(symbol="AAPL", shares=8, stock_type=StockType.STOCKS, total_cost=1200.0)
-            ],  # 750 + (150 * 3)
-            created_at=ANY,
-            updated_at=ANY,
-        )
+        stock_repo.create.return_value = "123"
 
         # Act
         result = usecase.create(stock)
 
         # Assert
-        portfolio_repo.get.assert_called_once_with(user_id)
-        portfolio_repo.update.assert_called_once_with(portfolio=updated_portfolio)
-        stock_repo.create.assert_called_once_with(stock)
-        assert result == stock_id
+        usecase.transaction_manager.run.assert_called_once()
+        portfolio_repo.apply_trade.assert_called_once_with(stock, session=session)
+        stock_repo.create.assert_called_once_with(stock, session=session)
+        assert result == "123"
 
-    def test_create_sell_existing_holding_partial(self, stock_usecase):
+    def test_create_in_transaction_propagates_error(self, stock_usecase):
         # Arrange
         usecase, stock_repo, portfolio_repo = stock_usecase
-        user_id, stock_id = 1, "stock_127"
+        usecase.transaction_manager = Mock()
+        usecase.transaction_manager.run.side_effect = lambda callback: callback(Mock())
+        stock_repo.create.side_effect = Exception("Stock create error")
         stock = CreateStock(
-            user_id=user_id,
+            user_id=1,
             symbol="AAPL",
-            price=200.0,
+            price=150.0,
             quantity=2,
-            action_type=ActionType.SELL,
+            action_type=ActionType.BUY,
             stock_type=StockType.STOCKS,
             created_at=ANY,
         )
-        existing_portfolio = Portfolio(
+
+        # Act/Assert
+        with pytest.raises(Exception, match="Stock create error"):
+            usecase.create(stock)
+        portfolio_repo.apply_trade.assert_called_once()
+
+
+class TestStockUsecaseCreateBatch:
+    @staticmethod
+    def _create_stock(user_id, symbol, price, quantity, action_type):
+        return CreateStock(
             user_id=user_id,
-            cash_balance=1000.0,
-            total_money_in=1000.0,
-            holdings=[Holding(symbol="AAPL", shares=5, stock_type=StockType.STOCKS, total_cost=750.0)],
-            created_at=ANY,
-            updated_at=ANY,
+            symbol=symbol,
+            price=price,
+            quantity=quantity,
+            action_type=action_type,
+            stock_type=StockType.STOCKS,
+            created_at=datetime.now(timezone.utc),
         )
-        portfolio_repo.get.return_value = existing_portfolio
-        stock_repo.create.return_value = stock_id
-        updated_portfolio = Portfolio(
-            user_id=user_id,
-            cash_balance=1400.0,  # 1000 + (200 * 2)
-            total_money_in=1000.0,
-            holdings=[
-                Holding(symbol="AAPL", shares=3, stock_type=StockType.STOCKS, total_cost=450.0)
-            ],  # 750 - (150 * 2)
-            created_at=ANY,
-            updated_at=ANY,
+
+    def test_create_batch(self, stock_usecase):
+        # Arrange
+        usecase, stock_repo, portfolio_repo = stock_usecase
+        stocks = [
+            self._create_stock(1, "CASH", 1000.0, 1, ActionType.TRANSFER),
+            self._create_stock(1, "AAPL", 100.0, 5, ActionType.BUY),
+            self._create_stock(2, "SPY", 400.0, 1, ActionType.BUY),
+            self._create_stock(1, "AAPL", 120.0, 2, ActionType.SELL),
+        ]
+        portfolio_repo.get.return_value = None
+        stock_repo.create_many.return_value = ["id0", "id1", "id2", "id3"]
+
+        # Act
+        result = usecase.create_batch(stocks)
+
+        # Assert
+        assert result == CreateBatchResult(ids=["id0", "id1", "id2", "id3"], errors=[])
+        assert portfolio_repo.get.call_count == 2  # once per user
+        portfolio_repo.apply_trade.assert_not_called()
+        stock_repo.create_many.assert_called_once_with(stocks, session=None)
+
+        portfolios = portfolio_repo.update_many.call_args[0][0]
+        assert [p.user_id for p in portfolios] == [1, 2]
+        assert portfolios[0].cash_balance == 1000.0 - 500.0 + 240.0
+        assert portfolios[0].total_money_in == 1000.0
+        assert [(h.symbol, h.shares, h.total_cost) for h in portfolios[0].holdings] == [("AAPL", 3, 300.0)]
+        assert portfolios[1].cash_balance == -400.0
+        assert [(h.symbol, h.shares) for h in portfolios[1].holdings] == [("SPY", 1)]
+
+    def test_create_batch_applies_trades_to_existing_portfolio(self, stock_usecase):
+        # Arrange
+        usecase, stock_repo, portfolio_repo = stock_usecase
+        created_at = datetime.now(timezone.utc)
+        portfolio_repo.get.return_value = Portfolio(
+            user_id=1,
+            cash_balance=500.0,
+            total_money_in=2000.0,
+            holdings=[Holding(symbol="AAPL", shares=10, stock_type=StockType.STOCKS, total_cost=1500.0)],
+            created_at=created_at,
+            updated_at=created_at,
         )
+        stock_repo.create_many.return_value = ["id0"]
 
         # Act
-        result = usecase.create(stock)
+        usecase.create_batch([self._create_stock(1, "AAPL", 200.0, 10, ActionType.SELL)])
 
         # Assert
-        portfolio_repo.get.assert_called_once_with(user_id)
-        portfolio_repo.update.assert_called_once_with(portfolio=updated_portfolio)
-        stock_repo.create.assert_called_once_with(stock)
-        assert result == stock_id
+        portfolio = portfolio_repo.update_many.call_args[0][0][0]
+        assert portfolio.cash_balance == 2500.0
+        assert portfolio.holdings == []
 
-    def test_create_sell_existing_holding_all_shares(self, stock_usecase):
+    def test_create_batch_reports_rejected_trades(self, stock_usecase):
         # Arrange
         usecase, stock_repo, portfolio_repo = stock_usecase
-        user_id, stock_id = 1, "stock_128"
-        stock = CreateStock(
-            user_id=user_id,
-            symbol="AAPL",
-            price=300.0,
-            quantity=5,
-            action_type=ActionType.SELL,
-            stock_type=StockType.STOCKS,
-            created_at=ANY,
-        )
-        existing_portfolio = Portfolio(
-            user_id=user_id,
-            cash_balance=1000.0,
-            total_money_in=1000.0,
-            holdings=[Holding(symbol="AAPL", shares=5, stock_type=StockType.STOCKS, total_cost=750.0)],
-            created_at=ANY,
-            updated_at=ANY,
-        )
-        portfolio_repo.get.return_value = existing_portfolio
-        stock_repo.create.return_value = stock_id
-        updated_portfolio = Portfolio(
-            user_id=user_id,
-            cash_balance=2500.0,  # 1000 + (300 * 5)
-            total_money_in=1000.0,
-            holdings=[],
-            created_at=ANY,
-            updated_at=ANY,
+        stocks = [
+            self._create_stock(1, "AAPL", 100.0, 5, ActionType.SELL),
+            self._create_stock(1, "SPY", 400.0, 1, ActionType.BUY),
+        ]
+        portfolio_repo.get.return_value = None
+        stock_repo.create_many.return_value = ["id1"]
+
+        # Act
+        result = usecase.create_batch(stocks)
+
+        # Assert
+        assert result == CreateBatchResult(
+            ids=["", "id1"], errors=[CreateBatchError(index=0, message="Can not sell non-exist stock")]
         )
+        stock_repo.create_many.assert_called_once_with([stocks[1]], session=None)
+
+    def test_create_batch_nothing_accepted(self, stock_usecase):
+        # Arrange
+        usecase, stock_repo, portfolio_repo = stock_usecase
+        portfolio_repo.get.return_value = None
 
         # Act
-        result = usecase.create(stock)
+        result = usecase.create_batch([self._create_stock(1, "AAPL", 100.0, 5, ActionType.SELL)])
 
         # Assert
-        portfolio_repo.get.assert_called_once_with(user_id)
-        portfolio_repo.update.assert_called_once_with(portfolio=updated_portfolio)
-        stock_repo.create.assert_called_once_with(stock)
-        assert result == stock_id
+        assert result.ids == [""]
+        assert len(result.errors) == 1
+        portfolio_repo.update_many.assert_not_called()
+        stock_repo.create_many.assert_not_called()
 
-    def test_create_sell_non_existent_holding(self, stock_usecase):
+    def test_create_batch_reapplies_trades_of_portfolios_changed_meanwhile(self, stock_usecase):
         # Arrange
         usecase, stock_repo, portfolio_repo = stock_usecase
-        user_id, stock_id = 1, "stock_129"
-        stock = CreateStock(
-            user_id=user_id,
-            symbol="AAPL",
-            price=150.0,
-            quantity=5,
-            action_type=ActionType.SELL,
-            stock_type=StockType.STOCKS,
-            created_at=ANY,
-        )
-        existing_portfolio = Portfolio(
-            user_id=user_id,
-            cash_balance=1000.0,
-            total_money_in=1000.0,
-            holdings=[],
-            created_at=ANY,
-            updated_at=ANY,
+        stocks = [
+            self._create_stock(1, "CASH", 1000.0, 1, ActionType.TRANSFER),
+            self._create_stock(2, "CASH", 500.0, 1, ActionType.TRANSFER),
+            self._create_stock(1, "AAPL", 100.0, 5, ActionType.BUY),
+        ]
+        created_at = datetime.now(timezone.utc)
+        concurrent = Portfolio(
+            user_id=1, cash_balance=50.0, total_money_in=50.0, holdings=[], created_at=created_at, updated_at=created_at
         )
-        portfolio_repo.get.return_value = existing_portfolio
-        stock_repo.create.return_value = stock_id
+        portfolio_repo.get.side_effect = [None, None, concurrent]
+        portfolio_repo.update_many.side_effect = [[1], []]
+        stock_repo.create_many.return_value = ["id0", "id1", "id2"]
 
-        # Act/Assert
-        with pytest.raises(Exception, match="Can not sell non-exist stock"):
-            usecase.create(stock)
-        portfolio_repo.get.assert_called_once_with(user_id)
-        portfolio_repo.update.assert_not_called()
-        stock_repo.create.assert_not_called()
+        # Act
+        result = usecase.create_batch(stocks)
 
-    def test_create_handles_repository_error_on_get(self, stock_usecase):
+        # Assert
+        assert result == CreateBatchResult(ids=["id0", "id1", "id2"], errors=[])
+        assert [call.kwargs["user_id"] for call in portfolio_repo.get.call_args_list] == [1, 2, 1]
+        [retried] = portfolio_repo.update_many.call_args_list[1].args[0]
+        assert retried.cash_balance == 50.0 + 1000.0 - 500.0
+        assert retried.total_money_in == 1050.0
+        stock_repo.create_many.assert_called_once_with(stocks, session=None)
+
+    def test_create_batch_gives_up_on_portfolios_that_keep_changing(self, stock_usecase):
         # Arrange
         usecase, stock_repo, portfolio_repo = stock_usecase
-        user_id, stock_id = 1, "stock_130"
-        stock = CreateStock(
-            user_id=user_id,
-            symbol="AAPL",
-            price=150.0,
-            quantity=10,
-            action_type=ActionType.BUY,
-            stock_type=StockType.STOCKS,
-            created_at=ANY,
-        )
-        portfolio_repo.get.side_effect = Exception("Portfolio repository error")
-        stock_repo.create.return_value = stock_id
+        portfolio_repo.get.return_value = None
+        portfolio_repo.update_many.return_value = [1]
 
-        # Act/Assert
-        with pytest.raises(Exception, match="Portfolio repository error"):
-            usecase.create(stock)
-        portfolio_repo.get.assert_called_once_with(user_id)
-        portfolio_repo.update.assert_not_called()
-        stock_repo.create.assert_not_called()
+        # Act & Assert
+        with pytest.raises(Exception, match="kept changing"):
+            usecase.create_batch([self._create_stock(1, "CASH", 1000.0, 1, ActionType.TRANSFER)])
+        assert portfolio_repo.update_many.call_count == 3
+        stock_repo.create_many.assert_not_called()
 
-    def test_create_handles_repository_error_on_update(self, stock_usecase):
+    def test_create_batch_in_transaction(self, stock_usecase):
         # Arrange
         usecase, stock_repo, portfolio_repo = stock_usecase
-        user_id, stock_id = 1, "stock_131"
-        stock = CreateStock(
-            user_id=user_id,
-            symbol="AAPL",
-            price=150.0,
-            quantity=10,
-            action_type=ActionType.BUY,
-            stock_type=StockType.STOCKS,
-            created_at=ANY,
-        )
-        existing_portfolio = Portfolio(
-            user_id=user_id,
-            cash_balance=2000.0,
-            total_money_in=2000.0,
-            holdings=[],
-            created_at=ANY,
-            updated_at=ANY,
-        )
-        portfolio_repo.get.return_value = existing_portfolio
-        portfolio_repo.update.side_effect = Exception("Portfolio update error")
-        stock_repo.create.return_value = stock_id
+        session = Mock()
+        usecase.transaction_manager = Mock()
+        usecase.transaction_manager.run.side_effect = lambda callback: callback(session)
+        stocks = [self._create_stock(1, "CASH", 1000.0, 1, ActionType.TRANSFER)]
+        portfolio_repo.get.return_value = None
+        stock_repo.create_many.return_value = ["id0"]
+
+        # Act
+        result = usecase.create_batch(stocks)
+
+        # Assert
+        assert result.ids == ["id0"]
+        usecase.transaction_manager.run.assert_called_once()
+        portfolio_repo.get.assert_called_once_with(user_id=1, session=session)
+        portfolio_repo.update_many.assert_called_once_with(ANY, session=session)
+        stock_repo.create_many.assert_called_once_with(stocks, session=session)
+
+
+class TestStockUsecaseList:
+    def test_list_dicts(self, stock_usecase):
+        # Arrange
+        usecase, mock_repo, _ = stock_usecase
+        page = StockDictPage(stocks=[], next_cursor="cursor")
+        mock_repo.list_dicts.return_value = page
+        query = ListStockQuery(user_id=1)
+
+        # Act
+        result = usecase.list_dicts(query)
+
+        # Assert
+        mock_repo.list_dicts.assert_called_once_with(query)
+        assert result is page
+
+    def test_list_dicts_handles_repository_error(self, stock_usecase):
+        # Arrange
+        usecase, mock_repo, _ = stock_usecase
+        mock_repo.list_dicts.side_effect = Exception("Repository error")
+        query = ListStockQuery(user_id=1)
+
+        # Act/Assert
+        with pytest.raises(Exception, match="Repository error"):
+            usecase.list_dicts(query)
+        mock_repo.list_dicts.assert_called_once_with(query)
+
+    def test_list_stream(self, stock_usecase):
+        # Arrange
+        usecase, mock_repo, _ = stock_usecase
+        pages = iter([StockPage(stocks=[], next_cursor="cursor"), StockPage(stocks=[])])
+        mock_repo.iter_pages.return_value = pages
+        query = ListStockQuery(user_id=1)
+
+        # Act
+        result = usecase.list_stream(query)
+
+        # Assert
+        mock_repo.iter_pages.assert_called_once_with(query)
+        assert result is pages
+
+
+class TestStockUsecaseGetStockPrice:
+    def test_get_stock_price_success(self, stock_usecase):
+        # Arrange
+        usecase, _, _ = stock_usecase
+        stock_info = [("AAPL", StockType.STOCKS), ("SPY", StockType.ETF)]
+        prices = {("AAPL", StockType.STOCKS): 150.0, ("SPY", StockType.ETF): 400.0}
+        usecase.price_provider.get_price.side_effect = lambda symbol, stock_type: prices[(symbol, stock_type)]
+
+        # Act
+        result = usecase._get_stock_price(stock_info=stock_info)
+
+        # Assert
+        assert usecase.price_provider.get_price.call_count == 2
+        usecase.price_provider.get_price.assert_any_call("AAPL", StockType.STOCKS)
+        usecase.price_provider.get_price.assert_any_call("SPY", StockType.ETF)
+        assert result == StockPrices(prices={"AAPL": 150.0, "SPY": 400.0})
+
+    def test_get_stock_price_empty_stock_info(self, stock_usecase):
+        # Arrange
+        usecase, _, _ = stock_usecase
+        stock_info = []
+
+        # Act
+        result = usecase._get_stock_price(stock_info=stock_info)
+
+        # Assert
+        usecase.price_provider.get_price.assert_not_called()
+        assert result == StockPrices(prices={})
+
+    def test_get_stock_price_handles_provider_error(self, stock_usecase):
+        # Arrange
+        usecase, _, _ = stock_usecase
+        stock_info = [("AAPL", StockType.STOCKS), ("GOOGL", StockType.STOCKS)]
+
+        def get_price(symbol, _):
+            if symbol == "AAPL":
+                raise Exception("API error")
+            return 2800.0
+
+        usecase.price_provider.get_price.side_effect = get_price
+
+        # Act
+        result = usecase._get_stock_price(stock_info=stock_info)
+
+        # Assert
+        assert result == StockPrices(prices={"AAPL": 0.0, "GOOGL": 2800.0}, missing_symbols=["AAPL"])
+
+    def test_get_stock_price_missing_quote(self, stock_usecase):
+        # Arrange
+        usecase, _, _ = stock_usecase
+        stock_info = [("AAPL", StockType.STOCKS), ("INVALID", StockType.STOCKS)]
+        usecase.price_provider.get_price.side_effect = lambda symbol, _: {"AAPL": 150.0}.get(symbol)
+
+        # Act
+        result = usecase._get_stock_price(stock_info=stock_info)
+
+        # Assert
+        assert result == StockPrices(prices={"AAPL": 150.0, "INVALID": 0.0}, missing_symbols=["INVALID"])
+
+    def test_get_stock_price_reads_through_cache(self, stock_usecase):
+        # Arrange
+        usecase, _, _ = stock_usecase
+        usecase.price_provider.get_price.side_effect = [150.0, 400.0]
+        usecase._get_stock_price(stock_info=[("AAPL", StockType.STOCKS)])
+
+        # Act
+        result = usecase._get_stock_price(stock_info=[("AAPL", StockType.STOCKS), ("SPY", StockType.ETF)])
+
+        # Assert
+        assert usecase.price_provider.get_price.call_count == 2
+        usecase.price_provider.get_price.assert_called_with("SPY", StockType.ETF)
+        assert result == StockPrices(prices={"AAPL": 150.0, "SPY": 400.0})
+        assert usecase.price_cache.stats().hits == 1
+
+    def test_get_stock_price_cache_key_includes_stock_type(self, stock_usecase):
+        # Arrange
+        usecase, _, _ = stock_usecase
+        usecase.price_provider.get_price.side_effect = [150.0, 149.0]
+        usecase._get_stock_price(stock_info=[("ABC", StockType.STOCKS)])
+
+        # Act
+        result = usecase._get_stock_price(stock_info=[("ABC", StockType.ETF)])
+
+        # Assert
+        assert usecase.price_provider.get_price.call_count == 2
+        assert result == StockPrices(prices={"ABC": 149.0})
+
+    def test_get_stock_price_does_not_cache_fallback(self, stock_usecase):
+        # Arrange
+        usecase, _, _ = stock_usecase
+        usecase.price_provider.get_price.side_effect = Exception("API error")
+        usecase._get_stock_price(stock_info=[("AAPL", StockType.STOCKS)])
+
+        # Act
+        result = usecase._get_stock_price(stock_info=[("AAPL", StockType.STOCKS)])
+
+        # Assert
+        assert usecase.price_provider.get_price.call_count == 2
+        assert result == StockPrices(prices={"AAPL": 0.0}, missing_symbols=["AAPL"])
+        assert len(usecase.price_cache) == 0
+
+    def test_get_stock_price_fetches_symbols_concurrently(self, stock_usecase):
+        # Arrange
+        usecase, _, _ = stock_usecase
+        stock_info = [(f"SYM{i}", StockType.STOCKS) for i in range(8)]
+        usecase.price_provider.get_price.side_effect = lambda symbol, _: time.sleep(0.2) or 100.0
+
+        # Act
+        start = time.monotonic()
+        result = usecase._get_stock_price(stock_info=stock_info)
+        elapsed = time.monotonic() - start
 
-        # Act/Assert
-        with pytest.raises(Exception, match="Portfolio update error"):
-            usecase.create(stock)
-        portfolio_repo.get.assert_called_once_with(user_id)
-        portfolio_repo.update.assert_called_once_with(portfolio=ANY)  # Portfolio may vary, so use ANY
-        stock_repo.create.assert_not_called()
+        # Assert
+        assert elapsed < 0.2 * len(stock_info) / 2
+        assert result == StockPrices(prices={symbol: 100.0 for symbol, _ in stock_info})
 
-    def test_create_handles_repository_error_on_stock_create(self, stock_usecase):
+    def test_get_stock_price_coalesces_concurrent_lookups(self, stock_usecase):
         # Arrange
-        usecase, stock_repo, portfolio_repo = stock_usecase
-        user_id = 1
-        stock = CreateStock(
-            user_id=user_id,
-            symbol="AAPL",
-            price=150.0,
-            quantity=10,
-            action_type=ActionType.BUY,
-            stock_type=StockType.STOCKS,
-            created_at=ANY,
-        )
-        existing_portfolio = Portfolio(
-            user_id=user_id,
-            cash_balance=2000.0,
-            total_money_in=2000.0,
-            holdings=[],
-            created_at=ANY,
-            updated_at=ANY,
-        )
-        portfolio_repo.get.return_value = existing_portfolio
-        stock_repo.create.side_effect = Exception("Stock create error")
+        usecase, _, _ = stock_usecase
+        release = Event()
+        usecase.price_provider.get_price.side_effect = lambda symbol, _: release.wait(5) and 400.0
 
-        # Act/Assert
-        with pytest.raises(Exception, match="Stock create error"):
-            usecase.create(stock)
-        portfolio_repo.get.assert_called_once_with(user_id)
-        portfolio_repo.update.assert_called_once_with(portfolio=ANY)  # Portfolio may vary, so use ANY
-        stock_repo.create.assert_called_once_with(stock)
+        # Act
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            calls = [executor.submit(usecase._get_stock_price, [("SPY", StockType.ETF)]) for _ in range(3)]
+            while usecase.price_flight.stats().coalesced < 2:
+                time.sleep(0.01)
+            release.set()
+            results = [call.result() for call in calls]
 
+        # Assert
+        usecase.price_provider.get_price.assert_called_once_with("SPY", StockType.ETF)
+        assert results == [StockPrices(prices={"SPY": 400.0})] * 3
 
-class TestStockUsecaseList:
-    def test_list(self, stock_usecase):
+    def test_get_stock_price_lookups_of_a_hot_symbol_take_one_worker(self, stock_usecase):
         # Arrange
-        usecase, mock_repo, _ = stock_usecase
-        user_id = 1
-        mock_stocks = [
-            Stock(
-                id="stock_123",
-                user_id=1,
-                symbol="AAPL",
-                price=150.25,
-                quantity=100,
-                action_type=ActionType.BUY,
-                stock_type=StockType.STOCKS,
-                created_at=ANY,
-                updated_at=ANY,
-            ),
-            Stock(
-                id="stock_124",
-                user_id=1,
-                symbol="GOOGL",
-                price=2800.50,
-                quantity=10,
-                action_type=ActionType.BUY,
-                stock_type=StockType.STOCKS,
-                created_at=ANY,
-                updated_at=ANY,
-            ),
-        ]
-        mock_repo.list.return_value = mock_stocks
+        usecase, _, _ = stock_usecase
+        usecase.price_executor = ThreadPoolExecutor(max_workers=2)
+        release = Event()
+        usecase.price_provider.get_price.side_effect = lambda symbol, _: (symbol != "SPY" or release.wait(5)) and 400.0
 
         # Act
-        result = usecase.list(user_id)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            calls = [executor.submit(usecase._get_stock_price, [("SPY", StockType.ETF)]) for _ in range(4)]
+            while usecase.price_flight.stats().coalesced < 3:
+                time.sleep(0.01)
+            other = usecase._get_stock_price([("AAPL", StockType.STOCKS)])
+            release.set()
+            results = [call.result() for call in calls]
 
         # Assert
-        mock_repo.list.assert_called_once_with(user_id)
-        assert result == mock_stocks
-        assert len(result) == 2
-        assert all(isinstance(stock, Stock) for stock in result)
-        assert result[0].symbol == "AAPL"
-        assert result[1].symbol == "GOOGL"
+        assert other == StockPrices(prices={"AAPL": 400.0})
+        assert results == [StockPrices(prices={"SPY": 400.0})] * 4
 
-    def test_list_handles_repository_error(self, stock_usecase):
+    def test_get_stock_price_timeout_degrades_to_missing(self, stock_usecase):
         # Arrange
-        usecase, mock_repo, _ = stock_usecase
-        user_id = 1
-        mock_repo.list.side_effect = Exception("Repository error")
+        usecase, _, _ = stock_usecase
+        usecase.price_fetch_timeout = 0.1
+        release = Event()
 
-        # Act/Assert
-        with pytest.raises(Exception, match="Repository error"):
-            usecase.list(user_id)
-        mock_repo.list.assert_called_once_with(user_id)
+        def get_price(symbol, _):
+            if symbol == "SLOW":
+                release.wait(5)
+            return 150.0
 
+        usecase.price_provider.get_price.side_effect = get_price
 
-class TestStockUsecaseGetStockPrice:
-    @patch("usecase.stock.yf.Tickers")
-    def test_get_stock_price_success_stocks(self, mock_yf_tickers, stock_usecase):
+        # Act
+        result = usecase._get_stock_price(stock_info=[("AAPL", StockType.STOCKS), ("SLOW", StockType.STOCKS)])
+        release.set()
+
+        # Assert
+        assert result == StockPrices(prices={"AAPL": 150.0, "SLOW": 0.0}, missing_symbols=["SLOW"])
+
+    def test_get_stock_price_timeout_degrades_to_stale_quote(self, stock_usecase):
         # Arrange
         usecase, _, _ = stock_usecase
-        stock_info = [("AAPL", StockType.STOCKS), ("GOOGL", StockType.STOCKS)]
-        mock_ticker_aapl = Mock()
-        mock_ticker_aapl.info = {"currentPrice": 150.0}
-        mock_ticker_googl = Mock()
-        mock_ticker_googl.info = {"currentPrice": 2800.0}
-        mock_yf_tickers.return_value.tickers = {
-            "AAPL": mock_ticker_aapl,
-            "GOOGL": mock_ticker_googl,
-        }
+        usecase.price_fetch_timeout = 0.1
+        usecase.price_cache = TTLCache(ttl=0.01, max_size=10)
+        usecase.price_cache.set(("SLOW", StockType.STOCKS), 140.0)
+        time.sleep(0.02)
+        release = Event()
+        usecase.price_provider.get_price.side_effect = lambda symbol, _: release.wait(5) and 150.0
 
         # Act
-        result = usecase._get_stock_price(stock_info=stock_info)
+        result = usecase._get_stock_price(stock_info=[("SLOW", StockType.STOCKS)])
+        release.set()
 
         # Assert
-        mock_yf_tickers.assert_called_once_with(["AAPL", "GOOGL"])
-        assert result == {"AAPL": 150.0, "GOOGL": 2800.0}
+        assert result == StockPrices(prices={"SLOW": 140.0}, stale_symbols=["SLOW"])
 
-    @patch("usecase.stock.yf.Tickers")
-    def test_get_stock_price_success_etf(self, mock_yf_tickers, stock_usecase):
+
+class TestStockUsecaseQuoteSnapshots:
+    def test_get_stock_price_uses_fresh_snapshot(self, stock_usecase):
         # Arrange
         usecase, _, _ = stock_usecase
-        stock_info = [("SPY", StockType.ETF), ("VTI", StockType.ETF)]
-        mock_ticker_spy = Mock()
-        mock_ticker_spy.info = {"navPrice": 400.0}
-        mock_ticker_vti = Mock()
-        mock_ticker_vti.info = {"navPrice": 200.0}
-        mock_yf_tickers.return_value.tickers = {
-            "SPY": mock_ticker_spy,
-            "VTI": mock_ticker_vti,
-        }
+        usecase.quote_repo = Mock()
+        usecase.quote_repo.get_many.return_value = [
+            Quote(symbol="SPY", stock_type=StockType.ETF, price=400.0, fetched_at=datetime.now(timezone.utc))
+        ]
+        usecase.price_provider.get_price.return_value = 150.0
 
         # Act
-        result = usecase._get_stock_price(stock_info=stock_info)
+        result = usecase._get_stock_price(stock_info=[("AAPL", StockType.STOCKS), ("SPY", StockType.ETF)])
 
         # Assert
-        mock_yf_tickers.assert_called_once_with(["SPY", "VTI"])
-        assert result == {"SPY": 400.0, "VTI": 200.0}
+        usecase.quote_repo.get_many.assert_called_once_with(
+            [("AAPL", StockType.STOCKS), ("SPY", StockType.ETF)], max_age=usecase.price_cache.ttl
+        )
+        usecase.price_provider.get_price.assert_called_once_with("AAPL", StockType.STOCKS)
+        usecase.quote_repo.save.assert_called_once_with(
+            Quote(symbol="AAPL", stock_type=StockType.STOCKS, price=150.0, fetched_at=ANY)
+        )
+        assert result == StockPrices(prices={"AAPL": 150.0, "SPY": 400.0})
+        assert usecase.price_cache.get(("SPY", StockType.ETF)) == 400.0
 
-    @patch("usecase.stock.yf.Tickers")
-    def test_get_stock_price_mixed_types(self, mock_yf_tickers, stock_usecase):
+    def test_get_stock_price_snapshot_cached_for_remaining_ttl(self, stock_usecase):
         # Arrange
         usecase, _, _ = stock_usecase
-        stock_info = [("AAPL", StockType.STOCKS), ("SPY", StockType.ETF)]
-        mock_ticker_aapl = Mock()
-        mock_ticker_aapl.info = {"currentPrice": 150.0}
-        mock_ticker_spy = Mock()
-        mock_ticker_spy.info = {"navPrice": 400.0}
-        mock_yf_tickers.return_value.tickers = {
-            "AAPL": mock_ticker_aapl,
-            "SPY": mock_ticker_spy,
-        }
+        usecase.quote_repo = Mock()
+        fetched_at = datetime.now(timezone.utc) - timedelta(seconds=usecase.price_cache.ttl - 10)
+        usecase.quote_repo.get_many.return_value = [
+            Quote(symbol="SPY", stock_type=StockType.ETF, price=400.0, fetched_at=fetched_at)
+        ]
 
         # Act
-        result = usecase._get_stock_price(stock_info=stock_info)
+        usecase._get_stock_price(stock_info=[("SPY", StockType.ETF)])
 
         # Assert
-        mock_yf_tickers.assert_called_once_with(["AAPL", "SPY"])
-        assert result == {"AAPL": 150.0, "SPY": 400.0}
+        assert 0 < usecase.price_cache.expires_in(("SPY", StockType.ETF)) <= 10
 
-    @patch("usecase.stock.yf.Tickers")
-    def test_get_stock_price_empty_stock_info(self, mock_yf_tickers, stock_usecase):
+    def test_get_stock_price_snapshot_error_falls_back_to_provider(self, stock_usecase):
         # Arrange
         usecase, _, _ = stock_usecase
-        stock_info = []
+        usecase.quote_repo = Mock()
+        usecase.quote_repo.get_many.side_effect = Exception("Database error")
+        usecase.quote_repo.save.side_effect = Exception("Database error")
+        usecase.price_provider.get_price.return_value = 150.0
 
         # Act
-        result = usecase._get_stock_price(stock_info=stock_info)
+        result = usecase._get_stock_price(stock_info=[("AAPL", StockType.STOCKS)])
 
         # Assert
-        mock_yf_tickers.assert_not_called()
-        assert result == {}
+        assert result == StockPrices(prices={"AAPL": 150.0})
 
-    @patch("usecase.stock.yf.Tickers")
-    def test_get_stock_price_handles_api_error(self, mock_yf_tickers, stock_usecase):
+    def test_refresh_skips_quotes_refreshed_by_another_replica(self, stock_usecase):
         # Arrange
         usecase, _, _ = stock_usecase
-        stock_info = [("AAPL", StockType.STOCKS), ("GOOGL", StockType.STOCKS)]
-        mock_yf_tickers.side_effect = Exception("API error")
+        usecase.hot_symbols = TTLCache(ttl=600, max_size=10)
+        usecase.hot_symbols.set(("SPY", StockType.ETF), True)
+        usecase.quote_repo = Mock()
+        usecase.quote_repo.get_many.return_value = [
+            Quote(symbol="SPY", stock_type=StockType.ETF, price=400.0, fetched_at=datetime.now(timezone.utc))
+        ]
 
         # Act
-        result = usecase._get_stock_price(stock_info=stock_info)
+        result = usecase.refresh_hot_prices(refresh_ahead=10)
 
         # Assert
-        mock_yf_tickers.assert_called_once_with(["AAPL", "GOOGL"])
-        assert result == {"AAPL": 0.0, "GOOGL": 0.0}
+        assert result == 0
+        usecase.quote_repo.get_many.assert_called_once_with(
+            [("SPY", StockType.ETF)], max_age=usecase.price_cache.ttl - 10
+        )
+        usecase.price_provider.get_price.assert_not_called()
 
-    @patch("usecase.stock.yf.Tickers")
-    def test_get_stock_price_missing_ticker(self, mock_yf_tickers, stock_usecase):
+
+class TestStockUsecaseRefreshHotPrices:
+    def test_refresh_without_tracking(self, stock_usecase):
         # Arrange
         usecase, _, _ = stock_usecase
-        stock_info = [("AAPL", StockType.STOCKS), ("INVALID", StockType.STOCKS)]
-        mock_ticker_aapl = Mock()
-        mock_ticker_aapl.info = {"currentPrice": 150.0}
-        mock_yf_tickers.return_value.tickers = {"AAPL": mock_ticker_aapl}
 
         # Act
-        result = usecase._get_stock_price(stock_info=stock_info)
+        result = usecase.refresh_hot_prices(refresh_ahead=10)
 
         # Assert
-        mock_yf_tickers.assert_called_once_with(["AAPL", "INVALID"])
-        assert result == {"AAPL": 150.0, "INVALID": 0.0}
+        assert result == 0
+        usecase.price_provider.get_price.assert_not_called()
 
-    @patch("usecase.stock.yf.Tickers")
-    def test_get_stock_price_missing_price_field(self, mock_yf_tickers, stock_usecase):
+    def test_refresh_only_quotes_about_to_expire(self, stock_usecase):
         # Arrange
         usecase, _, _ = stock_usecase
-        stock_info = [("AAPL", StockType.STOCKS), ("SPY", StockType.ETF)]
-        mock_ticker_aapl = Mock()
-        mock_ticker_aapl.info = {}  # No currentPrice
-        mock_ticker_spy = Mock()
-        mock_ticker_spy.info = {}  # No navPrice
-        mock_yf_tickers.return_value.tickers = {
-            "AAPL": mock_ticker_aapl,
-            "SPY": mock_ticker_spy,
-        }
+        usecase.hot_symbols = TTLCache(ttl=600, max_size=10)
+        usecase.price_cache = TTLCache(ttl=60, max_size=10)
+        usecase.price_provider.get_price.side_effect = lambda symbol, _: {"AAPL": 150.0, "SPY": 400.0}[symbol]
+        usecase._get_stock_price(stock_info=[("AAPL", StockType.STOCKS), ("SPY", StockType.ETF)])
+        usecase.price_cache.set(("SPY", StockType.ETF), 400.0)  # pretend SPY was refreshed recently
+        usecase.price_cache.ttl = 5
+        usecase.price_cache.set(("AAPL", StockType.STOCKS), 150.0)  # AAPL expires in 5 seconds
+        usecase.price_provider.get_price.reset_mock()
 
         # Act
-        result = usecase._get_stock_price(stock_info=stock_info)
+        result = usecase.refresh_hot_prices(refresh_ahead=10)
+
+        # Assert
+        assert result == 1
+        usecase.price_provider.get_price.assert_called_once_with("AAPL", StockType.STOCKS)
+        assert usecase.price_cache.expires_in(("AAPL", StockType.STOCKS)) > 4
+
+    def test_refresh_uncached_hot_quotes(self, stock_usecase):
+        # Arrange
+        usecase, _, _ = stock_usecase
+        usecase.hot_symbols = TTLCache(ttl=600, max_size=10)
+        usecase.price_provider.get_price.side_effect = [None, 150.0]
+        usecase._get_stock_price(stock_info=[("AAPL", StockType.STOCKS)])
+
+        # Act
+        result = usecase.refresh_hot_prices(refresh_ahead=10)
 
         # Assert
-        mock_yf_tickers.assert_called_once_with(["AAPL", "SPY"])
-        assert result == {"AAPL": 0.0, "SPY": 0.0}
+        assert result == 1
+        assert usecase.price_cache.get(("AAPL", StockType.STOCKS)) == 150.0
 
 
 class TestStockUsecaseGetPortfolioInfo:
@@ -571,7 +671,7 @@ class TestStockUsecaseGetPortfolioInfo:
         result = usecase.get_portfolio_info(user_id)
 
         # Assert
-        portfolio_repo.get.assert_called_once_with(user_id=user_id)
+        portfolio_repo.get.assert_called_once_with(user_id=user_id, secondary_ok=True)
         mock_get_stock_price.assert_not_called()
         assert result == expected_result
 
@@ -595,7 +695,7 @@ class TestStockUsecaseGetPortfolioInfo:
         result = usecase.get_portfolio_info(user_id)
 
         # Assert
-        portfolio_repo.get.assert_called_once_with(user_id=user_id)
+        portfolio_repo.get.assert_called_once_with(user_id=user_id, secondary_ok=True)
         mock_get_stock_price.assert_not_called()
         assert result == expected_result
 
@@ -624,7 +724,7 @@ class TestStockUsecaseGetPortfolioInfo:
         result = usecase.get_portfolio_info(user_id)
 
         # Assert
-        portfolio_repo.get.assert_called_once_with(user_id=user_id)
+        portfolio_repo.get.assert_called_once_with(user_id=user_id, secondary_ok=True)
         mock_get_stock_price.assert_not_called()
         assert result == expected_result
 
@@ -644,7 +744,7 @@ class TestStockUsecaseGetPortfolioInfo:
             created_at=ANY,
             updated_at=ANY,
         )
-        mock_get_stock_price.return_value = {"AAPL": 200.0, "SPY": 400.0}
+        mock_get_stock_price.return_value = StockPrices(prices={"AAPL": 200.0, "SPY": 400.0})
         portfolio_repo.get.return_value = portfolio
         expected_result = PortfolioInfo(
             user_id=user_id,
@@ -657,10 +757,44 @@ class TestStockUsecaseGetPortfolioInfo:
         result = usecase.get_portfolio_info(user_id)
 
         # Assert
-        portfolio_repo.get.assert_called_once_with(user_id=user_id)
+        portfolio_repo.get.assert_called_once_with(user_id=user_id, secondary_ok=True)
         mock_get_stock_price.assert_called_once_with(stock_info=[("AAPL", StockType.STOCKS), ("SPY", StockType.ETF)])
         assert result == expected_result
 
+    @patch.object(StockUsecase, "_get_stock_price")
+    def test_get_portfolio_info_reports_degraded_prices(self, mock_get_stock_price, stock_usecase):
+        # Arrange
+        usecase, _, portfolio_repo = stock_usecase
+        user_id = 1
+        portfolio = Portfolio(
+            user_id=user_id,
+            cash_balance=1000.0,
+            total_money_in=2000.0,
+            holdings=[
+                Holding(symbol="AAPL", shares=10, stock_type=StockType.STOCKS, total_cost=1500.0),
+                Holding(symbol="SPY", shares=5, stock_type=StockType.ETF, total_cost=1000.0),
+            ],
+            created_at=ANY,
+            updated_at=ANY,
+        )
+        mock_get_stock_price.return_value = StockPrices(
+            prices={"AAPL": 0.0, "SPY": 400.0}, missing_symbols=["AAPL"], stale_symbols=["SPY"]
+        )
+        portfolio_repo.get.return_value = portfolio
+
+        # Act
+        result = usecase.get_portfolio_info(user_id)
+
+        # Assert
+        assert result == PortfolioInfo(
+            user_id=user_id,
+            total_portfolio_value=3000.0,
+            total_gain=1000.0,
+            roi=50.0,
+            missing_symbols=["AAPL"],
+            stale_symbols=["SPY"],
+        )
+
 
 class TestStockUsecaseGetStockInfo:
     @patch.object(StockUsecase, "_get_stock_price")
@@ -675,7 +809,7 @@ class TestStockUsecaseGetStockInfo:
         result = usecase.get_stock_info(user_id)
 
         # Assert
-        portfolio_repo.get.assert_called_once_with(user_id=user_id)
+        portfolio_repo.get.assert_called_once_with(user_id=user_id, secondary_ok=True)
         mock_get_stock_price.assert_not_called()
         assert result == expected_result
 
@@ -699,7 +833,7 @@ class TestStockUsecaseGetStockInfo:
         result = usecase.get_stock_info(user_id)
 
         # Assert
-        portfolio_repo.get.assert_called_once_with(user_id=user_id)
+        portfolio_repo.get.assert_called_once_with(user_id=user_id, secondary_ok=True)
         mock_get_stock_price.assert_not_called()
         assert result == expected_result
 
@@ -723,7 +857,7 @@ class TestStockUsecaseGetStockInfo:
         result = usecase.get_stock_info(user_id)
 
         # Assert
-        portfolio_repo.get.assert_called_once_with(user_id=user_id)
+        portfolio_repo.get.assert_called_once_with(user_id=user_id, secondary_ok=True)
         mock_get_stock_price.assert_not_called()
         assert result == expected_result
 
@@ -746,7 +880,7 @@ class TestStockUsecaseGetStockInfo:
             updated_at=ANY,
         )
 
-        mock_get_stock_price.return_value = {"AAPL": 200.0, "TSLA": 500.0, "SPY": 400.0, "QQQ": 300.0}
+        mock_get_stock_price.return_value = StockPrices(prices={"AAPL": 200.0, "TSLA": 500.0, "SPY": 400.0, "QQQ": 300.0})
         portfolio_repo.get.return_value = portfolio
         expected_result = {
             StockType.ETF.value: [
@@ -796,7 +930,7 @@ class TestStockUsecaseGetStockInfo:
         result = usecase.get_stock_info(user_id)
 
         # Assert
-        portfolio_repo.get.assert_called_once_with(user_id=user_id)
+        portfolio_repo.get.assert_called_once_with(user_id=user_id, secondary_ok=True)
         mock_get_stock_price.assert_called_once_with(
             stock_info=[
                 ("AAPL", StockType.STOCKS),
@@ -806,3 +940,300 @@ class TestStockUsecaseGetStockInfo:
             ]
         )
         assert result == expected_result
+
+
+class TestStockUsecaseGetPortfolioSummary:
+    @patch.object(StockUsecase, "_get_stock_price")
+    def test_get_portfolio_summary_values_the_portfolio_once(self, mock_get_stock_price, stock_usecase):
+        # Arrange
+        usecase, _, portfolio_repo = stock_usecase
+        user_id = 1
+        portfolio = Portfolio(
+            user_id=user_id,
+            cash_balance=1000.0,
+            total_money_in=2000.0,
+            holdings=[
+                Holding(symbol="AAPL", shares=10, stock_type=StockType.STOCKS, total_cost=1500.0),
+                Holding(symbol="SPY", shares=5, stock_type=StockType.ETF, total_cost=1000.0),
+            ],
+            created_at=ANY,
+            updated_at=ANY,
+        )
+        mock_get_stock_price.return_value = StockPrices(prices={"AAPL": 200.0, "SPY": 400.0}, stale_symbols=["SPY"])
+        portfolio_repo.get.return_value = portfolio
+        expected_result = PortfolioSummary(
+            info=PortfolioInfo(
+                user_id=user_id,
+                total_portfolio_value=5000.0,
+                total_gain=3000.0,
+                roi=150.0,
+                stale_symbols=["SPY"],
+            ),
+            stock_info={
+                StockType.ETF.value: [
+                    StockInfo(symbol="SPY", quantity=5, price=400.0, avg_cost=200.0, percentage=40.0, stale=True)
+                ],
+                StockType.STOCKS.value: [
+                    StockInfo(symbol="AAPL", quantity=10, price=200.0, avg_cost=150.0, percentage=40.0)
+                ],
+                "CASH": [StockInfo(symbol="CASH", quantity=1, price=1000.0, avg_cost=0.0, percentage=20.0)],
+            },
+        )
+
+        # Act
+        result = usecase.get_portfolio_summary(user_id)
+
+        # Assert
+        portfolio_repo.get.assert_called_once_with(user_id=user_id, secondary_ok=True)
+        mock_get_stock_price.assert_called_once_with(stock_info=[("AAPL", StockType.STOCKS), ("SPY", StockType.ETF)])
+        assert result == expected_result
+
+    @patch.object(StockUsecase, "_get_stock_price")
+    def test_get_portfolio_summary_no_valid_holdings(self, mock_get_stock_price, stock_usecase):
+        # Arrange
+        usecase, _, portfolio_repo = stock_usecase
+        user_id = 1
+        portfolio = Portfolio(
+            user_id=user_id,
+            cash_balance=1000.0,
+            total_money_in=2000.0,
+            holdings=[Holding(symbol="AAPL", shares=0, stock_type=StockType.STOCKS, total_cost=0.0)],
+            created_at=ANY,
+            updated_at=ANY,
+        )
+        portfolio_repo.get.return_value = portfolio
+
+        # Act
+        result = usecase.get_portfolio_summary(user_id)
+
+        # Assert
+        mock_get_stock_price.assert_not_called()
+        assert result == PortfolioSummary(
+            info=PortfolioInfo(user_id=user_id, total_portfolio_value=1000.0, total_gain=-1000.0, roi=-50.0),
+            stock_info={StockType.ETF.value: [], StockType.STOCKS.value: [], "CASH": []},
+        )
+
+
+class TestStockUsecaseGetPortfolioInfoBatch:
+    @staticmethod
+    def _portfolio(user_id, holdings):
+        now = datetime.now(timezone.utc)
+        return Portfolio(
+            user_id=user_id,
+            cash_balance=1000.0,
+            total_money_in=2000.0,
+            holdings=holdings,
+            created_at=now,
+            updated_at=now,
+        )
+
+    @patch.object(StockUsecase, "_get_stock_price")
+    def test_values_every_portfolio_from_one_price_fetch(self, mock_get_stock_price, stock_usecase):
+        # Arrange
+        usecase, _, portfolio_repo = stock_usecase
+        portfolio_repo.get_many.return_value = {
+            1: self._portfolio(1, [Holding(symbol="AAPL", shares=10, stock_type=StockType.STOCKS, total_cost=1500.0)]),
+            2: self._portfolio(
+                2,
+                [
+                    Holding(symbol="AAPL", shares=5, stock_type=StockType.STOCKS, total_cost=500.0),
+                    Holding(symbol="SPY", shares=5, stock_type=StockType.ETF, total_cost=1000.0),
+                ],
+            ),
+        }
+        mock_get_stock_price.return_value = StockPrices(prices={"AAPL": 200.0, "SPY": 400.0}, stale_symbols=["SPY"])
+
+        # Act
+        result = usecase.get_portfolio_info_batch([2, 1, 3, 2])
+
+        # Assert
+        portfolio_repo.get_many.assert_called_once_with([2, 1, 3], secondary_ok=True)
+        portfolio_repo.get.assert_not_called()
+        mock_get_stock_price.assert_called_once_with(stock_info=[("AAPL", StockType.STOCKS), ("SPY", StockType.ETF)])
+        assert result == [
+            PortfolioInfo(user_id=2, total_portfolio_value=4000.0, total_gain=2000.0, roi=100.0, stale_symbols=["SPY"]),
+            PortfolioInfo(user_id=1, total_portfolio_value=3000.0, total_gain=1000.0, roi=50.0),
+            PortfolioInfo(user_id=3, total_portfolio_value=0.0, total_gain=0.0, roi=0.0),
+            PortfolioInfo(user_id=2, total_portfolio_value=4000.0, total_gain=2000.0, roi=100.0, stale_symbols=["SPY"]),
+        ]
+
+    def test_loads_only_uncached_portfolios(self, stock_usecase):
+        # Arrange
+        usecase, _, portfolio_repo = stock_usecase
+        usecase.valuation_cache = VersionedCache(ttl=5, max_size=10)
+        holdings = [Holding(symbol="AAPL", shares=10, stock_type=StockType.STOCKS, total_cost=1000.0)]
+        portfolio_repo.get.return_value = self._portfolio(1, holdings)
+        portfolio_repo.get_many.return_value = {2: self._portfolio(2, holdings)}
+        usecase.price_provider.get_price.return_value = 150.0
+        usecase.get_portfolio_info(1)
+
+        # Act
+        first = usecase.get_portfolio_info_batch([1, 2])
+        second = usecase.get_portfolio_info_batch([1, 2])
+
+        # Assert
+        portfolio_repo.get_many.assert_called_once_with([2], secondary_ok=True)
+        assert first == second
+        assert [info.total_portfolio_value for info in first] == [2500.0, 2500.0]
+
+    def test_rejects_too_many_users(self, stock_usecase):
+        # Arrange
+        usecase, _, portfolio_repo = stock_usecase
+
+        # Act & Assert
+        with pytest.raises(ValueError):
+            usecase.get_portfolio_info_batch(list(range(PORTFOLIO_INFO_BATCH_MAX_USERS + 1)))
+        portfolio_repo.get_many.assert_not_called()
+
+
+class TestStockUsecaseValuationCache:
+    @staticmethod
+    def _portfolio():
+        now = datetime.now(timezone.utc)
+        return Portfolio(
+            user_id=1,
+            cash_balance=1000.0,
+            total_money_in=2000.0,
+            holdings=[Holding(symbol="AAPL", shares=10, stock_type=StockType.STOCKS, total_cost=1000.0)],
+            created_at=now,
+            updated_at=now,
+        )
+
+    def test_serves_repeated_valuations_from_cache(self, stock_usecase):
+        # Arrange
+        usecase, _, portfolio_repo = stock_usecase
+        usecase.valuation_cache = VersionedCache(ttl=5, max_size=10)
+        portfolio_repo.get.return_value = self._portfolio()
+        usecase.price_provider.get_price.return_value = 150.0
+
+        # Act
+        first = usecase.get_portfolio_info(1)
+        second = usecase.get_portfolio_info(1)
+        usecase.get_stock_info(1)
+        usecase.get_stock_info(1)
+
+        # Assert
+        assert first == second == PortfolioInfo(user_id=1, total_portfolio_value=2500.0, total_gain=500.0, roi=25.0)
+        assert portfolio_repo.get.call_count == 1  # both views come from the same valuation
+        assert usecase.valuation_cache.stats().hits == 3
+
+    def test_create_invalidates_the_users_valuations(self, stock_usecase):
+        # Arrange
+        usecase, stock_repo, portfolio_repo = stock_usecase
+        usecase.valuation_cache = VersionedCache(ttl=5, max_size=10)
+        portfolio_repo.get.return_value = self._portfolio()
+        usecase.price_provider.get_price.return_value = 150.0
+        stock_repo.create.return_value = "123"
+        usecase.get_portfolio_info(1)
+        usecase.get_stock_info(1)
+
+        # Act
+        usecase.create(
+            CreateStock(
+                user_id=1,
+                symbol="AAPL",
+                price=150.0,
+                quantity=1,
+                action_type=ActionType.BUY,
+                stock_type=StockType.STOCKS,
+                created_at=ANY,
+            )
+        )
+        usecase.get_portfolio_info(1)
+        usecase.get_stock_info(1)
+
+        # Assert
+        assert portfolio_repo.get.call_count == 2
+        assert usecase.valuation_cache.stats().invalidations == 1
+
+    def test_reads_the_primary_after_the_users_own_trade(self, stock_usecase):
+        # Arrange
+        usecase, stock_repo, portfolio_repo = stock_usecase
+        usecase.valuation_cache = VersionedCache(ttl=5, max_size=10)
+        portfolio_repo.get.return_value = self._portfolio()
+        usecase.price_provider.get_price.return_value = 150.0
+        stock_repo.create.return_value = "123"
+        usecase.create(
+            CreateStock(
+                user_id=1,
+                symbol="AAPL",
+                price=150.0,
+                quantity=1,
+                action_type=ActionType.BUY,
+                stock_type=StockType.STOCKS,
+                created_at=ANY,
+            )
+        )
+
+        # Act
+        usecase.get_portfolio_info(1)
+        usecase.get_portfolio_info(2)
+
+        # Assert
+        assert portfolio_repo.get.call_args_list == [
+            call(user_id=1, secondary_ok=False),
+            call(user_id=2, secondary_ok=True),
+        ]
+
+    def test_batch_reads_the_primary_for_users_written_elsewhere(self, stock_usecase):
+        # Arrange
+        usecase, _, portfolio_repo = stock_usecase
+        portfolio_repo.get_many.side_effect = lambda user_ids, secondary_ok=False: {}
+        usecase.invalidate_valuation(2)
+
+        # Act
+        usecase.get_portfolio_info_batch([1, 2, 3])
+
+        # Assert
+        assert portfolio_repo.get_many.call_args_list == [call([1, 3], secondary_ok=True), call([2])]
+
+    def test_does_not_cache_degraded_valuations(self, stock_usecase):
+        # Arrange
+        usecase, _, portfolio_repo = stock_usecase
+        usecase.valuation_cache = VersionedCache(ttl=5, max_size=10)
+        portfolio_repo.get.return_value = self._portfolio()
+        usecase.price_provider.get_price.side_effect = [None, 150.0]
+
+        # Act
+        first = usecase.get_portfolio_info(1)
+        second = usecase.get_portfolio_info(1)
+
+        # Assert
+        assert first.missing_symbols == ["AAPL"]
+        assert second.missing_symbols == []
+        assert portfolio_repo.get.call_count == 2
+
+    def test_refreshed_prices_start_a_new_epoch(self, stock_usecase):
+        # Arrange
+        usecase, _, portfolio_repo = stock_usecase
+        usecase.valuation_cache = VersionedCache(ttl=5, max_size=10)
+        usecase.hot_symbols = TTLCache(ttl=600, max_size=10)
+        portfolio_repo.get.return_value = self._portfolio()
+        usecase.price_provider.get_price.side_effect = [150.0, 155.0]
+        usecase.get_portfolio_info(1)
+
+        # Act
+        usecase.refresh_hot_prices(refresh_ahead=usecase.price_cache.ttl)
+        usecase.get_portfolio_info(1)
+
+        # Assert
+        assert usecase.valuation_cache.stats().epoch == 1
+        assert portfolio_repo.get.call_count == 2
+
+    def test_unchanged_refreshed_prices_keep_the_epoch(self, stock_usecase):
+        # Arrange
+        usecase, _, portfolio_repo = stock_usecase
+        usecase.valuation_cache = VersionedCache(ttl=5, max_size=10)
+        usecase.hot_symbols = TTLCache(ttl=600, max_size=10)
+        portfolio_repo.get.return_value = self._portfolio()
+        usecase.price_provider.get_price.return_value = 150.0
+        usecase.get_portfolio_info(1)
+
+        # Act
+        usecase.refresh_hot_prices(refresh_ahead=usecase.price_cache.ttl)
+        usecase.get_portfolio_info(1)
+
+        # Assert
+        assert usecase.price_provider.get_price.call_count == 2
+        assert usecase.valuation_cache.stats().epoch == 0
+        assert portfolio_repo.get.call_count == 1
@@ -0,0 +1,73 @@
+import os
+import threading
+import time
+import pytest
+from utils.supervisor import Supervisor
+
+
+def crash_once(index: int) -> None:
+    # The first worker leaves a marker and crashes, the restarted one finds it and keeps running
+    marker = os.path.join(os.environ["SUPERVISOR_TEST_DIR"], f"worker-{index}")
+    if not os.path.exists(marker):
+        open(marker, "w").close()
+        os._exit(1)
+    time.sleep(60)
+
+
+def sleep_forever(index: int) -> None:
+    time.sleep(60)
+
+
+def _wait_until(condition, timeout: float = 20.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def _run_in_thread(supervisor: Supervisor) -> threading.Thread:
+    thread = threading.Thread(target=supervisor.run, daemon=True)
+    thread.start()
+    return thread
+
+
+class TestSupervisor:
+    def test_restarts_crashed_worker(self, tmp_path, monkeypatch):
+        # Arrange
+        monkeypatch.setenv("SUPERVISOR_TEST_DIR", str(tmp_path))
+        supervisor = Supervisor(crash_once, workers=2, restart_delay=0.05)
+
+        # Act
+        thread = _run_in_thread(supervisor)
+        restarted = _wait_until(lambda: supervisor.restarts == 2 and supervisor.alive() == 2)
+        supervisor.stop()
+        thread.join(timeout=20)
+
+        # Assert
+        assert restarted
+        assert sorted(os.listdir(tmp_path)) == ["worker-0", "worker-1"]
+        assert not thread.is_alive()
+        assert supervisor.alive() == 0
+
+    def test_stop_terminates_workers(self):
+        # Arrange
+        supervisor = Supervisor(sleep_forever, workers=2, shutdown_timeout=5)
+        thread = _run_in_thread(supervisor)
+        assert _wait_until(lambda: supervisor.alive() == 2)
+        processes = list(supervisor._processes.values())
+
+        # Act
+        supervisor.stop()
+        thread.join(timeout=20)
+
+        # Assert
+        assert not thread.is_alive()
+        assert all(not process.is_alive() for process in processes)
+        assert supervisor.restarts == 0
+
+    def test_invalid_workers(self):
+        # Act & Assert
+        with pytest.raises(ValueError, match="workers must be greater than 0"):
+            Supervisor(sleep_forever, workers=0)
@@ -0,0 +1,48 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+from pymongo import ReadPreference
+from adapters.transaction import AsyncMongoTransactionManager, MongoTransactionManager
+
+
+class TestMongoTransactionManager:
+    def test_run(self):
+        # Arrange
+        mongo_client = MagicMock()
+        session = mongo_client.start_session.return_value.__enter__.return_value
+        session.with_transaction.side_effect = lambda callback, **_: callback(session)
+        callback = MagicMock(return_value="stock_123")
+
+        # Action
+        result = MongoTransactionManager(mongo_client).run(callback)
+
+        # Assertion
+        assert result == "stock_123"
+        callback.assert_called_once_with(session)
+        kwargs = session.with_transaction.call_args.kwargs
+        assert kwargs["write_concern"].document == {"w": "majority"}
+        assert kwargs["read_preference"] == ReadPreference.PRIMARY
+        mongo_client.start_session.return_value.__exit__.assert_called_once()
+
+
+class TestAsyncMongoTransactionManager:
+    def test_run(self):
+        # Arrange
+        mongo_client = MagicMock()
+        session = mongo_client.start_session.return_value.__aenter__.return_value
+
+        async def with_transaction(callback, **_):
+            return await callback(session)
+
+        session.with_transaction = AsyncMock(side_effect=with_transaction)
+        callback = AsyncMock(return_value="stock_123")
+
+        # Action
+        result = asyncio.run(AsyncMongoTransactionManager(mongo_client).run(callback))
+
+        # Assertion
+        assert result == "stock_123"
+        callback.assert_awaited_once_with(session)
+        kwargs = session.with_transaction.call_args.kwargs
+        assert kwargs["write_concern"].document == {"w": "majority"}
+        assert kwargs["read_preference"] == ReadPreference.PRIMARY
+        mongo_client.start_session.return_value.__aexit__.assert_awaited_once()
@@ -0,0 +1,89 @@
+import asyncio
+from threading import Event
+from unittest.mock import Mock
+from usecase.invalidator import AsyncValuationInvalidator, ValuationInvalidator
+
+
+class TestValuationInvalidator:
+    def test_invalidates_watched_users_until_stopped(self):
+        # Arrange
+        invalidated = Event()
+        stock_usecase = Mock()
+        stock_usecase.invalidate_valuation.side_effect = lambda user_id: user_id == 2 and invalidated.set()
+        stock_repo = Mock()
+
+        def watch_user_ids(stopped):
+            yield from (1, 2)
+            while not stopped():
+                invalidated.wait(0.01)
+
+        stock_repo.watch_user_ids.side_effect = watch_user_ids
+        invalidator = ValuationInvalidator(stock_usecase, stock_repo, retry_delay=0.01)
+
+        # Act
+        invalidator.start()
+        assert invalidated.wait(5)
+        invalidator.stop(timeout=5)
+
+        # Assert
+        assert [c.args[0] for c in stock_usecase.invalidate_valuation.call_args_list] == [1, 2]
+        assert invalidator._thread is None
+        stock_usecase.invalidate_all_valuations.assert_not_called()
+
+    def test_invalidates_everything_when_the_stream_fails(self, caplog):
+        # Arrange
+        reopened = Event()
+        stock_usecase = Mock()
+        stock_repo = Mock()
+
+        def watch_user_ids(stopped):
+            if stock_repo.watch_user_ids.call_count == 1:
+                raise Exception("not a replica set")
+            reopened.set()
+            while not stopped():
+                reopened.wait(0.01)
+            yield from ()
+
+        stock_repo.watch_user_ids.side_effect = watch_user_ids
+        invalidator = ValuationInvalidator(stock_usecase, stock_repo, retry_delay=0.01)
+
+        # Act
+        invalidator.start()
+        result = reopened.wait(5)
+        invalidator.stop(timeout=5)
+
+        # Assert
+        assert result
+        assert stock_usecase.invalidate_all_valuations.call_count == 2
+        assert [(r.levelname, r.getMessage()) for r in caplog.records] == [("ERROR", "Failed to watch created stocks")]
+
+
+class TestAsyncValuationInvalidator:
+    def test_invalidates_watched_users_and_recovers_from_errors(self, caplog):
+        # Arrange
+        stock_usecase = Mock()
+        stock_repo = Mock()
+
+        async def watch_user_ids():
+            if stock_repo.watch_user_ids.call_count == 1:
+                raise Exception("not a replica set")
+            yield 1
+            await asyncio.Event().wait()
+
+        stock_repo.watch_user_ids.side_effect = watch_user_ids
+        invalidator = AsyncValuationInvalidator(stock_usecase, stock_repo, retry_delay=0.01)
+
+        async def run():
+            invalidator.start()
+            while not stock_usecase.invalidate_valuation.called:
+                await asyncio.sleep(0.01)
+            await invalidator.stop()
+
+        # Act
+        asyncio.run(run())
+
+        # Assert
+        stock_usecase.invalidate_valuation.assert_called_once_with(1)
+        assert stock_usecase.invalidate_all_valuations.call_count == 2
+        assert invalidator._task is None
+        assert ("ERROR", "Failed to watch created stocks") in [(r.levelname, r.getMessage()) for r in caplog.records]
@@ -1,7 +1,7 @@
-from typing import List, Dict
+from typing import AsyncIterator, Dict, Iterator, List
 from abc import ABC, abstractmethod
-from domain.stock import CreateStock, Stock, StockInfo
-from domain.portfolio import PortfolioInfo
+from domain.stock import CreateStock, CreateBatchResult, ListStockQuery, StockDictPage, StockPage, StockInfo
+from domain.portfolio import PortfolioInfo, PortfolioSummary
 
 
 class AbstractStockUsecase(ABC):
@@ -9,11 +9,52 @@ class AbstractStockUsecase(ABC):
     def create(self, stock: CreateStock) -> str:
         """Create a new stock entry."""
 
-    def list(self, user_id: int) -> List[Stock]:
-        """List all stock by user id"""
+    def create_batch(self, stocks: List[CreateStock]) -> CreateBatchResult:
+        """Create stock entries in bulk, reporting rejected entries by index."""
+
+    def list_dicts(self, query: ListStockQuery) -> StockDictPage:
+        """List one page of stock by user id as stored documents, newest first"""
+
+    def list_stream(self, query: ListStockQuery) -> Iterator[StockPage]:
+        """Yield every matching stock page by page, newest first"""
 
     def get_portfolio_info(self, user_id: int) -> PortfolioInfo:
         """Get portfolio info"""
 
     def get_stock_info(self, user_id: int) -> Dict[str, List[StockInfo]]:
         """Get stock info by user id"""
+
+    def get_portfolio_summary(self, user_id: int) -> PortfolioSummary:
+        """Get portfolio info and stock info by user id from a single valuation"""
+
+    def get_portfolio_info_batch(self, user_ids: List[int]) -> List[PortfolioInfo]:
+        """Get portfolio info of several users, in the order of user_ids"""
+
+
+class AbstractAsyncStockUsecase(ABC):
+    """asyncio counterpart of `AbstractStockUsecase`, for the grpc.aio server."""
+
+    @abstractmethod
+    async def create(self, stock: CreateStock) -> str:
+        """Create a new stock entry."""
+
+    async def create_batch(self, stocks: List[CreateStock]) -> CreateBatchResult:
+        """Create stock entries in bulk, reporting rejected entries by index."""
+
+    async def list_dicts(self, query: ListStockQuery) -> StockDictPage:
+        """List one page of stock by user id as stored documents, newest first"""
+
+    def list_stream(self, query: ListStockQuery) -> AsyncIterator[StockPage]:
+        """Yield every matching stock page by page, newest first"""
+
+    async def get_portfolio_info(self, user_id: int) -> PortfolioInfo:
+        """Get portfolio info"""
+
+    async def get_stock_info(self, user_id: int) -> Dict[str, List[StockInfo]]:
+        """Get stock info by user id"""
+
+    async def get_portfolio_summary(self, user_id: int) -> PortfolioSummary:
+        """Get portfolio info and stock info by user id from a single valuation"""
+
+    async def get_portfolio_info_batch(self, user_ids: List[int]) -> List[PortfolioInfo]:
+        """Get portfolio info of several users, in the order of user_ids"""
@@ -0,0 +1,64 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from domain.portfolio import Portfolio, apply_trades
+from domain.stock import CreateStock, CreateBatchError, CreateBatchResult
+
+# The create_batch attempts shared by StockUsecase and AsyncStockUsecase. None of it does I/O, the usecases read and
+# write the portfolios and the ledger their own way and hand the results over.
+
+
+class CreateBatchAttempts:
+    """The trades of one create_batch, applied again to a fresh read of the portfolios a concurrent request changed.
+
+    Each attempt reads the portfolios of `user_ids`, hands them to `apply` and writes back what it returns, then
+    reports the portfolios that changed since they were read to `settle`. Those are the `user_ids` of the next attempt.
+    """
+
+    def __init__(self, stocks: List[CreateStock], max_attempts: int):
+        self.stocks = stocks
+        self.max_attempts = max_attempts
+        # Users whose portfolio still has to be read, traded and written
+        self.user_ids: List[int] = list(dict.fromkeys(stock.user_id for stock in stocks))
+        self._attempts = 0
+        self._applied: List[Tuple[int, CreateStock]] = []
+        self._rejected: List[CreateBatchError] = []
+        self._accepted: List[Tuple[int, CreateStock]] = []
+        self._errors: List[CreateBatchError] = []
+
+    def pending(self) -> bool:
+        """Whether portfolios are left to write, raises once they kept changing for `max_attempts` attempts."""
+        if not self.user_ids:
+            return False
+        if self._attempts == self.max_attempts:
+            raise Exception(f"Failed to create stock batch, portfolios of user_ids={self.user_ids} kept changing")
+
+        self._attempts += 1
+        return True
+
+    def apply(self, portfolio_by_user_id: Dict[int, Optional[Portfolio]]) -> List[Portfolio]:
+        """Applies the trades to the portfolios read for `user_ids`, returns the ones to write back."""
+        portfolios = {
+            user_id: portfolio_by_user_id.get(user_id) or Portfolio.empty(user_id) for user_id in self.user_ids
+        }
+        self._applied, self._rejected = apply_trades(portfolios, self.stocks)
+        traded_user_ids = {stock.user_id for _, stock in self._applied}
+        return [portfolios[user_id] for user_id in self.user_ids if user_id in traded_user_ids]
+
+    def settle(self, conflicts: Iterable[int]) -> None:
+        """Keeps the outcome of the portfolios written, the trades of `conflicts` are applied again next attempt."""
+        conflicts = set(conflicts)
+        self._accepted.extend((index, stock) for index, stock in self._applied if stock.user_id not in conflicts)
+        self._errors.extend(error for error in self._rejected if self.stocks[error.index].user_id not in conflicts)
+        self.user_ids = [user_id for user_id in self.user_ids if user_id in conflicts]
+
+    def accepted(self) -> List[CreateStock]:
+        """The trades to insert into the ledger, in request order."""
+        self._accepted.sort(key=lambda trade: trade[0])
+        return [stock for _, stock in self._accepted]
+
+    def result(self, stock_ids: List[str]) -> CreateBatchResult:
+        """The outcome of every trade, `stock_ids` are the ledger ids of `accepted()`."""
+        ids = [""] * len(self.stocks)
+        for (index, _), stock_id in zip(self._accepted, stock_ids):
+            ids[index] = stock_id
+
+        return CreateBatchResult(ids=ids, errors=sorted(self._errors, key=lambda error: error.index))
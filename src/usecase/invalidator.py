@@ -0,0 +1,104 @@
+import asyncio
+import logging
+import threading
+from typing import Optional
+from adapters.base import AbstractAsyncStockRepository, AbstractStockRepository
+from .stock import StockUsecase
+from .stock_async import AsyncStockUsecase
+
+VALUATION_WATCH_RETRY_SECONDS = 5.0
+
+
+class ValuationInvalidator:
+    """Background thread that drops the cached valuations of users who trade through another process.
+
+    `create` only invalidates the cache of the process that served it. This follows every insert into the stock
+    ledger through a Mongo change stream instead, which needs a replica set. Trades made while the stream is down
+    are unknown, so when it fails or closes every cached valuation is dropped and the stream reopened `retry_delay`
+    later.
+    """
+
+    def __init__(
+        self,
+        stock_usecase: StockUsecase,
+        stock_repo: AbstractStockRepository,
+        retry_delay: float = VALUATION_WATCH_RETRY_SECONDS,
+    ):
+        self.stock_usecase = stock_usecase
+        self.stock_repo = stock_repo
+        self.retry_delay = retry_delay
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+
+        self._thread = threading.Thread(target=self._run, name="valuation-invalidator", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                for user_id in self.stock_repo.watch_user_ids(stopped=self._stopped.is_set):
+                    self.stock_usecase.invalidate_valuation(user_id)
+            except Exception:
+                logging.exception("Failed to watch created stocks")
+            if self._stopped.is_set():
+                return
+
+            self.stock_usecase.invalidate_all_valuations()
+            if self._stopped.wait(self.retry_delay):
+                return
+            # Also drop what was cached while the stream was down
+            self.stock_usecase.invalidate_all_valuations()
+
+
+class AsyncValuationInvalidator:
+    """`ValuationInvalidator` for the async server, it runs as a task on the server's event loop."""
+
+    def __init__(
+        self,
+        stock_usecase: AsyncStockUsecase,
+        stock_repo: AbstractAsyncStockRepository,
+        retry_delay: float = VALUATION_WATCH_RETRY_SECONDS,
+    ):
+        self.stock_usecase = stock_usecase
+        self.stock_repo = stock_repo
+        self.retry_delay = retry_delay
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                async for user_id in self.stock_repo.watch_user_ids():
+                    self.stock_usecase.invalidate_valuation(user_id)
+            except Exception:
+                logging.exception("Failed to watch created stocks")
+
+            self.stock_usecase.invalidate_all_valuations()
+            await asyncio.sleep(self.retry_delay)
+            self.stock_usecase.invalidate_all_valuations()
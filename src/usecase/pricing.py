@@ -0,0 +1,127 @@
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from domain.stock import StockPrices, Quote
+from domain.enum import StockType
+from utils.cache import TTLCache
+
+# Quote bookkeeping shared by StockUsecase and AsyncStockUsecase. None of it does I/O, the usecases fetch the quotes
+# and snapshots their own way and hand them over.
+
+PriceKey = Tuple[str, StockType]
+
+
+def price_cache_key(symbol: str, stock_type: StockType) -> PriceKey:
+    # The stock type decides which price field is read, so it is part of the key
+    return symbol.upper(), stock_type
+
+
+def read_cached_prices(
+    stock_info: List[Tuple[str, StockType]],
+    price_cache: TTLCache[float],
+    hot_symbols: Optional[TTLCache[bool]],
+    result: StockPrices,
+) -> List[Tuple[str, StockType]]:
+    """Fills `result` with the cached quotes and marks every symbol hot, returns the symbols that are not cached."""
+    uncached_stock_info = []
+    for symbol, stock_type in stock_info:
+        key = price_cache_key(symbol, stock_type)
+        if hot_symbols is not None:
+            hot_symbols.set(key, True)
+
+        price = price_cache.get(key)
+        if price is None:
+            uncached_stock_info.append((symbol, stock_type))
+        else:
+            result.prices[symbol] = price
+
+    return uncached_stock_info
+
+
+def read_snapshot_prices(
+    stock_info: List[Tuple[str, StockType]], snapshot_price_by_key: Dict[PriceKey, float], result: StockPrices
+) -> List[Tuple[str, StockType]]:
+    """Fills `result` with the snapshot quotes, returns the symbols that had none."""
+    not_in_snapshots = []
+    for symbol, stock_type in stock_info:
+        price = snapshot_price_by_key.get(price_cache_key(symbol, stock_type))
+        if price is None:
+            not_in_snapshots.append((symbol, stock_type))
+        else:
+            result.prices[symbol] = price
+
+    return not_in_snapshots
+
+
+def cache_quote_snapshots(quotes: List[Quote], price_cache: TTLCache[float]) -> Dict[PriceKey, float]:
+    now = datetime.now(timezone.utc)
+    price_by_key = {}
+    for quote in quotes:
+        # Cache the snapshot only for what is left of its TTL, so it expires when the writer's copy does
+        remaining_ttl = price_cache.ttl - (now - quote.fetched_at).total_seconds()
+        if not quote.price or remaining_ttl <= 0:
+            continue
+
+        key = price_cache_key(quote.symbol, quote.stock_type)
+        price_cache.set(key, quote.price, ttl=remaining_ttl)
+        price_by_key[key] = quote.price
+
+    return price_by_key
+
+
+def settle_price(
+    result: StockPrices,
+    symbol: str,
+    stock_type: StockType,
+    price: Optional[float],
+    price_cache: TTLCache[float],
+) -> None:
+    """Records the fetched `price` of `symbol`, or the best fallback when the fetch gave nothing."""
+    if price:
+        result.prices[symbol] = price
+        return
+
+    # Degrade to the last known quote if there is one, otherwise to 0.0
+    stale_price = price_cache.get_stale(price_cache_key(symbol, stock_type))
+    if stale_price is not None:
+        result.prices[symbol] = stale_price
+        result.stale_symbols.append(symbol)
+    else:
+        result.prices[symbol] = 0.0
+        result.missing_symbols.append(symbol)
+
+
+def refresh_due(hot_symbols: TTLCache[bool], price_cache: TTLCache[float], refresh_ahead: float) -> List[PriceKey]:
+    """Hot quotes that are uncached or expire within `refresh_ahead` seconds."""
+    return [
+        (symbol, stock_type)
+        for symbol, stock_type in hot_symbols.keys()
+        if (price_cache.expires_in((symbol, stock_type)) or 0.0) <= refresh_ahead
+    ]
+
+
+class HotPriceRefresh:
+    """One refresh_hot_prices pass: the hot quotes `due` for a refresh and whether refreshing them moved a price.
+
+    The usecases skip the quotes a snapshot already covers with `skip_snapshotted`, fetch what is left of `due` and
+    start a new price epoch when `prices_changed`.
+    """
+
+    def __init__(self, hot_symbols: TTLCache[bool], price_cache: TTLCache[float], refresh_ahead: float):
+        self.due = refresh_due(hot_symbols, price_cache, refresh_ahead)
+        # Another replica may already have refreshed them, a snapshot that outlives the window is good enough
+        self.snapshot_max_age = price_cache.ttl - refresh_ahead
+        self._price_cache = price_cache
+        # The cached quotes, expired or not, to tell afterwards whether the refresh changed any of them
+        self._previous_price_by_key = {key: price_cache.get_stale(key) for key in self.due}
+
+    def wants_snapshots(self) -> bool:
+        return bool(self.due) and self.snapshot_max_age > 0
+
+    def skip_snapshotted(self, snapshot_price_by_key: Dict[PriceKey, float]) -> None:
+        self.due = [key for key in self.due if key not in snapshot_price_by_key]
+
+    def prices_changed(self, unfinished: bool) -> bool:
+        """Whether a quote moved, from a snapshot or upstream, or `unfinished` fetches may still move one."""
+        return unfinished or any(
+            self._price_cache.get_stale(key) != price for key, price in self._previous_price_by_key.items()
+        )
@@ -0,0 +1,87 @@
+import asyncio
+import logging
+import threading
+from typing import Optional
+from .stock import StockUsecase
+from .stock_async import AsyncStockUsecase
+
+PRICE_REFRESH_INTERVAL_SECONDS = 15.0
+PRICE_REFRESH_AHEAD_SECONDS = 30.0
+PRICE_REFRESH_MAX_SYMBOLS = 500
+HOT_SYMBOL_TTL_SECONDS = 600.0  # how long a symbol stays hot after its last lookup
+
+
+class PriceRefresher:
+    """Background thread that keeps the quotes of recently viewed holdings warm.
+
+    Every `interval` seconds it asks the usecase to refetch the hot quotes that expire within `refresh_ahead`
+    seconds, so foreground requests are served from the cache instead of waiting on the provider.
+    """
+
+    def __init__(self, stock_usecase: StockUsecase, interval: float, refresh_ahead: float):
+        if interval <= 0:
+            raise ValueError("interval must be greater than 0")
+
+        self.stock_usecase = stock_usecase
+        self.interval = interval
+        self.refresh_ahead = refresh_ahead
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+
+        self._thread = threading.Thread(target=self._run, name="price-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            try:
+                self.stock_usecase.refresh_hot_prices(refresh_ahead=self.refresh_ahead)
+            except Exception:
+                logging.exception("Failed to refresh hot prices")
+
+
+class AsyncPriceRefresher:
+    """`PriceRefresher` for the async server, it runs as a task on the server's event loop."""
+
+    def __init__(self, stock_usecase: AsyncStockUsecase, interval: float, refresh_ahead: float):
+        if interval <= 0:
+            raise ValueError("interval must be greater than 0")
+
+        self.stock_usecase = stock_usecase
+        self.interval = interval
+        self.refresh_ahead = refresh_ahead
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.stock_usecase.refresh_hot_prices(refresh_ahead=self.refresh_ahead)
+            except Exception:
+                logging.exception("Failed to refresh hot prices")
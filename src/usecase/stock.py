@@ -1,179 +1,287 @@
-from typing import List, Dict, Tuple
+from typing import Any, Iterator, List, Dict, Optional, Tuple
+import logging
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, wait
 from datetime import datetime, timezone
-import yfinance as yf
 from .base import AbstractStockUsecase
-from adapters.base import AbstractStockRepository, AbstractPortfolioRepository
-from domain.portfolio import Portfolio, Holding, PortfolioInfo
-from domain.stock import CreateStock, Stock, StockInfo
-from domain.enum import ActionType, StockType
+from .batch import CreateBatchAttempts
+from .pricing import (
+    HotPriceRefresh,
+    cache_quote_snapshots,
+    price_cache_key,
+    read_cached_prices,
+    read_snapshot_prices,
+    settle_price,
+)
+from .valuation import (
+    holdings_to_price,
+    read_valuation,
+    read_valuation_batch,
+    record_writes,
+    secondary_ok,
+    split_recent_writes,
+    union_holdings_to_price,
+    value_portfolio,
+    value_portfolios,
+)
+from adapters.base import (
+    AbstractStockRepository,
+    AbstractPortfolioRepository,
+    AbstractPriceProvider,
+    AbstractQuoteRepository,
+    AbstractTransactionManager,
+)
+from domain.portfolio import PortfolioInfo, PortfolioSummary
+from domain.stock import (
+    CreateStock,
+    CreateBatchResult,
+    ListStockQuery,
+    StockDictPage,
+    StockInfo,
+    StockPage,
+    StockPrices,
+    Quote,
+)
+from domain.enum import StockType
+from utils.cache import TTLCache, VersionedCache
+from utils.singleflight import SingleFlight
 
-ETF_KEY = "navPrice"
-STOCK_KEY = "currentPrice"
+PRICE_CACHE_TTL_SECONDS = 60.0
+PRICE_CACHE_MAX_SIZE = 1024
+PRICE_FETCH_MAX_WORKERS = 16
+PRICE_FETCH_TIMEOUT_SECONDS = 5.0
+VALUATION_CACHE_TTL_SECONDS = 5.0  # bounds how stale a valuation gets when no invalidation reaches this process
+VALUATION_CACHE_MAX_SIZE = 10000
+PORTFOLIO_INFO_BATCH_MAX_USERS = 1000
+CREATE_BATCH_MAX_ATTEMPTS = 3  # reads and writes of the portfolios a concurrent request changed meanwhile
+RECENT_WRITE_TTL_SECONDS = 90.0  # how long a user's portfolio is read from the primary after a trade
+RECENT_WRITE_MAX_SIZE = 10000
 
 
 class StockUsecase(AbstractStockUsecase):
-    def __init__(self, stock_repo: AbstractStockRepository, portfolio_repo: AbstractPortfolioRepository):
+    def __init__(
+        self,
+        stock_repo: AbstractStockRepository,
+        portfolio_repo: AbstractPortfolioRepository,
+        price_provider: AbstractPriceProvider,
+        price_cache: Optional[TTLCache[float]] = None,
+        price_executor: Optional[Executor] = None,
+        price_fetch_timeout: float = PRICE_FETCH_TIMEOUT_SECONDS,
+        price_flight: Optional[SingleFlight[Optional[float]]] = None,
+        hot_symbols: Optional[TTLCache[bool]] = None,
+        quote_repo: Optional[AbstractQuoteRepository] = None,
+        transaction_manager: Optional[AbstractTransactionManager] = None,
+        valuation_cache: Optional[VersionedCache[Any]] = None,
+        recent_writes: Optional[TTLCache[bool]] = None,
+    ):
         self.stock_repo = stock_repo
         self.portfolio_repo = portfolio_repo
+        self.price_provider = price_provider
+        self.price_cache = price_cache or TTLCache(ttl=PRICE_CACHE_TTL_SECONDS, max_size=PRICE_CACHE_MAX_SIZE)
+        # Shared by every request so the number of concurrent upstream calls stays bounded
+        self.price_executor = price_executor or ThreadPoolExecutor(
+            max_workers=PRICE_FETCH_MAX_WORKERS, thread_name_prefix="price-fetch"
+        )
+        self.price_fetch_timeout = price_fetch_timeout
+        # Concurrent requests for the same quote share one upstream call
+        self.price_flight = price_flight or SingleFlight()
+        # Quotes looked up recently, kept warm by refresh_hot_prices. None disables the tracking
+        self.hot_symbols = hot_symbols
+        # Quote snapshots shared by every replica, checked before going upstream. None disables them
+        self.quote_repo = quote_repo
+        # Runs the portfolio update and the ledger insert of create in one transaction. None writes them separately
+        self.transaction_manager = transaction_manager
+        # Recent valuations per user, dropped by the user's trades and by price refreshes. None disables them
+        self.valuation_cache = valuation_cache
+        # Users whose portfolio changed lately, read from the primary until secondaries have surely replicated it
+        self.recent_writes = (
+            recent_writes
+            if recent_writes is not None
+            else TTLCache(ttl=RECENT_WRITE_TTL_SECONDS, max_size=RECENT_WRITE_MAX_SIZE)
+        )
 
     def create(self, stock: CreateStock) -> str:
-        portfolio = self.portfolio_repo.get(stock.user_id)
-        if portfolio is None:
-            created_at = datetime.now(timezone.utc)
-            portfolio = Portfolio(
-                user_id=stock.user_id,
-                cash_balance=0.0,
-                total_money_in=0.0,
-                holdings=[],
-                created_at=created_at,
-                updated_at=created_at,
-            )
+        if self.transaction_manager is None:
+            stock_id = self._create(stock)
+        else:
+            stock_id = self.transaction_manager.run(lambda session: self._create(stock, session=session))
 
-        symbol = stock.symbol
-        price = stock.price
-        quantity = stock.quantity
-        action_type = stock.action_type
+        record_writes(self.valuation_cache, self.recent_writes, [stock.user_id])
+        return stock_id
 
-        if action_type == ActionType.TRANSFER:
-            portfolio.cash_balance += price * quantity
-            portfolio.total_money_in += price * quantity
-        elif action_type == ActionType.BUY:
-            portfolio.cash_balance -= price * quantity
+    def _create(self, stock: CreateStock, session: Optional[Any] = None) -> str:
+        self.portfolio_repo.apply_trade(stock, session=session)
+        return self.stock_repo.create(stock, session=session)
 
-            holding = next((h for h in portfolio.holdings if h.symbol == symbol), None)  # Find the first holding
-            if not holding:
-                holding = Holding(symbol=symbol, shares=0, stock_type=stock.stock_type, total_cost=0.0)
-                portfolio.holdings.append(holding)
+    def create_batch(self, stocks: List[CreateStock]) -> CreateBatchResult:
+        """Create stock entries in bulk with one portfolio write and one ledger write.
 
-            holding.shares += quantity
-            holding.total_cost += price * quantity
+        Trades are applied in order to each user's portfolio in memory, a trade the portfolio rejects (e.g. selling
+        a stock it does not hold) is reported at its index and skipped. The portfolios are then written back whole,
+        except those a concurrent create changed since they were read, whose trades are applied again to a fresh
+        read. Without a transaction manager the portfolios and ledger are still written one after the other.
+        """
+        if self.transaction_manager is None:
+            result = self._create_batch(stocks)
         else:
-            portfolio.cash_balance += price * quantity
+            result = self.transaction_manager.run(lambda session: self._create_batch(stocks, session=session))
+
+        record_writes(self.valuation_cache, self.recent_writes, [stock.user_id for stock in stocks])
+        return result
 
-            holding = next((h for h in portfolio.holdings if h.symbol == symbol), None)  # Find the first holding
-            if holding is None:
-                raise Exception("Can not sell non-exist stock")
+    def _create_batch(self, stocks: List[CreateStock], session: Optional[Any] = None) -> CreateBatchResult:
+        batch = CreateBatchAttempts(stocks, max_attempts=CREATE_BATCH_MAX_ATTEMPTS)
+        while batch.pending():
+            portfolio_by_user_id = {
+                user_id: self.portfolio_repo.get(user_id=user_id, session=session) for user_id in batch.user_ids
+            }
+            traded = batch.apply(portfolio_by_user_id)
+            # Portfolios changed by another request since they were read are not written, their trades are applied
+            # again to a fresh read
+            batch.settle(self.portfolio_repo.update_many(traded, session=session) if traded else [])
 
-            holding.shares -= quantity
-            if holding.shares > 0:
-                # Adjust total_cost proportionally (using average cost)
-                avg_cost = holding.total_cost / (holding.shares + quantity)
-                holding.total_cost -= avg_cost * quantity
-            else:
-                holding.total_cost = 0.0
-                portfolio.holdings = [h for h in portfolio.holdings if h.shares > 0]
+        accepted = batch.accepted()
+        stock_ids = self.stock_repo.create_many(accepted, session=session) if accepted else []
+        return batch.result(stock_ids)
 
-        self.portfolio_repo.update(portfolio=portfolio)
-        return self.stock_repo.create(stock)
+    def list_dicts(self, query: ListStockQuery) -> StockDictPage:
+        return self.stock_repo.list_dicts(query)
 
-    def list(self, user_id: int) -> List[Stock]:
-        return self.stock_repo.list(user_id)
+    def list_stream(self, query: ListStockQuery) -> Iterator[StockPage]:
+        return self.stock_repo.iter_pages(query)
 
     def get_portfolio_info(self, user_id: int) -> PortfolioInfo:
-        portfolio = self.portfolio_repo.get(user_id=user_id)
-        if portfolio is None or portfolio.total_money_in == 0.0:
-            return PortfolioInfo(user_id=user_id, total_portfolio_value=0.0, total_gain=0.0, roi=0.0)
-
-        valid_holdings = [
-            (holding.symbol, holding.shares, holding.stock_type) for holding in portfolio.holdings if holding.shares > 0
-        ]
-        if not valid_holdings:
-            return PortfolioInfo(
-                user_id=user_id,
-                total_portfolio_value=portfolio.cash_balance,
-                total_gain=portfolio.cash_balance - portfolio.total_money_in,
-                roi=round(
-                    ((portfolio.cash_balance - portfolio.total_money_in) / portfolio.total_money_in) * 100, 2
-                ),  # If no valid holdings, ROI depends only on cash balance
-            )
+        return self.get_portfolio_summary(user_id).info
 
-        # Fetch prices in batch
-        stock_info = [(symbol, stock_type) for symbol, _, stock_type in valid_holdings]
-        stock_price_by_symbol = self._get_stock_price(stock_info=stock_info)
+    def get_stock_info(self, user_id: int) -> Dict[str, List[StockInfo]]:
+        return self.get_portfolio_summary(user_id).stock_info
 
-        # Calculate total stock value
-        total_stock_price = sum(shares * stock_price_by_symbol.get(symbol, 0.0) for symbol, shares, _ in valid_holdings)
+    def get_portfolio_summary(self, user_id: int) -> PortfolioSummary:
+        cached, version = read_valuation(self.valuation_cache, user_id)
+        if cached is not None:
+            return cached
 
-        # Compute ROI
-        total_value = total_stock_price + portfolio.cash_balance
-        roi = round(((total_value - portfolio.total_money_in) / portfolio.total_money_in) * 100, 2)
+        portfolio = self.portfolio_repo.get(user_id=user_id, secondary_ok=secondary_ok(self.recent_writes, user_id))
+        stock_info = holdings_to_price(portfolio)
+        stock_prices = self._get_stock_price(stock_info=stock_info) if stock_info else StockPrices(prices={})
+        return value_portfolio(user_id, portfolio, stock_prices, self.valuation_cache, version)
 
-        return PortfolioInfo(
-            user_id=user_id,
-            total_portfolio_value=total_value,
-            total_gain=total_value - portfolio.total_money_in,
-            roi=roi,
+    def get_portfolio_info_batch(self, user_ids: List[int]) -> List[PortfolioInfo]:
+        summary_by_user_id, uncached_user_ids, version = read_valuation_batch(
+            self.valuation_cache, user_ids, max_users=PORTFOLIO_INFO_BATCH_MAX_USERS
         )
+        if uncached_user_ids:
+            # One query for every portfolio and one price per symbol, however many users hold it
+            primary_user_ids, secondary_user_ids = split_recent_writes(self.recent_writes, uncached_user_ids)
+            portfolio_by_user_id = self.portfolio_repo.get_many(secondary_user_ids, secondary_ok=True)
+            if primary_user_ids:
+                portfolio_by_user_id.update(self.portfolio_repo.get_many(primary_user_ids))
+            stock_info = union_holdings_to_price(portfolio_by_user_id.values())
+            stock_prices = self._get_stock_price(stock_info=stock_info) if stock_info else StockPrices(prices={})
+            summary_by_user_id.update(
+                value_portfolios(uncached_user_ids, portfolio_by_user_id, stock_prices, self.valuation_cache, version)
+            )
 
-    def get_stock_info(self, user_id: int) -> Dict[str, List[StockInfo]]:
-        result = {StockType.ETF.value: [], StockType.STOCKS.value: [], "CASH": []}
-        portfolio = self.portfolio_repo.get(user_id=user_id)
-        if portfolio is None or portfolio.total_money_in == 0.0:
+        return [summary_by_user_id[user_id].info for user_id in user_ids]
+
+    def invalidate_valuation(self, user_id: int) -> None:
+        """Drop the cached valuations of a user whose portfolio changed elsewhere, e.g. on another replica."""
+        record_writes(self.valuation_cache, self.recent_writes, [user_id])
+
+    def invalidate_all_valuations(self) -> None:
+        if self.valuation_cache is not None:
+            self.valuation_cache.bump_epoch()
+
+    def _get_stock_price(self, stock_info: List[Tuple[str, StockType]]) -> StockPrices:
+        result = StockPrices(prices={})
+        if not stock_info:
             return result
 
-        valid_holdings = [
-            (holding.symbol, holding.shares, holding.stock_type, holding.total_cost)
-            for holding in portfolio.holdings
-            if holding.shares > 0
-        ]
-        if not valid_holdings:
+        uncached_stock_info = read_cached_prices(stock_info, self.price_cache, self.hot_symbols, result)
+        if uncached_stock_info and self.quote_repo is not None:
+            snapshot_price_by_key = self._load_quote_snapshots(uncached_stock_info, max_age=self.price_cache.ttl)
+            uncached_stock_info = read_snapshot_prices(uncached_stock_info, snapshot_price_by_key, result)
+
+        if not uncached_stock_info:
             return result
 
-        # Fetch prices in batch
-        stock_info = [(symbol, stock_type) for symbol, _, stock_type, _ in valid_holdings]
-        stock_price_by_symbol = self._get_stock_price(stock_info=stock_info)
+        # Fetch every uncached symbol in parallel and wait at most price_fetch_timeout for the whole batch
+        future_by_stock = {
+            (symbol, stock_type): self._submit_price_fetch(symbol, stock_type)
+            for symbol, stock_type in uncached_stock_info
+        }
+        wait(future_by_stock.values(), timeout=self.price_fetch_timeout)
 
-        # Calculate total stock value and total value
-        total_stock_price = sum(
-            shares * stock_price_by_symbol.get(symbol, 0.0) for symbol, shares, _, _ in valid_holdings
-        )
-        total_value = total_stock_price + portfolio.cash_balance
-
-        for symbol, shares, stock_type, total_cost in valid_holdings:
-            stock_price = stock_price_by_symbol.get(symbol, 0.0)
-            stock_total_value = shares * stock_price
-
-            result[stock_type.value].append(
-                StockInfo(
-                    symbol=symbol,
-                    quantity=shares,
-                    price=stock_price,
-                    avg_cost=round(total_cost / shares, 2),
-                    percentage=round(stock_total_value / total_value, 2) * 100,
-                )
-            )
+        for (symbol, stock_type), future in future_by_stock.items():
+            price = None
+            if future.done():
+                price = future.result()
+            else:
+                logging.warning("Timed out fetching price for symbol %s", symbol)
 
-        result["CASH"].append(
-            StockInfo(
-                symbol="CASH",
-                quantity=1,
-                price=portfolio.cash_balance,
-                avg_cost=0,
-                percentage=round(portfolio.cash_balance / total_value, 2) * 100,
-            )
-        )
+            settle_price(result, symbol, stock_type, price, self.price_cache)
 
         return result
 
-    def _get_stock_price(self, stock_info: List[Tuple[str, StockType]]) -> Dict[str, float]:
-        if not stock_info:
-            return {}
+    def refresh_hot_prices(self, refresh_ahead: float) -> int:
+        """Refetch hot quotes that are uncached or expire within `refresh_ahead` seconds.
+
+        Returns the number of quotes that were refreshed.
+        """
+        if self.hot_symbols is None:
+            return 0
 
+        refresh = HotPriceRefresh(self.hot_symbols, self.price_cache, refresh_ahead)
+        if self.quote_repo is not None and refresh.wants_snapshots():
+            refresh.skip_snapshotted(self._load_quote_snapshots(refresh.due, max_age=refresh.snapshot_max_age))
+
+        refreshes = [self._submit_price_fetch(symbol, stock_type) for symbol, stock_type in refresh.due]
+        _, not_done = wait(refreshes, timeout=self.price_fetch_timeout)
+        # A quote that moved starts a new price epoch for the cached valuations
+        if refresh.prices_changed(unfinished=bool(not_done)):
+            self.invalidate_all_valuations()
+        return len(refresh.due)
+
+    def _submit_price_fetch(self, symbol: str, stock_type: StockType) -> "Future[Optional[float]]":
+        # Coalesced before reaching the executor, a lookup of a symbol already being fetched takes no worker
+        key = price_cache_key(symbol, stock_type)
+        return self.price_flight.submit(key, self.price_executor, self._fetch_stock_price, symbol, stock_type)
+
+    def _fetch_stock_price(self, symbol: str, stock_type: StockType) -> Optional[float]:
         try:
-            symbols = [symbol for symbol, _ in stock_info]
-            tickers = yf.Tickers(symbols)
-            stock_price_by_symbol = {}
+            return self._load_stock_price(symbol, stock_type)
+        except Exception as e:
+            logging.error("Failed to fetch price for symbol %s: %s", symbol, str(e))
+            return None
 
-            for symbol, stock_type in stock_info:
-                ticker = tickers.tickers.get(symbol.upper())
-                if ticker is None:
-                    stock_price_by_symbol[symbol] = 0.0
-                    continue
+    def _load_stock_price(self, symbol: str, stock_type: StockType) -> Optional[float]:
+        price = self.price_provider.get_price(symbol, stock_type)
 
-                price_field = STOCK_KEY if stock_type == StockType.STOCKS else ETF_KEY
-                stock_price_by_symbol[symbol] = ticker.info.get(price_field, 0.0)
+        # Only real quotes are cached, a missing quote should be retried on the next call.
+        # This also runs for fetches that outlived the caller's deadline, so they still warm the cache.
+        if price:
+            self.price_cache.set(price_cache_key(symbol, stock_type), price)
+            if self.quote_repo is not None:
+                self._save_quote_snapshot(symbol, stock_type, price)
 
-            return stock_price_by_symbol
+        return price
+
+    def _load_quote_snapshots(
+        self, stock_info: List[Tuple[str, StockType]], max_age: float
+    ) -> Dict[Tuple[str, StockType], float]:
+        try:
+            quotes = self.quote_repo.get_many(stock_info, max_age=max_age)
+        except Exception as e:
+            logging.error(
+                "Failed to read quote snapshots for symbols %s: %s", [symbol for symbol, _ in stock_info], str(e)
+            )
+            return {}
+
+        return cache_quote_snapshots(quotes, self.price_cache)
+
+    def _save_quote_snapshot(self, symbol: str, stock_type: StockType, price: float) -> None:
+        try:
+            self.quote_repo.save(
+                Quote(symbol=symbol.upper(), stock_type=stock_type, price=price, fetched_at=datetime.now(timezone.utc))
+            )
         except Exception as e:
-            print(f"Error fetching prices for symbols {[symbol for symbol, _ in stock_info]}: {e}")
-            return {symbol: 0.0 for symbol, _ in stock_info}
+            logging.error("Failed to save quote snapshot for symbol %s: %s", symbol, str(e))
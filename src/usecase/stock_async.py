@@ -0,0 +1,274 @@
+import asyncio
+import logging
+from typing import Any, AsyncIterator, List, Dict, Optional, Tuple
+from datetime import datetime, timezone
+from .base import AbstractAsyncStockUsecase
+from .batch import CreateBatchAttempts
+from .pricing import (
+    HotPriceRefresh,
+    cache_quote_snapshots,
+    price_cache_key,
+    read_cached_prices,
+    read_snapshot_prices,
+    settle_price,
+)
+from .stock import (
+    CREATE_BATCH_MAX_ATTEMPTS,
+    PORTFOLIO_INFO_BATCH_MAX_USERS,
+    PRICE_CACHE_TTL_SECONDS,
+    PRICE_CACHE_MAX_SIZE,
+    PRICE_FETCH_TIMEOUT_SECONDS,
+    RECENT_WRITE_TTL_SECONDS,
+    RECENT_WRITE_MAX_SIZE,
+)
+from .valuation import (
+    holdings_to_price,
+    read_valuation,
+    read_valuation_batch,
+    record_writes,
+    secondary_ok,
+    split_recent_writes,
+    union_holdings_to_price,
+    value_portfolio,
+    value_portfolios,
+)
+from adapters.base import (
+    AbstractAsyncStockRepository,
+    AbstractAsyncPortfolioRepository,
+    AbstractAsyncPriceProvider,
+    AbstractAsyncQuoteRepository,
+    AbstractAsyncTransactionManager,
+)
+from domain.portfolio import PortfolioInfo, PortfolioSummary
+from domain.stock import (
+    CreateStock,
+    CreateBatchResult,
+    ListStockQuery,
+    StockDictPage,
+    StockInfo,
+    StockPage,
+    StockPrices,
+    Quote,
+)
+from domain.enum import StockType
+from utils.cache import TTLCache, VersionedCache
+from utils.singleflight import AsyncSingleFlight
+
+
+class AsyncStockUsecase(AbstractAsyncStockUsecase):
+    """`StockUsecase` for the grpc.aio server, every repository and provider call is awaited on the event loop.
+
+    Caching, snapshots, deadlines and valuation behave exactly like the threaded usecase. Price fetches run as
+    tasks instead of on an executor, so concurrent upstream calls are bounded by the provider (e.g. the executor of
+    an `ExecutorPriceProvider`).
+    """
+
+    def __init__(
+        self,
+        stock_repo: AbstractAsyncStockRepository,
+        portfolio_repo: AbstractAsyncPortfolioRepository,
+        price_provider: AbstractAsyncPriceProvider,
+        price_cache: Optional[TTLCache[float]] = None,
+        price_fetch_timeout: float = PRICE_FETCH_TIMEOUT_SECONDS,
+        price_flight: Optional[AsyncSingleFlight[Optional[float]]] = None,
+        hot_symbols: Optional[TTLCache[bool]] = None,
+        quote_repo: Optional[AbstractAsyncQuoteRepository] = None,
+        transaction_manager: Optional[AbstractAsyncTransactionManager] = None,
+        valuation_cache: Optional[VersionedCache[Any]] = None,
+        recent_writes: Optional[TTLCache[bool]] = None,
+    ):
+        self.stock_repo = stock_repo
+        self.portfolio_repo = portfolio_repo
+        self.price_provider = price_provider
+        self.price_cache = price_cache or TTLCache(ttl=PRICE_CACHE_TTL_SECONDS, max_size=PRICE_CACHE_MAX_SIZE)
+        self.price_fetch_timeout = price_fetch_timeout
+        self.price_flight = price_flight or AsyncSingleFlight()
+        self.hot_symbols = hot_symbols
+        self.quote_repo = quote_repo
+        self.transaction_manager = transaction_manager
+        self.valuation_cache = valuation_cache
+        self.recent_writes = (
+            recent_writes
+            if recent_writes is not None
+            else TTLCache(ttl=RECENT_WRITE_TTL_SECONDS, max_size=RECENT_WRITE_MAX_SIZE)
+        )
+
+    async def create(self, stock: CreateStock) -> str:
+        if self.transaction_manager is None:
+            stock_id = await self._create(stock)
+        else:
+            stock_id = await self.transaction_manager.run(lambda session: self._create(stock, session=session))
+
+        record_writes(self.valuation_cache, self.recent_writes, [stock.user_id])
+        return stock_id
+
+    async def _create(self, stock: CreateStock, session: Optional[Any] = None) -> str:
+        await self.portfolio_repo.apply_trade(stock, session=session)
+        return await self.stock_repo.create(stock, session=session)
+
+    async def create_batch(self, stocks: List[CreateStock]) -> CreateBatchResult:
+        """See `StockUsecase.create_batch`."""
+        if self.transaction_manager is None:
+            result = await self._create_batch(stocks)
+        else:
+            result = await self.transaction_manager.run(lambda session: self._create_batch(stocks, session=session))
+
+        record_writes(self.valuation_cache, self.recent_writes, [stock.user_id for stock in stocks])
+        return result
+
+    async def _create_batch(self, stocks: List[CreateStock], session: Optional[Any] = None) -> CreateBatchResult:
+        batch = CreateBatchAttempts(stocks, max_attempts=CREATE_BATCH_MAX_ATTEMPTS)
+        while batch.pending():
+            portfolio_by_user_id = {
+                user_id: await self.portfolio_repo.get(user_id=user_id, session=session) for user_id in batch.user_ids
+            }
+            traded = batch.apply(portfolio_by_user_id)
+            # Portfolios changed by another request since they were read are not written, their trades are applied
+            # again to a fresh read
+            batch.settle(await self.portfolio_repo.update_many(traded, session=session) if traded else [])
+
+        accepted = batch.accepted()
+        stock_ids = await self.stock_repo.create_many(accepted, session=session) if accepted else []
+        return batch.result(stock_ids)
+
+    async def list_dicts(self, query: ListStockQuery) -> StockDictPage:
+        return await self.stock_repo.list_dicts(query)
+
+    def list_stream(self, query: ListStockQuery) -> AsyncIterator[StockPage]:
+        return self.stock_repo.iter_pages(query)
+
+    async def get_portfolio_info(self, user_id: int) -> PortfolioInfo:
+        return (await self.get_portfolio_summary(user_id)).info
+
+    async def get_stock_info(self, user_id: int) -> Dict[str, List[StockInfo]]:
+        return (await self.get_portfolio_summary(user_id)).stock_info
+
+    async def get_portfolio_summary(self, user_id: int) -> PortfolioSummary:
+        cached, version = read_valuation(self.valuation_cache, user_id)
+        if cached is not None:
+            return cached
+
+        portfolio = await self.portfolio_repo.get(
+            user_id=user_id, secondary_ok=secondary_ok(self.recent_writes, user_id)
+        )
+        stock_info = holdings_to_price(portfolio)
+        stock_prices = await self._get_stock_price(stock_info=stock_info) if stock_info else StockPrices(prices={})
+        return value_portfolio(user_id, portfolio, stock_prices, self.valuation_cache, version)
+
+    async def get_portfolio_info_batch(self, user_ids: List[int]) -> List[PortfolioInfo]:
+        summary_by_user_id, uncached_user_ids, version = read_valuation_batch(
+            self.valuation_cache, user_ids, max_users=PORTFOLIO_INFO_BATCH_MAX_USERS
+        )
+        if uncached_user_ids:
+            # One query for every portfolio and one price per symbol, however many users hold it
+            primary_user_ids, secondary_user_ids = split_recent_writes(self.recent_writes, uncached_user_ids)
+            portfolio_by_user_id = await self.portfolio_repo.get_many(secondary_user_ids, secondary_ok=True)
+            if primary_user_ids:
+                portfolio_by_user_id.update(await self.portfolio_repo.get_many(primary_user_ids))
+            stock_info = union_holdings_to_price(portfolio_by_user_id.values())
+            stock_prices = await self._get_stock_price(stock_info=stock_info) if stock_info else StockPrices(prices={})
+            summary_by_user_id.update(
+                value_portfolios(uncached_user_ids, portfolio_by_user_id, stock_prices, self.valuation_cache, version)
+            )
+
+        return [summary_by_user_id[user_id].info for user_id in user_ids]
+
+    def invalidate_valuation(self, user_id: int) -> None:
+        record_writes(self.valuation_cache, self.recent_writes, [user_id])
+
+    def invalidate_all_valuations(self) -> None:
+        if self.valuation_cache is not None:
+            self.valuation_cache.bump_epoch()
+
+    async def _get_stock_price(self, stock_info: List[Tuple[str, StockType]]) -> StockPrices:
+        result = StockPrices(prices={})
+        if not stock_info:
+            return result
+
+        uncached_stock_info = read_cached_prices(stock_info, self.price_cache, self.hot_symbols, result)
+        if uncached_stock_info and self.quote_repo is not None:
+            snapshot_price_by_key = await self._load_quote_snapshots(
+                uncached_stock_info, max_age=self.price_cache.ttl
+            )
+            uncached_stock_info = read_snapshot_prices(uncached_stock_info, snapshot_price_by_key, result)
+
+        if not uncached_stock_info:
+            return result
+
+        # Fetch every uncached symbol concurrently and wait at most price_fetch_timeout for the whole batch, the
+        # fetches still running afterwards are left to finish and warm the cache
+        task_by_stock = {
+            (symbol, stock_type): asyncio.ensure_future(self._fetch_stock_price(symbol, stock_type))
+            for symbol, stock_type in uncached_stock_info
+        }
+        await asyncio.wait(task_by_stock.values(), timeout=self.price_fetch_timeout)
+
+        for (symbol, stock_type), task in task_by_stock.items():
+            price = None
+            if task.done():
+                price = task.result()
+            else:
+                logging.warning("Timed out fetching price for symbol %s", symbol)
+
+            settle_price(result, symbol, stock_type, price, self.price_cache)
+
+        return result
+
+    async def refresh_hot_prices(self, refresh_ahead: float) -> int:
+        """See `StockUsecase.refresh_hot_prices`."""
+        if self.hot_symbols is None:
+            return 0
+
+        refresh = HotPriceRefresh(self.hot_symbols, self.price_cache, refresh_ahead)
+        if self.quote_repo is not None and refresh.wants_snapshots():
+            refresh.skip_snapshotted(await self._load_quote_snapshots(refresh.due, max_age=refresh.snapshot_max_age))
+
+        pending = set()
+        if refresh.due:
+            refreshes = [
+                asyncio.ensure_future(self._fetch_stock_price(symbol, stock_type))
+                for symbol, stock_type in refresh.due
+            ]
+            _, pending = await asyncio.wait(refreshes, timeout=self.price_fetch_timeout)
+        if refresh.prices_changed(unfinished=bool(pending)):
+            self.invalidate_all_valuations()
+        return len(refresh.due)
+
+    async def _fetch_stock_price(self, symbol: str, stock_type: StockType) -> Optional[float]:
+        key = price_cache_key(symbol, stock_type)
+        try:
+            return await self.price_flight.do(key, lambda: self._load_stock_price(symbol, stock_type))
+        except Exception as e:
+            logging.error("Failed to fetch price for symbol %s: %s", symbol, str(e))
+            return None
+
+    async def _load_stock_price(self, symbol: str, stock_type: StockType) -> Optional[float]:
+        price = await self.price_provider.get_price(symbol, stock_type)
+
+        if price:
+            self.price_cache.set(price_cache_key(symbol, stock_type), price)
+            if self.quote_repo is not None:
+                await self._save_quote_snapshot(symbol, stock_type, price)
+
+        return price
+
+    async def _load_quote_snapshots(
+        self, stock_info: List[Tuple[str, StockType]], max_age: float
+    ) -> Dict[Tuple[str, StockType], float]:
+        try:
+            quotes = await self.quote_repo.get_many(stock_info, max_age=max_age)
+        except Exception as e:
+            logging.error(
+                "Failed to read quote snapshots for symbols %s: %s", [symbol for symbol, _ in stock_info], str(e)
+            )
+            return {}
+
+        return cache_quote_snapshots(quotes, self.price_cache)
+
+    async def _save_quote_snapshot(self, symbol: str, stock_type: StockType, price: float) -> None:
+        try:
+            await self.quote_repo.save(
+                Quote(symbol=symbol.upper(), stock_type=stock_type, price=price, fetched_at=datetime.now(timezone.utc))
+            )
+        except Exception as e:
+            logging.error("Failed to save quote snapshot for symbol %s: %s", symbol, str(e))
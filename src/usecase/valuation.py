@@ -0,0 +1,208 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from domain.portfolio import Portfolio, PortfolioInfo, PortfolioSummary
+from domain.stock import StockInfo, StockPrices
+from domain.enum import StockType
+from utils.cache import TTLCache, VersionedCache
+
+# Portfolio valuation shared by StockUsecase and AsyncStockUsecase, the usecases only differ in how they get the prices
+
+Version = Tuple[int, int]
+
+
+def holdings_to_price(portfolio: Optional[Portfolio]) -> List[Tuple[str, StockType]]:
+    """The symbols a valuation of `portfolio` needs quotes for, none when there is nothing to value."""
+    if portfolio is None or portfolio.total_money_in == 0.0:
+        return []
+
+    return [(holding.symbol, holding.stock_type) for holding in portfolio.holdings if holding.shares > 0]
+
+
+def union_holdings_to_price(portfolios: Iterable[Optional[Portfolio]]) -> List[Tuple[str, StockType]]:
+    """The symbols a valuation of all `portfolios` needs quotes for, each one once."""
+    return list(dict.fromkeys(stock for portfolio in portfolios for stock in holdings_to_price(portfolio)))
+
+
+def prices_for(portfolio: Optional[Portfolio], stock_prices: StockPrices) -> StockPrices:
+    """`stock_prices` fetched for several portfolios, with only the missing and stale symbols `portfolio` holds."""
+    if not stock_prices.missing_symbols and not stock_prices.stale_symbols:
+        return stock_prices
+
+    symbols = {symbol for symbol, _ in holdings_to_price(portfolio)}
+    return StockPrices(
+        prices=stock_prices.prices,
+        missing_symbols=[symbol for symbol in stock_prices.missing_symbols if symbol in symbols],
+        stale_symbols=[symbol for symbol in stock_prices.stale_symbols if symbol in symbols],
+    )
+
+
+def portfolio_summary(user_id: int, portfolio: Optional[Portfolio], stock_prices: StockPrices) -> PortfolioSummary:
+    """Values `portfolio` in one pass over its holdings, for both the totals and the per-holding breakdown."""
+    stock_info = {StockType.ETF.value: [], StockType.STOCKS.value: [], "CASH": []}
+    if portfolio is None or portfolio.total_money_in == 0.0:
+        info = PortfolioInfo(user_id=user_id, total_portfolio_value=0.0, total_gain=0.0, roi=0.0)
+        return PortfolioSummary(info=info, stock_info=stock_info)
+
+    stock_price_by_symbol = stock_prices.prices
+    valued_holdings = []
+    total_stock_price = 0.0
+    for holding in portfolio.holdings:
+        if holding.shares > 0:
+            stock_price = stock_price_by_symbol.get(holding.symbol, 0.0)
+            valued_holdings.append((holding, stock_price))
+            total_stock_price += holding.shares * stock_price
+
+    # Without valid holdings the value, and so the ROI, depends only on the cash balance
+    total_value = total_stock_price + portfolio.cash_balance
+    info = PortfolioInfo(
+        user_id=user_id,
+        total_portfolio_value=total_value,
+        total_gain=total_value - portfolio.total_money_in,
+        roi=round(((total_value - portfolio.total_money_in) / portfolio.total_money_in) * 100, 2),
+        missing_symbols=stock_prices.missing_symbols,
+        stale_symbols=stock_prices.stale_symbols,
+    )
+    if not valued_holdings:
+        return PortfolioSummary(info=info, stock_info=stock_info)
+
+    for holding, stock_price in valued_holdings:
+        stock_info[holding.stock_type.value].append(
+            StockInfo(
+                symbol=holding.symbol,
+                quantity=holding.shares,
+                price=stock_price,
+                avg_cost=round(holding.total_cost / holding.shares, 2),
+                percentage=round(holding.shares * stock_price / total_value, 2) * 100,
+                stale=holding.symbol in stock_prices.stale_symbols,
+                missing=holding.symbol in stock_prices.missing_symbols,
+            )
+        )
+
+    stock_info["CASH"].append(
+        StockInfo(
+            symbol="CASH",
+            quantity=1,
+            price=portfolio.cash_balance,
+            avg_cost=0,
+            percentage=round(portfolio.cash_balance / total_value, 2) * 100,
+        )
+    )
+
+    return PortfolioSummary(info=info, stock_info=stock_info)
+
+
+def value_portfolios(
+    user_ids: List[int],
+    portfolio_by_user_id: Dict[int, Portfolio],
+    stock_prices: StockPrices,
+    valuation_cache: Optional[VersionedCache],
+    version: Optional[Version],
+) -> Dict[int, PortfolioSummary]:
+    """Values the portfolios of `user_ids` against prices fetched once for all of them, and caches the valuations."""
+    summary_by_user_id = {}
+    for user_id in user_ids:
+        portfolio = portfolio_by_user_id.get(user_id)
+        portfolio_prices = prices_for(portfolio, stock_prices)
+        summary_by_user_id[user_id] = value_portfolio(user_id, portfolio, portfolio_prices, valuation_cache, version)
+
+    return summary_by_user_id
+
+
+def value_portfolio(
+    user_id: int,
+    portfolio: Optional[Portfolio],
+    stock_prices: StockPrices,
+    valuation_cache: Optional[VersionedCache],
+    version: Optional[Version],
+) -> PortfolioSummary:
+    """Values `portfolio` and caches the valuation under `version`."""
+    summary = portfolio_summary(user_id, portfolio, stock_prices)
+    store_valuation(valuation_cache, user_id, summary, stock_prices, version)
+    return summary
+
+
+def read_valuation(
+    valuation_cache: Optional[VersionedCache], user_id: int
+) -> Tuple[Optional[PortfolioSummary], Optional[Version]]:
+    """The cached valuation of the user if any, and the cache version to store a fresh one with."""
+    if valuation_cache is None:
+        return None, None
+
+    # Taken before the portfolio is read, so an invalidation in between keeps the result out of the cache
+    version = valuation_cache.version()
+    return valuation_cache.get(user_id), version
+
+
+def read_valuation_batch(
+    valuation_cache: Optional[VersionedCache], user_ids: List[int], max_users: int
+) -> Tuple[Dict[int, PortfolioSummary], List[int], Optional[Version]]:
+    """`read_valuation` for several users, each one once, raises ValueError for more than `max_users` of them.
+
+    Returns the cached valuations by user id, the users left to value and a single version to store theirs with.
+    """
+    if len(user_ids) > max_users:
+        raise ValueError(f"user_ids cannot hold more than {max_users} users")
+
+    unique_user_ids = list(dict.fromkeys(user_ids))
+    if valuation_cache is None:
+        return {}, unique_user_ids, None
+
+    version = valuation_cache.version()
+    summary_by_user_id = {}
+    for user_id in unique_user_ids:
+        summary = valuation_cache.get(user_id)
+        if summary is not None:
+            summary_by_user_id[user_id] = summary
+
+    uncached_user_ids = [user_id for user_id in unique_user_ids if user_id not in summary_by_user_id]
+    return summary_by_user_id, uncached_user_ids, version
+
+
+def store_valuation(
+    valuation_cache: Optional[VersionedCache],
+    user_id: int,
+    summary: PortfolioSummary,
+    stock_prices: StockPrices,
+    version: Optional[Version],
+) -> None:
+    # A valuation with stale or missing quotes should pick up the real ones as soon as they are back
+    if valuation_cache is None or stock_prices.stale_symbols or stock_prices.missing_symbols:
+        return
+
+    valuation_cache.set(user_id, summary, version)
+
+
+def invalidate_valuations(valuation_cache: Optional[VersionedCache], user_ids: Iterable[int]) -> None:
+    if valuation_cache is None:
+        return
+
+    for user_id in set(user_ids):
+        valuation_cache.invalidate(user_id)
+
+
+def record_writes(
+    valuation_cache: Optional[VersionedCache], recent_writes: TTLCache[bool], user_ids: Iterable[int]
+) -> None:
+    """Drops the cached valuations of users whose portfolio changed, whose reads `recent_writes` sends to the primary.
+
+    A secondary may not have replicated the write yet, and a valuation read from it would be cached under the version
+    taken after the invalidation. The users are marked before the invalidation, so a read that takes that version
+    also sees the mark.
+    """
+    user_ids = set(user_ids)
+    for user_id in user_ids:
+        recent_writes.set(user_id, True)
+    invalidate_valuations(valuation_cache, user_ids)
+
+
+def secondary_ok(recent_writes: TTLCache[bool], user_id: int) -> bool:
+    """Whether a secondary can serve the portfolio of the user, one that may lack the user's own recent trades can't."""
+    return not recent_writes.get(user_id)
+
+
+def split_recent_writes(recent_writes: TTLCache[bool], user_ids: List[int]) -> Tuple[List[int], List[int]]:
+    """`user_ids` split into those written recently, to read from the primary, and those a secondary can serve."""
+    primary_user_ids, secondary_user_ids = [], []
+    for user_id in user_ids:
+        (secondary_user_ids if secondary_ok(recent_writes, user_id) else primary_user_ids).append(user_id)
+
+    return primary_user_ids, secondary_user_ids
@@ -0,0 +1,136 @@
+import asyncio
+import queue
+import threading
+import time
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, List, Optional, TypeVar
+
+V = TypeVar("V")
+
+_END = object()
+
+
+class _Error:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def micro_batches(items: Iterable[V], max_size: int, max_delay: float) -> Iterator[List[V]]:
+    """Groups `items` into lists of at most `max_size` items.
+
+    `items` is consumed by a background thread so a partial batch is flushed once its oldest item has waited
+    `max_delay` seconds, even when the source is blocked waiting for the next item (e.g. a quiet gRPC stream).
+    An error raised by the source is re-raised after the batches read before it, the pending batch is dropped.
+    """
+    if max_size <= 0:
+        raise ValueError("max_size must be greater than 0")
+    if max_delay < 0:
+        raise ValueError("max_delay cannot be negative")
+
+    pending: "queue.Queue" = queue.Queue(maxsize=max_size * 2)  # bounded, a slow consumer slows the reader down
+    stopped = threading.Event()
+
+    def put(item) -> bool:
+        while not stopped.is_set():
+            try:
+                pending.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def read() -> None:
+        try:
+            for item in items:
+                if not put(item):
+                    return
+        except BaseException as e:
+            put(_Error(e))
+            return
+        put(_END)
+
+    reader = threading.Thread(target=read, name="micro-batch-reader", daemon=True)
+    reader.start()
+
+    batch: List[V] = []
+    deadline = 0.0
+    try:
+        while True:
+            try:
+                item = pending.get(timeout=max(0.0, deadline - time.monotonic()) if batch else None)
+            except queue.Empty:
+                yield batch
+                batch = []
+                continue
+
+            if item is _END:
+                break
+            if isinstance(item, _Error):
+                raise item.error
+
+            batch.append(item)
+            if len(batch) == 1:
+                deadline = time.monotonic() + max_delay
+            if len(batch) >= max_size:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
+    finally:
+        stopped.set()
+
+
+async def async_micro_batches(items: AsyncIterable[V], max_size: int, max_delay: float) -> AsyncIterator[List[V]]:
+    """asyncio counterpart of `micro_batches`, `items` is consumed by a task instead of a thread."""
+    if max_size <= 0:
+        raise ValueError("max_size must be greater than 0")
+    if max_delay < 0:
+        raise ValueError("max_delay cannot be negative")
+
+    pending: "asyncio.Queue" = asyncio.Queue(maxsize=max_size * 2)
+
+    async def read() -> None:
+        try:
+            async for item in items:
+                await pending.put(item)
+        except Exception as e:
+            await pending.put(_Error(e))
+            return
+        await pending.put(_END)
+
+    reader = asyncio.ensure_future(read())
+    # asyncio.wait leaves the get running on timeout, unlike wait_for it can not drop an item it already dequeued
+    getter: Optional[asyncio.Future] = None
+    batch: List[V] = []
+    deadline = 0.0
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            if getter is None:
+                getter = asyncio.ensure_future(pending.get())
+            done, _ = await asyncio.wait({getter}, timeout=max(0.0, deadline - loop.time()) if batch else None)
+            if not done:
+                yield batch
+                batch = []
+                continue
+
+            item = getter.result()
+            getter = None
+            if item is _END:
+                break
+            if isinstance(item, _Error):
+                raise item.error
+
+            batch.append(item)
+            if len(batch) == 1:
+                deadline = loop.time() + max_delay
+            if len(batch) >= max_size:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
+    finally:
+        reader.cancel()
+        if getter is not None:
+            getter.cancel()
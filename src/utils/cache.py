@@ -0,0 +1,180 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Generic, Hashable, List, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+
+@dataclass
+class CacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    max_size: int
+
+
+class TTLCache(Generic[V]):
+    """Thread-safe LRU cache whose entries expire `ttl` seconds after they are set."""
+
+    def __init__(self, ttl: float, max_size: int, clock: Callable[[], float] = time.monotonic):
+        if ttl <= 0:
+            raise ValueError("ttl must be greater than 0")
+        if max_size <= 0:
+            raise ValueError("max_size must be greater than 0")
+
+        self.ttl = ttl
+        self.max_size = max_size
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[V, float]]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: Hashable) -> Optional[V]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= self._clock():
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+
+    def get_stale(self, key: Hashable) -> Optional[V]:
+        """Return the entry even if it has expired, without touching the hit/miss counters."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return None if entry is None else entry[0]
+
+    def expires_in(self, key: Hashable) -> Optional[float]:
+        """Seconds until the entry expires (negative once expired), None if the key is not cached."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return None if entry is None else entry[1] - self._clock()
+
+    def keys(self) -> List[Hashable]:
+        """Keys of the entries that have not expired yet, least recently used first."""
+        with self._lock:
+            now = self._clock()
+            return [key for key, (_, expires_at) in self._entries.items() if expires_at > now]
+
+    def set(self, key: Hashable, value: V, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._entries[key] = (value, self._clock() + (self.ttl if ttl is None else ttl))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                size=len(self._entries),
+                max_size=self.max_size,
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+@dataclass
+class VersionedCacheStats(CacheStats):
+    invalidations: int
+    epoch: int
+
+
+class VersionedCache(Generic[V]):
+    """TTLCache of values derived from data that changes under it, like a valuation of a portfolio.
+
+    `invalidate(key)` drops one entry and `bump_epoch()` all of them. A value computed from inputs read before an
+    invalidation is stale before it is even cached, so callers take `version()` before reading their inputs and `set`
+    refuses the value if its key was invalidated or the epoch bumped since. Invalidations leave a marker behind for
+    that check, should it be evicted first the TTL still bounds how stale an entry can get.
+    """
+
+    def __init__(self, ttl: float, max_size: int, clock: Callable[[], float] = time.monotonic):
+        # (epoch, sequence of the key's last invalidation, value), the value is None right after an invalidation
+        self._entries: TTLCache[Tuple[int, int, Optional[V]]] = TTLCache(ttl=ttl, max_size=max_size, clock=clock)
+        self._lock = threading.Lock()
+        self._epoch = 0
+        self._sequence = 0
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    @property
+    def ttl(self) -> float:
+        return self._entries.ttl
+
+    def version(self) -> Tuple[int, int]:
+        with self._lock:
+            return self._epoch, self._sequence
+
+    def get(self, key: Hashable) -> Optional[V]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[2] is None or entry[0] != self._epoch:
+                self._misses += 1
+                return None
+
+            self._hits += 1
+            return entry[2]
+
+    def set(self, key: Hashable, value: V, version: Tuple[int, int]) -> bool:
+        """Cache `value` unless `key` was invalidated after `version` was taken, returns whether it was cached."""
+        epoch, sequence = version
+        with self._lock:
+            if epoch != self._epoch:
+                return False
+            entry = self._entries.get_stale(key)
+            invalidated_at = 0 if entry is None else entry[1]
+            if invalidated_at > sequence:
+                return False
+
+            self._entries.set(key, (epoch, invalidated_at, value))
+            return True
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._sequence += 1
+            self._invalidations += 1
+            self._entries.set(key, (self._epoch, self._sequence, None))
+
+    def bump_epoch(self) -> None:
+        with self._lock:
+            self._epoch += 1
+            # Entries of older epochs can neither be read nor written any more
+            self._entries.clear()
+
+    def stats(self) -> VersionedCacheStats:
+        with self._lock:
+            entry_stats = self._entries.stats()
+            return VersionedCacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=entry_stats.evictions,
+                size=entry_stats.size,
+                max_size=entry_stats.max_size,
+                invalidations=self._invalidations,
+                epoch=self._epoch,
+            )
+
+    def __len__(self) -> int:
+        return len(self._entries)
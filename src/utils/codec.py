@@ -0,0 +1,101 @@
+import typing
+from dataclasses import fields, is_dataclass
+from enum import Enum
+from typing import Any, Callable, Dict, Tuple, Type, TypeVar, get_type_hints
+
+D = TypeVar("D")
+
+
+def compile_encoder(cls: Type[D]) -> Callable[[D], Dict[str, Any]]:
+    """Generates a function turning a `cls` instance into a Mongo-ready dict.
+
+    The output matches `asdict(obj, dict_factory=custom_dict_factory)`: enums become their value, nested dataclasses
+    become dicts and lists are copied, every other value is passed through as is instead of being deep copied. The
+    field types are resolved once, so the generated function is a single dict literal.
+    """
+    namespace: Dict[str, Any] = {}
+    hints = get_type_hints(cls)
+    items = [f"{f.name!r}: {_encode_expr(f'obj.{f.name}', hints[f.name], namespace, 0)}" for f in fields(cls)]
+    source = f"def encode(obj):\n    return {{{', '.join(items)}}}\n"
+    exec(compile(source, f"<encoder {cls.__qualname__}>", "exec"), namespace)
+    return namespace["encode"]
+
+
+def compile_decoder(cls: Type[D]) -> Callable[[Dict[str, Any]], D]:
+    """Generates the inverse of `compile_encoder`, keys that are not fields of `cls` (e.g. `_id`) are ignored.
+
+    Nested dataclasses are built inline rather than through their own decoder, so a list of them costs one
+    constructor call per item, as a hand-written decoder would.
+    """
+    namespace: Dict[str, Any] = {}
+    source = f"def decode(data):\n    return {_construct_expr('data', cls, namespace, 0)}\n"
+    exec(compile(source, f"<decoder {cls.__qualname__}>", "exec"), namespace)
+    return namespace["decode"]
+
+
+def _encode_expr(value: str, tp: Any, namespace: Dict[str, Any], depth: int) -> str:
+    if isinstance(tp, type) and issubclass(tp, Enum):
+        return f"{value}.value"
+    if is_dataclass(tp):
+        return f"{_register(namespace, '_encode', tp, compile_encoder)}({value})"
+
+    origin, args = _unpack(tp)
+    if origin is list:
+        item = f"item{depth}"
+        inner = _encode_expr(item, args[0], namespace, depth + 1)
+        return f"list({value})" if inner == item else f"[{inner} for {item} in {value}]"
+    if origin is typing.Union and type(None) in args:
+        inner = _encode_expr(value, _without_none(args), namespace, depth)
+        return value if inner == value else f"(None if {value} is None else {inner})"
+    return value
+
+
+def _decode_expr(value: str, tp: Any, namespace: Dict[str, Any], depth: int) -> str:
+    if isinstance(tp, type) and issubclass(tp, Enum):
+        # Indexing a dict is several times cheaper than the Enum constructor, which dominates decoding lists
+        return f"{_register(namespace, '_members', tp, _EnumMembers)}[{value}]"
+    if is_dataclass(tp):
+        return _construct_expr(value, tp, namespace, depth)
+
+    origin, args = _unpack(tp)
+    if origin is list:
+        item = f"item{depth}"
+        inner = _decode_expr(item, args[0], namespace, depth + 1)
+        return f"list({value})" if inner == item else f"[{inner} for {item} in {value}]"
+    if origin is typing.Union and type(None) in args:
+        inner = _decode_expr(value, _without_none(args), namespace, depth)
+        return value if inner == value else f"(None if {value} is None else {inner})"
+    return value
+
+
+def _construct_expr(value: str, cls: type, namespace: Dict[str, Any], depth: int) -> str:
+    hints = get_type_hints(cls)
+    items = [f"{f.name}={_decode_expr(f'{value}[{f.name!r}]', hints[f.name], namespace, depth)}" for f in fields(cls)]
+    return f"{_register(namespace, '_type', cls, lambda t: t)}({', '.join(items)})"
+
+
+class _EnumMembers(dict):
+    """The members of an enum by value, values that are not members raise the ValueError of the enum itself."""
+
+    def __init__(self, enum: Type[Enum]):
+        super().__init__((member.value, member) for member in enum)
+        self._enum = enum
+
+    def __missing__(self, value: Any) -> Enum:
+        return self._enum(value)
+
+
+def _register(namespace: Dict[str, Any], prefix: str, tp: type, build: Callable[[type], Any]) -> str:
+    name = f"{prefix}_{tp.__name__}_{id(tp)}"
+    if name not in namespace:
+        namespace[name] = build(tp)
+    return name
+
+
+def _unpack(tp: Any) -> Tuple[Any, Tuple[Any, ...]]:
+    return typing.get_origin(tp), typing.get_args(tp)
+
+
+def _without_none(args: Tuple[Any, ...]) -> Any:
+    remaining = tuple(arg for arg in args if arg is not type(None))
+    return remaining[0] if len(remaining) == 1 else typing.Union[remaining]
@@ -0,0 +1,233 @@
+import os
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple, TypeVar
+import grpc
+from dotenv import dotenv_values
+
+SERVER_PORT = 50051
+SERVER_MAX_WORKERS = 10
+SERVER_MAX_SEND_MESSAGE_BYTES = 16 * 1024 * 1024
+SERVER_MAX_RECEIVE_MESSAGE_BYTES = 4 * 1024 * 1024  # gRPC's own default
+SERVER_COMPRESSION = "none"
+SERVER_KEEPALIVE_TIME_SECONDS = 7200.0
+SERVER_KEEPALIVE_TIMEOUT_SECONDS = 20.0
+SERVER_MIN_PING_INTERVAL_SECONDS = 300.0
+MONGO_MAX_POOL_SIZE = 100  # pymongo's own default
+MONGO_MIN_POOL_SIZE = 0
+MONGO_MAX_IDLE_TIME_SECONDS = 300.0
+MONGO_WAIT_QUEUE_TIMEOUT_SECONDS = 10.0
+MONGO_PREWARM_TIMEOUT_SECONDS = 10.0
+MONGO_READ_PREFERENCE = "primary"
+MONGO_MIN_MAX_STALENESS_SECONDS = 90  # the smallest maxStalenessSeconds MongoDB accepts
+
+COMPRESSIONS = {
+    "none": grpc.Compression.NoCompression,
+    "gzip": grpc.Compression.Gzip,
+    "deflate": grpc.Compression.Deflate,
+}
+MONGO_COMPRESSORS = ("zstd", "snappy", "zlib")
+MONGO_READ_PREFERENCES = ("primary", "primaryPreferred", "secondary", "secondaryPreferred", "nearest")
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class ServerConfig:
+    """Tuning of the gRPC server, durations in seconds and sizes in bytes.
+
+    `maximum_concurrent_rpcs` None accepts every RPC, past the limit the server answers RESOURCE_EXHAUSTED instead of
+    queueing. `compression` applies to every response, so it stays off by default and the handlers compress only the
+    RPCs that return pages or batches. The `max_connection_*` settings are off when None, a bounded connection age also
+    makes clients reconnect and spread across SO_REUSEPORT workers.
+    """
+
+    port: int = SERVER_PORT
+    max_workers: int = SERVER_MAX_WORKERS
+    maximum_concurrent_rpcs: Optional[int] = None
+    max_send_message_length: int = SERVER_MAX_SEND_MESSAGE_BYTES
+    max_receive_message_length: int = SERVER_MAX_RECEIVE_MESSAGE_BYTES
+    compression: grpc.Compression = COMPRESSIONS[SERVER_COMPRESSION]
+    keepalive_time: float = SERVER_KEEPALIVE_TIME_SECONDS
+    keepalive_timeout: float = SERVER_KEEPALIVE_TIMEOUT_SECONDS
+    keepalive_permit_without_calls: bool = False
+    min_ping_interval: float = SERVER_MIN_PING_INTERVAL_SECONDS
+    max_connection_idle: Optional[float] = None
+    max_connection_age: Optional[float] = None
+    max_connection_age_grace: Optional[float] = None
+    reuse_port: bool = False
+
+    def __post_init__(self):
+        if self.max_workers <= 0:
+            raise ValueError("max_workers must be greater than 0")
+        if self.maximum_concurrent_rpcs is not None and self.maximum_concurrent_rpcs <= 0:
+            raise ValueError("maximum_concurrent_rpcs must be greater than 0")
+
+    @classmethod
+    def from_env(cls, env: Mapping[str, Optional[str]]) -> "ServerConfig":
+        """Reads the SERVER_* variables of `env`, missing or empty ones keep their default."""
+        compression = env.get("SERVER_COMPRESSION") or SERVER_COMPRESSION
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Invalid server compression: {compression}. Must be none, gzip or deflate.")
+
+        return cls(
+            port=_get(env, "SERVER_PORT", int, SERVER_PORT),
+            max_workers=_get(env, "SERVER_MAX_WORKERS", int, SERVER_MAX_WORKERS),
+            maximum_concurrent_rpcs=_get(env, "SERVER_MAX_CONCURRENT_RPCS", int, None),
+            max_send_message_length=_get(env, "SERVER_MAX_SEND_MESSAGE_BYTES", int, SERVER_MAX_SEND_MESSAGE_BYTES),
+            max_receive_message_length=_get(
+                env, "SERVER_MAX_RECEIVE_MESSAGE_BYTES", int, SERVER_MAX_RECEIVE_MESSAGE_BYTES
+            ),
+            compression=COMPRESSIONS[compression],
+            keepalive_time=_get(env, "SERVER_KEEPALIVE_TIME_SECONDS", float, SERVER_KEEPALIVE_TIME_SECONDS),
+            keepalive_timeout=_get(env, "SERVER_KEEPALIVE_TIMEOUT_SECONDS", float, SERVER_KEEPALIVE_TIMEOUT_SECONDS),
+            keepalive_permit_without_calls=_get(env, "SERVER_KEEPALIVE_PERMIT_WITHOUT_CALLS", _to_bool, False),
+            min_ping_interval=_get(env, "SERVER_MIN_PING_INTERVAL_SECONDS", float, SERVER_MIN_PING_INTERVAL_SECONDS),
+            max_connection_idle=_get(env, "SERVER_MAX_CONNECTION_IDLE_SECONDS", float, None),
+            max_connection_age=_get(env, "SERVER_MAX_CONNECTION_AGE_SECONDS", float, None),
+            max_connection_age_grace=_get(env, "SERVER_MAX_CONNECTION_AGE_GRACE_SECONDS", float, None),
+        )
+
+    def options(self) -> List[Tuple[str, Any]]:
+        """The channel arguments for `grpc.server(options=...)` and `grpc.aio.server(options=...)`."""
+        options = [
+            # gRPC enables SO_REUSEPORT by default, a single server should fail to start if the port is taken instead
+            ("grpc.so_reuseport", int(self.reuse_port)),
+            ("grpc.max_send_message_length", self.max_send_message_length),
+            ("grpc.max_receive_message_length", self.max_receive_message_length),
+            ("grpc.keepalive_time_ms", _to_ms(self.keepalive_time)),
+            ("grpc.keepalive_timeout_ms", _to_ms(self.keepalive_timeout)),
+            ("grpc.keepalive_permit_without_calls", int(self.keepalive_permit_without_calls)),
+            ("grpc.http2.min_recv_ping_interval_without_data_ms", _to_ms(self.min_ping_interval)),
+        ]
+        for name, seconds in (
+            ("grpc.max_connection_idle_ms", self.max_connection_idle),
+            ("grpc.max_connection_age_ms", self.max_connection_age),
+            ("grpc.max_connection_age_grace_ms", self.max_connection_age_grace),
+        ):
+            if seconds is not None:
+                options.append((name, _to_ms(seconds)))
+
+        return options
+
+
+@dataclass(frozen=True)
+class MongoConfig:
+    """Connection pool of the MongoClient, durations in seconds.
+
+    `max_idle_time` closes connections unused for that long, `wait_queue_timeout` bounds how long a request waits for
+    a free connection once `max_pool_size` are checked out, None disables either. `compressors` are negotiated with
+    the server in order, zstd needs the zstandard package and snappy python-snappy.
+
+    `read_preference` and `max_staleness` route the read-only queries of the read RPCs, writes and the reads they
+    depend on always go to the primary.
+    """
+
+    uri: Optional[str] = None
+    max_pool_size: int = MONGO_MAX_POOL_SIZE
+    min_pool_size: int = MONGO_MIN_POOL_SIZE
+    max_idle_time: Optional[float] = MONGO_MAX_IDLE_TIME_SECONDS
+    wait_queue_timeout: Optional[float] = MONGO_WAIT_QUEUE_TIMEOUT_SECONDS
+    compressors: Tuple[str, ...] = ()
+    prewarm_timeout: float = MONGO_PREWARM_TIMEOUT_SECONDS
+    read_preference: str = MONGO_READ_PREFERENCE
+    max_staleness: Optional[float] = None
+
+    def __post_init__(self):
+        if self.max_pool_size <= 0:
+            raise ValueError("max_pool_size must be greater than 0")
+        if not 0 <= self.min_pool_size <= self.max_pool_size:
+            raise ValueError("min_pool_size must be between 0 and max_pool_size")
+        for compressor in self.compressors:
+            if compressor not in MONGO_COMPRESSORS:
+                raise ValueError(f"Invalid mongo compressor: {compressor}. Must be zstd, snappy or zlib.")
+        if self.read_preference not in MONGO_READ_PREFERENCES:
+            raise ValueError(
+                f"Invalid mongo read preference: {self.read_preference}. Must be {', '.join(MONGO_READ_PREFERENCES)}."
+            )
+        if self.max_staleness is not None:
+            if self.read_preference == "primary":
+                raise ValueError("max_staleness needs a read preference other than primary")
+            if self.max_staleness < MONGO_MIN_MAX_STALENESS_SECONDS:
+                raise ValueError(f"max_staleness must be at least {MONGO_MIN_MAX_STALENESS_SECONDS} seconds")
+
+    @classmethod
+    def from_env(cls, env: Mapping[str, Optional[str]]) -> "MongoConfig":
+        """Reads MONGO_URI and the MONGO_* pool variables of `env`, missing or empty ones keep their default."""
+        return cls(
+            uri=env.get("MONGO_URI") or None,
+            max_pool_size=_get(env, "MONGO_MAX_POOL_SIZE", int, MONGO_MAX_POOL_SIZE),
+            min_pool_size=_get(env, "MONGO_MIN_POOL_SIZE", int, MONGO_MIN_POOL_SIZE),
+            max_idle_time=_get(env, "MONGO_MAX_IDLE_TIME_SECONDS", _to_optional_seconds, MONGO_MAX_IDLE_TIME_SECONDS),
+            wait_queue_timeout=_get(
+                env, "MONGO_WAIT_QUEUE_TIMEOUT_SECONDS", _to_optional_seconds, MONGO_WAIT_QUEUE_TIMEOUT_SECONDS
+            ),
+            compressors=_get(env, "MONGO_COMPRESSORS", _to_names, ()),
+            prewarm_timeout=_get(env, "MONGO_PREWARM_TIMEOUT_SECONDS", float, MONGO_PREWARM_TIMEOUT_SECONDS),
+            read_preference=env.get("MONGO_READ_PREFERENCE") or MONGO_READ_PREFERENCE,
+            max_staleness=_get(env, "MONGO_MAX_STALENESS_SECONDS", float, None),
+        )
+
+    def client_options(self) -> Dict[str, Any]:
+        """Keyword arguments for `MongoClient` and `AsyncMongoClient`."""
+        options: Dict[str, Any] = {"maxPoolSize": self.max_pool_size, "minPoolSize": self.min_pool_size}
+        if self.max_idle_time is not None:
+            options["maxIdleTimeMS"] = _to_ms(self.max_idle_time)
+        if self.wait_queue_timeout is not None:
+            options["waitQueueTimeoutMS"] = _to_ms(self.wait_queue_timeout)
+        if self.compressors:
+            options["compressors"] = ",".join(self.compressors)
+
+        return options
+
+
+def load_env() -> Dict[str, Optional[str]]:
+    """The environment on top of the dotenv file SERVER_CONFIG_FILE names if any."""
+    env: Dict[str, Optional[str]] = dict(os.environ)
+    config_file = env.get("SERVER_CONFIG_FILE")
+    if config_file:
+        if not os.path.isfile(config_file):
+            raise ValueError(f"Server config file not found: {config_file}")
+        # Set variables win, so a deployment can override a single setting of a shared file
+        env = {**dotenv_values(config_file), **{name: value for name, value in env.items() if value}}
+
+    return env
+
+
+def load_server_config(reuse_port: bool = False) -> ServerConfig:
+    return replace(ServerConfig.from_env(load_env()), reuse_port=reuse_port)
+
+
+def load_mongo_config() -> MongoConfig:
+    return MongoConfig.from_env(load_env())
+
+
+def _get(env: Mapping[str, Optional[str]], name: str, convert: Callable[[str], T], default: T) -> T:
+    value = env.get(name)
+    if value is None or value == "":
+        return default
+
+    try:
+        return convert(value)
+    except ValueError:
+        raise ValueError(f"Invalid {name}: {value}") from None
+
+
+def _to_bool(value: str) -> bool:
+    if value not in ("true", "false"):
+        raise ValueError(value)
+
+    return value == "true"
+
+
+def _to_optional_seconds(value: str) -> Optional[float]:
+    # 0 turns the limit off, as an empty value would keep the default
+    seconds = float(value)
+    return seconds if seconds > 0 else None
+
+
+def _to_names(value: str) -> Tuple[str, ...]:
+    return tuple(name.strip() for name in value.split(",") if name.strip())
+
+
+def _to_ms(seconds: float) -> int:
+    return int(seconds * 1000)
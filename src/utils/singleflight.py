@@ -0,0 +1,89 @@
+import asyncio
+import threading
+from concurrent.futures import Executor, Future
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, TypeVar
+
+V = TypeVar("V")
+
+
+@dataclass
+class SingleFlightStats:
+    executed: int
+    coalesced: int
+    in_flight: int
+
+
+class SingleFlight(Generic[V]):
+    """Coalesces concurrent calls for the same key, submitted to an executor, into a single execution.
+
+    The first caller for a key submits `fn`, every caller that arrives while it is still running gets the same
+    future, and so the same result or exception, without taking a worker per waiting caller. Once the call finishes
+    the key is forgotten, so later calls run again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._futures: Dict[Hashable, "Future[V]"] = {}
+        self._executed = 0
+        self._coalesced = 0
+
+    def submit(self, key: Hashable, executor: Executor, fn: Callable[..., V], *args: Any) -> "Future[V]":
+        """Submits `fn(*args)` to `executor`, or returns the future of the call already submitted for `key`."""
+        with self._lock:
+            future = self._futures.get(key)
+            if future is not None:
+                self._coalesced += 1
+                return future
+
+            future = executor.submit(fn, *args)
+            self._futures[key] = future
+            self._executed += 1
+
+        # Runs right away when the call already finished
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return future
+
+    def _forget(self, key: Hashable, future: "Future[V]") -> None:
+        with self._lock:
+            if self._futures.get(key) is future:
+                del self._futures[key]
+
+    def stats(self) -> SingleFlightStats:
+        with self._lock:
+            return SingleFlightStats(executed=self._executed, coalesced=self._coalesced, in_flight=len(self._futures))
+
+
+class AsyncSingleFlight(Generic[V]):
+    """asyncio counterpart of `SingleFlight`, for callers on a single event loop.
+
+    The first caller's coroutine runs as its own task that every caller awaits through `asyncio.shield`, so a caller
+    cancelled on a deadline neither cancels the call for the others nor stops it from completing.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[Hashable, "asyncio.Future[V]"] = {}
+        self._executed = 0
+        self._coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[V]]) -> V:
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._tasks[key] = task
+            self._executed += 1
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self._coalesced += 1
+
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: "asyncio.Future[V]") -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            # Marks the error as retrieved when every caller gave up before the call finished
+            task.exception()
+
+    def stats(self) -> SingleFlightStats:
+        return SingleFlightStats(executed=self._executed, coalesced=self._coalesced, in_flight=len(self._tasks))
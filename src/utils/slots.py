@@ -0,0 +1,32 @@
+from dataclasses import fields
+from typing import Callable, Optional, Tuple, Type, TypeVar, Union
+
+C = TypeVar("C")
+
+
+def slotted(
+    cls: Optional[Type[C]] = None, *, extra_slots: Tuple[str, ...] = ()
+) -> Union[Type[C], Callable[[Type[C]], Type[C]]]:
+    """Recreates a dataclass with `__slots__`, the Python 3.9 equivalent of `@dataclass(slots=True)`.
+
+    Apply it above `@dataclass`, as `@slotted` or `@slotted(extra_slots=(...))` for private attributes that are not
+    fields (set in `__post_init__`, left out of `__eq__`, `__repr__` and serialization). Instances get no
+    per-instance `__dict__`, everything dataclass generated (`__init__` with its defaults, `__eq__`, `__post_init__`
+    validation) is carried over unchanged. Like the stdlib version, methods relying on the implicit `__class__` cell
+    (zero-argument `super()`) are not supported.
+    """
+    if cls is None:
+        return lambda cls: slotted(cls, extra_slots=extra_slots)
+
+    field_names = tuple(f.name for f in fields(cls))
+    cls_dict = dict(cls.__dict__)
+    cls_dict["__slots__"] = field_names + tuple(extra_slots)
+    for name in field_names:
+        # Defaults live in the generated __init__, as class attributes they would clash with the slots
+        cls_dict.pop(name, None)
+    cls_dict.pop("__dict__", None)
+    cls_dict.pop("__weakref__", None)
+
+    slotted_cls = type(cls)(cls.__name__, cls.__bases__, cls_dict)
+    slotted_cls.__qualname__ = cls.__qualname__
+    return slotted_cls
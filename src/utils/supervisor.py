@@ -0,0 +1,137 @@
+import logging
+import multiprocessing
+import signal
+import threading
+import time
+from multiprocessing.connection import wait
+from multiprocessing.context import BaseContext
+from multiprocessing.process import BaseProcess
+from typing import Callable, Dict, Optional
+
+RESTART_DELAY_SECONDS = 1.0
+MAX_RESTART_DELAY_SECONDS = 30.0
+MIN_UPTIME_SECONDS = 10.0  # a worker that dies sooner is crash looping, its restart delay doubles
+SHUTDOWN_TIMEOUT_SECONDS = 10.0
+_SUPERVISE_INTERVAL_SECONDS = 0.5
+
+logger = logging.getLogger(__name__)
+
+
+class Supervisor:
+    """Keeps `workers` processes running `target(index)`, `index` being the worker's slot in `range(workers)`.
+
+    A worker that exits is restarted in the same slot after `restart_delay`, doubled up to `max_restart_delay` every
+    time the slot's worker dies within `min_uptime` of starting. `stop()`, or SIGTERM/SIGINT when `run` is called from
+    the main thread, sends SIGTERM to every worker and kills those still running after `shutdown_timeout`.
+
+    Workers are spawned, not forked, so they inherit no gRPC or Mongo state from the parent, and `target` must be a
+    module-level function.
+    """
+
+    def __init__(
+        self,
+        target: Callable[[int], None],
+        workers: int,
+        restart_delay: float = RESTART_DELAY_SECONDS,
+        max_restart_delay: float = MAX_RESTART_DELAY_SECONDS,
+        min_uptime: float = MIN_UPTIME_SECONDS,
+        shutdown_timeout: float = SHUTDOWN_TIMEOUT_SECONDS,
+        context: Optional[BaseContext] = None,
+    ):
+        if workers <= 0:
+            raise ValueError("workers must be greater than 0")
+
+        self.target = target
+        self.workers = workers
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.min_uptime = min_uptime
+        self.shutdown_timeout = shutdown_timeout
+        self.restarts = 0
+        self._context = context or multiprocessing.get_context("spawn")
+        self._processes: Dict[int, BaseProcess] = {}
+        self._started_at: Dict[int, float] = {}
+        self._delays: Dict[int, float] = {}
+        self._restart_at: Dict[int, float] = {}  # slots waiting for their restart delay
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        """Starts the workers and supervises them until `stop()` is called."""
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(signum, lambda *_: self.stop())
+
+        for index in range(self.workers):
+            self._start(index)
+
+        try:
+            while not self._stopped.is_set():
+                sentinels = [process.sentinel for process in self._processes.values()]
+                if sentinels:
+                    wait(sentinels, timeout=_SUPERVISE_INTERVAL_SECONDS)
+                else:
+                    self._stopped.wait(_SUPERVISE_INTERVAL_SECONDS)
+                if self._stopped.is_set():
+                    break
+
+                now = time.monotonic()
+                for index, process in list(self._processes.items()):
+                    if not process.is_alive():
+                        self._schedule_restart(index, process, now)
+
+                for index, restart_at in list(self._restart_at.items()):
+                    if restart_at <= now:
+                        del self._restart_at[index]
+                        self._start(index)
+                        self.restarts += 1
+        finally:
+            self._shutdown()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def alive(self) -> int:
+        return sum(process.is_alive() for process in self._processes.values())
+
+    def _start(self, index: int) -> None:
+        process = self._context.Process(target=_run_worker, args=(self.target, index), name=f"worker-{index}")
+        process.start()
+        self._processes[index] = process
+        self._started_at[index] = time.monotonic()
+        logger.info("started worker %s (pid %s)", index, process.pid)
+
+    def _schedule_restart(self, index: int, process: BaseProcess, now: float) -> None:
+        del self._processes[index]
+        process.join()
+        if now - self._started_at[index] < self.min_uptime:
+            delay = min(self._delays.get(index, self.restart_delay / 2) * 2, self.max_restart_delay)
+        else:
+            delay = self.restart_delay
+        self._delays[index] = delay
+        self._restart_at[index] = now + delay
+        logger.error(
+            "worker %s (pid %s) exited with %s, restarting in %.1fs", index, process.pid, process.exitcode, delay
+        )
+
+    def _shutdown(self) -> None:
+        for process in self._processes.values():
+            if process.is_alive():
+                process.terminate()
+
+        deadline = time.monotonic() + self.shutdown_timeout
+        for process in self._processes.values():
+            process.join(max(0.0, deadline - time.monotonic()))
+        for index, process in self._processes.items():
+            if process.is_alive():
+                logger.error("worker %s (pid %s) did not stop in time, killing it", index, process.pid)
+                process.kill()
+                process.join()
+
+        self._processes.clear()
+        self._restart_at.clear()
+
+
+def _run_worker(target: Callable[[int], None], index: int) -> None:
+    # Ctrl+C reaches the whole process group, the supervisor turns it into an orderly SIGTERM instead
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    target(index)
@@ -0,0 +1,83 @@
+"""Throughput of StockUsecase.create with and without the transactional mode.
+
+Transactions need a replica set, for example a single node started with `mongod --replSet rs0` and initiated
+with `rs.initiate()`.
+
+    PYTHONPATH=./src uv run tools/benchmarks/bench_create.py --mongo-uri "mongodb://localhost:27017/?replicaSet=rs0"
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pymongo import MongoClient
+from adapters.stock import StockRepository
+from adapters.portfolio import PortfolioRepository
+from adapters.price import InMemoryPriceProvider
+from adapters.transaction import MongoTransactionManager
+from domain.stock import CreateStock
+from domain.enum import ActionType, StockType
+from usecase.stock import StockUsecase
+
+DATABASE_NAME = "bench_stock_db"
+SYMBOLS = ["AAPL", "MSFT", "GOOGL", "AMZN", "TSLA", "NVDA", "META", "SPY"]
+
+
+def build_trades(count: int, users: int):
+    trades = []
+    for i in range(count):
+        trades.append(
+            CreateStock(
+                user_id=i % users + 1,
+                symbol=SYMBOLS[i % len(SYMBOLS)],
+                price=100.0,
+                quantity=1,
+                action_type=ActionType.BUY,
+                stock_type=StockType.STOCKS,
+                created_at=datetime.now(timezone.utc),
+            )
+        )
+    return trades
+
+
+def run(client: MongoClient, transactional: bool, trades, concurrency: int) -> float:
+    client.drop_database(DATABASE_NAME)
+    # Collections have to exist before they are written to inside a transaction on older servers
+    client[DATABASE_NAME].create_collection("stocks")
+    client[DATABASE_NAME].create_collection("portfolio")
+
+    usecase = StockUsecase(
+        StockRepository(client, DATABASE_NAME),
+        PortfolioRepository(client, DATABASE_NAME),
+        InMemoryPriceProvider(),
+        transaction_manager=MongoTransactionManager(client) if transactional else None,
+    )
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(usecase.create, trades))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo-uri", default="mongodb://localhost:27017/?replicaSet=rs0")
+    parser.add_argument("--trades", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+
+    client = MongoClient(args.mongo_uri)
+    trades = build_trades(args.trades, args.users)
+    try:
+        for transactional in (False, True):
+            elapsed = run(client, transactional, trades, args.concurrency)
+            mode = "transactional" if transactional else "separate writes"
+            print(f"{mode:>16}: {len(trades) / elapsed:8.1f} creates/s ({elapsed:.2f}s for {len(trades)} trades)")
+    finally:
+        client.drop_database(DATABASE_NAME)
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
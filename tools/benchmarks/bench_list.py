@@ -0,0 +1,121 @@
+"""Per-row cost of turning stored stock documents into the List response.
+
+Compares the Stock dataclass path (adapters.stock._to_stock then StockService._convert_to_proto_stock_list) with
+the stored document fast path (adapters.stock._to_stock_dict then StockService._convert_dicts_to_proto_stock_list)
+on synthetic documents, so no database is needed. With --mongo-uri it also times whole pages read through
+StockRepository.iter_pages and StockRepository.list_dicts.
+
+    PYTHONPATH=./src uv run tools/benchmarks/bench_list.py --rows 100000
+"""
+
+import argparse
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List
+from bson.objectid import ObjectId
+from pymongo import MongoClient
+from adapters.stock import StockRepository, _to_stock, _to_stock_dict
+from domain.stock import ListStockQuery, LIST_PAGE_SIZE_MAX
+from domain.enum import ActionType, StockType
+from handler.stock import StockService
+
+DATABASE_NAME = "bench_stock_db"
+SYMBOLS = ["AAPL", "MSFT", "GOOGL", "AMZN", "TSLA", "NVDA", "META", "SPY"]
+
+
+def build_docs(count: int) -> List[dict]:
+    created_at = datetime(2024, 1, 1)
+    return [
+        {
+            "_id": ObjectId(),
+            "user_id": 1,
+            "symbol": SYMBOLS[i % len(SYMBOLS)],
+            "price": 100.0 + i % 50,
+            "quantity": 1 + i % 10,
+            "action_type": ActionType.BUY.value if i % 3 else ActionType.SELL.value,
+            "stock_type": StockType.STOCKS.value,
+            "created_at": created_at + timedelta(seconds=i),
+            "updated_at": created_at + timedelta(seconds=i),
+        }
+        for i in range(count)
+    ]
+
+
+def best_of(repeat: int, fn: Callable[[], object]) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def bench_decode(rows: int, repeat: int) -> None:
+    service = StockService(stock_usecase=None)
+    docs = build_docs(rows)
+
+    def dataclass_path():
+        service._convert_to_proto_stock_list([_to_stock(doc) for doc in docs])
+
+    def dict_path():
+        # _to_stock_dict consumes _id, so each run works on fresh shallow copies like a new cursor would
+        service._convert_dicts_to_proto_stock_list([_to_stock_dict(dict(doc)) for doc in docs])
+
+    copy_cost = best_of(repeat, lambda: [dict(doc) for doc in docs])
+    results = {
+        "dataclass": best_of(repeat, dataclass_path),
+        "stored document": best_of(repeat, dict_path) - copy_cost,
+    }
+    for name, elapsed in results.items():
+        print(f"{name:>16}: {elapsed / rows * 1e6:6.2f} us/row ({elapsed * 1e3:.1f} ms for {rows} rows)")
+    print(f"{'speedup':>16}: {results['dataclass'] / results['stored document']:.2f}x")
+
+
+def bench_mongo(mongo_uri: str, rows: int, repeat: int) -> None:
+    client = MongoClient(mongo_uri)
+    client.drop_database(DATABASE_NAME)
+    try:
+        repo = StockRepository(client, DATABASE_NAME)
+        repo.ensure_indexes()
+        repo.collection.insert_many(build_docs(rows))
+        service = StockService(stock_usecase=None)
+
+        def stock_pages():
+            # The ListStream path, a single cursor read page by page into Stock
+            return repo.iter_pages(ListStockQuery(user_id=1, page_size=LIST_PAGE_SIZE_MAX))
+
+        def dict_pages():
+            # The List path, one query per page following next_cursor
+            cursor = None
+            while True:
+                page = repo.list_dicts(ListStockQuery(user_id=1, page_size=LIST_PAGE_SIZE_MAX, cursor=cursor))
+                yield page
+                if page.next_cursor is None:
+                    return
+                cursor = page.next_cursor
+
+        for name, pages, convert in [
+            ("dataclass", stock_pages, service._convert_to_proto_stock_list),
+            ("stored document", dict_pages, service._convert_dicts_to_proto_stock_list),
+        ]:
+            elapsed = best_of(repeat, lambda: [convert(page.stocks) for page in pages()])
+            print(f"{name:>16}: {elapsed / rows * 1e6:6.2f} us/row end to end ({elapsed * 1e3:.1f} ms)")
+    finally:
+        client.drop_database(DATABASE_NAME)
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--mongo-uri", help="also time full pages read from this server")
+    args = parser.parse_args()
+
+    bench_decode(args.rows, args.repeat)
+    if args.mongo_uri:
+        bench_mongo(args.mongo_uri, args.rows, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
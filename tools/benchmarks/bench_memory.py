@@ -0,0 +1,68 @@
+"""Bytes per Stock for the slotted domain class against the same dataclass with a per-instance __dict__.
+
+Field values are shared between instances, so only the per-object overhead is measured.
+
+    PYTHONPATH=./src uv run tools/benchmarks/bench_memory.py --count 50000
+"""
+
+import argparse
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable
+from domain.stock import Stock
+from domain.enum import ActionType, StockType
+
+# Same fields and validation as Stock, without the slots
+UnslottedStock = dataclass(
+    type(
+        "UnslottedStock",
+        (),
+        {"__annotations__": dict(Stock.__annotations__), "__post_init__": Stock.__post_init__},
+    )
+)
+
+
+def bytes_per_instance(factory: Callable[[int], object], count: int) -> float:
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        instances = [factory(i) for i in range(count)]
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    # The list holding the instances is the same size for both classes
+    return (after - before - instances.__sizeof__()) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=50000)
+    args = parser.parse_args()
+
+    created_at = datetime.now(timezone.utc)
+    ids = [f"{i:024x}" for i in range(args.count)]
+
+    def build(cls):
+        return lambda i: cls(
+            id=ids[i],
+            user_id=1,
+            symbol="AAPL",
+            price=150.0,
+            quantity=10,
+            action_type=ActionType.BUY,
+            stock_type=StockType.STOCKS,
+            created_at=created_at,
+            updated_at=created_at,
+        )
+
+    before = bytes_per_instance(build(UnslottedStock), args.count)
+    after = bytes_per_instance(build(Stock), args.count)
+    print(f"   __dict__: {before:7.1f} bytes/Stock ({before * args.count / 2**20:.1f} MiB for {args.count})")
+    print(f"    slotted: {after:7.1f} bytes/Stock ({after * args.count / 2**20:.1f} MiB for {args.count})")
+    print(f"      saved: {1 - after / before:.0%}")
+
+
+if __name__ == "__main__":
+    main()
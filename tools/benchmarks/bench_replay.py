@@ -0,0 +1,98 @@
+"""Replays a synthetic trade history into one Portfolio, with the symbol index against the former linear scans.
+
+The history buys into `--symbols` positions and keeps fully selling and re-buying some of them, the mix a batch
+replay or a long CreateBatch/CreateStream feed applies.
+
+    PYTHONPATH=./src uv run tools/benchmarks/bench_replay.py --trades 100000 --symbols 500
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+from domain.portfolio import Portfolio, Holding
+from domain.stock import CreateStock
+from domain.enum import ActionType, StockType
+
+
+def build_history(trades: int, symbols: int, seed: int) -> List[CreateStock]:
+    rng = random.Random(seed)
+    created_at = datetime.now(timezone.utc)
+    shares: Dict[str, int] = {}
+    history = []
+    for _ in range(trades):
+        symbol = f"SYM{rng.randrange(symbols)}"
+        held = shares.get(symbol, 0)
+        if held and rng.random() < 0.3:
+            # Every other sell closes the position
+            action_type, quantity = ActionType.SELL, held if rng.random() < 0.5 else rng.randint(1, held)
+        else:
+            action_type, quantity = ActionType.BUY, rng.randint(1, 20)
+        shares[symbol] = held + quantity if action_type == ActionType.BUY else held - quantity
+        history.append(
+            CreateStock(
+                user_id=1,
+                symbol=symbol,
+                price=rng.uniform(10, 500),
+                quantity=quantity,
+                action_type=action_type,
+                stock_type=StockType.STOCKS,
+                created_at=created_at,
+            )
+        )
+    return history
+
+
+def apply_trade_by_scan(portfolio: Portfolio, stock: CreateStock) -> None:
+    # Portfolio.apply_trade before the symbol index
+    amount = stock.price * stock.quantity
+    if stock.action_type == ActionType.BUY:
+        portfolio.cash_balance -= amount
+        holding = next((h for h in portfolio.holdings if h.symbol == stock.symbol), None)
+        if not holding:
+            holding = Holding(symbol=stock.symbol, shares=0, stock_type=stock.stock_type, total_cost=0.0)
+            portfolio.holdings.append(holding)
+        holding.shares += stock.quantity
+        holding.total_cost += amount
+    else:
+        holding = next((h for h in portfolio.holdings if h.symbol == stock.symbol), None)
+        portfolio.cash_balance += amount
+        holding.shares -= stock.quantity
+        if holding.shares > 0:
+            holding.total_cost -= holding.total_cost / (holding.shares + stock.quantity) * stock.quantity
+        else:
+            holding.total_cost = 0.0
+            portfolio.holdings = [h for h in portfolio.holdings if h.shares > 0]
+
+
+def replay(history: List[CreateStock], apply: Callable[[Portfolio, CreateStock], None]) -> Portfolio:
+    portfolio = Portfolio.empty(user_id=1)
+    for stock in history:
+        apply(portfolio, stock)
+    return portfolio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trades", type=int, default=100000)
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    history = build_history(args.trades, args.symbols, args.seed)
+    results = {}
+    for name, apply in [("linear scan", apply_trade_by_scan), ("symbol index", Portfolio.apply_trade)]:
+        start = time.perf_counter()
+        portfolio = replay(history, apply)
+        elapsed = time.perf_counter() - start
+        results[name] = (elapsed, portfolio)
+        print(f"{name:>14}: {elapsed:7.3f}s, {elapsed / len(history) * 1e6:6.2f} us/trade")
+
+    scanned, indexed = results["linear scan"][1], results["symbol index"][1]
+    assert {h.symbol: h.shares for h in scanned.holdings} == {h.symbol: h.shares for h in indexed.holdings}
+    print(f"{'speedup':>14}: {results['linear scan'][0] / results['symbol index'][0]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
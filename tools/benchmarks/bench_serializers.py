@@ -0,0 +1,93 @@
+"""Cost of the domain as_dict/from_dict serializers against dataclasses.asdict with custom_dict_factory.
+
+Covers what a Create writes (CreateStock and a whole Portfolio) and what a portfolio read decodes.
+
+    PYTHONPATH=./src uv run tools/benchmarks/bench_serializers.py --holdings 50
+"""
+
+import argparse
+import timeit
+from dataclasses import asdict
+from datetime import datetime, timezone
+from domain.portfolio import Portfolio, Holding
+from domain.stock import CreateStock
+from domain.enum import ActionType, StockType
+from utils.utils import custom_dict_factory
+
+
+def build_portfolio(holdings: int) -> Portfolio:
+    now = datetime.now(timezone.utc)
+    return Portfolio(
+        user_id=1,
+        cash_balance=1000.0,
+        total_money_in=50000.0,
+        holdings=[
+            Holding(symbol=f"SYM{i}", shares=10 + i, stock_type=StockType.STOCKS, total_cost=1000.0 + i)
+            for i in range(holdings)
+        ],
+        created_at=now,
+        updated_at=now,
+    )
+
+
+def decode_by_hand(data) -> Portfolio:
+    # What PortfolioRepository.get did before from_dict
+    return Portfolio(
+        user_id=data["user_id"],
+        cash_balance=data["cash_balance"],
+        total_money_in=data["total_money_in"],
+        holdings=[
+            Holding(
+                symbol=holding["symbol"],
+                shares=holding["shares"],
+                stock_type=StockType(holding["stock_type"]),
+                total_cost=holding["total_cost"],
+            )
+            for holding in data["holdings"]
+        ],
+        created_at=data["created_at"],
+        updated_at=data["updated_at"],
+    )
+
+
+def report(name: str, baseline, compiled, number: int) -> None:
+    before = min(timeit.repeat(baseline, number=number, repeat=5)) / number * 1e6
+    after = min(timeit.repeat(compiled, number=number, repeat=5)) / number * 1e6
+    print(f"{name:>24}: {before:8.2f} us -> {after:8.2f} us ({before / after:.1f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--holdings", type=int, default=20)
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    stock = CreateStock(
+        user_id=1,
+        symbol="AAPL",
+        price=150.0,
+        quantity=2,
+        action_type=ActionType.BUY,
+        stock_type=StockType.STOCKS,
+        created_at=datetime.now(timezone.utc),
+    )
+    portfolio = build_portfolio(args.holdings)
+    portfolio_dict = portfolio.as_dict()
+
+    report("CreateStock.as_dict", lambda: asdict(stock, dict_factory=custom_dict_factory), stock.as_dict, args.number)
+    report(
+        f"Portfolio.as_dict ({args.holdings})",
+        lambda: asdict(portfolio, dict_factory=custom_dict_factory),
+        portfolio.as_dict,
+        args.number,
+    )
+    report(
+        f"Portfolio.from_dict ({args.holdings})",
+        lambda: decode_by_hand(portfolio_dict),
+        lambda: Portfolio.from_dict(portfolio_dict),
+        args.number,
+    )
+
+
+if __name__ == "__main__":
+    main()
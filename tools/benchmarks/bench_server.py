@@ -0,0 +1,160 @@
+"""Load test of the threaded server against the grpc.aio one (SERVER_MODE=threaded|async).
+
+Each mode runs src/index.py as a subprocess on port 50051 with the in-memory price provider, whose
+--price-latency stands in for the upstream round trip, and a price cache short enough that most lookups go
+upstream. --concurrency clients then call GetPortfolioInfo for random seeded users for --duration seconds.
+p50/p99 latency and throughput are reported per mode.
+
+The servers write to the stock_db database of --mongo-uri. The benchmark seeds portfolios for the users from
+--first-user on and deletes them afterwards, point it at a disposable server.
+
+    PYTHONPATH=./src uv run tools/benchmarks/bench_server.py --mongo-uri mongodb://localhost:27017 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, List
+import grpc
+from pymongo import MongoClient
+import proto.stock_pb2 as stock_pb2
+import proto.stock_pb2_grpc as stock_pb2_grpc
+from adapters.portfolio import PortfolioRepository
+from domain.portfolio import Portfolio, Holding
+from domain.enum import StockType
+
+ADDRESS = "localhost:50051"
+INDEX_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "src", "index.py")
+
+
+def seed_portfolios(client: MongoClient, first_user: int, users: int, holdings: int, symbols: int, seed: int) -> None:
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    PortfolioRepository(client, "stock_db").update_many(
+        [
+            Portfolio(
+                user_id=user_id,
+                cash_balance=1000.0,
+                total_money_in=50000.0,
+                holdings=[
+                    Holding(symbol=f"SYM{i}", shares=10, stock_type=StockType.STOCKS, total_cost=1000.0)
+                    for i in rng.sample(range(symbols), holdings)
+                ],
+                created_at=now,
+                updated_at=now,
+            )
+            for user_id in range(first_user, first_user + users)
+        ]
+    )
+
+
+def cleanup(client: MongoClient, first_user: int, users: int) -> None:
+    user_ids = {"user_id": {"$gte": first_user, "$lt": first_user + users}}
+    client["stock_db"]["portfolio"].delete_many(user_ids)
+    client["stock_db"]["stocks"].delete_many(user_ids)
+
+
+def start_server(mode: str, args: argparse.Namespace) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "SERVER_MODE": mode,
+        "MONGO_URI": args.mongo_uri,
+        "PRICE_PROVIDER": "memory",
+        "PRICE_LATENCY_SECONDS": str(args.price_latency),
+        "PRICE_CACHE_TTL_SECONDS": str(args.price_cache_ttl),
+        "PRICE_REFRESH_INTERVAL_SECONDS": "0",
+        "MONGO_TRANSACTIONS": "false",
+    }
+    server = subprocess.Popen([sys.executable, INDEX_PATH], env=env)
+    with grpc.insecure_channel(ADDRESS) as channel:
+        grpc.channel_ready_future(channel).result(timeout=30)
+    return server
+
+
+def stop_server(server: subprocess.Popen) -> None:
+    server.send_signal(signal.SIGTERM)
+    try:
+        server.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        server.kill()
+        server.wait()
+
+
+async def drive(args: argparse.Namespace) -> Dict[str, float]:
+    latencies: List[float] = []
+    errors = 0
+
+    async with grpc.aio.insecure_channel(ADDRESS) as channel:
+        stub = stock_pb2_grpc.StockServiceStub(channel)
+
+        async def client(rng: random.Random, deadline: float, record: bool) -> None:
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                user_id = rng.randrange(args.first_user, args.first_user + args.users)
+                start = time.perf_counter()
+                try:
+                    await stub.GetPortfolioInfo(stock_pb2.GetPortfolioInfoReq(user_id=user_id))
+                except grpc.RpcError:
+                    if record:
+                        errors += 1
+                    continue
+                if record:
+                    latencies.append(time.perf_counter() - start)
+
+        for record, duration in ((False, args.warmup), (True, args.duration)):
+            deadline = time.perf_counter() + duration
+            await asyncio.gather(
+                *(client(random.Random(args.seed + i), deadline, record) for i in range(args.concurrency))
+            )
+
+    latencies.sort()
+    return {
+        "p50": latencies[len(latencies) // 2] * 1e3 if latencies else float("nan"),
+        "p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1e3 if latencies else float("nan"),
+        "rps": len(latencies) / args.duration,
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo-uri", required=True)
+    parser.add_argument("--modes", nargs="+", default=["threaded", "async"], choices=["threaded", "async"])
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--first-user", type=int, default=900000)
+    parser.add_argument("--holdings", type=int, default=5)
+    parser.add_argument("--symbols", type=int, default=200)
+    parser.add_argument("--price-latency", type=float, default=0.05)
+    parser.add_argument("--price-cache-ttl", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    client = MongoClient(args.mongo_uri)
+    seed_portfolios(client, args.first_user, args.users, args.holdings, args.symbols, args.seed)
+    try:
+        for mode in args.modes:
+            server = start_server(mode, args)
+            try:
+                result = asyncio.run(drive(args))
+            finally:
+                stop_server(server)
+            print(
+                f"{mode:>8}: p50 {result['p50']:7.1f} ms, p99 {result['p99']:7.1f} ms, "
+                f"{result['rps']:8.1f} req/s, {result['errors']} errors (concurrency {args.concurrency})"
+            )
+    finally:
+        cleanup(client, args.first_user, args.users)
+        client.close()
+
+
+if __name__ == "__main__":
+    main()